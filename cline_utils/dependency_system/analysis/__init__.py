@@ -10,6 +10,9 @@
 - dependency_analyzer.py: 依赖分析器，解析和分析代码依赖关系
 - dependency_suggester.py: 依赖建议器，为代码提供智能依赖建议
 - embedding_manager.py: 嵌入管理器 (v8.0)，管理 Symbol Essence Strings (SES)
+- embedding_store.py: 嵌入存储，单个内存映射矩阵文件加行索引
+- ann_index.py: 近似最近邻（IVF）索引，大型项目的语义候选检索
+- token_counter.py: 词元计数缓存与校准估算，用于嵌入与重排序规划
 - project_analyzer.py: 项目分析器，执行全项目级别的依赖分析
 - reranker_history_tracker.py: 重排序历史追踪器 (v8.0)，追踪 Qwen3 重排序历史
 - runtime_inspector.py: 运行时检查器 (v8.0)，提取运行时符号元数据
@@ -0,0 +1,289 @@
+# analysis/ann_index.py
+
+"""
+Approximate nearest-neighbour (IVF-flat) index over the embedding store.
+
+Exact semantic neighbours need every pair of files compared, which is
+quadratic in the file count. The IVF index clusters the store's vectors with
+spherical k-means into nlist inverted lists; a query scores only the members
+of the nprobe lists whose centroids are closest to it. nlist and nprobe trade
+recall for speed (recall_at_k() measures it against exact search).
+
+Only centroids and list membership are kept; vectors are read from the store's
+memmap at query time. The index is saved next to the store (ann_ivf.npz) and
+updated incrementally: entries whose content hash or mtime changed are
+reassigned to their nearest centroid, removed ones are dropped, and centroids
+are retrained once the indexed set has changed too much since training.
+"""
+
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cline_utils.dependency_system.analysis.embedding_store import EmbeddingStore
+
+logger = logging.getLogger(__name__)
+
+ANN_INDEX_FILENAME = "ann_ivf.npz"
+ANN_INDEX_VERSION = 1
+KMEANS_SAMPLE_PER_LIST = 64  # Training points per centroid
+RETRAIN_CHANGE_RATIO = 0.5  # Retrain once changes since training exceed this fraction
+
+
+def _entry_stamp(store: EmbeddingStore, norm_path: str) -> str:
+    entry = store.entries[norm_path]
+    return f"{entry.content_hash}:{entry.mtime}"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def spherical_kmeans(
+    vectors: np.ndarray, nlist: int, iterations: int, seed: int = 0
+) -> np.ndarray:
+    """Unit-norm centroids maximizing the summed cosine similarity of each vector to its centroid."""
+    rng = np.random.default_rng(seed)
+    nlist = min(nlist, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _iteration in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = np.flatnonzero(np.bincount(assignment, minlength=nlist) == 0)
+        if len(empty):
+            # Re-seed empty clusters with random points
+            sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids = _normalize_rows(sums).astype(np.float32)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file index: norm_path -> list id, with one centroid per list.
+
+    stamps records the (content hash, mtime) each path was indexed with, so
+    update() can tell which store entries changed.
+    """
+
+    def __init__(self, centroids: np.ndarray, trained_size: int = 0):
+        self.centroids = centroids.astype(np.float32)
+        self.trained_size = trained_size
+        self.changes_since_training = 0
+        self.assignments: Dict[str, int] = {}
+        self.stamps: Dict[str, str] = {}
+        self._lists: Optional[List[List[str]]] = None
+        # Per list: member paths and their store rows, valid for one store state
+        self._probe_lists: Optional[List[Tuple[List[str], np.ndarray]]] = None
+        self._probe_key: Optional[Tuple[int, object, int]] = None
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def dim(self) -> int:
+        return self.centroids.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.assignments)
+
+    # --- Building / Updating ---
+
+    @classmethod
+    def train(
+        cls,
+        store: EmbeddingStore,
+        nlist: Optional[int] = None,
+        iterations: int = 10,
+        tile_bytes: int = 64 * 1024 * 1024,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """Train centroids on a sample of the store and assign every entry."""
+        paths = sorted(store.file_paths())
+        if not paths:
+            raise ValueError("Cannot train an ANN index on an empty embedding store")
+        nlist = nlist or max(1, int(round(np.sqrt(len(paths)))))
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(paths), nlist * KMEANS_SAMPLE_PER_LIST)
+        sample = [paths[i] for i in sorted(rng.choice(len(paths), sample_size, replace=False))]
+        centroids = spherical_kmeans(
+            np.stack(store.vectors(sample)), nlist, iterations, seed
+        )
+        index = cls(centroids, trained_size=len(paths))
+        index._assign(store, paths, tile_bytes)
+        return index
+
+    def _assign(self, store: EmbeddingStore, paths: Sequence[str], tile_bytes: int) -> None:
+        rows_per_tile = max(1, tile_bytes // max(1, self.nlist * 4))
+        for start in range(0, len(paths), rows_per_tile):
+            chunk = paths[start : start + rows_per_tile]
+            lists = np.argmax(np.stack(store.vectors(chunk)) @ self.centroids.T, axis=1)
+            for norm_path, list_id in zip(chunk, lists.tolist()):
+                self.assignments[norm_path] = list_id
+                self.stamps[norm_path] = _entry_stamp(store, norm_path)
+        self._lists = None
+
+    def update(self, store: EmbeddingStore, tile_bytes: int = 64 * 1024 * 1024) -> int:
+        """
+        Reassign new or changed store entries and drop removed ones.
+        Returns the number of paths touched.
+        """
+        removed = [path for path in self.assignments if path not in store.entries]
+        for norm_path in removed:
+            del self.assignments[norm_path]
+            del self.stamps[norm_path]
+        changed = [
+            norm_path
+            for norm_path in store.file_paths()
+            if self.stamps.get(norm_path) != _entry_stamp(store, norm_path)
+        ]
+        if changed:
+            self._assign(store, changed, tile_bytes)
+        if removed:
+            self._lists = None
+        self.changes_since_training += len(removed) + len(changed)
+        return len(removed) + len(changed)
+
+    def needs_retraining(self) -> bool:
+        return self.changes_since_training > RETRAIN_CHANGE_RATIO * max(1, self.trained_size)
+
+    # --- Searching ---
+
+    def _inverted_lists(self) -> List[List[str]]:
+        if self._lists is None:
+            lists: List[List[str]] = [[] for _ in range(self.nlist)]
+            for norm_path, list_id in self.assignments.items():
+                lists[list_id].append(norm_path)
+            self._lists = lists
+            self._probe_lists = None
+        return self._lists
+
+    def _lists_for_store(self, store: EmbeddingStore) -> List[Tuple[List[str], np.ndarray]]:
+        """Member paths and store rows per list (rows move when the store is compacted)."""
+        lists = self._inverted_lists()
+        key = (id(store), store.signature, store.row_count)
+        if self._probe_lists is None or self._probe_key != key:
+            entries = store.entries
+            probe_lists = []
+            for members in lists:
+                present = [p for p in members if p in entries]
+                rows = np.fromiter((entries[p].row for p in present), dtype=np.int64, count=len(present))
+                probe_lists.append((present, rows))
+            self._probe_lists, self._probe_key = probe_lists, key
+        return self._probe_lists
+
+    def search(
+        self,
+        store: EmbeddingStore,
+        query: np.ndarray,
+        k: int,
+        nprobe: int,
+        min_score: float = 0.0,
+        exclude: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """Up to k (path, score) pairs scoring at least min_score, best first, from the nprobe closest lists."""
+        lists = self._lists_for_store(store)
+        centroid_scores = self.centroids @ query
+        nprobe = min(nprobe, self.nlist)
+        probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe].tolist()
+        candidates = [norm_path for list_id in probed for norm_path in lists[list_id][0]]
+        if not candidates:
+            return []
+        rows = np.concatenate([lists[list_id][1] for list_id in probed])
+        scores = np.clip(store.gather(rows) @ query, 0.0, 1.0)
+        excluded = store.entries.get(exclude) if exclude is not None else None
+        if excluded is not None:
+            scores[rows == excluded.row] = -1.0
+        kept = np.flatnonzero(scores >= min_score)
+        if len(kept) > k:
+            kept = kept[np.argpartition(-scores[kept], k - 1)[:k]]
+        kept = kept[np.argsort(-scores[kept], kind="stable")]
+        return [(candidates[i], float(scores[i])) for i in kept.tolist()]
+
+    # --- Persistence ---
+
+    def save(self, path: str) -> None:
+        paths = list(self.assignments)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            version=np.int32(ANN_INDEX_VERSION),
+            centroids=self.centroids,
+            trained_size=np.int64(self.trained_size),
+            changes_since_training=np.int64(self.changes_since_training),
+            paths=np.array(paths, dtype=str),
+            lists=np.array([self.assignments[p] for p in paths], dtype=np.int32),
+            stamps=np.array([self.stamps[p] for p in paths], dtype=str),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IVFIndex"]:
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != ANN_INDEX_VERSION:
+                    return None
+                index = cls(data["centroids"], int(data["trained_size"]))
+                index.changes_since_training = int(data["changes_since_training"])
+                paths = data["paths"].tolist()
+                index.assignments = dict(zip(paths, data["lists"].tolist()))
+                index.stamps = dict(zip(paths, data["stamps"].tolist()))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not load ANN index {path}: {e}")
+            return None
+        return index
+
+
+def load_or_build_ivf_index(
+    store: EmbeddingStore,
+    nlist: Optional[int] = None,
+    iterations: int = 10,
+    tile_bytes: int = 64 * 1024 * 1024,
+) -> IVFIndex:
+    """
+    Load the store's persisted IVF index and bring it up to date, or train a new one.
+    The index is retrained when its dimension or nlist no longer match, or
+    when it has changed too much since training; it is saved whenever it changes.
+    """
+    path = os.path.join(store.embeddings_dir, ANN_INDEX_FILENAME)
+    index = IVFIndex.load(path) if os.path.exists(path) else None
+    wanted_nlist = nlist or max(1, int(round(np.sqrt(len(store.file_paths())))))
+    if index is not None and (index.dim != store.dim or (nlist and index.nlist != nlist)):
+        index = None
+    touched = index.update(store, tile_bytes) if index is not None else 0
+    if index is None or index.needs_retraining():
+        index = IVFIndex.train(store, wanted_nlist, iterations, tile_bytes)
+        logger.info(f"Trained ANN index: {len(index)} vectors in {index.nlist} lists.")
+        touched = len(index)
+    if touched:
+        index.save(path)
+    return index
+
+
+def recall_at_k(
+    store: EmbeddingStore,
+    index: IVFIndex,
+    k: int,
+    nprobe: int,
+    sample_paths: Sequence[str],
+) -> float:
+    """Fraction of the exact top-k neighbours of sample_paths that the index returns."""
+    paths = list(index.assignments)
+    matrix = np.stack(store.vectors(paths))
+    position = {norm_path: i for i, norm_path in enumerate(paths)}
+    found = total = 0
+    for norm_path in sample_paths:
+        query = store.get(norm_path)
+        scores = np.clip(matrix @ query, 0.0, 1.0)
+        scores[position[norm_path]] = -1.0
+        exact = np.argpartition(-scores, k - 1)[:k]
+        exact_paths = {paths[i] for i in exact.tolist()}
+        approx = {p for p, _ in index.search(store, query, k, nprobe, exclude=norm_path)}
+        found += len(exact_paths & approx)
+        total += len(exact_paths)
+    return found / max(1, total)
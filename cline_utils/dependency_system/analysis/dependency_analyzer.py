@@ -47,17 +47,17 @@ from cline_utils.dependency_system.utils.cache_manager import (
     cached,
     invalidate_dependent_entries,
 )
+from cline_utils.dependency_system.utils.batch_processor import (
+    OperationCancelledError,
+    check_cancelled,
+)
 from cline_utils.dependency_system.utils.config_manager import ConfigManager
 
 # Import only from utils, core, and io layers
 from cline_utils.dependency_system.utils.path_utils import (
     get_file_type as util_get_file_type,
 )
-from cline_utils.dependency_system.utils.path_utils import (
-    get_project_root,
-    is_subpath,
-    normalize_path,
-)
+from cline_utils.dependency_system.utils.path_utils import normalize_path
 
 logger = logging.getLogger(__name__)
 
@@ -333,25 +333,12 @@ def analyze_file(file_path: str, force: bool = False) -> Dict[str, Any]:
         return {"error": "File not found or not a file", "file_path": norm_file_path}
 
     config_manager = ConfigManager()
-    project_root = get_project_root()
-    excluded_dirs_rel = config_manager.get_excluded_dirs()
-    # get_excluded_paths() from config_manager now returns a list of absolute normalized paths
-    # including resolved file patterns.
-    all_excluded_paths_abs = set(config_manager.get_excluded_paths())  # Fetch once
-    excluded_extensions = set(config_manager.get_excluded_extensions())
-
-    # Check against pre-normalized absolute excluded paths
-    if (
-        norm_file_path in all_excluded_paths_abs
-        or any(
-            is_subpath(norm_file_path, excluded_dir_abs)
-            for excluded_dir_abs in {
-                normalize_path(os.path.join(project_root, p)) for p in excluded_dirs_rel
-            }
-        )
-        or os.path.splitext(norm_file_path)[1].lower() in excluded_extensions
-        or os.path.basename(norm_file_path).endswith("_module.md")
-    ):  # Check tracker file name pattern
+    path_filter = config_manager.get_path_filter()
+
+    # Excluded paths, dir names, file patterns and extensions in one compiled check
+    if path_filter.is_excluded(norm_file_path) or os.path.basename(
+        norm_file_path
+    ).endswith("_module.md"):  # Check tracker file name pattern
         logger.debug(f"Skipping analysis of excluded/tracker file: {norm_file_path}")
         return {
             "skipped": True,
@@ -431,6 +418,7 @@ def analyze_file(file_path: str, force: bool = False) -> Dict[str, Any]:
                 "file_path": norm_file_path,
             }
 
+        check_cancelled()  # Bail out early if this item already timed out
         if file_type == "py":
             _analyze_python_file(norm_file_path, content, analysis_result)
             # --- FIX (MAJOR): Do not pop the AST. Keep it in the result for explicit passing. ---
@@ -506,6 +494,8 @@ def analyze_file(file_path: str, force: bool = False) -> Dict[str, Any]:
                 ts_ast_cache = cache_manager.get_cache("ts_ast_cache")
                 ts_ast_cache.set(norm_file_path, ts_tree_object)
 
+        check_cancelled()
+
         # --- ADDED: Consolidate all fields (Global) ---
         # Define grouping keys for each field
         consolidation_map = {
@@ -596,6 +586,8 @@ def analyze_file(file_path: str, force: bool = False) -> Dict[str, Any]:
         return (
             analysis_result  # This result no longer contains _ast_tree for Python files
         )
+    except OperationCancelledError:
+        raise  # Timed out / cancelled: let the batch processor record it
     except Exception as e:
         logger.exception(f"Unexpected error analyzing {norm_file_path}: {e}")
         return {
@@ -1772,11 +1764,12 @@ def _analyze_javascript_file_regex_fallback(
     import_matches = JAVASCRIPT_IMPORT_PATTERN.finditer(content)
     # Ensure imports are not duplicated if fallback is called after partial AST analysis
     existing_imports = set(d["path"] for d in result.get("imports", []))
-    new_imports = [
-        m.group(1) or m.group(2) or m.group(3)
-        for m in import_matches
-        if m and (m.group(1) or m.group(2) or m.group(3))
-    ]
+    new_imports = []
+    for m in import_matches:
+        # Poll between matches so a pathological input can be abandoned on timeout
+        check_cancelled()
+        if m and (m.group(1) or m.group(2) or m.group(3)):
+            new_imports.append(m.group(1) or m.group(2) or m.group(3))
     for imp in new_imports:
         if imp not in existing_imports:
             result["imports"].append(
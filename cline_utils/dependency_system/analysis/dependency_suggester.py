@@ -28,12 +28,16 @@ import logging
 from cline_utils.dependency_system.core import key_manager
 
 # Import only from lower-level modules
-from cline_utils.dependency_system.core.key_manager import KeyInfo
+from cline_utils.dependency_system.core.key_manager import KeyInfo, as_global_key_map
 from cline_utils.dependency_system.utils.cache_manager import (
     cache_manager,
     cached,
     clear_all_caches,
 )
+from cline_utils.dependency_system.utils.batch_processor import (
+    OperationCancelledError,
+    check_cancelled,
+)
 from cline_utils.dependency_system.utils.config_manager import ConfigManager
 from cline_utils.dependency_system.utils.path_utils import get_file_type, normalize_path
 
@@ -1483,6 +1487,8 @@ def suggest_semantic_dependencies_path_based(
         )
         return []
 
+    # Indexed map: calculate_similarity resolves both keys in O(1) per candidate
+    path_to_key_info = as_global_key_map(path_to_key_info)
     source_key_info = path_to_key_info.get(file_path)
     if not source_key_info or source_key_info.is_directory:
         return []  # Only for files
@@ -1506,6 +1512,7 @@ def suggest_semantic_dependencies_path_based(
         from .embedding_manager import (  # Local import to avoid top-level circularity
             calculate_similarity,
             generate_symbol_essence_string,
+            get_similarity_index,
             preprocess_doc_structure,
         )
     except ImportError:
@@ -1521,30 +1528,48 @@ def suggest_semantic_dependencies_path_based(
     # Collect all candidates first for potential reranking
     candidates_with_similarity: List[Tuple[KeyInfo, float]] = []
 
-    for target_ki in target_key_infos_list:
-        try:
-            # calculate_similarity expects key strings (canonical global ones)
-            confidence = calculate_similarity(
-                source_key_info.key_string,
-                target_ki.key_string,
-                embeddings_dir_abs,
-                path_to_key_info,
-                project_root,
-                code_roots_rel_list,
-                doc_roots_rel_list,
-            )
-        except Exception as e_sim_calc:
-            confidence = 0.0
-            logger.warning(
-                f"Similarity calculation error between '{source_key_info.key_string}' and '{target_ki.key_string}': {e_sim_calc}",
-                exc_info=False,
-            )
+    # Use half threshold to catch potential candidates
+    min_confidence = threshold * 0.5
+    try:
+        # Top-k neighbours: one blocked E @ E.T for the project, or an IVF index for large ones
+        similarity_index = get_similarity_index(
+            embeddings_dir_abs, path_to_key_info, project_root, min_confidence
+        )
+    except Exception as e_index:
+        similarity_index = None
+        logger.warning(
+            f"Similarity index unavailable, comparing pairwise: {e_index}", exc_info=False
+        )
 
-        # Only collect candidates that meet minimum threshold for potential reranking
-        if (
-            confidence >= threshold * 0.5
-        ):  # Use half threshold to catch potential candidates
-            candidates_with_similarity.append((target_ki, confidence))
+    if similarity_index is not None:
+        check_cancelled()
+        for target_path, confidence in similarity_index.neighbours(file_path):
+            if confidence >= min_confidence:
+                candidates_with_similarity.append((path_to_key_info[target_path], confidence))
+    else:
+        for target_ki in target_key_infos_list:
+            check_cancelled()  # Stop scanning candidates once this item has timed out
+            try:
+                # calculate_similarity expects key strings (canonical global ones)
+                confidence = calculate_similarity(
+                    source_key_info.key_string,
+                    target_ki.key_string,
+                    embeddings_dir_abs,
+                    path_to_key_info,
+                    project_root,
+                    code_roots_rel_list,
+                    doc_roots_rel_list,
+                )
+            except Exception as e_sim_calc:
+                confidence = 0.0
+                logger.warning(
+                    f"Similarity calculation error between '{source_key_info.key_string}' and '{target_ki.key_string}': {e_sim_calc}",
+                    exc_info=False,
+                )
+
+            # Only collect candidates that meet minimum threshold for potential reranking
+            if confidence >= min_confidence:
+                candidates_with_similarity.append((target_ki, confidence))
 
     # This variable will hold the results from either reranking or the fallback logic
     initial_suggestions = []
@@ -1855,6 +1880,8 @@ def suggest_semantic_dependencies_path_based(
             logger.debug(
                 f"Reranking not available ({e}), using original similarity scores"
             )
+        except OperationCancelledError:
+            raise
         except Exception as e:
             logger.warning(f"Reranking error, using original similarity scores: {e}")
 
@@ -5,13 +5,17 @@ Module for managing embeddings generation and similarity calculations using cont
 Handles embedding creation from project files using Symbol Essence Strings (SES) derived from
 the project symbol map, and calculates cosine similarity between embeddings.
 """
+import hashlib
 import json
 import logging
 import os
+import queue
+import re
 import sys
 import threading
+import time
 import urllib.request
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 import numpy as np
 import torch
@@ -30,7 +34,26 @@ except ImportError:
     llama_cpp = None
 
 import cline_utils.dependency_system.core.key_manager as key_manager_module
-from cline_utils.dependency_system.core.key_manager import KeyInfo
+from cline_utils.dependency_system.analysis.ann_index import (
+    IVFIndex,
+    load_or_build_ivf_index,
+)
+from cline_utils.dependency_system.analysis.embedding_store import (
+    STORE_METADATA_FILENAME,
+    EmbeddingStore,
+    QuantizedRows,
+    chunk_entry_path,
+    chunk_owner,
+    open_embedding_store,
+)
+from cline_utils.dependency_system.analysis.token_counter import (
+    TOKENIZER_LOCK,
+    TokenCounter,
+    get_token_counter,
+    save_token_counters,
+)
+from cline_utils.dependency_system.core.key_manager import KeyInfo, as_global_key_map
+from cline_utils.dependency_system.utils.batch_processor import check_cancelled
 from cline_utils.dependency_system.utils.cache_manager import cache_manager, cached
 from cline_utils.dependency_system.utils.config_manager import ConfigManager
 from cline_utils.dependency_system.utils.path_utils import (
@@ -38,6 +61,7 @@ from cline_utils.dependency_system.utils.path_utils import (
     normalize_path,
 )
 from cline_utils.dependency_system.utils.phase_tracker import PhaseTracker
+from cline_utils.dependency_system.utils.project_inventory import ProjectInventory
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +101,17 @@ MODEL_CONFIGS = {
 
 # Maximum safe context length to prevent OOM/crashes
 MAX_CONTEXT_LENGTH = 32768
+MIN_CONTEXT_LENGTH = 8192  # Smallest context bucket
+CONTEXT_MARGIN_TOKENS = 512  # Headroom over the text's token count
+CHUNK_SEPARATOR = "\x1e"  # Joins a file's chunks for its content hash
+# Lines a chunk may start at: headings, SES sections and members, top-level definitions
+CHUNK_BOUNDARY_PATTERN = re.compile(
+    r"^(?:#{1,6}\s"
+    r"|(?:CLASS|FUNCTIONS|CALLS|CALLED_BY):"
+    r"|  (?!BASES|DECORATORS|DOC)\S"
+    r"|(?:export\s+)?(?:async\s+)?(?:def|class|function|interface|struct|enum|impl|fn|func)\b)"
+)
+MAX_EMBEDDING_FILE_SIZE = 10 * 1024 * 1024  # Larger source files are not embedded
 SIM_CACHE_MAXSIZE = 100_000
 SIM_CACHE_TTL_SEC = 7 * 24 * 60 * 60  # 7 days
 SIM_CACHE_NEGATIVE_RESULTS = True
@@ -410,8 +445,137 @@ def _count_tokens(text: str, tokenizer: Any = None) -> int:
     return len(text) // 4
 
 
-def _load_model(n_ctx: int = 8192):
-    """Loads the embedding model based on hardware capabilities."""
+def _context_bucket(token_count: int) -> int:
+    """
+    Context length to embed a text of token_count tokens with: the next power
+    of two holding the tokens plus a margin, between MIN_CONTEXT_LENGTH and
+    MAX_CONTEXT_LENGTH. Few distinct buckets mean few GGUF model reloads.
+    """
+    needed = max(token_count + CONTEXT_MARGIN_TOKENS, MIN_CONTEXT_LENGTH)
+    return min(1 << (needed - 1).bit_length(), MAX_CONTEXT_LENGTH)
+
+
+def _planning_boundaries(chunk_tokens: int = 0) -> List[int]:
+    """
+    Token counts at which a text's plan changes (its count compared with "> b"):
+    the last count of each context bucket, the truncation limit and chunk_tokens.
+    """
+    boundaries = []
+    size = MIN_CONTEXT_LENGTH
+    while size <= MAX_CONTEXT_LENGTH:
+        boundaries.append(size - CONTEXT_MARGIN_TOKENS)
+        size *= 2
+    if chunk_tokens:
+        boundaries.append(chunk_tokens)
+    return boundaries
+
+
+def _embeddings_dir(project_root: str) -> str:
+    """The configured embeddings directory, made absolute against project_root."""
+    embeddings_dir = ConfigManager().get_path(
+        "embeddings_dir", "cline_utils/dependency_system/analysis/embeddings"
+    )
+    if not os.path.isabs(embeddings_dir):
+        embeddings_dir = os.path.join(project_root, embeddings_dir)
+    return embeddings_dir
+
+
+def _truncate_to_context(text: str, token_count: int, tokenizer: Any = None) -> Tuple[str, int]:
+    """
+    Deterministically cut a text that does not fit MAX_CONTEXT_LENGTH to its
+    leading tokens (or leading characters without a tokenizer).
+    Returns the text and its token count.
+    """
+    limit = MAX_CONTEXT_LENGTH - CONTEXT_MARGIN_TOKENS
+    if token_count <= limit:
+        return text, token_count
+    if tokenizer is not None:
+        try:
+            token_ids = tokenizer.encode(text, add_special_tokens=False)[:limit]
+            return tokenizer.decode(token_ids), limit
+        except Exception:
+            pass
+    return text[: limit * 4], limit
+
+
+def _embedding_content_hash(text: str, model_name: str, n_ctx: int) -> str:
+    """Hash of everything an embedding depends on: the exact text, the model and the context length."""
+    digest = hashlib.sha256(f"{model_name}\0{n_ctx}\0".encode("utf-8"))
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _gguf_thread_count() -> int:
+    """llama.cpp thread count: the configured gguf_n_threads, else the physical core count."""
+    configured = ConfigManager().get_embedding_setting("gguf_n_threads", None)
+    if configured:
+        return max(1, int(configured))
+    try:
+        import psutil
+
+        physical = psutil.cpu_count(logical=False)
+    except ImportError:
+        physical = None
+    return physical or os.cpu_count() or 1
+
+
+def split_into_chunks(text: str, max_tokens: int, tokenizer: Any = None) -> List[str]:
+    """
+    Split text into windows of at most max_tokens tokens, cutting at heading or
+    symbol boundaries (CHUNK_BOUNDARY_PATTERN). Sections are packed greedily; a
+    section larger than a window is split by lines, and a line by characters.
+    Windows after the first repeat the text's "[FILE: ...]" header line.
+    """
+    lines = text.splitlines(keepends=True)
+    header = lines[0] if lines and lines[0].startswith("[FILE:") else ""
+    sections: List[List[str]] = []
+    for line in lines:
+        if not sections or CHUNK_BOUNDARY_PATTERN.match(line):
+            sections.append([line])
+        else:
+            sections[-1].append(line)
+
+    budget = max(1, max_tokens - _count_tokens(header, tokenizer))
+    pieces: List[Tuple[str, int]] = []
+    for section in sections:
+        section_text = "".join(section)
+        tokens = _count_tokens(section_text, tokenizer)
+        if tokens <= budget:
+            pieces.append((section_text, tokens))
+            continue
+        for line in section:
+            tokens = _count_tokens(line, tokenizer)
+            if tokens <= budget:
+                pieces.append((line, tokens))
+                continue
+            width = max(1, len(line) * budget // tokens)
+            pieces.extend(
+                (line[start : start + width], budget)
+                for start in range(0, len(line), width)
+            )
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece, tokens in pieces:
+        if current and current_tokens + tokens > budget:
+            chunks.append("".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(current))
+    return [
+        chunk if i == 0 or not header or chunk.startswith(header) else header + chunk
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def _load_model(n_ctx: int = 8192, n_threads: Optional[int] = None):
+    """
+    Loads the embedding model based on hardware capabilities.
+    n_threads overrides the GGUF thread count (see _gguf_thread_count()).
+    """
     global MODEL_INSTANCE, SELECTED_MODEL_CONFIG
 
     if MODEL_INSTANCE is not None:
@@ -482,12 +646,16 @@ def _load_model(n_ctx: int = 8192):
 
                 llama_cpp.llama_log_set(_C_LOG_CALLBACK_REF, ctypes.c_void_p())
 
+                # n_batch = n_ctx: embed() truncates each text to n_batch tokens
+                # and packs as many texts as fit into one n_batch decode
+                threads = n_threads or _gguf_thread_count()
                 MODEL_INSTANCE = Llama(
                     model_path=SELECTED_MODEL_CONFIG["path"],
                     embedding=True,
                     n_ctx=n_ctx,
-                    n_batch=512,
-                    n_threads=os.cpu_count(),  # Adjust based on CPU
+                    n_batch=n_ctx,
+                    n_threads=threads,
+                    n_threads_batch=threads,
                     n_gpu_layers=n_gpu_layers,
                     use_mmap=True,
                     use_mlock=False,
@@ -495,7 +663,8 @@ def _load_model(n_ctx: int = 8192):
                     verbose=False,
                 )
                 logger.debug(
-                    f"Loaded GGUF model: {SELECTED_MODEL_CONFIG['name']} on device: {device}"
+                    f"Loaded GGUF model: {SELECTED_MODEL_CONFIG['name']} on device: {device} "
+                    f"(n_ctx={n_ctx}, n_threads={threads})"
                 )
 
             elif SELECTED_MODEL_CONFIG["type"] == "sentence-transformer":
@@ -837,6 +1006,7 @@ RERANKING_COUNTER: int = 0
 TOTAL_FILES_TO_RERANK: int = 0
 
 # Qwen3 Reranker Configuration
+RERANKER_MAX_LENGTH = 32000  # Token cap per prompt, to bound memory
 RERANKER_REPO_ID = "ManiKumarAdapala/Qwen3-Reranker-0.6B-Q8_0-Safetensors"
 RERANKER_FILES = [
     "model.safetensors",
@@ -1050,8 +1220,9 @@ def _load_reranker_model():
 
 
 def unload_reranker_model():
-    """Unloads reranker model to free memory."""
+    """Unloads reranker model to free memory (and saves the token counts it cached)."""
     global RERANKER_MODEL, RERANKER_TOKENIZER
+    save_token_counters()
     RERANKER_MODEL = None
     RERANKER_TOKENIZER = None
     if torch.cuda.is_available():
@@ -1160,6 +1331,8 @@ def rerank_candidates_with_qwen3(
     Rerank candidate texts using Qwen3 reranker model.
     Implements official Qwen3-Reranker-0.6B format from HuggingFace with special token handling.
     Optimizes throughput by sorting candidates by length and using dynamic batch sizing.
+    Lengths for planning come from the shared token counter (cached or estimated
+    document counts plus the prompt template's); each batch is tokenized when it runs.
     """
     tokenizer, model = _load_reranker_model()
 
@@ -1189,33 +1362,24 @@ def rerank_candidates_with_qwen3(
 
     device = next(model.parameters()).device.type  # 'cuda', 'cpu', 'mps'
 
-    # 1. Prepare and Tokenize All Candidates
-    # We tokenize everything upfront to get accurate lengths for sorting and batching.
+    # 1. Prepare All Candidates
+    # Planned lengths: the template with the query, counted once, plus each
+    # document's cached or estimated count. Nothing is tokenized up front.
+    head = f"{prefix}<Instruct>: {instruction}\n<Query>: {query_text}\n<Document>: "
+    token_counter = get_token_counter(tokenizer, _embeddings_dir(get_project_root()))
+    template_length = token_counter.count(head + suffix)
     full_prompts_data = []
     for i, doc in enumerate(candidate_texts):
-        prompt = f"{prefix}<Instruct>: {instruction}\n<Query>: {query_text}\n<Document>: {doc}{suffix}"
-        full_prompts_data.append({"index": i, "text": prompt})
-
-    try:
-        # Tokenize without padding first to get raw lengths
-        # We use a large max_length here to avoid premature truncation, but clamp to model max if needed.
-        # Qwen3 typically handles 32k, but let's use a reasonable upper bound.
-        all_inputs = tokenizer(
-            [p["text"] for p in full_prompts_data],
-            padding=False,
-            truncation=True,
-            max_length=32000,  # Hard cap to prevent insane memory usage
-            add_special_tokens=False,  # We added them manually in the prompt string
+        full_prompts_data.append(
+            {
+                "index": i,
+                "text": f"{head}{doc}{suffix}",
+                "length": min(
+                    RERANKER_MAX_LENGTH, template_length + token_counter.estimate(doc)
+                ),
+            }
         )
 
-        for i, input_ids in enumerate(all_inputs["input_ids"]):
-            full_prompts_data[i]["input_ids"] = input_ids
-            full_prompts_data[i]["length"] = len(input_ids)
-
-    except Exception as e:
-        logger.error(f"Tokenization failed: {e}")
-        return []
-
     # 2. Sort by Length (Ascending)
     # This groups short items together (large batches) and long items together (small batches).
     sorted_items = sorted(full_prompts_data, key=lambda x: x["length"])
@@ -1226,6 +1390,9 @@ def rerank_candidates_with_qwen3(
 
     # 3. Process in Dynamic Batches
     while start_idx < total_candidates:
+        # Give up between batches if the calling batch item has timed out
+        check_cancelled()
+
         # CRITICAL: Re-poll available memory before each batch calculation
         # This ensures we get accurate, real-time values after previous batches free memory
         if device == "cuda":
@@ -1261,6 +1428,15 @@ def rerank_candidates_with_qwen3(
         batch_items = sorted_items[start_idx:end_idx]
 
         try:
+            # Tokenize this batch only; truncation caps runaway documents
+            batch_inputs = tokenizer(
+                [item["text"] for item in batch_items],
+                padding=False,
+                truncation=True,
+                max_length=RERANKER_MAX_LENGTH,
+                add_special_tokens=False,  # We added them manually in the prompt string
+            )
+
             # Clear cache before allocation to reduce fragmentation
             if device == "cuda":
                 torch.cuda.empty_cache()
@@ -1270,10 +1446,10 @@ def rerank_candidates_with_qwen3(
                 # We manually pad using tokenizer.pad which handles the list of dicts
                 batch_inputs_list = [
                     {
-                        "input_ids": item["input_ids"],
-                        "attention_mask": [1] * len(item["input_ids"]),
+                        "input_ids": input_ids,
+                        "attention_mask": [1] * len(input_ids),
                     }
-                    for item in batch_items
+                    for input_ids in batch_inputs["input_ids"]
                 ]
 
                 # Pad to the longest in THIS batch
@@ -1336,10 +1512,13 @@ def generate_embeddings(
     force: bool = False,
     batch_size: Optional[int] = None,
     symbol_map: Optional[Dict[str, Any]] = None,
+    inventory: Optional[ProjectInventory] = None,
 ) -> bool:
     """
     Generates embeddings for project files.
     Uses SES (Symbol Essence Strings) derived from symbol_map where available.
+    If a ProjectInventory is passed, source exclusion, size and mtime checks use
+    its snapshot instead of stat-ing each file again.
     """
     if not project_paths or not path_to_key_info:
         logger.error("No project paths or key info provided.")
@@ -1347,41 +1526,53 @@ def generate_embeddings(
 
     config_manager = ConfigManager()
     project_root = get_project_root()
-    embeddings_dir = config_manager.get_path(
-        "embeddings_dir", "cline_utils/dependency_system/analysis/embeddings"
-    )
-    if not os.path.isabs(embeddings_dir):
-        embeddings_dir = os.path.join(project_root, embeddings_dir)
+    embeddings_dir = _embeddings_dir(project_root)
     os.makedirs(embeddings_dir, exist_ok=True)
+    # One memory-mapped matrix for all files (migrates the old per-file .npy layout)
+    store = open_embedding_store(
+        embeddings_dir,
+        project_root,
+        config_manager.get_embedding_setting("store_dtype", "float32"),
+    )
 
     # 1. Load Symbol Map (if not provided)
     if symbol_map is None:
         symbol_map = _load_project_symbol_map()
 
     # 2. Identification Phase
+    # Files embedded by another model are stale even if unchanged (entries
+    # migrated without a recorded model are kept)
+    model_name = _select_best_model()["name"]
     files_to_process: List[KeyInfo] = []
 
     for key_info in path_to_key_info.values():
         if key_info.is_directory:
             continue
 
-        if not _is_valid_file(key_info.norm_path):
+        entry = inventory.get(key_info.norm_path) if inventory is not None else None
+        if entry is not None:
+            if entry.excluded or entry.size > MAX_EMBEDDING_FILE_SIZE:
+                continue
+        elif not _is_valid_file(key_info.norm_path):
             continue
 
-        # Calculate where the embedding should be
-        rel_path = os.path.relpath(key_info.norm_path, project_root)
-        embedding_path = os.path.join(embeddings_dir, rel_path) + ".npy"
+        stored = store.get_entry(key_info.norm_path)
 
         should_process = False
         if force:
             should_process = True
-        elif not os.path.exists(embedding_path):
+        elif stored is None:
+            should_process = True
+        elif stored.model is not None and stored.model != model_name:
             should_process = True
         else:
             try:
-                src_mtime = os.path.getmtime(key_info.norm_path)
-                emb_mtime = os.path.getmtime(embedding_path)
-                if src_mtime > emb_mtime:
+                src_mtime = (
+                    entry.mtime
+                    if entry is not None
+                    else os.path.getmtime(key_info.norm_path)
+                )
+                if src_mtime > stored.mtime:
                     should_process = True
             except OSError:
                 should_process = True
@@ -1390,6 +1581,7 @@ def generate_embeddings(
             files_to_process.append(key_info)
 
     if not files_to_process:
+        _sync_store_entries(store, path_to_key_info)
         logger.info("All embeddings are up to date.")
         return True
 
@@ -1398,191 +1590,601 @@ def generate_embeddings(
     )
 
     # 3. Processing Phase
-    logger.info(
-        f"Generating embeddings for {len(files_to_process)} files using Symbol Essence..."
-    )
-
-    # 3. Processing Phase
-    # Pre-calculate token counts and sort to optimize model loading
+    # Pre-calculate token counts and sort to optimize model loading. Counts are
+    # cached across runs and estimated away from bucket boundaries
     tokenizer = _get_tokenizer()
     if tokenizer is None:
         logger.warning("Tokenizer not found. Using character-based token estimation.")
+    token_counter = get_token_counter(tokenizer, embeddings_dir)
+
+    # The stored content hash decides staleness: a touched file whose text is
+    # unchanged is not re-embedded, and identical texts share one inference
+    dedup = _TextDeduplicator(store, model_name, force)
+
+    chunk_tokens = int(config_manager.get_embedding_setting("chunk_tokens", 0) or 0)
+
+    def prepare(key_info: KeyInfo) -> Optional[Dict[str, Any]]:
+        return _prepare_embedding_text(
+            key_info,
+            project_root,
+            symbol_map,
+            tokenizer,
+            model_name,
+            inventory,
+            chunk_tokens,
+            token_counter,
+        )
 
-    processing_queue = []
+    # Determine batch size
+    effective_batch_size = batch_size or (64 if SELECTED_DEVICE == "cuda" else 16)
 
-    with PhaseTracker(
-        total=len(files_to_process), phase_name="Preparing Embeddings"
-    ) as prep_tracker:
-        for key_info in files_to_process:
-            file_path = key_info.norm_path
-            rel_path = os.path.relpath(file_path, project_root)
-            prep_tracker.set_description(f"Reading {os.path.basename(rel_path)}")
-            text_to_embed = ""
-
-            # Strategy: Symbol Map -> Doc Structure -> Raw Fallback
-            if file_path in symbol_map:
-                text_to_embed = generate_symbol_essence_string(
-                    file_path, symbol_map[file_path], symbol_map=symbol_map
+    workers = config_manager.get_embedding_setting("pipeline_workers", 2)
+    if workers:
+        ok = _embed_pipelined(
+            files_to_process, prepare, dedup, effective_batch_size, int(workers)
+        )
+    else:
+        ok = _embed_sequential(files_to_process, prepare, dedup, effective_batch_size)
+    token_counter.save()
+    logger.debug(f"Token counts: {token_counter.stats()}.")
+    logger.info(
+        f"Embedded {dedup.embedded} unique texts; {dedup.skipped_unchanged} unchanged "
+        f"and {dedup.reused + dedup.duplicates} duplicate texts needed no inference."
+    )
+    if not ok:
+        logger.error(
+            "Some embeddings could not be generated; those files are retried on the next run."
+        )
+
+    # Tombstone removed files, refresh keys and write the row index (also
+    # after a failure, so the files that were embedded are not redone)
+    _sync_store_entries(store, path_to_key_info)
+
+    try:
+        # Invalidate similarity cache as embeddings have changed
+        cache_manager.get_cache("similarity_calculation").invalidate(".*")
+        logger.debug(
+            "Invalidated similarity_calculation cache after embedding generation."
+        )
+    except Exception as e:
+        logger.warning(f"Failed to invalidate similarity cache: {e}")
+    invalidate_similarity_index()
+
+    _unload_model()
+    return ok
+
+
+def _prepare_or_skip(
+    prepare: Callable[[KeyInfo], Optional[Dict[str, Any]]], key_info: KeyInfo
+) -> Optional[Dict[str, Any]]:
+    """prepare(key_info), or None (the file is skipped) if it raises."""
+    try:
+        return prepare(key_info)
+    except Exception as e:
+        logger.error(f"Failed to prepare {key_info.norm_path} for embedding: {e}")
+        return None
+
+
+def _prepare_embedding_text(
+    key_info: KeyInfo,
+    project_root: str,
+    symbol_map: Dict[str, Any],
+    tokenizer: Any,
+    model_name: str,
+    inventory: Optional[ProjectInventory] = None,
+    chunk_tokens: int = 0,
+    token_counter: Optional[TokenCounter] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Build the text to embed for one file (SES, doc structure or raw content),
+    count its tokens (through token_counter: exact only near a planning
+    boundary), pick its context bucket and hash it.
+    With chunk_tokens set, the text is not truncated; one longer than
+    chunk_tokens is split into "chunks" embedded separately.
+    Returns None when the file cannot be read or yields no text.
+    """
+    file_path = key_info.norm_path
+    rel_path = os.path.relpath(file_path, project_root)
+    text_to_embed = ""
+
+    # Strategy: Symbol Map -> Doc Structure -> Raw Fallback
+    if file_path in symbol_map:
+        text_to_embed = generate_symbol_essence_string(
+            file_path,
+            symbol_map[file_path],
+            symbol_map=symbol_map,
+            **({"max_chars": MAX_EMBEDDING_FILE_SIZE} if chunk_tokens else {}),
+        )
+    else:
+        # Not in symbol map (e.g. documentation, config files, or analysis skipped)
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                content = f.read()
+
+            ext = os.path.splitext(file_path)[1].lower()
+            if ext in [".md", ".txt", ".rst"]:
+                text_to_embed = (
+                    content if chunk_tokens else preprocess_doc_structure(content)
                 )
             else:
-                # Not in symbol map (e.g. documentation, config files, or analysis skipped)
-                try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        content = f.read()
+                # Raw fallback for unknown types
+                text_to_embed = (
+                    f"[FILE: {rel_path}]\n{content if chunk_tokens else content[:32000]}"
+                )
+        except Exception as e:
+            logger.error(f"Failed to read {file_path}: {e}")
+            return None
+
+    if not text_to_embed.strip():
+        return None
+
+    # Count tokens; long texts are chunked, or cut to the largest context
+    chunks: Optional[List[str]] = None
+    if token_counter is None:
+        token_counter = TokenCounter(tokenizer)
+    token_count = token_counter.plan(text_to_embed, _planning_boundaries(chunk_tokens))
+    if chunk_tokens and token_count > chunk_tokens:
+        with TOKENIZER_LOCK:
+            chunks = split_into_chunks(text_to_embed, chunk_tokens, tokenizer)
+    elif token_count > MAX_CONTEXT_LENGTH - CONTEXT_MARGIN_TOKENS:
+        logger.warning(
+            f"{rel_path}: {token_count} tokens exceed the {MAX_CONTEXT_LENGTH} context; truncating."
+        )
+        with TOKENIZER_LOCK:
+            text_to_embed, token_count = _truncate_to_context(
+                text_to_embed, token_count, tokenizer
+            )
+    n_ctx = _context_bucket(chunk_tokens if chunks else token_count)
 
-                    ext = os.path.splitext(file_path)[1].lower()
-                    if ext in [".md", ".txt", ".rst"]:
-                        text_to_embed = preprocess_doc_structure(content)
-                    else:
-                        # Raw fallback for unknown types
-                        text_to_embed = (
-                            f"[FILE: {rel_path}]\n{content[:32000]}"  # Increased limit
-                        )
-                except Exception as e:
-                    logger.error(f"Failed to read {file_path}: {e}")
-                    prep_tracker.update()
-                    continue
+    entry = inventory.get(file_path) if inventory is not None else None
+    try:
+        src_mtime = entry.mtime if entry is not None else os.path.getmtime(file_path)
+    except OSError:
+        src_mtime = 0.0
+
+    return {
+        "targets": [{"key_info": key_info, "mtime": src_mtime}],
+        "text": text_to_embed,
+        "chunks": chunks,
+        "tokens": token_count,
+        "n_ctx": n_ctx,
+        "rel_path": rel_path,
+        "content_hash": _embedding_content_hash(
+            CHUNK_SEPARATOR.join(chunks) if chunks else text_to_embed, model_name, n_ctx
+        ),
+    }
 
-            if not text_to_embed.strip():
-                prep_tracker.update()
-                continue
 
-            # Count tokens
-            token_count = _count_tokens(text_to_embed, tokenizer)
+def _item_texts(item: Dict[str, Any]) -> List[str]:
+    """The texts one prepared item sends to the model: its chunks, or its whole text."""
+    return item["chunks"] or [item["text"]]
 
-            processing_queue.append(
-                {
-                    "key_info": key_info,
-                    "text": text_to_embed,
-                    "tokens": token_count,
-                    "rel_path": rel_path,
-                }
-            )
+
+class _TextDeduplicator:
+    """
+    Decides which prepared texts need inference and writes the results.
+
+    A file whose stored content hash matches is only touched; a text already
+    pending gains the file as another target; a text stored for another file
+    is copied. All store access goes through the lock, so preparation,
+    inference and writing may run on different threads.
+    """
+
+    def __init__(self, store: EmbeddingStore, model_name: str, force: bool = False):
+        self.store = store
+        self.model_name = model_name
+        self.force = force
+        self.lock = threading.Lock()
+        # Files only: chunk rows carry their file's hash but are not a whole embedding
+        self.stored_by_hash = {
+            stored.content_hash: norm_path
+            for norm_path, stored in store.entries.items()
+            if stored.content_hash and chunk_owner(norm_path) is None
+        }
+        self.written_hashes: Set[str] = set()  # Reusable even when forced
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.skipped_unchanged = self.reused = self.duplicates = self.embedded = 0
+
+    def admit(self, item: Dict[str, Any]) -> bool:
+        """Record a prepared item; True if its text needs inference."""
+        target = item["targets"][0]
+        file_path = target["key_info"].norm_path
+        content_hash = item["content_hash"]
+        with self.lock:
+            stored = self.store.get_entry(file_path)
+            if not self.force and stored is not None and stored.content_hash == content_hash:
+                self.store.touch(file_path, target["mtime"], target["key_info"].key_string)
+                self.skipped_unchanged += 1
+                return False
+            if stored is not None and self.stored_by_hash.get(stored.content_hash) == file_path:
+                del self.stored_by_hash[stored.content_hash]  # Its row is about to change
+            if content_hash in self.pending:
+                self.pending[content_hash]["targets"].append(target)
+                self.duplicates += 1
+                return False
+            source = self.stored_by_hash.get(content_hash)
+            if source is not None and (not self.force or content_hash in self.written_hashes):
+                # Another file already has an embedding of this exact text
+                chunks = self.store.chunks(source)
+                self._put(
+                    file_path,
+                    chunks if chunks is not None else self.store.get(source),
+                    content_hash,
+                    target,
+                )
+                self.reused += 1
+                return False
+            self.pending[content_hash] = item
+            return True
+
+    def write(self, embeddings: List[np.ndarray], items: List[Dict[str, Any]]) -> None:
+        """
+        Normalize the embeddings (one per text of _item_texts(), in item order) and
+        store each item's vector, or chunk vectors, for every target file of the item.
+        """
+        with self.lock:
+            offset = 0
+            for item in items:
+                count = len(_item_texts(item))
+                emb = np.array(embeddings[offset : offset + count], dtype=np.float32)
+                offset += count
+                norms = np.linalg.norm(emb, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                emb = emb / norms
+                if item["chunks"] is None:
+                    emb = emb[0]
+                for target in item["targets"]:
+                    self._put(target["key_info"].norm_path, emb, item["content_hash"], target)
+                self.pending.pop(item["content_hash"], None)
+                self.stored_by_hash[item["content_hash"]] = item["targets"][0]["key_info"].norm_path
+                self.written_hashes.add(item["content_hash"])
+                self.embedded += 1
+
+    def _put(self, file_path: str, vector: np.ndarray, content_hash: str, target: Dict[str, Any]) -> None:
+        """Store a single vector, or chunk vectors (a 2-D array), for the file."""
+        if vector.ndim == 1:
+            self.store.remove_chunks(file_path)
+        (self.store.put if vector.ndim == 1 else self.store.put_chunks)(
+            file_path,
+            vector,
+            key=target["key_info"].key_string,
+            content_hash=content_hash,
+            model=self.model_name,
+            mtime=target["mtime"],
+        )
+
+
+def _embed_sequential(
+    files: List[KeyInfo],
+    prepare: Callable[[KeyInfo], Optional[Dict[str, Any]]],
+    dedup: _TextDeduplicator,
+    batch_size: int,
+) -> bool:
+    """
+    Prepare every text first, then embed them bucket by bucket.
+    Returns False if the model could not be loaded or a batch failed.
+    """
+    processing_queue = []
+    with PhaseTracker(total=len(files), phase_name="Preparing Embeddings") as prep_tracker:
+        for key_info in files:
+            prep_tracker.set_description(f"Reading {os.path.basename(key_info.norm_path)}")
+            item = _prepare_or_skip(prepare, key_info)
+            if item is not None and dedup.admit(item):
+                processing_queue.append(item)
             prep_tracker.update()
 
     # Sort by token count (ascending) to grow context window monotonically
     processing_queue.sort(key=lambda x: x["tokens"])
 
-    current_batch_texts = []
-    current_batch_paths = []
-
-    # Determine batch size
-    effective_batch_size = batch_size or (64 if SELECTED_DEVICE == "cuda" else 16)
+    # Plan the context buckets up front: the model is loaded once per bucket,
+    # smallest first, and a batch never spans two buckets
+    buckets: Dict[int, List[Dict[str, Any]]] = {}
+    for item in processing_queue:
+        buckets.setdefault(item["n_ctx"], []).append(item)
+    logger.info(
+        "Context plan: "
+        + ", ".join(f"{n_ctx} ({len(items)} texts)" for n_ctx, items in sorted(buckets.items()))
+    )
 
+    ok = True
     with PhaseTracker(
         total=len(processing_queue), phase_name="Generating Embeddings"
     ) as tracker:
-        for item in processing_queue:
-            tracker.set_description(f"Embedding {os.path.basename(item['rel_path'])}")
-
-            # Calculate required n_ctx for this item
-            # Formula: max(actual_tokens + 512, 8192)
-            # Cap at MAX_CONTEXT_LENGTH
-            required_n_ctx = min(max(item["tokens"] + 512, 8192), MAX_CONTEXT_LENGTH)
-
+        for n_ctx, bucket_items in sorted(buckets.items()):
             # Ensure model is loaded with sufficient context
             try:
-                _load_model(n_ctx=required_n_ctx)
+                _load_model(n_ctx=n_ctx)
             except Exception as e:
                 logger.error(f"Could not load model for embedding generation: {e}")
                 return False
 
-            current_batch_texts.append(item["text"])
-
-            # Calculate save path
-            save_path = os.path.join(embeddings_dir, item["rel_path"]) + ".npy"
-            current_batch_paths.append(save_path)
-
-            if len(current_batch_texts) >= effective_batch_size:
-                _flush_batch(current_batch_texts, current_batch_paths)
-                tracker.update(len(current_batch_texts))
-                current_batch_texts = []
-                current_batch_paths = []
+            bucket_tokens = 0
+            bucket_start = time.perf_counter()
+            for start in range(0, len(bucket_items), batch_size):
+                batch_items = bucket_items[start : start + batch_size]
+                tracker.set_description(
+                    f"Embedding {os.path.basename(batch_items[-1]['rel_path'])}"
+                )
+                batch_tokens = _flush_batch(
+                    [text for item in batch_items for text in _item_texts(item)],
+                    batch_items,
+                    dedup,
+                )
+                if batch_tokens is None:
+                    ok = False
+                else:
+                    bucket_tokens += batch_tokens
+                tracker.update(len(batch_items))
+            _log_throughput(
+                n_ctx,
+                len(bucket_items),
+                bucket_tokens,
+                time.perf_counter() - bucket_start,
+                batch_size,
+            )
+    return ok
 
-        # Flush remaining
-        if current_batch_texts:
-            _flush_batch(current_batch_texts, current_batch_paths)
-            tracker.update(len(current_batch_texts))
 
-    # Create/Update Metadata
-    metadata_path = os.path.join(embeddings_dir, "metadata.json")
-    new_metadata = {
-        "version": "2.0_SES",
-        "model": SELECTED_MODEL_CONFIG["name"] if SELECTED_MODEL_CONFIG else "unknown",
-        "keys": {},
-    }
+def _embed_pipelined(
+    files: List[KeyInfo],
+    prepare: Callable[[KeyInfo], Optional[Dict[str, Any]]],
+    dedup: _TextDeduplicator,
+    batch_size: int,
+    workers: int,
+) -> bool:
+    """
+    Overlap text preparation, inference and writing.
+
+    workers threads prepare texts into a bounded queue; this thread batches
+    them into the model; a writer thread stores the vectors. Texts needing a
+    larger context than the loaded model are held back and embedded at the
+    end, one bucket at a time, so the model still loads at most once per bucket.
+    A file that fails to prepare is skipped; a batch that fails to embed or
+    write makes the run return False (its files are retried next run).
+    """
+    prepared: "queue.Queue[Any]" = queue.Queue(maxsize=max(8, 2 * batch_size))
+    writes: "queue.Queue[Any]" = queue.Queue(maxsize=2)
+    stop = threading.Event()
+    done = object()
+    file_iter = iter(files)
+    file_lock = threading.Lock()
 
-    # Populate metadata with current state of all valid files
-    for key_info in path_to_key_info.values():
-        if key_info.is_directory:
-            continue
-        rel_path = os.path.relpath(key_info.norm_path, project_root)
-        npy_path = os.path.join(embeddings_dir, rel_path) + ".npy"
+    failed = threading.Event()  # A batch could not be embedded or written
 
-        if os.path.exists(npy_path):
+    def produce() -> None:
+        try:
+            while not stop.is_set():
+                with file_lock:
+                    key_info = next(file_iter, None)
+                if key_info is None:
+                    break
+                # A file that fails to prepare is skipped, not the rest of the worker's share
+                prepared.put(_prepare_or_skip(prepare, key_info))
+        finally:
+            prepared.put(done)
+
+    def write() -> None:
+        while True:
+            batch = writes.get()
+            if batch is None:
+                return
             try:
-                new_metadata["keys"][key_info.key_string] = {
-                    "path": key_info.norm_path,
-                    "mtime": os.path.getmtime(key_info.norm_path),
-                }
-            except OSError:
-                pass
-
+                dedup.write(*batch)
+            except Exception as e:
+                logger.error(f"Failed to write embedding batch: {e}")
+                failed.set()
+
+    producers = [
+        threading.Thread(target=produce, name=f"embedding-prep-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    writer = threading.Thread(target=write, name="embedding-writer", daemon=True)
+    for thread in producers + [writer]:
+        thread.start()
+
+    loaded_ctx = 0
+    ready: List[Dict[str, Any]] = []
+    deferred: List[Dict[str, Any]] = []
+    stats: Dict[int, List[float]] = {}  # n_ctx -> [texts, tokens, seconds]
+
+    def embed(batch_items: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        try:
+            embeddings, token_count = _encode_batch(
+                [text for item in batch_items for text in _item_texts(item)]
+            )
+        except Exception as e:
+            logger.error(f"Failed to embed batch: {e}")
+            failed.set()
+            return
+        writes.put((embeddings, batch_items))
+        if token_count is None:
+            token_count = sum(item["tokens"] for item in batch_items)
+        totals = stats.setdefault(loaded_ctx, [0, 0, 0.0])
+        totals[0] += len(batch_items)
+        totals[1] += token_count
+        totals[2] += time.perf_counter() - start
+
+    ok = True
     try:
-        with open(metadata_path, "w", encoding="utf-8") as f:
-            json.dump(new_metadata, f, indent=2)
-        logger.info(f"Updated metadata at {metadata_path}")
+        with PhaseTracker(total=len(files), phase_name="Generating Embeddings") as tracker:
+            finished = 0
+            while finished < workers:
+                item = prepared.get()
+                if item is done:
+                    finished += 1
+                    continue
+                if item is None or not dedup.admit(item):
+                    tracker.update()
+                    continue
+                if not loaded_ctx:
+                    _load_model(n_ctx=item["n_ctx"])
+                    loaded_ctx = item["n_ctx"]
+                if item["n_ctx"] > loaded_ctx:
+                    deferred.append(item)
+                    continue
+                ready.append(item)
+                if len(ready) >= batch_size:
+                    tracker.set_description(f"Embedding {os.path.basename(ready[-1]['rel_path'])}")
+                    embed(ready)
+                    tracker.update(len(ready))
+                    ready = []
+            if ready:
+                embed(ready)
+                tracker.update(len(ready))
+
+            deferred.sort(key=lambda x: x["tokens"])
+            for n_ctx in sorted({item["n_ctx"] for item in deferred}):
+                _load_model(n_ctx=n_ctx)
+                loaded_ctx = n_ctx
+                bucket_items = [item for item in deferred if item["n_ctx"] == n_ctx]
+                for start in range(0, len(bucket_items), batch_size):
+                    embed(bucket_items[start : start + batch_size])
+                    tracker.update(len(bucket_items[start : start + batch_size]))
     except Exception as e:
-        logger.error(f"Failed to save metadata: {e}")
+        logger.error(f"Could not load model for embedding generation: {e}")
+        ok = False
+    finally:
+        stop.set()
+        # Unblock producers waiting on a full queue, then let the writer drain
+        while any(thread.is_alive() for thread in producers):
+            try:
+                prepared.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        writes.put(None)
+        writer.join()
+
+    for n_ctx, (texts, tokens, seconds) in sorted(stats.items()):
+        _log_throughput(n_ctx, int(texts), int(tokens), seconds, batch_size)
+    return ok and not failed.is_set()
 
-    try:
-        # Invalidate similarity cache as embeddings have changed
-        cache_manager.get_cache("similarity_calculation").invalidate(".*")
-        logger.debug(
-            "Invalidated similarity_calculation cache after embedding generation."
-        )
-    except Exception as e:
-        logger.warning(f"Failed to invalidate similarity cache: {e}")
 
+def _encode_batch(texts: List[str]) -> Tuple[List[np.ndarray], Optional[int]]:
+    """
+    Encode texts with the loaded model in one call.
+    Returns the embeddings and, for GGUF models, the number of tokens llama.cpp evaluated.
+    """
+    if SELECTED_MODEL_CONFIG and SELECTED_MODEL_CONFIG["type"] == "gguf":
+        # llama.cpp packs the sequences into n_batch-token decodes
+        embeddings, token_count = MODEL_INSTANCE.embed(texts, return_count=True)
+        return [np.array(res, dtype=np.float32) for res in embeddings], token_count
+    # SentenceTransformer handles batches natively
+    embeddings = MODEL_INSTANCE.encode(
+        texts, show_progress_bar=False, convert_to_numpy=True
+    )
+    return list(embeddings), None
+
+
+def _log_throughput(
+    n_ctx: int, text_count: int, token_count: int, seconds: float, batch_size: int
+) -> Dict[str, Any]:
+    """Log (and return) the measured embedding throughput of one configuration."""
+    stats = {
+        "model": SELECTED_MODEL_CONFIG["name"] if SELECTED_MODEL_CONFIG else "unknown",
+        "n_ctx": n_ctx,
+        "n_threads": _gguf_thread_count()
+        if SELECTED_MODEL_CONFIG and SELECTED_MODEL_CONFIG["type"] == "gguf"
+        else None,
+        "batch_size": batch_size,
+        "texts": text_count,
+        "tokens": token_count,
+        "seconds": seconds,
+        "tokens_per_sec": token_count / seconds if seconds > 0 else 0.0,
+    }
+    logger.info(
+        f"Embedding throughput ({stats['model']}, n_ctx={n_ctx}, n_threads={stats['n_threads']}, "
+        f"batch={batch_size}): {text_count} texts, {token_count} tokens in {seconds:.2f}s "
+        f"= {stats['tokens_per_sec']:.0f} tokens/s"
+    )
+    return stats
+
+
+def benchmark_embedding_throughput(
+    texts: List[str],
+    thread_counts: Optional[List[int]] = None,
+    batch_sizes: Optional[List[int]] = None,
+    n_ctx: int = MIN_CONTEXT_LENGTH,
+) -> List[Dict[str, Any]]:
+    """
+    Measure embedding tokens/sec for each (n_threads, batch size) pair on the given
+    texts, reloading the model per thread count. For tuning gguf_n_threads and
+    the batch size on a CPU box.
+    """
+    tokenizer = _get_tokenizer()
+    results = []
+    for n_threads in thread_counts or [_gguf_thread_count()]:
+        _unload_model()
+        _load_model(n_ctx=n_ctx, n_threads=n_threads)
+        for batch_size in batch_sizes or [16]:
+            token_count = 0
+            start = time.perf_counter()
+            for offset in range(0, len(texts), batch_size):
+                batch = texts[offset : offset + batch_size]
+                _embeddings, counted = _encode_batch(batch)
+                token_count += (
+                    counted
+                    if counted is not None
+                    else sum(_count_tokens(text, tokenizer) for text in batch)
+                )
+            stats = _log_throughput(
+                n_ctx, len(texts), token_count, time.perf_counter() - start, batch_size
+            )
+            stats["n_threads"] = n_threads
+            results.append(stats)
     _unload_model()
-    return True
+    return results
 
 
-def _flush_batch(texts: List[str], save_paths: List[str]):
-    """Helper to encode a batch of texts and save them to their respective paths."""
+def _flush_batch(
+    texts: List[str], items: List[Dict[str, Any]], dedup: "_TextDeduplicator"
+) -> Optional[int]:
+    """
+    Helper to encode a batch of texts and write each to the store rows of every file it came from.
+    Returns the number of tokens embedded, or None if the batch failed.
+    """
     if not texts:
-        return
+        return 0
 
     try:
         if MODEL_INSTANCE is None:
             logger.error("Model instance lost during batch flush")
-            return
+            return None
 
-        if SELECTED_MODEL_CONFIG and SELECTED_MODEL_CONFIG["type"] == "gguf":
-            # GGUF (llama-cpp) handles one by one in loop usually unless batched explicitly
-            embeddings = []
-            for t in texts:
-                res = MODEL_INSTANCE.embed(t)
-                embeddings.append(np.array(res, dtype=np.float32))
-        else:
-            # SentenceTransformer handles batches natively
-            embeddings = MODEL_INSTANCE.encode(
-                texts, show_progress_bar=False, convert_to_numpy=True
-            )
+        embeddings, token_count = _encode_batch(texts)
+        dedup.write(embeddings, items)
+        if token_count is None:
+            token_count = sum(item["tokens"] for item in items)
+        return token_count
 
-        for i, emb in enumerate(embeddings):
-            # Normalize
-            emb = np.array(emb, dtype=np.float32)
-            norm = np.linalg.norm(emb)
-            if norm > 0:
-                emb = emb / norm
+    except Exception as e:
+        logger.error(f"Failed to flush batch: {e}")
+        return None
 
-            path = save_paths[i]
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            np.save(path, emb)
 
+def _sync_store_entries(
+    store: EmbeddingStore, path_to_key_info: Dict[str, KeyInfo]
+) -> None:
+    """
+    Tombstone rows of files no longer in the key map, refresh changed keys,
+    compact when tombstones pile up, and save the row index.
+    """
+    for norm_path in list(store.entries):
+        owner = chunk_owner(norm_path)
+        key_info = path_to_key_info.get(owner or norm_path)
+        if key_info is None or key_info.is_directory:
+            store.remove(norm_path)
+        elif owner is None:
+            store.update_key(norm_path, key_info.key_string)
+    ratio = ConfigManager().get_embedding_setting("store_compact_ratio", 0.25)
+    reclaimed = store.compact_if_needed(ratio)
+    if reclaimed:
+        logger.info(f"Compacted embedding store, reclaiming {reclaimed} rows.")
+    try:
+        store.save()
+        logger.info(f"Updated embedding store index at {store.metadata_path}")
     except Exception as e:
-        logger.error(f"Failed to flush batch: {e}")
+        logger.error(f"Failed to save embedding store index: {e}")
 
 
 # --- Similarity Calculation ---
@@ -1612,41 +2214,377 @@ def calculate_similarity(
     Requires the embeddings to be generated and saved on disk.
     """
     # 1. Validate Keys
-    ki1 = next((k for k in path_to_key_info.values() if k.key_string == key1_str), None)
-    ki2 = next((k for k in path_to_key_info.values() if k.key_string == key2_str), None)
+    key_map = as_global_key_map(path_to_key_info)
+    ki1 = key_map.get_by_key(key1_str)
+    ki2 = key_map.get_by_key(key2_str)
 
     if not ki1 or not ki2:
         return 0.0
 
-    # 2. Locate NPY files
-    def get_npy_path(ki: KeyInfo) -> Optional[str]:
-        rel = os.path.relpath(ki.norm_path, project_root)
-        path = os.path.join(embeddings_dir, rel) + ".npy"
-        return path if os.path.exists(path) else None
-
-    p1 = get_npy_path(ki1)
-    p2 = get_npy_path(ki2)
-
-    if not p1 or not p2:
-        return 0.0
-
-    # 3. Load and Compute
+    # 2. Load and Compute
     try:
-        v1 = np.load(p1)
-        v2 = np.load(p2)
+        store = open_embedding_store(embeddings_dir, project_root)
+        aggregation = ConfigManager().get_embedding_setting("chunk_aggregation", "max")
+        v1 = _file_vectors(store, ki1.norm_path, aggregation)
+        v2 = _file_vectors(store, ki2.norm_path, aggregation)
 
-        # Ensure flat (1D) arrays
-        v1 = v1.flatten()
-        v2 = v2.flatten()
+        if v1 is None or v2 is None:
+            return 0.0
 
-        # Dot product (vectors are already normalized in generation)
-        score = np.dot(v1, v2)
+        # Dot product (vectors are already normalized in generation); the best chunk pair for chunked files
+        score = np.max(np.atleast_2d(v1) @ np.atleast_2d(v2).T)
         return float(max(0.0, min(1.0, score)))
     except Exception as e:
         logger.warning(f"Similarity calc error ({key1_str}, {key2_str}): {e}")
         return 0.0
 
 
+def _file_vectors(
+    store: EmbeddingStore, norm_path: str, aggregation: str
+) -> Optional[np.ndarray]:
+    """
+    The vectors a file is compared with: its chunk vectors (chunks x dim) under
+    "max" aggregation if it was embedded in chunks, else its single vector
+    (for chunked files, the normalized mean of the chunks).
+    """
+    if aggregation == "max":
+        chunks = store.chunks(norm_path)
+        if chunks is not None:
+            return chunks
+    return store.get(norm_path)
+
+
+# --- Whole-Project Similarity Index ---
+
+SIMILARITY_INDEX_LOCK = threading.Lock()
+_SIMILARITY_INDEX: Optional["SimilarityIndex"] = None
+
+
+class SimilarityIndex:
+    """
+    Top-k semantic neighbours of every embedded file, from one blocked E @ E.T product.
+
+    Scores equal calculate_similarity (dot product clamped to [0, 1]); only those at or
+    above min_score are kept, at most top_k per file. Each file's neighbours are stored
+    in the order of the files passed in, so callers see the same order as a per-pair loop.
+    A 2-D entry in vectors holds a file's chunk vectors; files are then scored by
+    their best chunk pair (max-sim). from_rows() builds the index from store rows
+    kept in the store's dtype, dequantizing them one tile at a time.
+    """
+
+    def __init__(
+        self,
+        paths: Tuple[str, ...],
+        vectors: List[Optional[np.ndarray]],
+        min_score: float,
+        top_k: int,
+        tile_bytes: int,
+        signature: Any = None,
+    ):
+        self.paths = paths
+        self.min_score = min_score
+        self.top_k = top_k
+        self.signature = signature
+        self._row_of = {path: i for i, path in enumerate(paths)}
+        self._neighbours: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+        # Vectors of different dimensions score 0 against each other (as a failed np.dot did)
+        by_dim: Dict[int, List[int]] = {}
+        for i, vec in enumerate(vectors):
+            if vec is not None:
+                by_dim.setdefault(vec.shape[-1], []).append(i)
+        for indices in by_dim.values():
+            group = [vectors[i] for i in indices]
+            index_array = np.asarray(indices, dtype=np.int64)
+            if all(vec.ndim == 1 for vec in group):
+                matrix = np.stack(group).astype(np.float32, copy=False)
+                self._build_group(index_array, QuantizedRows(matrix, None), tile_bytes)
+            else:
+                self._build_chunked_group(index_array, group, tile_bytes)
+
+    @classmethod
+    def from_rows(
+        cls,
+        paths: Tuple[str, ...],
+        present: np.ndarray,
+        rows: QuantizedRows,
+        min_score: float,
+        top_k: int,
+        tile_bytes: int,
+        signature: Any = None,
+    ) -> "SimilarityIndex":
+        """Index of the files paths[present], whose vectors are rows (in the same order)."""
+        index = cls(paths, [], min_score, top_k, tile_bytes, signature)
+        if len(present):
+            index._build_group(present, rows, tile_bytes)
+        return index
+
+    def _build_group(self, indices: np.ndarray, rows: QuantizedRows, tile_bytes: int):
+        n = len(indices)
+        rows_per_tile = max(1, tile_bytes // max(1, n * 4))
+        # float32 rows are used in place; others are dequantized in column blocks
+        # of at most tile_bytes unless they fit in one
+        block = max(1, tile_bytes // max(1, rows.values.shape[1] * 4))
+        columns = (
+            rows.dequantize()
+            if block >= n or (rows.scales is None and rows.values.dtype == np.float32)
+            else None
+        )
+        for start in range(0, n, rows_per_tile):
+            stop = min(n, start + rows_per_tile)
+            tile = rows.dequantize(start, stop)
+            if columns is not None:
+                scores = tile @ columns.T
+            else:
+                scores = np.empty((stop - start, n), dtype=np.float32)
+                for first in range(0, n, block):
+                    last = min(n, first + block)
+                    scores[:, first:last] = tile @ rows.dequantize(first, last).T
+            self._keep_neighbours(indices, start, stop, scores)
+
+    def _build_chunked_group(
+        self, indices: np.ndarray, group: List[np.ndarray], tile_bytes: int
+    ):
+        """Max-sim scores: chunk-by-chunk products reduced to the best pair per file pair."""
+        counts = np.array([1 if vec.ndim == 1 else len(vec) for vec in group])
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        matrix = np.vstack([np.atleast_2d(vec) for vec in group])
+        n = len(indices)
+        row_bytes = len(matrix) * matrix.itemsize * max(1.0, counts.mean())
+        files_per_tile = max(1, int(tile_bytes // max(1.0, row_bytes)))
+        for start in range(0, n, files_per_tile):
+            stop = min(n, start + files_per_tile)
+            first = offsets[start]
+            chunk_scores = matrix[first : offsets[stop]] @ matrix.T
+            per_file = np.maximum.reduceat(chunk_scores, offsets[:-1], axis=1)
+            scores = np.maximum.reduceat(per_file, offsets[start:stop] - first, axis=0)
+            self._keep_neighbours(indices, start, stop, scores)
+
+    def _keep_neighbours(
+        self, indices: np.ndarray, start: int, stop: int, scores: np.ndarray
+    ):
+        """Keep the top-k scores above min_score for group files [start, stop)."""
+        np.clip(scores, 0.0, 1.0, out=scores)
+        scores[np.arange(stop - start), np.arange(start, stop)] = -1.0  # Exclude self
+        for offset, row in enumerate(scores):
+            kept = np.flatnonzero(row >= self.min_score)
+            if len(kept) > self.top_k:
+                kept = kept[np.argpartition(row[kept], -self.top_k)[-self.top_k :]]
+                kept.sort()
+            if len(kept):
+                self._neighbours[int(indices[start + offset])] = (
+                    indices[kept],
+                    row[kept],
+                )
+
+    def neighbours(self, norm_path: str) -> List[Tuple[str, float]]:
+        """Return (target_path, score) for the file's kept neighbours, in input order."""
+        row = self._row_of.get(norm_path)
+        if row is None or row not in self._neighbours:
+            return []
+        targets, scores = self._neighbours[row]
+        return [
+            (self.paths[target], float(score))
+            for target, score in zip(targets.tolist(), scores.tolist())
+        ]
+
+
+class ApproximateSimilarityIndex:
+    """
+    Same interface as SimilarityIndex, answering each file's neighbours on demand
+    with an IVF search over the embedding store (for projects too large for all pairs).
+    Under "max" aggregation, candidates found by their mean vectors are rescored
+    by their best chunk pair.
+    """
+
+    def __init__(
+        self,
+        paths: Tuple[str, ...],
+        store: EmbeddingStore,
+        ivf: IVFIndex,
+        min_score: float,
+        top_k: int,
+        nprobe: int,
+        signature: Any = None,
+        aggregation: str = "mean",
+    ):
+        self.paths = paths
+        self.min_score = min_score
+        self.top_k = top_k
+        self.signature = signature
+        self._aggregation = aggregation
+        self._store = store
+        self._ivf = ivf
+        self._nprobe = nprobe
+        self._row_of = {path: i for i, path in enumerate(paths)}
+        self._memo: Dict[str, List[Tuple[str, float]]] = {}
+
+    def neighbours(self, norm_path: str) -> List[Tuple[str, float]]:
+        """Return (target_path, score) for the file's approximate neighbours, in input order."""
+        found = self._memo.get(norm_path)
+        if found is None:
+            query = self._store.get(norm_path) if norm_path in self._row_of else None
+            rescore = self._aggregation == "max"
+            results = (
+                self._ivf.search(
+                    self._store,
+                    query,
+                    self.top_k,
+                    self._nprobe,
+                    0.0 if rescore else self.min_score,
+                    norm_path,
+                )
+                if query is not None
+                else []
+            )
+            if rescore and results:
+                results = self._rescore_max(norm_path, results)
+            found = sorted(
+                (item for item in results if item[0] in self._row_of),
+                key=lambda item: self._row_of[item[0]],
+            )
+            self._memo[norm_path] = found
+        return found
+
+    def _rescore_max(
+        self, norm_path: str, results: List[Tuple[str, float]]
+    ) -> List[Tuple[str, float]]:
+        source = _file_vectors(self._store, norm_path, "max")
+        rescored = []
+        for target, score in results:
+            target_vectors = _file_vectors(self._store, target, "max")
+            if source.ndim > 1 or target_vectors.ndim > 1:
+                score = float(
+                    np.clip(np.max(np.atleast_2d(source) @ np.atleast_2d(target_vectors).T), 0.0, 1.0)
+                )
+            if score >= self.min_score:
+                rescored.append((target, score))
+        return rescored
+
+
+def _embeddings_signature(embeddings_dir: str) -> Optional[Tuple[int, int]]:
+    """(size, mtime_ns) of the embedding store's row index, rewritten by every generation run."""
+    try:
+        stat = os.stat(os.path.join(embeddings_dir, STORE_METADATA_FILENAME))
+        return (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        return None
+
+
+def invalidate_similarity_index() -> None:
+    """Drop the cached similarity index (embeddings were regenerated)."""
+    global _SIMILARITY_INDEX
+    with SIMILARITY_INDEX_LOCK:
+        _SIMILARITY_INDEX = None
+
+
+def get_similarity_index(
+    embeddings_dir: str,
+    path_to_key_info: Dict[str, KeyInfo],
+    project_root: str,
+    min_score: float,
+) -> Union[SimilarityIndex, ApproximateSimilarityIndex]:
+    """
+    Return the process-wide similarity index for the project's files, building it on first use.
+
+    With at least performance.ann_min_files embedded files, neighbours come from the
+    persisted IVF index instead of the exact all-pairs product.
+    The index is rebuilt when the file set, the embeddings metadata or the project changes,
+    or when a lower min_score is requested than the cached index kept.
+    """
+    global _SIMILARITY_INDEX
+    paths = tuple(
+        ki.norm_path for ki in path_to_key_info.values() if not ki.is_directory
+    )
+    aggregation = ConfigManager().get_embedding_setting("chunk_aggregation", "max")
+    signature = (
+        embeddings_dir,
+        project_root,
+        _embeddings_signature(embeddings_dir),
+        aggregation,
+    )
+    with SIMILARITY_INDEX_LOCK:
+        index = _SIMILARITY_INDEX
+        if (
+            index is not None
+            and index.signature == signature
+            and index.min_score <= min_score
+            and index.paths == paths
+        ):
+            return index
+
+        config = ConfigManager()
+        top_k = int(config.get_performance_setting("semantic_neighbours_top_k", 256))
+        tile_mb = config.get_performance_setting("similarity_tile_mb", 64)
+        store = open_embedding_store(embeddings_dir, project_root)
+        ann_min_files = config.get_performance_setting("ann_min_files", 20000)
+        embedded = sum(path in store for path in paths)
+        if ann_min_files and embedded >= ann_min_files:
+            ivf = load_or_build_ivf_index(
+                store,
+                config.get_performance_setting("ann_nlist"),
+                config.get_performance_setting("ann_kmeans_iterations", 10),
+                int(tile_mb * 1024 * 1024),
+            )
+            index = ApproximateSimilarityIndex(
+                paths,
+                store,
+                ivf,
+                min_score,
+                top_k,
+                config.get_performance_setting("ann_nprobe", 16),
+                signature,
+                aggregation,
+            )
+            logger.info(
+                f"Using ANN similarity index for {embedded} embedded files "
+                f"({ivf.nlist} lists, min score {min_score:.3f}, top {top_k})."
+            )
+            _SIMILARITY_INDEX = index
+            return index
+
+        present = np.array(
+            [i for i, norm_path in enumerate(paths) if norm_path in store], dtype=np.int64
+        )
+        chunked = aggregation == "max" and any(
+            chunk_entry_path(paths[i], 0) in store for i in present.tolist()
+        )
+        if chunked:
+            vectors = store.vectors(paths)
+            for i in present.tolist():
+                chunks = store.chunks(paths[i])
+                if chunks is not None:
+                    vectors[i] = chunks
+            index = SimilarityIndex(
+                paths,
+                vectors,
+                min_score,
+                top_k,
+                int(tile_mb * 1024 * 1024),
+                signature,
+            )
+        else:
+            # Vectors stay in the store's dtype (float16/int8) until scored
+            rows = np.array(
+                [store.entries[paths[i]].row for i in present.tolist()], dtype=np.int64
+            )
+            index = SimilarityIndex.from_rows(
+                paths,
+                present,
+                store.quantized_rows(rows),
+                min_score,
+                top_k,
+                int(tile_mb * 1024 * 1024),
+                signature,
+            )
+        logger.info(
+            f"Built similarity index for {len(present)} embedded files "
+            f"(min score {min_score:.3f}, top {top_k}, {store.dtype.name} vectors)."
+        )
+        _SIMILARITY_INDEX = index
+        return index
+
+
 # --- File Validation Helper ---
 
 
@@ -1657,29 +2595,14 @@ def calculate_similarity(
 def _is_valid_file(file_path: str) -> bool:
     """Check if a file is valid for processing (not excluded, size limit)."""
     try:
-        config = ConfigManager()
-        project_root = get_project_root()
         norm_path = normalize_path(file_path)
 
-        # Excluded paths/dirs
-        excluded_paths = set(config.get_excluded_paths())
-        if norm_path in excluded_paths:
-            return False
-
-        excluded_dirs = [
-            normalize_path(os.path.join(project_root, d))
-            for d in config.get_excluded_dirs()
-        ]
-        if any(norm_path.startswith(d + os.sep) for d in excluded_dirs):
-            return False
-
-        # Extensions
-        ext = os.path.splitext(norm_path)[1].lower()
-        if ext in config.get_excluded_extensions():
+        # Excluded paths, dir names, file patterns and extensions
+        if ConfigManager().get_path_filter().is_excluded(norm_path):
             return False
 
         # Size check (10MB limit)
-        if os.path.getsize(norm_path) > 10 * 1024 * 1024:
+        if os.path.getsize(norm_path) > MAX_EMBEDDING_FILE_SIZE:
             return False
 
         return True
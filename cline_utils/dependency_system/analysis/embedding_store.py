@@ -0,0 +1,671 @@
+# analysis/embedding_store.py
+
+"""
+Consolidated embedding store: one memory-mapped matrix file plus a row index.
+
+Embeddings used to be written as one .npy file per source file, under a tree
+mirroring the project, with metadata.json listing each key's path and mtime.
+The store keeps every vector as a row of a single matrix file (embeddings.bin)
+opened with np.memmap. metadata.json becomes the row index:
+norm_path -> row, key, content hash, model and the source mtime at embedding time.
+
+Re-embedding a file overwrites its row in place. New files are appended, and
+the file's capacity doubles when it is full. Removed files leave tombstoned
+rows behind; compact() rewrites the live rows contiguously (optionally in
+another dtype). open_embedding_store() migrates a directory still in the old
+per-file layout the first time it is opened.
+
+A file embedded in chunks keeps the normalized mean of its chunk vectors in
+its own row and each chunk vector in a row of its own, indexed under
+chunk_entry_path(norm_path, i).
+
+Rows are stored as float32, float16 (half the disk and page cache) or int8
+(a quarter): each int8 row is the vector divided by its own scale, max|v| / 127,
+and the scales are kept in embeddings.scales.bin. Readers get float32 rows
+dequantized as they are gathered; quantization_topk_overlap() measures how
+much a lossy dtype changes each vector's nearest neighbours.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_STORE_VERSION = "3.0_store"
+STORE_METADATA_FILENAME = "metadata.json"
+STORE_MATRIX_FILENAME = "embeddings.bin"
+STORE_SCALES_FILENAME = "embeddings.scales.bin"  # Per-row float32 scales of an int8 matrix
+STORE_DTYPES = ("float32", "float16", "int8")
+INITIAL_CAPACITY = 64
+CHUNK_MARKER = "#chunk"  # norm_path + CHUNK_MARKER + index names a chunk row
+
+
+def chunk_entry_path(norm_path: str, index: int) -> str:
+    return f"{norm_path}{CHUNK_MARKER}{index}"
+
+
+def chunk_owner(entry_path: str) -> Optional[str]:
+    """The file a chunk entry belongs to, or None for a file's own entry."""
+    head, marker, index = entry_path.rpartition(CHUNK_MARKER)
+    return head if marker and index.isdigit() else None
+
+
+def quantize_rows(
+    vectors: np.ndarray, dtype: np.dtype
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Rows of vectors in dtype, plus their scales when dtype is int8 (else None)."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if np.dtype(dtype) != np.int8:
+        return vectors.astype(dtype), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    values = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return values, scales.astype(np.float32)
+
+
+class QuantizedRows(NamedTuple):
+    """Matrix rows in the store's dtype, with their scales if int8."""
+
+    values: np.ndarray
+    scales: Optional[np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def dequantize(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Rows [start, stop) as float32 (a view when they already are)."""
+        block = np.asarray(self.values[start:stop], dtype=np.float32)
+        if self.scales is not None:
+            block = block * self.scales[start:stop, None]
+        return block
+
+
+class StoreEntry(NamedTuple):
+    """Row index entry of one embedded file."""
+
+    row: int
+    key: Optional[str]
+    content_hash: Optional[str]
+    model: Optional[str]
+    mtime: float
+
+
+class EmbeddingStore:
+    """
+    norm_path -> embedding, stored as rows of one memory-mapped matrix.
+
+    Rows [0, row_count) are allocated; those not referenced by an entry are
+    tombstones. Vectors are normalized by the caller and returned as float32.
+    Changes are written to the matrix immediately; save() flushes them and
+    rewrites the row index.
+    """
+
+    def __init__(self, embeddings_dir: str, dtype: str = "float32"):
+        if dtype not in STORE_DTYPES:
+            raise ValueError(f"Unsupported embedding store dtype: {dtype}")
+        self.embeddings_dir = embeddings_dir
+        self.dtype = np.dtype(dtype)
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self.row_count = 0
+        self.entries: Dict[str, StoreEntry] = {}
+        self.tombstones: List[int] = []
+        self.signature: Optional[Tuple[int, int]] = None
+        self._matrix: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._writable = False
+
+    @property
+    def metadata_path(self) -> str:
+        return os.path.join(self.embeddings_dir, STORE_METADATA_FILENAME)
+
+    @property
+    def matrix_path(self) -> str:
+        return os.path.join(self.embeddings_dir, STORE_MATRIX_FILENAME)
+
+    @property
+    def scales_path(self) -> str:
+        return os.path.join(self.embeddings_dir, STORE_SCALES_FILENAME)
+
+    @property
+    def quantized(self) -> bool:
+        return self.dtype == np.int8
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, norm_path: str) -> bool:
+        return norm_path in self.entries
+
+    def get_entry(self, norm_path: str) -> Optional[StoreEntry]:
+        return self.entries.get(norm_path)
+
+    # --- Loading / Saving ---
+
+    @classmethod
+    def load(cls, embeddings_dir: str) -> Optional["EmbeddingStore"]:
+        """Open the store in embeddings_dir; None if its metadata is not a store index."""
+        store = cls(embeddings_dir)
+        try:
+            with open(store.metadata_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if metadata.get("version") != EMBEDDING_STORE_VERSION:
+            return None
+        store.dtype = np.dtype(metadata.get("dtype", "float32"))
+        store.dim = metadata.get("dim")
+        store.row_count = metadata.get("rows", 0)
+        store.capacity = metadata.get("capacity", 0)
+        store.tombstones = list(metadata.get("tombstones", []))
+        store.entries = {
+            path: StoreEntry(
+                entry["row"],
+                entry.get("key"),
+                entry.get("hash"),
+                entry.get("model"),
+                entry.get("mtime", 0.0),
+            )
+            for path, entry in metadata.get("entries", {}).items()
+        }
+        if store.entries and (
+            not store.dim
+            or not os.path.exists(store.matrix_path)
+            or os.path.getsize(store.matrix_path)
+            < store.capacity * store.dim * store.dtype.itemsize
+            or (
+                store.quantized
+                and (
+                    not os.path.exists(store.scales_path)
+                    or os.path.getsize(store.scales_path) < store.capacity * 4
+                )
+            )
+        ):
+            logger.warning(
+                f"Embedding matrix {store.matrix_path} is missing or truncated; starting an empty store."
+            )
+            store = cls(embeddings_dir, store.dtype.name)
+        store.signature = _file_signature(store.metadata_path)
+        return store
+
+    def save(self) -> None:
+        """Flush the matrix and atomically rewrite the row index."""
+        if self._matrix is not None and self._writable:
+            self._matrix.flush()
+            if self._scales is not None:
+                self._scales.flush()
+        os.makedirs(self.embeddings_dir, exist_ok=True)
+        metadata = {
+            "version": EMBEDDING_STORE_VERSION,
+            "dtype": self.dtype.name,
+            "dim": self.dim,
+            "rows": self.row_count,
+            "capacity": self.capacity,
+            "tombstones": self.tombstones,
+            "entries": {
+                path: {
+                    "row": entry.row,
+                    "key": entry.key,
+                    "hash": entry.content_hash,
+                    "model": entry.model,
+                    "mtime": entry.mtime,
+                }
+                for path, entry in self.entries.items()
+            },
+        }
+        tmp_path = f"{self.metadata_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+        os.replace(tmp_path, self.metadata_path)
+        self.signature = _file_signature(self.metadata_path)
+
+    def close(self) -> None:
+        if self._matrix is not None and self._writable:
+            self._matrix.flush()
+            if self._scales is not None:
+                self._scales.flush()
+        self._matrix = None
+        self._scales = None
+        self._writable = False
+
+    def _open_matrix(self, writable: bool) -> Optional[np.memmap]:
+        if self._matrix is not None and (self._writable or not writable):
+            return self._matrix
+        if not self.capacity or not self.dim:
+            return None
+        self.close()
+        self._matrix = np.memmap(
+            self.matrix_path,
+            dtype=self.dtype,
+            mode="r+" if writable else "r",
+            shape=(self.capacity, self.dim),
+        )
+        if self.quantized:
+            self._scales = np.memmap(
+                self.scales_path,
+                dtype=np.float32,
+                mode="r+" if writable else "r",
+                shape=(self.capacity,),
+            )
+        self._writable = writable
+        return self._matrix
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self.capacity:
+            return
+        capacity = max(INITIAL_CAPACITY, self.capacity)
+        while capacity < rows:
+            capacity *= 2
+        self.close()
+        os.makedirs(self.embeddings_dir, exist_ok=True)
+        with open(self.matrix_path, "ab") as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        if self.quantized:
+            with open(self.scales_path, "ab") as f:
+                f.truncate(capacity * 4)
+        self.capacity = capacity
+
+    # --- Reading ---
+
+    def get(self, norm_path: str) -> Optional[np.ndarray]:
+        """The file's embedding as a float32 vector, or None if it has none."""
+        entry = self.entries.get(norm_path)
+        if entry is None or self._open_matrix(writable=False) is None:
+            return None
+        return self.gather(np.array([entry.row]))[0]
+
+    def vectors(self, norm_paths: Iterable[str]) -> List[Optional[np.ndarray]]:
+        """Embeddings of several files (None where missing), read with one gather."""
+        norm_paths = list(norm_paths)
+        rows = [
+            self.entries[path].row if path in self.entries else -1
+            for path in norm_paths
+        ]
+        matrix = self._open_matrix(writable=False)
+        if matrix is None:
+            return [None] * len(norm_paths)
+        present = [row for row in rows if row >= 0]
+        gathered = self.gather(np.asarray(present, dtype=np.int64)) if present else None
+        result: List[Optional[np.ndarray]] = []
+        i = 0
+        for row in rows:
+            if row < 0:
+                result.append(None)
+            else:
+                result.append(gathered[i])
+                i += 1
+        return result
+
+    def gather(self, rows: np.ndarray) -> np.ndarray:
+        """Rows of the matrix as a float32 array (rows are entry row numbers)."""
+        return self.quantized_rows(rows).dequantize()
+
+    def quantized_rows(self, rows: np.ndarray) -> QuantizedRows:
+        """Rows of the matrix as stored, to be dequantized block by block by the caller."""
+        matrix = self._open_matrix(writable=False)
+        if matrix is None or not len(rows):
+            return QuantizedRows(np.empty((0, self.dim or 0), dtype=np.float32), None)
+        values = np.asarray(matrix[rows])
+        scales = np.asarray(self._scales[rows]) if self.quantized else None
+        return QuantizedRows(values, scales)
+
+    # --- Writing ---
+
+    def put(
+        self,
+        norm_path: str,
+        vector: np.ndarray,
+        key: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        model: Optional[str] = None,
+        mtime: float = 0.0,
+    ) -> int:
+        """
+        Store the file's embedding (in place if it already has a row) and return its row.
+
+        A vector of another dimension than the stored ones (a model change)
+        clears the store first, since the old vectors cannot be compared with it.
+        """
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        if self.dim != vector.shape[0]:
+            if self.entries:
+                logger.warning(
+                    f"Embedding dimension changed ({self.dim} -> {vector.shape[0]}); clearing the store."
+                )
+            self.clear()
+            self.dim = vector.shape[0]
+        entry = self.entries.get(norm_path)
+        if entry is not None:
+            row = entry.row
+        else:
+            row = self.row_count
+            self._ensure_capacity(row + 1)
+            self.row_count += 1
+        values, scales = quantize_rows(vector, self.dtype)
+        self._open_matrix(writable=True)[row] = values[0]
+        if scales is not None:
+            self._scales[row] = scales[0]
+        self.entries[norm_path] = StoreEntry(row, key, content_hash, model, mtime)
+        return row
+
+    def update_key(self, norm_path: str, key: Optional[str]) -> None:
+        entry = self.entries.get(norm_path)
+        if entry is not None and entry.key != key:
+            self.entries[norm_path] = entry._replace(key=key)
+
+    def touch(self, norm_path: str, mtime: float, key: Optional[str] = None) -> None:
+        """Record a newer source mtime (and key) for an entry whose embedded text did not change."""
+        entry = self.entries.get(norm_path)
+        if entry is not None:
+            self.entries[norm_path] = entry._replace(
+                mtime=mtime, key=key if key is not None else entry.key
+            )
+
+    def file_paths(self) -> List[str]:
+        """Paths of the embedded files (without their chunk entries)."""
+        return [path for path in self.entries if chunk_owner(path) is None]
+
+    def chunks(self, norm_path: str) -> Optional[np.ndarray]:
+        """The file's chunk vectors (chunks x dim), or None if it was embedded whole."""
+        rows = []
+        while True:
+            entry = self.entries.get(chunk_entry_path(norm_path, len(rows)))
+            if entry is None:
+                break
+            rows.append(entry.row)
+        if not rows:
+            return None
+        return self.gather(np.asarray(rows, dtype=np.int64))
+
+    def put_chunks(
+        self,
+        norm_path: str,
+        vectors: np.ndarray,
+        key: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        model: Optional[str] = None,
+        mtime: float = 0.0,
+    ) -> int:
+        """
+        Store a file embedded in chunks: the normalized mean in the file's row and
+        one row per chunk. Returns the file's row.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        mean = vectors.mean(axis=0)
+        norm = np.linalg.norm(mean)
+        row = self.put(norm_path, mean / norm if norm > 0 else mean, key, content_hash, model, mtime)
+        for index, vector in enumerate(vectors):
+            self.put(chunk_entry_path(norm_path, index), vector, None, content_hash, model, mtime)
+        self.remove_chunks(norm_path, start=len(vectors))
+        return row
+
+    def remove_chunks(self, norm_path: str, start: int = 0) -> int:
+        """Tombstone the file's chunk rows from index start on. Returns how many there were."""
+        index = start
+        while self._remove_entry(chunk_entry_path(norm_path, index)):
+            index += 1
+        return index - start
+
+    def remove(self, norm_path: str) -> bool:
+        """Tombstone the file's row (and its chunk rows). Returns False if it had none."""
+        if chunk_owner(norm_path) is None:
+            self.remove_chunks(norm_path)
+        return self._remove_entry(norm_path)
+
+    def _remove_entry(self, entry_path: str) -> bool:
+        entry = self.entries.pop(entry_path, None)
+        if entry is None:
+            return False
+        self.tombstones.append(entry.row)
+        return True
+
+    def clear(self) -> None:
+        """Drop every row and the matrix file."""
+        self.close()
+        for path in (self.matrix_path, self.scales_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.entries = {}
+        self.tombstones = []
+        self.dim = None
+        self.capacity = 0
+        self.row_count = 0
+
+    def compact(self, dtype: Optional[str] = None) -> int:
+        """
+        Rewrite the live rows contiguously (in dtype, if given) and return the rows reclaimed.
+        Entries keep their relative row order.
+        """
+        target_dtype = np.dtype(dtype) if dtype else self.dtype
+        if target_dtype.name not in STORE_DTYPES:
+            raise ValueError(f"Unsupported embedding store dtype: {dtype}")
+        reclaimed = self.row_count - len(self.entries)
+        if not reclaimed and target_dtype == self.dtype:
+            return 0
+        ordered = sorted(self.entries.items(), key=lambda item: item[1].row)
+        capacity = max(INITIAL_CAPACITY, 1 << max(0, len(ordered) - 1).bit_length())
+        tmp_path = f"{self.matrix_path}.tmp"
+        tmp_scales_path = f"{self.scales_path}.tmp"
+        if ordered:
+            rows = np.array([entry.row for _, entry in ordered], dtype=np.int64)
+            source = self.quantized_rows(rows)
+            if target_dtype == self.dtype:
+                values, scales = source  # Moved as stored, without requantizing
+            else:
+                values, scales = quantize_rows(source.dequantize(), target_dtype)
+            target = np.memmap(
+                tmp_path, dtype=target_dtype, mode="w+", shape=(capacity, self.dim)
+            )
+            target[: len(ordered)] = values
+            target.flush()
+            del target
+            if scales is not None:
+                target_scales = np.memmap(
+                    tmp_scales_path, dtype=np.float32, mode="w+", shape=(capacity,)
+                )
+                target_scales[: len(ordered)] = scales
+                target_scales.flush()
+                del target_scales
+        self.close()
+        if ordered:
+            os.replace(tmp_path, self.matrix_path)
+            if target_dtype == np.int8:
+                os.replace(tmp_scales_path, self.scales_path)
+        elif os.path.exists(self.matrix_path):
+            os.remove(self.matrix_path)
+        if target_dtype != np.int8 and os.path.exists(self.scales_path):
+            os.remove(self.scales_path)
+        self.entries = {
+            path: entry._replace(row=row) for row, (path, entry) in enumerate(ordered)
+        }
+        self.tombstones = []
+        self.dtype = target_dtype
+        self.row_count = len(ordered)
+        self.capacity = capacity if ordered else 0
+        if not ordered:
+            self.dim = None
+        return reclaimed
+
+    def compact_if_needed(self, ratio: float) -> int:
+        """Compact once tombstones exceed ratio of the allocated rows."""
+        if self.row_count and len(self.tombstones) > ratio * self.row_count:
+            return self.compact()
+        return 0
+
+
+def quantization_topk_overlap(
+    vectors: np.ndarray,
+    dtype: str,
+    k: int = 10,
+    sample_size: int = 200,
+    seed: int = 0,
+) -> float:
+    """
+    Mean fraction of each sampled vector's float32 top-k neighbours that are
+    still its top-k once the vectors are stored in dtype (1.0 = unchanged).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    k = min(k, len(vectors) - 1)
+    if k < 1:
+        return 1.0
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(vectors), min(sample_size, len(vectors)), replace=False)
+    approximate = QuantizedRows(*quantize_rows(vectors, np.dtype(dtype))).dequantize()
+    found = 0
+    for exact_scores, approx_scores, query in zip(
+        vectors[sample] @ vectors.T, approximate[sample] @ approximate.T, sample
+    ):
+        exact_scores[query] = approx_scores[query] = -np.inf  # Exclude self
+        exact = np.argpartition(-exact_scores, k - 1)[:k]
+        approx = np.argpartition(-approx_scores, k - 1)[:k]
+        found += len(np.intersect1d(exact, approx))
+    return found / (k * len(sample))
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+        return (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        return None
+
+
+# --- Migration from the per-file layout ---
+
+
+def migrate_legacy_layout(
+    embeddings_dir: str, project_root: str, dtype: str = "float32"
+) -> Optional[EmbeddingStore]:
+    """
+    Move per-file .npy embeddings into a new store and delete them.
+
+    Keys come from the old metadata.json. Each entry's mtime is the .npy file's
+    mtime, so the freshness check (source newer than its embedding) is unchanged.
+    Vectors whose dimension differs from the most common one are dropped.
+    Returns None if the directory holds no .npy files.
+    """
+    npy_files = []
+    for dirpath, _dirnames, filenames in os.walk(embeddings_dir):
+        npy_files.extend(
+            os.path.join(dirpath, name) for name in filenames if name.endswith(".npy")
+        )
+    if not npy_files:
+        return None
+
+    keys_by_path: Dict[str, str] = {}
+    try:
+        with open(
+            os.path.join(embeddings_dir, STORE_METADATA_FILENAME), "r", encoding="utf-8"
+        ) as f:
+            legacy = json.load(f)
+        model = legacy.get("model")
+        for key, entry in legacy.get("keys", {}).items():
+            keys_by_path[entry["path"]] = key  # Written as normalized paths
+    except (OSError, ValueError, KeyError, TypeError):
+        model = None
+
+    # Normalize the root once; the relative paths only need '/' separators
+    root = normalize_path(project_root)
+    loaded = []
+    for npy_path in sorted(npy_files):
+        rel_path = os.path.relpath(npy_path, embeddings_dir)[: -len(".npy")]
+        try:
+            vector = np.load(npy_path).astype(np.float32).ravel()
+            loaded.append(
+                (
+                    f"{root}/{rel_path.replace(os.sep, '/')}",
+                    vector,
+                    os.path.getmtime(npy_path),
+                )
+            )
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable embedding {npy_path}: {e}")
+
+    store = EmbeddingStore(embeddings_dir, dtype)
+    if loaded:
+        dims = [vector.shape[0] for _, vector, _ in loaded]
+        dim = max(set(dims), key=dims.count)
+        for norm_path, vector, mtime in loaded:
+            if vector.shape[0] == dim:
+                store.put(norm_path, vector, keys_by_path.get(norm_path), None, model, mtime)
+    store.save()
+
+    for npy_path in npy_files:
+        try:
+            os.remove(npy_path)
+        except OSError:
+            pass
+    for dirpath, _dirnames, _filenames in os.walk(embeddings_dir, topdown=False):
+        if dirpath != embeddings_dir:
+            try:
+                os.rmdir(dirpath)  # Only succeeds for directories left empty
+            except OSError:
+                pass
+    logger.info(
+        f"Migrated {len(store)} per-file embeddings into {store.matrix_path}."
+    )
+    return store
+
+
+# --- Process-wide stores ---
+
+_STORES: Dict[str, EmbeddingStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def open_embedding_store(
+    embeddings_dir: str, project_root: str, dtype: Optional[str] = None
+) -> EmbeddingStore:
+    """
+    Return the process-wide store for embeddings_dir.
+
+    The store is reloaded when its row index was rewritten by another store
+    object or process, migrated from the per-file layout if needed, and
+    compacted into dtype if it differs from the stored one.
+    """
+    embeddings_dir = normalize_path(embeddings_dir)
+    with _STORES_LOCK:
+        store = _STORES.get(embeddings_dir)
+        signature = _file_signature(os.path.join(embeddings_dir, STORE_METADATA_FILENAME))
+        if store is None or store.signature != signature:
+            if store is not None:
+                store.close()
+            store = EmbeddingStore.load(embeddings_dir)
+            if store is None:
+                store = migrate_legacy_layout(
+                    embeddings_dir, project_root, dtype or "float32"
+                )
+            if store is None:
+                store = EmbeddingStore(embeddings_dir, dtype or "float32")
+                store.signature = signature
+            _STORES[embeddings_dir] = store
+        if dtype and store.dtype.name != dtype:
+            if store.entries:
+                if dtype != "float32" and store.dtype == np.float32:
+                    overlap = quantization_topk_overlap(
+                        store.vectors(store.file_paths()), dtype
+                    )
+                    logger.info(
+                        f"Converting the embedding store to {dtype}: "
+                        f"top-10 neighbour overlap with float32 is {overlap:.3f}."
+                    )
+                store.compact(dtype)
+                store.save()
+            else:
+                store.dtype = np.dtype(dtype)
+        return store
+
+
+def close_embedding_stores() -> None:
+    """Close and forget every open store (their files may be replaced or deleted)."""
+    with _STORES_LOCK:
+        for store in _STORES.values():
+            store.close()
+        _STORES.clear()
@@ -19,7 +19,6 @@
 # ========================================
 # 标准库导入 (Standard Library Imports)
 # ========================================
-import fnmatch  # 用于文件名模式匹配 (for filename pattern matching)
 import json  # 用于JSON数据处理 (for JSON data handling)
 import logging  # 用于日志记录 (for logging)
 import os  # 用于操作系统接口 (for OS interface)
@@ -40,7 +39,7 @@ from cline_utils.dependency_system.core import key_manager  # 密钥管理器 (k
 from cline_utils.dependency_system.io import tracker_io  # 跟踪器IO模块 (tracker I/O module)
 from cline_utils.dependency_system.utils.batch_processor import (
     BatchProcessor,  # 批处理器类 (batch processor class)
-    process_items,  # 批量处理项目函数 (batch process items function)
+    OperationCancelledError,  # 项目被取消/超时 (item cancelled / timed out)
 )
 from cline_utils.dependency_system.utils.cache_manager import (
     cache_manager,  # 缓存管理器 (cache manager)
@@ -55,6 +54,7 @@ from cline_utils.dependency_system.utils.path_utils import (
     normalize_path,  # 路径规范化函数 (path normalization function)
 )
 from cline_utils.dependency_system.utils.phase_tracker import PhaseTracker  # 阶段跟踪器 (phase tracker)
+from cline_utils.dependency_system.utils.project_inventory import ProjectInventory  # 项目清单 (project inventory)
 from cline_utils.dependency_system.utils.template_generator import (
     generate_final_review_checklist,  # 生成最终审查清单函数 (generate final review checklist function)
 )
@@ -104,7 +104,8 @@ OLD_AST_VERIFIED_LINKS_FILENAME = "ast_verified_links_old.json"  # 旧AST验证
 # ==============================================================================
 def analyze_project(
     force_analysis: bool = False,  # 是否强制重新分析(忽略缓存) - Force reanalysis flag
-    force_embeddings: bool = False  # 是否强制重新生成嵌入 - Force embedding regeneration flag
+    force_embeddings: bool = False,  # 是否强制重新生成嵌入 - Force embedding regeneration flag
+    inventory: Optional[ProjectInventory] = None,  # 预扫描的项目清单 - Pre-scanned project inventory
 ) -> Dict[str, Any]:  # 返回包含分析结果和状态的字典 - Returns dict with analysis results and status
     """
     项目分析主函数 - Main Project Analysis Function
@@ -157,6 +158,12 @@ def analyze_project(
             If True, force regeneration of all embeddings
             默认值: False
 
+        inventory (Optional[ProjectInventory]):
+            预扫描的项目清单;为None时在此扫描一次,所有阶段共享
+            Pre-scanned project snapshot; if None (or it does not cover every
+            root) the roots are scanned once here and shared by all phases
+            默认值: None
+
     返回值 (Returns):
     ----------------
         Dict[str, Any]: 包含以下键的字典 (Dictionary containing the following keys):
@@ -227,30 +234,34 @@ def analyze_project(
         "template_generation": {},  # 模板生成结果 (template generation results)
         "auto_visualization": {},  # 自动可视化结果 (auto visualization results)
         "symbol_map_generation": {},  # 符号映射生成结果 - 新增 (symbol map generation results - new)
+        "timeouts": {},  # 超时/取消的项目 (timed-out / cancelled items per phase)
     }
+
+    # 超时与截止时间设置 (Timeout and deadline settings)
+    # 单个病态文件不应阻塞整个运行；超时项目被记录后继续分析
+    # A single pathological file must not block the whole run; timed-out items are recorded and analysis continues
+    analysis_item_timeout = config.get_performance_setting("analysis_item_timeout_seconds")
+    suggestion_item_timeout = config.get_performance_setting("suggestion_item_timeout_seconds")
+    phase_deadline = config.get_performance_setting("phase_deadline_seconds")
+
+    def _record_timeouts(phase_key: str, batcher: BatchProcessor) -> None:
+        """Record timed-out / cancelled items of a batch phase in analysis_results."""
+        if not batcher.timed_out_items and not batcher.cancelled_items:
+            return
+        analysis_results["timeouts"][phase_key] = {
+            "timed_out": [str(item) for item in batcher.timed_out_items],
+            "cancelled": [str(item) for item in batcher.cancelled_items],
+        }
+        analysis_results["warnings"].append(
+            f"{batcher.phase_name}: {len(batcher.timed_out_items)} item(s) timed out, "
+            f"{len(batcher.cancelled_items)} cancelled; results are partial."
+        )
     # --- Exclusion Setup ---
-    excluded_dirs_rel = config.get_excluded_dirs()
-    excluded_paths_config = config.config.get(
-        "excluded_paths", []
-    )  # Get raw "excluded_paths" list from config
-    excluded_paths_rel = [
-        p for p in excluded_paths_config if not os.path.isabs(p)
-    ]  # Filter for relative
-    all_excluded_paths_abs_set = set(config.get_excluded_paths())
-    excluded_extensions = set(config.get_excluded_extensions())
-    excluded_file_patterns_config = config.config.get("excluded_file_patterns", [])
+    # One compiled matcher (dir names, paths, extensions, file patterns) shared by every walker
+    path_filter = config.get_path_filter()
 
     norm_project_root = normalize_path(project_root)
-    if any(
-        norm_project_root == excluded_path
-        or norm_project_root.startswith(
-            excluded_path + os.sep
-            if not excluded_path.endswith(os.sep)
-            else excluded_path
-        )  # Ensure trailing sep for startswith
-        for excluded_path in all_excluded_paths_abs_set
-        if excluded_path
-    ):  # check if excluded_path is not empty
+    if path_filter.is_excluded_dir(norm_project_root):
         logger.info(f"Skipping analysis of excluded project root: {project_root}")
         analysis_results["status"] = "skipped"
         analysis_results["message"] = "Project root is excluded"
@@ -270,16 +281,26 @@ def analyze_project(
         f"Absolute code roots for mini-tracker consideration: {abs_code_roots}"
     )
 
+    # --- Project Inventory ---
+    # 单次并行遍历,供密钥生成、文件识别与嵌入阶段共享
+    # One parallel walk shared by key generation, file identification and embeddings
+    if inventory is None or not abs_all_roots.issubset(inventory.roots):
+        inventory = ProjectInventory.scan(sorted(abs_all_roots), path_filter=path_filter)
+    logger.debug(f"Project inventory holds {len(inventory)} entries.")
+
     # old_map_existed_before_gen logic block
     old_map_existed_before_gen = False
     try:
         # Determine the expected path for the old map file RELATIVE to key_manager.py
         # Use the imported key_manager module to find its location
         key_manager_dir = os.path.dirname(os.path.abspath(key_manager.__file__))
-        old_map_path = normalize_path(
-            os.path.join(key_manager_dir, key_manager.OLD_GLOBAL_KEY_MAP_FILENAME)
+        old_map_existed_before_gen = any(
+            os.path.exists(normalize_path(os.path.join(key_manager_dir, filename)))
+            for filename in (
+                key_manager.OLD_GLOBAL_KEY_MAP_FILENAME,
+                key_manager.LEGACY_OLD_GLOBAL_KEY_MAP_FILENAME,
+            )
         )
-        old_map_existed_before_gen = os.path.exists(old_map_path)
         if old_map_existed_before_gen:
             logger.info(
                 f"Found existing '{key_manager.OLD_GLOBAL_KEY_MAP_FILENAME}' before key generation. Grid migration will prioritize it."
@@ -296,15 +317,14 @@ def analyze_project(
 
     # --- Key Generation ---
     logger.info("Generating/Regenerating keys...")
-    path_to_key_info: Dict[str, key_manager.KeyInfo] = {}
+    path_to_key_info = key_manager.GlobalKeyMap()
     newly_generated_keys: List[key_manager.KeyInfo] = []
     try:
         # Call generate_keys using the module reference
         path_to_key_info, newly_generated_keys = key_manager.generate_keys(
             all_roots_rel,  # Use this variable name
-            excluded_dirs=(set(excluded_dirs_rel)),
-            excluded_extensions=(set(excluded_extensions)),
-            precomputed_excluded_paths=all_excluded_paths_abs_set,
+            path_filter=path_filter,
+            inventory=inventory,
         )
         analysis_results["key_generation"]["count"] = len(path_to_key_info)
         analysis_results["key_generation"]["new_count"] = len(newly_generated_keys)
@@ -333,9 +353,10 @@ def analyze_project(
     old_global_map = key_manager.load_old_global_key_map()  # Load old map (can be None)
     path_migration_info: PathMigrationInfo
     try:
-        path_migration_info = tracker_io.build_path_migration_map(
+        # Built from the key delta: unchanged paths map to themselves without re-normalizing
+        path_migration_info = key_manager.diff_key_maps(
             old_global_map, path_to_key_info
-        )
+        ).migration_map(path_to_key_info)
     except ValueError as ve:
         logger.critical(
             f"Failed to build migration map during analysis: {ve}. Downstream functions may fail."
@@ -355,65 +376,32 @@ def analyze_project(
     # --- File Identification and Filtering ---
     logger.debug("Identifying files for analysis...")
     files_to_analyze_abs = []
-    for abs_root_dir in abs_all_roots:
-        if not os.path.isdir(abs_root_dir):
+    for abs_root_dir in sorted(abs_all_roots):
+        if inventory.get(abs_root_dir) is None:
             logger.warning(f"Configured root directory not found: {abs_root_dir}")
             continue
-        # Use os.walk - order within walk is OS-dependent but shouldn't affect analysis analysis_results
-        for root, dirs, files in os.walk(abs_root_dir, topdown=True):
-            norm_root = normalize_path(root)
-            dirs[:] = [
-                d
-                for d in dirs
-                if d not in excluded_dirs_rel
-                and normalize_path(os.path.join(norm_root, d))
-                not in all_excluded_paths_abs_set
-            ]
-            is_root_excluded_by_path = False
-            if norm_root in all_excluded_paths_abs_set or any(
-                is_subpath(norm_root, excluded)
-                for excluded in all_excluded_paths_abs_set
-                if os.path.isdir(excluded)
-            ):  # Check against dirs in exclusion set
-                is_root_excluded_by_path = True
-            if is_root_excluded_by_path:
-                dirs[:] = []
-                continue
-            for file_name in files:
-                file_path_abs = normalize_path(os.path.join(norm_root, file_name))
-                file_basename = os.path.basename(file_path_abs)
-                _, file_ext_tuple = os.path.splitext(file_name)
-                file_ext = file_ext_tuple.lower()
-
-                is_excluded = (
-                    file_path_abs in all_excluded_paths_abs_set
-                    or any(
-                        is_subpath(file_path_abs, excluded_path_iter)
-                        for excluded_path_iter in all_excluded_paths_abs_set
-                        if os.path.isdir(excluded_path_iter)
-                    )
-                    or file_ext in excluded_extensions
-                    or any(
-                        fnmatch.fnmatch(file_basename, pattern)
-                        for pattern in excluded_file_patterns_config
-                    )  # Use original pattern list from config
-                )
-                if is_excluded:
-                    logger.debug(f"Skipping excluded file: {file_path_abs}")
-                    continue
-                if file_path_abs in path_to_key_info:  # Check against the generated map
-                    files_to_analyze_abs.append(file_path_abs)
-                else:
-                    logger.warning(f"File found but no key generated: {file_path_abs}")
+        # Excluded entries are flagged in the inventory; excluded dirs were never descended
+        for entry in inventory.files(abs_root_dir):
+            if entry.path in path_to_key_info:  # Check against the generated map
+                files_to_analyze_abs.append(entry.path)
+            else:
+                logger.warning(f"File found but no key generated: {entry.path}")
     logger.debug(f"Found {len(files_to_analyze_abs)} files to analyze.")
 
     # --- File Analysis ---
     logger.debug("Starting file analysis...")
-    # Use process_items for potential parallelization
+    # Use BatchProcessor for parallelization; files that exceed the per-item timeout are recorded and skipped
     # Pass force_analysis flag down to analyze_file if caching is implemented there
-    analysis_results_list = process_items(
+    analysis_batcher = BatchProcessor(
+        phase_name="File Analysis",
+        item_timeout=analysis_item_timeout,
+        phase_deadline=phase_deadline,
+        timeout_result=lambda p: {"error": "Analysis timed out", "timed_out": True, "file_path": p},
+    )
+    analysis_results_list = analysis_batcher.process_items(
         files_to_analyze_abs, analyze_file, force=force_analysis
     )
+    _record_timeouts("file_analysis", analysis_batcher)
     file_analysis_results: Dict[str, Any] = {}
     analyzed_count, skipped_count, error_count = 0, 0, 0
     for file_path_abs, analysis_result in zip(
@@ -545,25 +533,8 @@ def analyze_project(
 
     # --- Create file_to_module mapping (Adapted for path_to_key_info) ---
     # Maps normalized absolute file path -> normalized absolute parent directory path (module path)
-    logger.debug("Creating file-to-module mapping...")
-    file_to_module: Dict[str, str] = {}
-    # Iterate through all the generated key information from path_to_key_info
-    for key_info_obj in path_to_key_info.values():  # Iterate over KeyInfo objects
-        # We only care about mapping files
-        if not key_info_obj.is_directory:
-            # Ensure the file has a parent path recorded
-            if key_info_obj.parent_path:
-                file_path = key_info_obj.norm_path
-                module_path = key_info_obj.parent_path  # Direct parent directory path
-                file_to_module[file_path] = module_path
-                logger.debug(
-                    f"Mapped file '{file_path}' to module '{module_path}'"
-                )  # Optional debug log
-
-            else:
-                logger.warning(
-                    f"File '{key_info_obj.norm_path}' (Key: {key_info_obj.key_string}) has no parent path in KeyInfo. Cannot map to a module."
-                )
+    # Taken from the GlobalKeyMap index (files without a parent path are not mapped)
+    file_to_module: Dict[str, str] = path_to_key_info.file_to_module_map()
     logger.info(f"File-to-module mapping created with {len(file_to_module)} entries.")
 
     # --- Embedding generation ---
@@ -591,6 +562,7 @@ def analyze_project(
             path_to_key_info,
             force=force_embeddings,
             batch_size=optimal_batch,
+            inventory=inventory,
         )
         analysis_results["embedding_generation"]["status"] = (
             "success" if success else "partial_failure"
@@ -653,6 +625,8 @@ def analyze_project(
                 shared_scan_counter=shared_scan_counter,
             )
             return (single_file_path, suggs or [], ast_links or [])
+        except OperationCancelledError:
+            raise  # Let the batch processor record the timeout
         except Exception as e:
             logger.error(
                 f"Suggestion wrapper error for {single_file_path}: {e}", exc_info=True
@@ -660,7 +634,11 @@ def analyze_project(
             return (single_file_path, [], [])
 
     suggestion_batcher = BatchProcessor(
-        show_progress=True, phase_name="Dependency Suggestion"
+        show_progress=True,
+        phase_name="Dependency Suggestion",
+        item_timeout=suggestion_item_timeout,
+        phase_deadline=phase_deadline,
+        timeout_result=lambda p: (p, [], []),
     )
 
     # Create a shared counter for global reranker limit
@@ -680,6 +658,7 @@ def analyze_project(
         doc_similarity_threshold=doc_similarity_threshold,
         shared_scan_counter=shared_scan_counter,  # Pass shared counter
     )
+    _record_timeouts("dependency_suggestion", suggestion_batcher)
     # Use configured threshold for doc_similarity
     doc_similarity_threshold = config.get_threshold("doc_similarity")
 
@@ -954,7 +933,7 @@ def analyze_project(
                 if ki_obj.norm_path == code_r_abs or is_subpath(
                     ki_obj.norm_path, code_r_abs
                 ):
-                    if ki_obj.norm_path not in all_excluded_paths_abs_set:
+                    if not path_filter.is_excluded_dir(ki_obj.norm_path):
                         is_mod_dir = True
                         break
             if is_mod_dir:
@@ -975,70 +954,60 @@ def analyze_project(
         )
 
     # --- Update Mini Trackers ---
+    # Modules are updated in parallel (tracker_io.update_mini_trackers); the doc
+    # and main trackers below are only updated once every mini tracker is written.
+    mini_module_paths: List[str] = []
+    for module_key_info_obj in potential_mini_tracker_dirs:
+        norm_module_path = module_key_info_obj.norm_path
+        if not norm_module_path:
+            logger.error(
+                f"Encountered module KeyInfo with empty norm_path: {module_key_info_obj}. Skipping mini-tracker update."
+            )
+            analysis_results["tracker_updates"]["mini"][
+                f"ERROR_EMPTY_MODULE_PATH_FOR_{module_key_info_obj.key_string}"
+            ] = "failure_empty_path"
+            continue
+        if norm_module_path in mini_tracker_paths_updated:
+            continue
+        expected_mini_tracker_filename = os.path.basename(
+            tracker_io.get_tracker_path(
+                project_root=project_root,
+                tracker_type="mini",
+                module_path=norm_module_path,
+            )
+        )
+        if os.path.isdir(norm_module_path) and not _is_empty_dir(
+            norm_module_path, expected_mini_tracker_filename
+        ):
+            logger.debug(
+                f"Updating mini tracker for module '{norm_module_path}' (Key: {module_key_info_obj.key_string})"
+            )
+            mini_tracker_paths_updated.add(norm_module_path)
+            mini_module_paths.append(norm_module_path)
+        elif os.path.isdir(norm_module_path):
+            logger.debug(
+                f"Skipping mini-tracker update for empty module directory: {norm_module_path}"
+            )
+
     with PhaseTracker(
-        total=len(potential_mini_tracker_dirs), phase_name="Updating Mini Trackers"
+        total=len(mini_module_paths), phase_name="Updating Mini Trackers"
     ) as tracker:
-        for module_key_info_obj in potential_mini_tracker_dirs:
-            norm_module_path = module_key_info_obj.norm_path
-            tracker.update(description=f"Updating {os.path.basename(norm_module_path)}")
-
-            if not norm_module_path:
-                logger.error(
-                    f"Encountered module KeyInfo with empty norm_path: {module_key_info_obj}. Skipping mini-tracker update."
-                )
-                analysis_results["tracker_updates"]["mini"][
-                    f"ERROR_EMPTY_MODULE_PATH_FOR_{module_key_info_obj.key_string}"
-                ] = "failure_empty_path"
-                continue
-            if norm_module_path in mini_tracker_paths_updated:
-                continue
-            expected_mini_tracker_filename = os.path.basename(
-                tracker_io.get_tracker_path(
-                    project_root=project_root,
-                    tracker_type="mini",
-                    module_path=norm_module_path,
-                )
-            )
-            if os.path.isdir(norm_module_path) and not _is_empty_dir(
-                norm_module_path, expected_mini_tracker_filename
-            ):
-                mini_tracker_path_val = tracker_io.get_tracker_path(
-                    project_root=project_root,
-                    tracker_type="mini",
-                    module_path=norm_module_path,
-                )
-                logger.debug(
-                    f"Updating mini tracker for module '{norm_module_path}' (Key: {module_key_info_obj.key_string}) at: {mini_tracker_path_val}"
-                )
-                mini_tracker_paths_updated.add(norm_module_path)
-                try:
-                    tracker_io.update_tracker(
-                        output_file_suggestion=mini_tracker_path_val,
-                        path_to_key_info=path_to_key_info,
-                        tracker_type="mini",
-                        suggestions_external=all_global_instance_suggestions,
-                        file_to_module=file_to_module,
-                        new_keys=newly_generated_keys,
-                        # Force suggestion application so 'p' (and EMPTY) never block 's'/'S'
-                        force_apply_suggestions=True,
-                        use_old_map_for_migration=old_map_existed_before_gen,
-                    )
-                    analysis_results["tracker_updates"]["mini"][
-                        norm_module_path
-                    ] = "success"
-                except Exception as mini_err:
-                    logger.error(
-                        f"Error updating mini tracker {mini_tracker_path_val}: {mini_err}",
-                        exc_info=True,
-                    )
-                    analysis_results["tracker_updates"]["mini"][
-                        norm_module_path
-                    ] = "failure"
-                    analysis_results["status"] = "warning"
-            elif os.path.isdir(norm_module_path):
-                logger.debug(
-                    f"Skipping mini-tracker update for empty module directory: {norm_module_path}"
-                )
+        mini_results = tracker_io.update_mini_trackers(
+            mini_module_paths,
+            path_to_key_info,
+            suggestions_external=all_global_instance_suggestions,
+            file_to_module=file_to_module,
+            new_keys=newly_generated_keys,
+            # Force suggestion application so 'p' (and EMPTY) never block 's'/'S'
+            force_apply_suggestions=True,
+            use_old_map_for_migration=old_map_existed_before_gen,
+            progress=lambda module_path: tracker.update(
+                description=f"Updated {os.path.basename(module_path)}"
+            ),
+        )
+    analysis_results["tracker_updates"]["mini"].update(mini_results)
+    if any(status != "success" for status in mini_results.values()):
+        analysis_results["status"] = "warning"
 
     # --- Update Doc Tracker ---
     doc_directories_rel = (
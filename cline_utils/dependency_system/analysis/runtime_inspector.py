@@ -1111,13 +1111,13 @@ def main():
     1. 解析命令行参数（项目根目录）
     2. 初始化ConfigManager
     3. 加载配置（code_roots、排除项等）
-    4. 遍历code_roots中的所有Python文件
+    4. 遍历code_roots中的所有Python文件（有项目清单时使用清单快照）
     5. 对每个文件调用get_module_info()
     6. 将所有符号信息保存到runtime_symbols.json
 
     命令行用法：
     ----------
-    python runtime_inspector.py <project_root>
+    python runtime_inspector.py <project_root> [--inventory <file>]
 
     输出文件：
     ----------
@@ -1140,9 +1140,16 @@ def main():
     # 步骤1: 检查命令行参数
     # ------------------------------------------------------------------------
     if len(sys.argv) < 2:
-        print("Usage: python runtime_inspector.py <project_root>")
+        print("Usage: python runtime_inspector.py <project_root> [--inventory <file>]")
         sys.exit(1)
 
+    # 可选：由analyze-project预先扫描的项目清单 / Optional inventory pre-scanned by analyze-project
+    inventory_file = None
+    if "--inventory" in sys.argv[2:]:
+        idx = sys.argv.index("--inventory", 2)
+        if idx + 1 < len(sys.argv):
+            inventory_file = sys.argv[idx + 1]
+
     # ------------------------------------------------------------------------
     # 步骤2: 获取项目根目录
     # ------------------------------------------------------------------------
@@ -1161,6 +1168,7 @@ def main():
     try:
         from cline_utils.dependency_system.utils.config_manager import ConfigManager
         from cline_utils.dependency_system.utils.path_utils import normalize_path
+        from cline_utils.dependency_system.utils.project_inventory import ProjectInventory
     except ImportError as e:
         logger.error(f"Could not import ConfigManager: {e}. Ensure cline_utils is in python path.")
         sys.exit(1)
@@ -1185,12 +1193,11 @@ def main():
         # ====================================================================
         # 获取代码根目录列表（已归一化）
         code_roots = config_manager.get_code_root_directories()
-        # 获取排除的目录名集合
-        excluded_dirs = set(config_manager.get_excluded_dirs())
-        # 获取排除的文件扩展名集合
-        excluded_extensions = set(config_manager.get_excluded_extensions())
-        # 获取排除的完整路径集合
-        excluded_paths = set(config_manager.get_excluded_paths())
+        # 获取编译好的排除匹配器（目录名、路径、扩展名、文件模式）
+        # Compiled exclusion matcher (dir names, paths, extensions, file patterns)
+        path_filter = config_manager.get_path_filter()
+        # 项目清单快照（不可用时回退到os.walk）/ Inventory snapshot (falls back to os.walk)
+        inventory = ProjectInventory.load(inventory_file) if inventory_file else None
 
         logger.info(f"Loaded configuration. Code roots: {code_roots}")
 
@@ -1253,75 +1260,57 @@ def main():
             logger.info(f"Scanning root: {root_dir}")
 
             # ================================================================
-            # 步骤6.3: 遍历目录树
+            # 步骤6.3: 收集候选文件（优先使用项目清单快照）
+            # Collect candidate files (prefer the project inventory snapshot)
             # ================================================================
-            for root, dirs, files in os.walk(root_dir):
-                # 归一化当前目录路径
-                root = normalize_path(root)
-
-                # ------------------------------------------------------------
-                # 步骤6.3.1: 过滤排除的目录
-                # ------------------------------------------------------------
-                # 就地修改dirs列表以跳过排除的目录
-                dirs[:] = [d for d in dirs if d not in excluded_dirs]
-
-                # ------------------------------------------------------------
-                # 步骤6.3.2: 过滤排除的完整路径
-                # ------------------------------------------------------------
-                valid_dirs = []
-                for d in dirs:
-                    dir_path = normalize_path(os.path.join(root, d))
-                    if dir_path not in excluded_paths:
-                        valid_dirs.append(d)
-                dirs[:] = valid_dirs
-
-                # ------------------------------------------------------------
-                # 步骤6.3.3: 遍历文件
-                # ------------------------------------------------------------
-                for file in files:
-                    # --------------------------------------------------------
-                    # 过滤非Python文件和__开头的文件
-                    # --------------------------------------------------------
-                    if not file.endswith(".py") or file.startswith("__"):
-                        continue
-
-                    # --------------------------------------------------------
-                    # 检查文件扩展名是否被排除
-                    # --------------------------------------------------------
-                    _, ext = os.path.splitext(file)
-                    if ext in excluded_extensions:
-                        continue
-
-                    # --------------------------------------------------------
-                    # 构建完整文件路径
-                    # --------------------------------------------------------
-                    file_path = normalize_path(os.path.join(root, file))
-
-                    # --------------------------------------------------------
-                    # 检查完整路径是否被排除
-                    # --------------------------------------------------------
-                    if file_path in excluded_paths:
-                        continue
-
-                    # --------------------------------------------------------
-                    # 构建模块名（近似）
-                    # --------------------------------------------------------
-                    # 相对于项目根的路径
-                    rel_path = os.path.relpath(file_path, project_root)
-                    # 转换为模块名格式
-                    module_name = rel_path.replace(os.sep, ".").replace(".py", "")
-
-                    logger.info(f"Inspecting {module_name}...")
+            if inventory is not None and inventory.get(root_dir) is not None:
+                # 清单已标记排除项，且未进入被排除的目录
+                candidate_files = [entry.path for entry in inventory.files(root_dir)]
+            else:
+                candidate_files = []
+                for root, dirs, files in os.walk(root_dir):
+                    # 归一化当前目录路径
+                    root = normalize_path(root)
+                    # 就地修改dirs列表以跳过排除的目录
+                    dirs[:] = [
+                        d for d in dirs if not path_filter.is_excluded_dir(f"{root}/{d}")
+                    ]
+                    for file in files:
+                        file_path = normalize_path(os.path.join(root, file))
+                        # 检查路径、扩展名和文件模式是否被排除
+                        if not path_filter.is_excluded(file_path):
+                            candidate_files.append(file_path)
 
-                    # --------------------------------------------------------
-                    # 步骤6.3.4: 检查模块并收集符号
-                    # --------------------------------------------------------
-                    # 传递absolute_code_roots用于路径验证
-                    info = get_module_info(file_path, module_name, absolute_code_roots)
+            # ================================================================
+            # 步骤6.4: 遍历文件
+            # ================================================================
+            for file_path in candidate_files:
+                file = os.path.basename(file_path)
+                # --------------------------------------------------------
+                # 过滤非Python文件和__开头的文件
+                # --------------------------------------------------------
+                if not file.endswith(".py") or file.startswith("__"):
+                    continue
 
-                    if info:
-                        # 将符号信息添加到结果字典
-                        all_symbols[file_path] = info
+                # --------------------------------------------------------
+                # 构建模块名（近似）
+                # --------------------------------------------------------
+                # 相对于项目根的路径
+                rel_path = os.path.relpath(file_path, project_root)
+                # 转换为模块名格式
+                module_name = rel_path.replace(os.sep, ".").replace(".py", "")
+
+                logger.info(f"Inspecting {module_name}...")
+
+                # --------------------------------------------------------
+                # 步骤6.4.1: 检查模块并收集符号
+                # --------------------------------------------------------
+                # 传递absolute_code_roots用于路径验证
+                info = get_module_info(file_path, module_name, absolute_code_roots)
+
+                if info:
+                    # 将符号信息添加到结果字典
+                    all_symbols[file_path] = info
 
         # ------------------------------------------------------------------------
         # 步骤7: 保存符号信息到JSON文件
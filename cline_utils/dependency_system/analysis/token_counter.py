@@ -0,0 +1,257 @@
+# analysis/token_counter.py
+
+"""
+Token counts for planning embedding and reranking work.
+
+Token counts only decide the order texts are processed in, their context
+bucket, whether they are chunked or truncated, and reranker batch sizes.
+Running the full tokenizer over every text on every run is therefore wasted
+work. A TokenCounter:
+
+- caches exact counts by a hash of the text in a file per tokenizer
+  (token_counts.<name hash>.json) next to the embedding store, so a text
+  that does not change is tokenized once, not once per run, and the
+  embedding and reranker tokenizers keep separate caches;
+- learns the UTF-8 bytes per token of this tokenizer on this project from
+  the exact counts it makes (persisted with them);
+- estimates a text's count from its byte length once calibrated, and runs
+  the tokenizer only when the estimate's error interval straddles one of the
+  caller's boundaries (a bucket edge or the chunk size), where the exact
+  value changes the plan.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+
+logger = logging.getLogger(__name__)
+
+TOKEN_COUNTS_FILENAME = "token_counts.{}.json"  # Formatted with a hash of the tokenizer name
+TOKEN_COUNTS_VERSION = 1
+MAX_CACHED_COUNTS = 100000  # Least recently used counts are dropped beyond this
+CALIBRATION_MIN_SAMPLES = 32  # Exact counts needed before estimating
+CALIBRATION_MIN_TOKENS = 64  # Shorter texts have too noisy a bytes-per-token ratio
+ESTIMATE_SLACK = 0.15  # Widening of the observed bytes-per-token range
+
+TOKENIZER_LOCK = threading.Lock()  # Tokenizers are shared by the embedding preparation workers
+
+
+def _tokenizer_name(tokenizer: Any) -> str:
+    name = getattr(tokenizer, "name_or_path", None)
+    return name if isinstance(name, str) and name else type(tokenizer).__name__
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def token_counts_path(cache_dir: str, tokenizer: Any) -> str:
+    """The file caching tokenizer's counts in cache_dir."""
+    name_hash = _text_hash(_tokenizer_name(tokenizer))[:12]
+    return os.path.join(normalize_path(cache_dir), TOKEN_COUNTS_FILENAME.format(name_hash))
+
+
+class TokenCounter:
+    """
+    Cached exact token counts and a calibrated estimator for one tokenizer.
+
+    Without a tokenizer every count is the len(text) // 4 rule of thumb.
+    Safe to share between threads; exact counts run under TOKENIZER_LOCK.
+    """
+
+    def __init__(self, tokenizer: Any = None, cache_path: Optional[str] = None):
+        self.tokenizer = tokenizer
+        self.cache_path = cache_path
+        self.tokenizer_name = _tokenizer_name(tokenizer) if tokenizer is not None else None
+        self.counts: Dict[str, int] = {}
+        # Calibration: totals and the extreme bytes-per-token ratios seen
+        self.samples = 0
+        self.sample_bytes = 0
+        self.sample_tokens = 0
+        self.min_ratio: Optional[float] = None
+        self.max_ratio: Optional[float] = None
+        self.exact_counts = 0
+        self.cache_hits = 0
+        self.estimates = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @property
+    def calibrated(self) -> bool:
+        return self.samples >= CALIBRATION_MIN_SAMPLES
+
+    # --- Persistence ---
+
+    @classmethod
+    def load(cls, tokenizer: Any, cache_path: str) -> "TokenCounter":
+        """Counter with the counts cached in cache_path (ignored if written for another tokenizer)."""
+        counter = cls(tokenizer, cache_path)
+        if tokenizer is None:
+            return counter
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return counter
+        if (
+            data.get("version") != TOKEN_COUNTS_VERSION
+            or data.get("tokenizer") != counter.tokenizer_name
+        ):
+            return counter
+        calibration = data.get("calibration", {})
+        counter.samples = calibration.get("samples", 0)
+        counter.sample_bytes = calibration.get("bytes", 0)
+        counter.sample_tokens = calibration.get("tokens", 0)
+        counter.min_ratio = calibration.get("min_ratio")
+        counter.max_ratio = calibration.get("max_ratio")
+        counter.counts = dict(data.get("counts", {}))
+        return counter
+
+    def save(self) -> None:
+        """Write the cached counts and calibration if they changed."""
+        if self.cache_path is None or self.tokenizer is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            if len(self.counts) > MAX_CACHED_COUNTS:
+                excess = len(self.counts) - MAX_CACHED_COUNTS
+                for text_hash in list(self.counts)[:excess]:
+                    del self.counts[text_hash]
+            data = {
+                "version": TOKEN_COUNTS_VERSION,
+                "tokenizer": self.tokenizer_name,
+                "calibration": {
+                    "samples": self.samples,
+                    "bytes": self.sample_bytes,
+                    "tokens": self.sample_tokens,
+                    "min_ratio": self.min_ratio,
+                    "max_ratio": self.max_ratio,
+                },
+                "counts": self.counts,
+            }
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save token counts to {self.cache_path}: {e}")
+
+    # --- Counting ---
+
+    def count(self, text: str) -> int:
+        """Exact token count of text, from the cache when it was counted before."""
+        if self.tokenizer is None:
+            return len(text) // 4
+        text_hash = _text_hash(text)
+        with self._lock:
+            cached = self.counts.pop(text_hash, None)
+            if cached is not None:
+                self.counts[text_hash] = cached  # Most recently used last
+                self.cache_hits += 1
+                return cached
+        try:
+            with TOKENIZER_LOCK:
+                tokens = len(self.tokenizer.encode(text, add_special_tokens=False))
+        except Exception:
+            return len(text) // 4
+        with self._lock:
+            self.counts[text_hash] = tokens
+            self.exact_counts += 1
+            self._calibrate(len(text.encode("utf-8")), tokens)
+            self._dirty = True
+        return tokens
+
+    def _calibrate(self, byte_count: int, tokens: int) -> None:
+        if tokens < CALIBRATION_MIN_TOKENS:
+            return
+        ratio = byte_count / tokens
+        self.samples += 1
+        self.sample_bytes += byte_count
+        self.sample_tokens += tokens
+        self.min_ratio = ratio if self.min_ratio is None else min(self.min_ratio, ratio)
+        self.max_ratio = ratio if self.max_ratio is None else max(self.max_ratio, ratio)
+
+    def estimate(self, text: str) -> int:
+        """Cached exact count, else the calibrated estimate, else an exact count."""
+        return self.plan(text, ())
+
+    def plan(self, text: str, boundaries: Iterable[int]) -> int:
+        """
+        Token count for planning against boundaries (a count compared with "> b"):
+        the calibrated estimate when every count in its error interval falls on
+        the same side of each boundary, otherwise the exact count.
+        """
+        if self.tokenizer is None:
+            return len(text) // 4
+        with self._lock:
+            cached = self.counts.get(_text_hash(text))
+            calibrated = self.calibrated
+        if cached is not None or not calibrated:
+            return self.count(text)
+        byte_count = len(text.encode("utf-8"))
+        low = byte_count / (self.max_ratio * (1 + ESTIMATE_SLACK))
+        high = byte_count / (self.min_ratio * (1 - ESTIMATE_SLACK))
+        low, high = math.ceil(low), math.floor(high)
+        if low > high or any(low <= boundary < high for boundary in boundaries):
+            return self.count(text)
+        with self._lock:
+            self.estimates += 1
+        expected = byte_count * self.sample_tokens / max(1, self.sample_bytes)
+        return min(max(int(round(expected)), low), high)
+
+    def stats(self) -> str:
+        return (
+            f"{self.exact_counts} tokenized, {self.cache_hits} cached, "
+            f"{self.estimates} estimated"
+        )
+
+
+# --- Process-wide counters ---
+
+_COUNTERS: Dict[Tuple[str, str], TokenCounter] = {}  # (cache path, tokenizer name) -> counter
+_COUNTERS_LOCK = threading.Lock()
+
+
+def get_token_counter(tokenizer: Any, cache_dir: Optional[str]) -> TokenCounter:
+    """
+    Return the process-wide counter for tokenizer, cached in cache_dir
+    (usually the embeddings directory); loaded from disk on first use.
+    Each tokenizer has its own counter and file. A reloaded tokenizer of the
+    same name keeps its counter's counts.
+    """
+    if tokenizer is None or cache_dir is None:
+        return TokenCounter(tokenizer)
+    cache_path = token_counts_path(cache_dir, tokenizer)
+    key = (cache_path, _tokenizer_name(tokenizer))
+    with _COUNTERS_LOCK:
+        counter = _COUNTERS.get(key)
+        if counter is None:
+            counter = TokenCounter.load(tokenizer, cache_path)
+            _COUNTERS[key] = counter
+        elif counter.tokenizer is not tokenizer:
+            counter.tokenizer = tokenizer
+        return counter
+
+
+def save_token_counters() -> None:
+    """Write every process-wide counter's changed counts."""
+    with _COUNTERS_LOCK:
+        counters = list(_COUNTERS.values())
+    for counter in counters:
+        counter.save()
+
+
+def reset_token_counters() -> None:
+    """Forget the process-wide counters (their cache files may be replaced or deleted)."""
+    with _COUNTERS_LOCK:
+        _COUNTERS.clear()
@@ -11,10 +11,13 @@
 - exceptions.py: 异常定义，定义系统使用的标准异常类型
 - exceptions_enhanced.py: 增强异常 (v8.0)，提供更详细的错误处理
 - key_manager.py: 键管理器，管理上下文键 (KeyInfo) 和依赖追踪键
+- key_map_store.py: 全局键映射的二进制存储（字符串表、定长记录、哈希索引，mmap 延迟读取）
+- key_snapshot.py: 增量键生成的目录快照（mtime、目录键、子项键）
 
 核心概念:
 ---------
 - 上下文键 (KeyInfo): 富上下文的键，用于准确的依赖追踪
+- 全局键映射 (GlobalKeyMap): 路径到 KeyInfo 的字典，带键字符串/基础键/父目录/模块索引
 - 依赖网格: 支持多向依赖关系的网格结构
   - <: 依赖于（depends on）
   - >: 被依赖（depended by）
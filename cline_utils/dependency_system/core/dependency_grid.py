@@ -25,6 +25,8 @@ import re  # 正则表达式操作 / Regular expression operations
 from typing import Dict, List, Tuple, Optional  # 类型提示 / Type hints
 from collections import defaultdict  # 默认字典 / Default dictionary for grouping
 
+import numpy as np  # 向量化网格重映射 / Vectorized grid remapping
+
 # ============================================================================
 # 内部模块导入 / Internal Module Imports
 # ============================================================================
@@ -715,6 +717,92 @@ def get_dependencies_from_grid(grid: Dict[str, str], source_key_str: str, key_in
     return {k: list(v) for k, v in results.items()}
 
 
+# ============================================================================
+# 网格重映射函数 / Grid Remapping Functions
+# ============================================================================
+
+def remap_grid_rows(compressed_rows: List[str], old_to_new: List[int],
+                    new_size: int) -> Tuple[List[List[str]], int, int, List[int]]:
+    """
+    按索引置换将旧网格的值复制到新网格 / Copy old grid values into a new grid through an index permutation.
+
+    old_to_new[i] 是旧行/列 i 在新网格中的索引（-1 表示已删除）。只解压缩被保留的行，
+    然后用一次花式索引取出存活的子网格并写入新位置，而不是逐个单元格解析路径。
+    old_to_new[i] is the new index of old row/column i (-1 if dropped). Only surviving rows are
+    decompressed; the surviving sub-grid is then taken with one fancy index and scattered into
+    place instead of resolving paths cell by cell.
+
+    语义与逐单元格复制相同 / Same semantics as the cell-by-cell copy:
+    - 不复制 DIAGONAL/PLACEHOLDER/EMPTY 值 / DIAGONAL/PLACEHOLDER/EMPTY values are not copied
+    - 目标单元格已填充（对角线，或多个旧索引映射到同一新索引时已写入）则跳过，
+      按旧网格的行优先顺序先写者胜 / A filled target (the diagonal, or one already written when
+      several old indices map to the same new index) is skipped; first write in old row-major order wins
+    - 解压缩长度不等于旧网格大小的行整行跳过 / Rows whose decompressed length differs from the
+      old grid size are skipped entirely
+
+    Args:
+        compressed_rows: 旧网格的压缩行，按旧定义顺序 / Old compressed rows in old definition order.
+        old_to_new: 旧索引到新索引的映射 / Old index -> new index (-1 = dropped).
+        new_size: 新网格大小 / Size of the new grid.
+
+    Returns:
+        (新网格的解压缩行, 复制的值数量, 因目标已填充而跳过的数量, 长度错误的旧行索引)
+        (decompressed new rows, values copied, values skipped because the target was filled,
+        old row indices with a bad length)
+    """
+    perm = np.asarray(old_to_new, dtype=np.intp).reshape(-1)
+    old_size = len(perm)
+    surviving = np.flatnonzero(perm >= 0)
+
+    # 只解压缩存活的行 / Decompress only surviving rows
+    row_indices: List[int] = []
+    row_strings: List[str] = []
+    bad_rows: List[int] = []
+    for old_idx in surviving.tolist():
+        row = decompress(compressed_rows[old_idx])
+        if len(row) != old_size:
+            bad_rows.append(old_idx)
+            continue
+        row_indices.append(old_idx)
+        row_strings.append(row)
+
+    # 依赖字符是ASCII；其他字符时退回到每字符4字节 / Dependency chars are ASCII; fall back to 4 bytes per char otherwise
+    if all(row.isascii() for row in row_strings):
+        encoding, dtype = "latin-1", np.uint8
+    else:
+        encoding, dtype = "utf-32-le", np.uint32
+
+    def codes(chars: str) -> np.ndarray:
+        return np.frombuffer(chars.encode(encoding), dtype=dtype)
+
+    placeholder, diagonal = codes(PLACEHOLDER_CHAR)[0], codes(DIAGONAL_CHAR)[0]
+    new_grid = np.full((new_size, new_size), placeholder, dtype=dtype)
+    copied = skipped_filled = 0
+
+    if row_indices and len(surviving):
+        old_grid = codes("".join(row_strings)).reshape(len(row_indices), old_size)
+        rows = np.asarray(row_indices, dtype=np.intp)
+        block = old_grid[:, surviving]  # 存活子网格 / Surviving sub-grid
+        new_rows = perm[rows][:, None]
+        new_cols = perm[surviving][None, :]
+
+        copyable = ~np.isin(block, codes(DIAGONAL_CHAR + PLACEHOLDER_CHAR + EMPTY_CHAR))
+        selected = copyable & (new_rows != new_cols)  # 新对角线已填充 / The new diagonal is filled
+        targets = (new_rows * new_size + new_cols)[selected]  # 行优先顺序 / Row-major order
+        values = block[selected]
+        if len(np.unique(perm[surviving])) < len(surviving):
+            # 多对一映射：保留每个目标的第一次写入 / Many-to-one: keep the first write per target
+            targets, first = np.unique(targets, return_index=True)
+            values = values[first]
+        new_grid.reshape(-1)[targets] = values
+        copied = len(targets)
+        skipped_filled = int(np.count_nonzero(copyable)) - copied
+
+    new_grid[np.arange(new_size), np.arange(new_size)] = diagonal
+    new_rows_list = [list(row.tobytes().decode(encoding)) for row in new_grid]
+    return new_rows_list, copied, skipped_filled, bad_rows
+
+
 # ============================================================================
 # 网格格式化函数 / Grid Formatting Functions
 # ============================================================================
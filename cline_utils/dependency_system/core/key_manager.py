@@ -31,13 +31,24 @@ import logging  # 日志记录 / Logging
 import os  # 操作系统接口 / Operating system interface
 import re  # 正则表达式 / Regular expressions
 import shutil  # 高级文件操作 / High-level file operations (for renaming)
+import threading  # 线程锁 / Thread lock (lazy map materialization)
+import time  # 时间戳 / Timestamps (snapshot mtime trust window)
 from collections import defaultdict  # 默认字典 / Default dictionary
-from typing import Dict, List, NamedTuple, Optional, Set, Tuple  # 类型提示 / Type hints
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple  # 类型提示 / Type hints
 
 # ============================================================================
 # 内部模块导入 / Internal Module Imports
 # ============================================================================
+from cline_utils.dependency_system.core.key_map_store import (
+    KeyMapFormatError,
+    KeyMapStore,
+    write_key_map,
+)
+from cline_utils.dependency_system.core.key_snapshot import KeySnapshot
 from cline_utils.dependency_system.utils.config_manager import ConfigManager
+from cline_utils.dependency_system.utils.path_filter import PathFilter
+from cline_utils.dependency_system.utils.path_intern import intern_path
+from cline_utils.dependency_system.utils.project_inventory import ProjectInventory
 # 配置管理器 / Configuration manager
 from cline_utils.dependency_system.utils.path_utils import (
     get_project_root,  # 获取项目根目录 / Get project root directory
@@ -80,8 +91,16 @@ KEY_VALIDATION_PATTERN = re.compile(
 KEY_PATTERN = r"\d+|\D+"
 
 # 文件名常量 / Filename Constants
-GLOBAL_KEY_MAP_FILENAME = "global_key_map.json"          # 当前全局键映射文件 / Current global key map file
-OLD_GLOBAL_KEY_MAP_FILENAME = "global_key_map_old.json"  # 旧全局键映射文件 / Old global key map file
+GLOBAL_KEY_MAP_FILENAME = "global_key_map.bin"          # 当前全局键映射文件 / Current global key map file
+OLD_GLOBAL_KEY_MAP_FILENAME = "global_key_map_old.bin"  # 旧全局键映射文件 / Old global key map file
+# 旧版 JSON 格式（仅作读取回退） / Legacy JSON format (read fallback only)
+LEGACY_GLOBAL_KEY_MAP_FILENAME = "global_key_map.json"
+LEGACY_OLD_GLOBAL_KEY_MAP_FILENAME = "global_key_map_old.json"
+# JSON 导出（加载时从不读取） / JSON exports (never read by the loaders)
+EXPORT_GLOBAL_KEY_MAP_FILENAME = "global_key_map.export.json"
+EXPORT_OLD_GLOBAL_KEY_MAP_FILENAME = "global_key_map_old.export.json"
+# 增量键生成快照 / Incremental key generation snapshot
+KEY_SNAPSHOT_FILENAME = "key_generation_snapshot.json"
 
 
 # ============================================================================
@@ -136,6 +155,442 @@ class KeyInfo(NamedTuple):
     is_directory: bool  # 是否为目录 / True if the key represents a directory
 
 
+class _KeyMapIndexes(NamedTuple):
+    """GlobalKeyMap 的派生索引 / Derived indexes of a GlobalKeyMap."""
+
+    by_key: Dict[str, KeyInfo]  # key_string -> KeyInfo (first occurrence wins)
+    by_base_key: Dict[str, List[KeyInfo]]  # base key -> instances, ordered by #GI
+    children: Dict[str, List[KeyInfo]]  # parent_path -> direct children (map order)
+    file_to_module: Dict[str, str]  # file norm_path -> module (parent directory) path
+
+
+class GlobalKeyMap(Dict[str, KeyInfo]):
+    """
+    带索引的全局键映射 / Indexed global key map.
+
+    这是一个 dict（norm_path -> KeyInfo），可在任何需要 Dict[str, KeyInfo] 的地方使用，
+    同时提供按键字符串、基础键、父目录和所属模块的 O(1) 查找。
+    A dict (norm_path -> KeyInfo) usable anywhere a Dict[str, KeyInfo] is expected,
+    with O(1) lookups by key string, base key, parent directory and owning module.
+
+    索引在首次查询时构建，任何修改都会使其失效。
+    Indexes are built on first query and invalidated by any mutation.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._indexes: Optional[_KeyMapIndexes] = None
+        self._ordinals: Optional[Dict[str, int]] = None  # key_string -> sort ordinal
+
+    def __reduce__(self):
+        # Pickle (cache storage) only the mapping, never the derived indexes
+        return (self.__class__, (dict(self),))
+
+    # --- Mutation (invalidates indexes) ---
+
+    def __setitem__(self, path: str, key_info: KeyInfo) -> None:
+        super().__setitem__(path, key_info)
+        self._indexes = None
+        self._ordinals = None
+
+    def __delitem__(self, path: str) -> None:
+        super().__delitem__(path)
+        self._indexes = None
+        self._ordinals = None
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self._indexes = None
+        self._ordinals = None
+
+    def pop(self, *args):
+        self._indexes = None
+        self._ordinals = None
+        return super().pop(*args)
+
+    def popitem(self):
+        self._indexes = None
+        self._ordinals = None
+        return super().popitem()
+
+    def setdefault(self, path: str, default: Optional[KeyInfo] = None):
+        self._indexes = None
+        self._ordinals = None
+        return super().setdefault(path, default)
+
+    def update(self, *args, **kwargs) -> None:
+        super().update(*args, **kwargs)
+        self._indexes = None
+        self._ordinals = None
+
+    def copy(self) -> "GlobalKeyMap":
+        return GlobalKeyMap(self)
+
+    # --- Indexes ---
+
+    def _get_indexes(self) -> _KeyMapIndexes:
+        indexes = self._indexes
+        if indexes is None:
+            by_key: Dict[str, KeyInfo] = {}
+            by_base_key: Dict[str, List[KeyInfo]] = defaultdict(list)
+            children: Dict[str, List[KeyInfo]] = defaultdict(list)
+            file_to_module: Dict[str, str] = {}
+            for ki in self.values():
+                by_key.setdefault(ki.key_string, ki)
+                by_base_key[_strip_instance_suffix(ki.key_string)].append(ki)
+                if ki.parent_path:
+                    children[ki.parent_path].append(ki)
+                    if not ki.is_directory:
+                        file_to_module[ki.norm_path] = ki.parent_path
+            for instances in by_base_key.values():
+                if len(instances) > 1:
+                    instances.sort(
+                        key=lambda k: (_parse_instance_suffix(k.key_string) or 0, k.norm_path)
+                    )
+            indexes = _KeyMapIndexes(
+                by_key, dict(by_base_key), dict(children), file_to_module
+            )
+            self._indexes = indexes  # Built locally first, so concurrent readers never see a partial index
+        return indexes
+
+    def get_by_key(self, key_string: str) -> Optional[KeyInfo]:
+        """KeyInfo whose key_string (KEY or KEY#GI) matches exactly, or None."""
+        if not key_string:
+            return None
+        return self._get_indexes().by_key.get(key_string)
+
+    def resolve(self, key_string: str, path: Optional[str] = None) -> Optional[KeyInfo]:
+        """
+        KeyInfo for key_string, preferring the entry at `path` when it carries that key.
+        (Replaces the "match key and path, else match key" linear scans.)
+        """
+        if path is not None:
+            ki = self.get(path)
+            if ki is not None and ki.key_string == key_string:
+                return ki
+        return self.get_by_key(key_string)
+
+    def instances_of(self, base_key: str) -> List[KeyInfo]:
+        """All KeyInfos sharing a base key (instance suffix stripped), ordered by #GI."""
+        return list(
+            self._get_indexes().by_base_key.get(_strip_instance_suffix(base_key), ())
+        )
+
+    def children_of(self, parent_path: str) -> List[KeyInfo]:
+        """Direct children of a directory, in map order."""
+        return list(self._get_indexes().children.get(parent_path, ()))
+
+    def module_of(self, path: str) -> Optional[KeyInfo]:
+        """KeyInfo of the module (parent directory) that owns a file or directory."""
+        ki = self.get(path)
+        if ki is None or not ki.parent_path:
+            return None
+        return self.get(ki.parent_path)
+
+    def file_to_module_map(self) -> Dict[str, str]:
+        """
+        File path -> module (parent directory) path for every file, as passed to
+        update_tracker(file_to_module=...). Shared with the index: do not mutate.
+        """
+        return self._get_indexes().file_to_module
+
+    def key_ordinals(self) -> Dict[str, int]:
+        """
+        key_string -> dense hierarchical sort ordinal (0..n-1) over this map's keys.
+        Sorting key strings by ordinal gives the same order as get_sortable_parts_for_key.
+        """
+        ordinals = self._ordinals
+        if ordinals is None:
+            ordinals = compute_key_ordinals(ki.key_string for ki in self.values())
+            self._ordinals = ordinals
+        return ordinals
+
+
+# Last plain dict wrapped by as_global_key_map(): (source, its size, wrapper)
+_wrapped_plain_map: Optional[Tuple[Dict[str, KeyInfo], int, GlobalKeyMap]] = None
+
+
+def as_global_key_map(path_to_key_info: Optional[Dict[str, KeyInfo]]) -> GlobalKeyMap:
+    """
+    返回带索引的映射（已是 GlobalKeyMap 时不复制）。
+    Return an indexed map, without copying if it already is a GlobalKeyMap.
+
+    普通字典的包装按对象身份复用，直到其大小改变，因此逐键查找的调用方不会每次复制整个映射。
+    The wrapper of a plain dict is reused for that same dict object until its
+    size changes, so per-key lookups do not copy the whole map each call. A
+    plain dict whose values are replaced in place should be passed as a
+    GlobalKeyMap instead.
+    """
+    global _wrapped_plain_map
+    if isinstance(path_to_key_info, GlobalKeyMap):
+        return path_to_key_info
+    if not path_to_key_info:
+        return GlobalKeyMap()
+    wrapped = _wrapped_plain_map
+    if (
+        wrapped is not None
+        and wrapped[0] is path_to_key_info
+        and wrapped[1] == len(path_to_key_info)
+    ):
+        return wrapped[2]
+    key_map = GlobalKeyMap(path_to_key_info)
+    _wrapped_plain_map = (path_to_key_info, len(path_to_key_info), key_map)
+    return key_map
+
+
+def _interned_key_info(record: Tuple[str, str, Optional[str], int, bool]) -> KeyInfo:
+    """
+    由记录创建KeyInfo，路径使用进程内共享的字符串 / KeyInfo from a record, with process-wide shared path strings.
+    The old and new maps (and every index built from them) then reference one copy of each path.
+    """
+    key_string, norm_path, parent_path, tier, is_directory = record
+    return KeyInfo(
+        key_string, intern_path(norm_path), intern_path(parent_path), tier, is_directory
+    )
+
+
+def _mapped_key_map_from_bytes(data: bytes) -> "MappedGlobalKeyMap":
+    """Unpickle helper: rebuild a lazy map over an in-memory copy of the binary file."""
+    return MappedGlobalKeyMap(KeyMapStore(data))
+
+
+class MappedGlobalKeyMap(GlobalKeyMap):
+    """
+    延迟加载的全局键映射 / Lazily loaded global key map backed by a binary key map file.
+
+    按路径或键字符串的单点查找直接在内存映射文件的哈希索引中进行，仅为访问到的条目创建 KeyInfo。
+    Point lookups by path or key string go straight to the memory-mapped hash
+    indexes and only create KeyInfo objects for the entries touched. Iteration,
+    mutation and the derived GlobalKeyMap indexes first materialize the whole
+    map into the dict (once), after which it behaves exactly like a GlobalKeyMap.
+
+    C-level consumers that bypass dict overrides (e.g. json.dump) should be
+    given dict(mapped_map).
+    """
+
+    def __init__(self, store: KeyMapStore):
+        super().__init__()
+        self._store: Optional[KeyMapStore] = store
+        self._loaded: Dict[int, KeyInfo] = {}  # Record index -> KeyInfo created on access
+        self._materialize_lock = threading.Lock()
+
+    @property
+    def is_materialized(self) -> bool:
+        return self._store is None
+
+    def _materialize(self) -> None:
+        store = self._store
+        if store is None:
+            return
+        with self._materialize_lock:
+            if self._store is None:
+                return
+            loaded = self._loaded
+            infos = [
+                loaded.get(idx) or _interned_key_info(record)
+                for idx, record in enumerate(store.records())
+            ]
+            dict.update(self, [(ki.norm_path, ki) for ki in infos])
+            # Readers check _store first, so the dict must be complete before this
+            self._store = None
+            self._loaded = {}
+
+    def _record_info(self, rec_idx: int) -> KeyInfo:
+        ki = self._loaded.get(rec_idx)
+        if ki is None:
+            ki = self._loaded[rec_idx] = _interned_key_info(self._store.record(rec_idx))
+        return ki
+
+    # --- Point lookups (served from the file while not materialized) ---
+
+    def __getitem__(self, path: str) -> KeyInfo:
+        store = self._store
+        if store is None:
+            return super().__getitem__(path)
+        rec_idx = store.find_path(path) if isinstance(path, str) else None
+        if rec_idx is None:
+            raise KeyError(path)
+        return self._record_info(rec_idx)
+
+    def get(self, path: str, default=None):
+        store = self._store
+        if store is None:
+            return super().get(path, default)
+        rec_idx = store.find_path(path) if isinstance(path, str) else None
+        return default if rec_idx is None else self._record_info(rec_idx)
+
+    def __contains__(self, path) -> bool:
+        store = self._store
+        if store is None:
+            return super().__contains__(path)
+        return isinstance(path, str) and store.find_path(path) is not None
+
+    def __len__(self) -> int:
+        store = self._store
+        return super().__len__() if store is None else len(store)
+
+    def get_by_key(self, key_string: str) -> Optional[KeyInfo]:
+        store = self._store
+        if store is None:
+            return super().get_by_key(key_string)
+        if not key_string:
+            return None
+        rec_idx = store.find_key(key_string)
+        return None if rec_idx is None else self._record_info(rec_idx)
+
+    # --- Whole-map access (materializes first) ---
+
+    def __iter__(self):
+        self._materialize()
+        return super().__iter__()
+
+    def __reversed__(self):
+        self._materialize()
+        return super().__reversed__()
+
+    def keys(self):
+        self._materialize()
+        return super().keys()
+
+    def values(self):
+        self._materialize()
+        return super().values()
+
+    def items(self):
+        self._materialize()
+        return super().items()
+
+    def __eq__(self, other):
+        self._materialize()
+        if isinstance(other, MappedGlobalKeyMap):
+            other._materialize()
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __or__(self, other):
+        self._materialize()
+        return super().__or__(other)
+
+    def __ror__(self, other):
+        self._materialize()
+        return super().__ror__(other)
+
+    def __repr__(self) -> str:
+        self._materialize()
+        return super().__repr__()
+
+    def __reduce__(self):
+        store = self._store
+        if store is None:
+            return (GlobalKeyMap, (dict(self),))
+        # Pickle the raw file bytes rather than every KeyInfo
+        return (_mapped_key_map_from_bytes, (store.to_bytes(),))
+
+    def _get_indexes(self):
+        self._materialize()
+        return super()._get_indexes()
+
+    def key_ordinals(self) -> Dict[str, int]:
+        # Ordinals persisted in the file are read without materializing the map
+        store = self._store
+        if self._ordinals is None and store is not None:
+            self._ordinals = store.key_ordinals()
+        return super().key_ordinals()
+
+    def __setitem__(self, path: str, key_info: KeyInfo) -> None:
+        self._materialize()
+        super().__setitem__(path, key_info)
+
+    def __delitem__(self, path: str) -> None:
+        self._materialize()
+        super().__delitem__(path)
+
+    def clear(self) -> None:
+        self._materialize()
+        super().clear()
+
+    def pop(self, *args):
+        self._materialize()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._materialize()
+        return super().popitem()
+
+    def setdefault(self, path: str, default: Optional[KeyInfo] = None):
+        self._materialize()
+        return super().setdefault(path, default)
+
+    def update(self, *args, **kwargs) -> None:
+        self._materialize()
+        super().update(*args, **kwargs)
+
+    def copy(self) -> GlobalKeyMap:
+        self._materialize()
+        return GlobalKeyMap(self)
+
+
+class KeyMapDelta(NamedTuple):
+    """
+    两次键生成之间的差异 / Difference between two generated key maps.
+
+    changed: 新路径或键已变化的路径 -> 旧键字符串（新路径为 None），按新映射顺序
+             Path -> previous key string (None for new paths) for every path whose
+             key is new or different, in new-map order
+    removed: 仅存在于旧映射中的路径 -> 旧键字符串 / Path -> key string for paths only in the old map
+    """
+
+    changed: Dict[str, Optional[str]]
+    removed: Dict[str, str]
+
+    def changed_key_infos(self, new_map: Dict[str, KeyInfo]) -> List[KeyInfo]:
+        """New-map KeyInfos of the changed paths (the "newly generated" keys)."""
+        return [new_map[path] for path in self.changed]
+
+    def migration_map(
+        self, new_map: Dict[str, KeyInfo]
+    ) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """
+        Path -> (old key, new key) for every path in either map; the same content as
+        tracker_io.build_path_migration_map(old_map, new_map) for normalized maps.
+        """
+        changed = self.changed
+        migration: Dict[str, Tuple[Optional[str], Optional[str]]] = {
+            path: (changed[path] if path in changed else ki.key_string, ki.key_string)
+            for path, ki in new_map.items()
+        }
+        for path, old_key in self.removed.items():
+            migration[path] = (old_key, None)
+        return migration
+
+
+def diff_key_maps(
+    old_map: Optional[Dict[str, KeyInfo]], new_map: Dict[str, KeyInfo]
+) -> KeyMapDelta:
+    """
+    比较旧映射与新映射 / Compare a previous key map with a newly generated one.
+    With no old map every path counts as new.
+    """
+    old_keys: Dict[str, str] = (
+        {path: ki.key_string for path, ki in old_map.items()} if old_map else {}
+    )
+    changed: Dict[str, Optional[str]] = {}
+    for path, ki in new_map.items():
+        old_key = old_keys.pop(path, None)
+        if old_key != ki.key_string:
+            changed[path] = old_key
+    return KeyMapDelta(changed, old_keys)
+
+
 # ============================================================================
 # 辅助函数 / Helper Functions
 # ============================================================================
@@ -243,7 +698,8 @@ def _apply_global_instance_suffixes(
         for old_path, old_ki in old_map.items():
             inst = _parse_instance_suffix(old_ki.key_string)
             if inst is not None and inst > 0:
-                prev_instance_by_path[normalize_path(old_path)] = inst
+                # Saved map keys are already normalized (they were written by generate_keys)
+                prev_instance_by_path[old_path] = inst
 
     # We will create updated KeyInfos only where necessary
     updated_map: Dict[str, KeyInfo] = {}
@@ -321,7 +777,10 @@ def generate_keys(
     excluded_dirs: Optional[Set[str]] = None,
     excluded_extensions: Optional[Set[str]] = None,
     precomputed_excluded_paths: Optional[Set[str]] = None,
-) -> Tuple[Dict[str, KeyInfo], List[KeyInfo]]:
+    path_filter: Optional[PathFilter] = None,
+    inventory: Optional[ProjectInventory] = None,
+    incremental: Optional[bool] = None,
+) -> Tuple[GlobalKeyMap, List[KeyInfo]]:
     """
     Generate hierarchical, contextual keys for files and directories.
     Implements tier promotion (resetting dir letter to 'A') for nested subdirectories.
@@ -334,11 +793,24 @@ def generate_keys(
         excluded_dirs: Optional set of directory names to exclude. If None, uses config.
         excluded_extensions: Optional set of file extensions to exclude. If None, uses config.
         precomputed_excluded_paths: Optional set of pre-calculated absolute paths to exclude.
+        path_filter: Optional compiled exclusion matcher. Takes precedence over the
+            three exclusion arguments above; defaults to the shared config filter.
+        inventory: Optional pre-scanned ProjectInventory. If None, the roots are
+            listed up front by a parallel scan (bounded by the performance
+            scan_max_workers setting). Key assignment below stays serial and walks
+            the sorted listings depth-first, so keys are identical to a serial walk;
+            directories missing from the inventory fall back to os.scandir.
+        incremental: Reuse the previous run's keys for directories whose mtime and
+            own key are unchanged (see key_snapshot.py). Defaults to the performance
+            incremental_key_generation setting. Without an inventory, an incremental
+            run stats directories and lists only the changed ones instead of scanning
+            the whole tree. The result is identical to a full regeneration.
 
     Returns:
         Tuple containing:
-        - Dictionary mapping normalized paths to KeyInfo objects.
-        - List of newly generated KeyInfo objects (unique).
+        - GlobalKeyMap (dict) mapping normalized paths to KeyInfo objects.
+        - KeyInfo objects whose path is new or whose key changed since the previous
+          map (all keys on the first run), in map order.
 
     Raises:
         FileNotFoundError: If a root path does not exist.
@@ -351,32 +823,62 @@ def generate_keys(
             raise FileNotFoundError(f"Root path '{root_path}' does not exist.")
 
     config_manager = ConfigManager()
-    excluded_dirs_names = (
-        set(excluded_dirs) if excluded_dirs else config_manager.get_excluded_dirs()
+    if path_filter is None:
+        if excluded_dirs or excluded_extensions or precomputed_excluded_paths is not None:
+            # Explicit overrides: compile them once, falling back to config per category
+            path_filter = PathFilter(
+                get_project_root(),
+                excluded_dirs=excluded_dirs or config_manager.get_excluded_dirs(),
+                excluded_paths=(
+                    precomputed_excluded_paths
+                    if precomputed_excluded_paths is not None
+                    else config_manager.config.get("excluded_paths", [])
+                ),
+                excluded_extensions=excluded_extensions
+                or config_manager.get_excluded_extensions()
+                or [],
+                excluded_file_patterns=config_manager.config.get(
+                    "excluded_file_patterns", []
+                ),
+            )
+        else:
+            path_filter = config_manager.get_path_filter()
+
+    if incremental is None:
+        incremental = bool(
+            config_manager.get_performance_setting("incremental_key_generation", True)
+        )
+    snapshot_path = _key_map_file_path(KEY_SNAPSHOT_FILENAME)
+    previous_snapshot: Optional[KeySnapshot] = (
+        KeySnapshot.load(snapshot_path, path_filter.fingerprint) if incremental else None
     )
-    excluded_extensions = (
-        set(excluded_extensions)
-        if excluded_extensions
-        else set(config_manager.get_excluded_extensions() or [])
+    new_snapshot: Optional[KeySnapshot] = (
+        KeySnapshot(path_filter.fingerprint) if incremental else None
     )
-    project_root = get_project_root()
-    absolute_excluded_dirs = {
-        normalize_path(os.path.join(project_root, d)) for d in excluded_dirs_names
-    }
-
-    if precomputed_excluded_paths is not None:
-        exclusion_set_for_processing = precomputed_excluded_paths.union(
-            absolute_excluded_dirs
-        )
-    else:
-        calculated_excluded_paths_list = config_manager.get_excluded_paths()
-        exclusion_set_for_processing = set(calculated_excluded_paths_list).union(
-            absolute_excluded_dirs
-        )
+    listed_at = time.time()  # Listings are no older than this (mtime trust window)
+
+    # Parallel listing front end: directories are listed concurrently, keys are
+    # then assigned by the serial depth-first pass over the sorted listings.
+    # An incremental run without an inventory lists only the changed directories.
+    if inventory is None and previous_snapshot is None:
+        inventory = ProjectInventory.scan(root_paths, path_filter=path_filter)
+    if inventory is not None:
+        listed_at = min(listed_at, inventory.scanned_at)
 
     path_to_key_info: Dict[str, KeyInfo] = {}  # Maps norm_path -> KeyInfo
-    newly_generated_keys: List[KeyInfo] = []  # Tracks newly assigned KeyInfo objects
     top_level_dir_count = 0  # Counter for assigning 'A', 'B', ... at Tier 1
+    reused_dir_count = 0  # Directories whose keys came from the previous snapshot
+
+    def dir_mtime(norm_dir_path: str) -> Optional[float]:
+        """Directory mtime from the inventory, or a stat for directories it did not see."""
+        if inventory is not None:
+            entry = inventory.get(norm_dir_path)
+            if entry is not None:
+                return entry.mtime if entry.size >= 0 else None
+        try:
+            return os.stat(norm_dir_path).st_mtime
+        except OSError:
+            return None
 
     def parse_key(
         key_string: Optional[str],
@@ -398,22 +900,23 @@ def generate_keys(
         return None, None, None
 
     def process_directory(
-        dir_path: str, exclusion_set: Set[str], parent_info: Optional[KeyInfo]
+        dir_path: str, path_filter: PathFilter, parent_info: Optional[KeyInfo]
     ):
         """Recursively processes directories and files, generating contextual keys."""
-        nonlocal path_to_key_info, newly_generated_keys, top_level_dir_count
+        nonlocal path_to_key_info, top_level_dir_count, reused_dir_count
 
         try:
             norm_dir_path = normalize_path(dir_path)
 
             # 1. Skip excluded directories
-            if any(norm_dir_path.startswith(ex_path) for ex_path in exclusion_set):
+            if path_filter.is_excluded_dir(norm_dir_path):
                 logger.debug(
                     f"Exclusion Check 1: Skipping excluded dir path: '{norm_dir_path}'"
                 )
                 return
             # else: # No need for else, debug log below covers processing
             #     logger.debug(f"Exclusion Check 1: Processing dir path: '{norm_dir_path}'")
+            norm_dir_path = intern_path(norm_dir_path)  # Keyed below, or already by its parent
 
             # --- Assign key to the current directory being processed ---
             current_dir_key_info: Optional[KeyInfo] = None
@@ -429,7 +932,6 @@ def generate_keys(
                 # Store immediately so it's available if needed later in this call
                 if norm_dir_path not in path_to_key_info:
                     path_to_key_info[norm_dir_path] = current_dir_key_info
-                    newly_generated_keys.append(current_dir_key_info)
                     logger.debug(
                         f"Assigned key '{current_dir_key_info.key_string}' to directory '{norm_dir_path}'"
                     )
@@ -454,13 +956,69 @@ def generate_keys(
                     )
                     # return # Cannot proceed without parent context for children
 
-            # --- Process items within this directory ---
-            try:
-                items = sorted([entry.name for entry in os.scandir(dir_path)])
-            except OSError as e:
-                logger.error(f"Error accessing directory '{dir_path}': {e}")
+            # --- Reuse the previous run's keys if this directory is unchanged ---
+            # Child keys depend only on this directory's key and its filtered
+            # listing; an unchanged mtime means the listing is unchanged.
+            current_mtime = dir_mtime(norm_dir_path) if new_snapshot is not None else None
+            reusable_children = (
+                previous_snapshot.reusable_children(
+                    norm_dir_path, current_mtime, current_dir_key_info.key_string
+                )
+                if previous_snapshot is not None
+                else None
+            )
+            if reusable_children is not None:
+                reused_dir_count += 1
+                for item_name, is_dir, key_str, tier in reusable_children:
+                    try:
+                        norm_item_path = intern_path(f"{norm_dir_path.rstrip('/')}/{item_name}")
+                        item_key_info = KeyInfo(
+                            key_str, norm_item_path, norm_dir_path, tier, is_dir
+                        )
+                        if norm_item_path in path_to_key_info:
+                            logger.warning(
+                                f"Path '{norm_item_path}' already has an assigned key '{path_to_key_info[norm_item_path].key_string}'. Overwriting with new key '{item_key_info.key_string}'. Check root_paths/exclusions if unexpected."
+                            )
+                        path_to_key_info[norm_item_path] = item_key_info
+                        if is_dir:
+                            process_directory(norm_item_path, path_filter, item_key_info)
+                    except Exception as item_err:
+                        logger.error(
+                            f"Error processing item '{item_name}' in directory '{dir_path}': {item_err}",
+                            exc_info=True,
+                        )
+                        if isinstance(item_err, KeyGenerationError):
+                            raise item_err
+                new_snapshot.record(
+                    norm_dir_path,
+                    current_mtime,
+                    current_dir_key_info.key_string,
+                    reusable_children,
+                    listed_at,
+                )
                 return
 
+            # --- Process items within this directory ---
+            # Listings come from the inventory snapshot; for directories it did not
+            # list, DirEntry.is_dir()/is_file() reuse the type info from the
+            # directory listing, so classifying items needs no extra stat calls.
+            # Each entry is (name, is_dir, is_file), sorted by name.
+            inventory_listing = (
+                inventory.children(norm_dir_path) if inventory is not None else None
+            )
+            if inventory_listing is not None:
+                entries = [(e.name, e.is_dir, not e.is_dir) for e in inventory_listing]
+            else:
+                try:
+                    with os.scandir(dir_path) as it:
+                        entries = [
+                            (entry.name, entry.is_dir(), entry.is_file())
+                            for entry in sorted(it, key=lambda entry: entry.name)
+                        ]
+                except OSError as e:
+                    logger.error(f"Error accessing directory '{dir_path}': {e}")
+                    return
+
             # --- Initialize counters for THIS level ---
             file_counter = 1  # For files (1A1, 1Ba1, 2A1...)
             subdir_letter_ord = ASCII_A_LOWER  # For direct subdirs (1Ba, 1Bb...)
@@ -483,22 +1041,20 @@ def generate_keys(
                 f"Processing items in: '{norm_dir_path}' (Key: {parent_key_string}, Is Subdir Key: {is_parent_key_a_subdir})"
             )
 
-            for item_name in items:
+            keyed_children: List[Tuple[str, bool, str, int]] = []  # For the snapshot
+            listing_complete = True
+            for item_name, is_dir, is_file in entries:
                 try:
                     item_path = os.path.join(dir_path, item_name)
                     norm_item_path = normalize_path(item_path)
-                    is_dir = os.path.isdir(item_path)
-                    is_file = os.path.isfile(item_path)
 
-                    # Apply standard exclusions (name, type, extension, etc.)
-                    if any(
-                        norm_item_path.startswith(ex_path) for ex_path in exclusion_set
-                    ):  # Check again for items potentially matching deeper patterns
+                    # Apply standard exclusions (paths, dir names, file patterns, extensions)
+                    if path_filter.is_excluded(norm_item_path, is_dir=is_dir):
                         logger.debug(
                             f"Exclusion Check 1b: Skipping excluded item path: '{norm_item_path}'"
                         )
                         continue
-                    if (item_name in excluded_dirs_names) or (item_name == ".gitkeep"):
+                    if item_name == ".gitkeep":
                         logger.debug(
                             f"Exclusion Check 3: Skipping item name '{item_name}' in '{norm_dir_path}'"
                         )
@@ -516,17 +1072,9 @@ def generate_keys(
                         )
                         continue
 
-                    # Check extension exclusion only for files
-                    if is_file:
-                        _, ext = os.path.splitext(item_name)
-                        if ext in excluded_extensions:
-                            logger.debug(
-                                f"Exclusion Check 5: Skipping file '{item_name}' with extension '{ext}' in '{norm_dir_path}'"
-                            )
-                            continue
-
                     # --- Key Generation Logic ---
                     item_key_info: Optional[KeyInfo] = None
+                    norm_item_path = intern_path(norm_item_path)  # Keyed from here on
 
                     # Determine parent context
                     parent_key_string = (
@@ -663,11 +1211,13 @@ def generate_keys(
                                     f"Path '{norm_item_path}' already has an assigned key '{path_to_key_info[norm_item_path].key_string}'. Overwriting with new key '{item_key_info.key_string}'. Check root_paths/exclusions if unexpected."
                                 )
                             path_to_key_info[norm_item_path] = item_key_info
-                            newly_generated_keys.append(item_key_info)
+                            keyed_children.append(
+                                (item_name, is_dir, item_key_info.key_string, item_key_info.tier)
+                            )
                             if is_dir:
                                 # Pass the newly generated info for this item as the parent for the recursive call
                                 process_directory(
-                                    item_path, exclusion_set, item_key_info
+                                    item_path, path_filter, item_key_info
                                 )
                         else:
                             # This should ideally not happen if generation logic and limits are correct
@@ -679,6 +1229,7 @@ def generate_keys(
 
                 except Exception as item_err:
                     # Catch errors processing a specific item but continue with others in the directory
+                    listing_complete = False
                     logger.error(
                         f"Error processing item '{item_name}' in directory '{dir_path}': {item_err}",
                         exc_info=True,
@@ -687,6 +1238,15 @@ def generate_keys(
                     if isinstance(item_err, KeyGenerationError):
                         raise item_err
 
+            if new_snapshot is not None:
+                new_snapshot.record(
+                    norm_dir_path,
+                    current_mtime if listing_complete else None,
+                    current_dir_key_info.key_string,
+                    keyed_children,
+                    listed_at,
+                )
+
         except KeyGenerationError:
             raise  # Propagate critical errors
         except Exception as dir_err:
@@ -702,7 +1262,11 @@ def generate_keys(
 
     # --- Main Loop ---
     for root_path in root_paths:
-        process_directory(root_path, exclusion_set_for_processing, parent_info=None)
+        process_directory(root_path, path_filter, parent_info=None)
+    if previous_snapshot is not None:
+        logger.info(
+            f"Incremental key generation: reused keys of {reused_dir_count} of {len(new_snapshot)} directories."
+        )
 
     # Ensure the returned list contains unique KeyInfo objects (in case of reprocessing/overlaps)
     # Using dict.fromkeys preserves order (Python 3.7+) and ensures uniqueness based on KeyInfo equality
@@ -839,17 +1403,30 @@ def generate_keys(
         )
         os.makedirs(script_dir, exist_ok=True)  # Ensure directory exists
 
-        # Step 1: Rename current to old (overwrite existing old if present)
+        # Step 1: Rename current to old (overwrite existing old if present).
+        # A legacy JSON map (from before the binary format) becomes the legacy old map.
+        legacy_current_path = normalize_path(
+            os.path.join(script_dir, LEGACY_GLOBAL_KEY_MAP_FILENAME)
+        )
         if os.path.exists(current_map_path):
+            rename_from, rename_to = current_map_path, old_map_path
+        elif os.path.exists(legacy_current_path):
+            rename_from = legacy_current_path
+            rename_to = normalize_path(
+                os.path.join(script_dir, LEGACY_OLD_GLOBAL_KEY_MAP_FILENAME)
+            )
+        else:
+            rename_from = rename_to = ""
+        if rename_from:
             try:
                 # Use shutil.move for atomic rename where possible, handles overwrite
-                shutil.move(current_map_path, old_map_path)
+                shutil.move(rename_from, rename_to)
                 logger.info(
-                    f"Renamed existing '{GLOBAL_KEY_MAP_FILENAME}' to '{OLD_GLOBAL_KEY_MAP_FILENAME}'."
+                    f"Renamed existing '{os.path.basename(rename_from)}' to '{os.path.basename(rename_to)}'."
                 )
             except OSError as rename_err:
                 logger.error(
-                    f"Failed to rename '{current_map_path}' to '{old_map_path}': {rename_err}. Proceeding to save new map."
+                    f"Failed to rename '{rename_from}' to '{rename_to}': {rename_err}. Proceeding to save new map."
                 )
         else:
             logger.info(f"No existing '{GLOBAL_KEY_MAP_FILENAME}' found to rename.")
@@ -867,13 +1444,20 @@ def generate_keys(
         # Step 2: Apply GI suffixes for duplicated base keys, reusing prior assignments
         _apply_global_instance_suffixes(path_to_key_info, previous_map)
 
-        # Step 3: Save the newly generated map to the current filename
-        serializable_map = {
-            path: info._asdict() for path, info in path_to_key_info.items()
-        }
-        with open(current_map_path, "w", encoding="utf-8") as f:
-            json.dump(serializable_map, f, indent=2)
+        # Step 3: Save the newly generated map to the current filename (binary format),
+        # with each key's hierarchical sort ordinal
+        result_map = GlobalKeyMap(path_to_key_info)
+        write_key_map(current_map_path, result_map.values(), result_map.key_ordinals())
+        register_key_ordinals(result_map)
         logger.info(f"Successfully saved new global key map to: {current_map_path}")
+
+        # Step 4: Save the directory snapshot for the next incremental run. Entries
+        # are self-validating (mtime + directory key), so a failed save is harmless.
+        if new_snapshot is not None:
+            try:
+                new_snapshot.save(snapshot_path)
+            except OSError as snap_err:
+                logger.warning(f"Could not save key generation snapshot: {snap_err}")
     except IOError as e:
         logger.error(
             f"I/O Error saving global key map to {current_map_path}: {e}", exc_info=True
@@ -886,63 +1470,101 @@ def generate_keys(
         )
         raise KeyGenerationError(f"Failed to save global key map: {e}") from e
 
-    unique_new_keys = list(dict.fromkeys(newly_generated_keys).keys())
-    return path_to_key_info, unique_new_keys
+    return result_map, diff_key_maps(previous_map, result_map).changed_key_infos(result_map)
 
 
 from cline_utils.dependency_system.utils.cache_manager import cached
 
 
+def _key_map_file_path(filename: str) -> str:
+    """Path of a key map file stored alongside key_manager.py."""
+    return normalize_path(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    )
+
+
+def _global_key_map_cache_key() -> str:
+    """Cache key for load_global_key_map(): whichever file would be loaded, plus its mtime."""
+    for filename in (GLOBAL_KEY_MAP_FILENAME, LEGACY_GLOBAL_KEY_MAP_FILENAME):
+        map_path = _key_map_file_path(filename)
+        if os.path.exists(map_path):
+            return f"global_key_map:{filename}:{os.path.getmtime(map_path)}"
+    return "global_key_map:0"
+
+
+def _load_legacy_json_key_map(map_path: str) -> GlobalKeyMap:
+    """Parse a JSON key map (legacy format, or an export) into a GlobalKeyMap."""
+    with open(map_path, "r", encoding="utf-8") as f:
+        loaded_data = json.load(f)
+
+    # Convert dictionary data back into KeyInfo objects
+    path_to_key_info = GlobalKeyMap()
+    for path, info_dict in loaded_data.items():
+        try:
+            ki = _interned_key_info(KeyInfo(**info_dict))
+            path_to_key_info[intern_path(path)] = ki
+        except TypeError as te:
+            logger.error(
+                f"Error converting loaded data to KeyInfo for path '{path}'. Data: {info_dict}. Error: {te}"
+            )
+            # Skip this entry or return None entirely? For now, skip.
+            continue  # Skip this entry
+    return path_to_key_info
+
+
+def _load_key_map_file(filename: str, legacy_filename: str) -> Optional[GlobalKeyMap]:
+    """
+    Open the binary key map `filename` lazily, falling back to the legacy JSON
+    file. Returns None if neither exists; raises on unreadable/corrupt files.
+    """
+    map_path = _key_map_file_path(filename)
+    if os.path.exists(map_path):
+        return MappedGlobalKeyMap(KeyMapStore.open(map_path))
+    legacy_path = _key_map_file_path(legacy_filename)
+    if os.path.exists(legacy_path):
+        logger.info(f"Loading legacy JSON key map: {legacy_path}")
+        return _load_legacy_json_key_map(legacy_path)
+    return None
+
+
 @cached(
     "global_key_map_load",
-    key_func=lambda: f"global_key_map:{os.path.getmtime(os.path.join(os.path.dirname(os.path.abspath(__file__)), GLOBAL_KEY_MAP_FILENAME)) if os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), GLOBAL_KEY_MAP_FILENAME)) else 0}",
+    key_func=_global_key_map_cache_key,
 )
-def load_global_key_map() -> Optional[Dict[str, KeyInfo]]:
+def load_global_key_map() -> Optional[GlobalKeyMap]:
     """
-    Loads the persisted global path_to_key_info map from the JSON file
-    located alongside key_manager.py.
+    Loads the persisted global path_to_key_info map from the binary file
+    located alongside key_manager.py (or the legacy JSON file if no binary
+    map exists yet).
 
-    Cached based on file modification time.
+    The binary map is memory-mapped: KeyInfo objects are created only for the
+    entries accessed (see MappedGlobalKeyMap). Cached based on file modification time.
 
     Returns:
-        The loaded dictionary mapping normalized paths to KeyInfo objects,
+        The loaded mapping of normalized paths to KeyInfo objects,
         or None if the file doesn't exist or fails to load/parse.
     """
     # Predeclare for type checkers
-    map_path: str = ""
+    map_path: str = _key_map_file_path(GLOBAL_KEY_MAP_FILENAME)
     try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        map_path = normalize_path(os.path.join(script_dir, GLOBAL_KEY_MAP_FILENAME))
-
-        if not os.path.exists(map_path):
+        path_to_key_info = _load_key_map_file(
+            GLOBAL_KEY_MAP_FILENAME, LEGACY_GLOBAL_KEY_MAP_FILENAME
+        )
+        if path_to_key_info is None:
             logger.error(
                 f"Global key map file not found at {map_path}. Run project analysis ('analyze-project') first."
             )
             return None
 
-        with open(map_path, "r", encoding="utf-8") as f:
-            loaded_data = json.load(f)
-
-        # Convert dictionary data back into KeyInfo objects
-        path_to_key_info: Dict[str, KeyInfo] = {}
-        for path, info_dict in loaded_data.items():
-            try:
-                path_to_key_info[path] = KeyInfo(**info_dict)
-            except TypeError as te:
-                logger.error(
-                    f"Error converting loaded data to KeyInfo for path '{path}'. Data: {info_dict}. Error: {te}"
-                )
-                # Skip this entry or return None entirely? For now, skip.
-                continue  # Skip this entry
-
         logger.info(
             f"Successfully loaded global key map ({len(path_to_key_info)} entries) from: {map_path}"
         )
+        register_key_ordinals(path_to_key_info)
         return path_to_key_info
 
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, KeyMapFormatError) as e:
         logger.error(
-            f"Error decoding JSON from global key map file {map_path}: {e}",
+            f"Error decoding global key map file {map_path}: {e}",
             exc_info=True,
         )
         return None
@@ -958,29 +1580,19 @@ def load_global_key_map() -> Optional[Dict[str, KeyInfo]]:
         return None
 
 
-def load_old_global_key_map() -> Optional[Dict[str, KeyInfo]]:
+def load_old_global_key_map() -> Optional[GlobalKeyMap]:
     """Loads the persisted PREVIOUS global path_to_key_info map."""
     # Predeclare for type checkers
-    map_path: str = ""
+    map_path: str = _key_map_file_path(OLD_GLOBAL_KEY_MAP_FILENAME)  # Target old map
     try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        map_path = normalize_path(
-            os.path.join(script_dir, OLD_GLOBAL_KEY_MAP_FILENAME)
-        )  # Target old map
-        if not os.path.exists(map_path):
+        path_to_key_info = _load_key_map_file(
+            OLD_GLOBAL_KEY_MAP_FILENAME, LEGACY_OLD_GLOBAL_KEY_MAP_FILENAME
+        )
+        if path_to_key_info is None:
             logger.warning(
                 f"Previous global key map file not found: {map_path}. This may be the first run."
             )
             return None  # Return None gracefully if old map doesn't exist
-        with open(map_path, "r", encoding="utf-8") as f:
-            loaded_data = json.load(f)
-        path_to_key_info: Dict[str, KeyInfo] = {}
-        for path, info_dict in loaded_data.items():
-            try:
-                path_to_key_info[path] = KeyInfo(**info_dict)
-            except TypeError as te:
-                logger.error(f"Error converting OLD KeyInfo data for '{path}': {te}")
-                continue
         logger.debug(
             f"Loaded previous global key map ({len(path_to_key_info)} entries) from: {map_path}"
         )
@@ -992,6 +1604,36 @@ def load_old_global_key_map() -> Optional[Dict[str, KeyInfo]]:
         return None
 
 
+def export_global_key_map_json(
+    output_path: Optional[str] = None, use_old_map: bool = False
+) -> Optional[str]:
+    """
+    Export the current (or previous) global key map as JSON in the original
+    {norm_path: KeyInfo fields} layout.
+
+    Args:
+        output_path: Destination file; defaults to global_key_map[_old].export.json
+            alongside key_manager.py. (Not the legacy global_key_map.json name,
+            which the loaders fall back to when no binary map exists.)
+        use_old_map: Export the previous map instead of the current one.
+
+    Returns:
+        The path written, or None if there was no map to export.
+    """
+    path_to_key_info = load_old_global_key_map() if use_old_map else load_global_key_map()
+    if path_to_key_info is None:
+        return None
+    if output_path is None:
+        output_path = _key_map_file_path(
+            EXPORT_OLD_GLOBAL_KEY_MAP_FILENAME if use_old_map else EXPORT_GLOBAL_KEY_MAP_FILENAME
+        )
+    serializable_map = {path: info._asdict() for path, info in path_to_key_info.items()}
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(serializable_map, f, indent=2)
+    logger.info(f"Exported global key map ({len(serializable_map)} entries) to: {output_path}")
+    return output_path
+
+
 def validate_key(key: str) -> bool:
     """
     Validate if a key follows the hierarchical key format, optionally followed by '#' and digits (for instance).
@@ -1094,43 +1736,78 @@ def get_sortable_parts_for_key(key_str: str) -> list:
     return converted_parts
 
 
+def compute_key_ordinals(key_strings: Iterable[str]) -> Dict[str, int]:
+    """
+    Assign each distinct key string a dense integer ordinal (0..n-1) in
+    hierarchical (natural) sort order. Keys are parsed once here; sorting by
+    ordinal afterwards is a plain integer sort.
+    """
+    unique_keys = sorted({k for k in key_strings if k}, key=get_sortable_parts_for_key)
+    return {key: ordinal for ordinal, key in enumerate(unique_keys)}
+
+
+# Map whose key ordinals the sort helpers use (the current global map)
+_ordinal_key_map: Optional[GlobalKeyMap] = None
+
+
+def register_key_ordinals(key_map: Optional[GlobalKeyMap]) -> None:
+    """
+    Make key_map's ordinals the ones used by the sort helpers below. Called when
+    the global map is generated or loaded; the ordinals are computed (or read
+    from the binary map file) on first use.
+    """
+    global _ordinal_key_map
+    _ordinal_key_map = key_map
+
+
+def current_key_ordinals() -> Dict[str, int]:
+    """Ordinals of the registered global map's key strings (empty if none is registered)."""
+    key_map = _ordinal_key_map
+    return key_map.key_ordinals() if key_map is not None else {}
+
+
 def sort_key_strings_hierarchically(keys: List[str]) -> List[str]:
     """
     Sorts a list of key strings hierarchically (natural sort order).
     e.g., 1A1, 1A2, 1A10 instead of 1A1, 1A10, 1A2.
 
+    Keys of the current global map are sorted by their precomputed ordinals;
+    lists containing other keys fall back to parsing every key.
+
     Args:
         keys: A list of key strings.
 
     Returns:
         A new list containing the sorted key strings.
     """
-
-    def sort_key_func(key_str: str):
-        if not key_str:
-            return []  # Handle invalid input
-        parts = re.findall(KEY_PATTERN, key_str)
-        # Convert numeric parts to integers for correct numerical sorting
-        try:
-            # Ensure tier (first part if numeric) is handled correctly
-            # The pattern splits correctly, just need conversion
-            converted_parts = [(int(p) if p.isdigit() else p) for p in parts]
-        except (ValueError, TypeError):
-            logger.warning(
-                f"Could not convert parts for sorting key string '{key_str}', using basic string sort."
-            )
-            converted_parts = parts  # Fallback
-        # Return tuple for sorting (implicitly handles tier first if pattern is correct)
-        return converted_parts
-
     # Filter out potential None or non-string elements before sorting
     valid_keys = [k for k in keys if k]
-    return sorted(valid_keys, key=get_sortable_parts_for_key)  # Use the new helper
+    try:
+        return sorted(valid_keys, key=current_key_ordinals().__getitem__)
+    except KeyError:
+        return sorted(valid_keys, key=get_sortable_parts_for_key)
+
+
+def sort_key_infos(key_infos: Iterable[KeyInfo]) -> List[KeyInfo]:
+    """
+    Sort KeyInfo objects by hierarchical key order, then by path (the order of
+    tracker definitions). Uses the current global map's ordinals when every key
+    is known, and parses the keys otherwise.
+    """
+    key_infos = list(key_infos)
+    ordinals = current_key_ordinals()
+    try:
+        return sorted(key_infos, key=lambda ki: (ordinals[ki.key_string], ki.norm_path))
+    except KeyError:
+        return sorted(
+            key_infos,
+            key=lambda ki: (
+                get_sortable_parts_for_key(ki.key_string) if ki.key_string else [],
+                ki.norm_path,
+            ),
+        )
 
 
-# --- Modify sort_keys to be explicit about KeyInfo ---
-# Rename original sort_keys to avoid confusion if needed, or keep as is
-# Let's keep it named sort_keys but it strictly takes List[KeyInfo] now
 def sort_keys(key_info_list: List[KeyInfo]) -> List[KeyInfo]:
     """
     Sort a list of KeyInfo objects based primarily on tier, then natural sort of key string.
@@ -1141,27 +1818,19 @@ def sort_keys(key_info_list: List[KeyInfo]) -> List[KeyInfo]:
     Returns:
         Sorted list of KeyInfo objects.
     """
+    ordinals = current_key_ordinals()
+    try:
+        return sorted(key_info_list, key=lambda ki: (ki.tier, ordinals[ki.key_string]))
+    except (KeyError, AttributeError):
+        pass
 
     def sort_key_func(key_info: KeyInfo):
         # Handle potential None values if list source isn't guaranteed clean
         if key_info is None or not hasattr(key_info, "key_string"):
             return (float("inf"), [])
+        # Tuple: (tier, converted_parts) for primary sort by tier
+        return (key_info.tier, get_sortable_parts_for_key(key_info.key_string))
 
-        key = key_info.key_string
-        parts = re.findall(KEY_PATTERN, key)
-        # Convert numeric parts to integers for correct numerical sorting
-        try:
-            converted_parts = [(int(p) if p.isdigit() else p) for p in parts]
-        except (ValueError, TypeError):
-            # Fallback if parts contain unexpected non-digit/non-alpha chars
-            logger.warning(
-                f"Could not convert parts for sorting key '{key}', using basic string sort."
-            )
-            converted_parts = parts  # Use original parts if conversion fails
-        # Return tuple: (tier, converted_parts) for primary sort by tier
-        return (key_info.tier, converted_parts)
-
-    # return sorted([ki for ki in key_info_list if ki is not None], key=sort_key_func)
     return sorted(key_info_list, key=sort_key_func)
 
 
@@ -0,0 +1,340 @@
+# core/key_map_store.py
+
+"""
+Compact binary storage for the global key map.
+
+Layout (little-endian, version 2):
+
+    header      magic, version, record/string/bucket counts, section offsets
+    str_offsets (string_count + 1) x u32, offsets into str_data
+    records     record_count x (key_sid u32, path_sid u32, parent_sid u32, tier i32,
+                ordinal u32, is_dir u8, pad)
+    path_index  bucket_count x u32, open-addressing hash of norm_path -> record + 1 (0 = empty)
+    key_index   bucket_count x u32, open-addressing hash of key_string -> record + 1
+    str_data    UTF-8 bytes of the interned string table
+
+Every path, parent path and key string is stored once in the string table, so
+parent paths shared by many entries cost a single u32 per record. Readers map
+the file with mmap and decode only the records they touch; nothing is parsed at
+open time beyond the fixed-size header.
+
+The ordinal is the key's rank in hierarchical sort order (see
+key_manager.compute_key_ordinals), or 0xFFFFFFFF if none was written. Version 1
+files (no ordinal column) are still readable.
+
+This module deals in plain (key_string, norm_path, parent_path, tier,
+is_directory) tuples; key_manager wraps them in KeyInfo.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+KEY_MAP_MAGIC = b"CRCTKMAP"
+KEY_MAP_VERSION = 2
+
+_HEADER = struct.Struct("<8sIIII4xQQQQQ")
+_RECORD = struct.Struct("<IIIiIB3x")
+_RECORD_V1 = struct.Struct("<IIIiB3x")  # Version 1: no ordinal column
+_U32 = struct.Struct("<I")
+_NO_PARENT = 0xFFFFFFFF
+_NO_ORDINAL = 0xFFFFFFFF
+
+RecordTuple = Tuple[str, str, Optional[str], int, bool]
+
+
+class KeyMapFormatError(ValueError):
+    """Raised when a binary key map file is truncated, corrupt or of an unknown version."""
+
+    pass
+
+
+def _hash(data: bytes) -> int:
+    # Stable across processes and Python versions (unlike hash())
+    return zlib.crc32(data)
+
+
+def _bucket_count(record_count: int) -> int:
+    """Power of two at least twice the record count (load factor <= 0.5)."""
+    buckets = 8
+    while buckets < record_count * 2:
+        buckets <<= 1
+    return buckets
+
+
+def write_key_map(
+    file_path: str,
+    records: Iterable[Sequence],
+    ordinals: Optional[Mapping[str, int]] = None,
+) -> int:
+    """
+    Write records (KeyInfo or equivalent 5-tuples) to file_path atomically.
+    Records keep their iteration order; the path index is keyed by norm_path.
+    `ordinals` (key_string -> sort ordinal) is stored per record when given.
+
+    Returns:
+        The number of records written.
+    """
+    string_ids: Dict[str, int] = {}
+    strings: List[bytes] = []
+
+    def intern(value: str) -> int:
+        sid = string_ids.get(value)
+        if sid is None:
+            sid = string_ids[value] = len(strings)
+            strings.append(value.encode("utf-8"))
+        return sid
+
+    packed_records: List[bytes] = []
+    path_sids: List[int] = []
+    key_sids: List[int] = []
+    for key_string, norm_path, parent_path, tier, is_directory in records:
+        key_sid = intern(key_string)
+        path_sid = intern(norm_path)
+        parent_sid = _NO_PARENT if parent_path is None else intern(parent_path)
+        ordinal = ordinals.get(key_string, _NO_ORDINAL) if ordinals else _NO_ORDINAL
+        packed_records.append(
+            _RECORD.pack(
+                key_sid, path_sid, parent_sid, int(tier), ordinal, 1 if is_directory else 0
+            )
+        )
+        path_sids.append(path_sid)
+        key_sids.append(key_sid)
+
+    record_count = len(packed_records)
+    bucket_count = _bucket_count(record_count)
+    mask = bucket_count - 1
+
+    def build_index(sids: List[int]) -> List[int]:
+        buckets = [0] * bucket_count
+        seen = set()
+        for rec_idx, sid in enumerate(sids):
+            if sid in seen:
+                continue  # First occurrence wins (matches GlobalKeyMap.get_by_key)
+            seen.add(sid)
+            slot = _hash(strings[sid]) & mask
+            while buckets[slot]:
+                slot = (slot + 1) & mask
+            buckets[slot] = rec_idx + 1
+        return buckets
+
+    path_index = build_index(path_sids)
+    key_index = build_index(key_sids)
+
+    str_offsets = [0]
+    for data in strings:
+        str_offsets.append(str_offsets[-1] + len(data))
+
+    off_str_offsets = _HEADER.size
+    off_records = off_str_offsets + 4 * len(str_offsets)
+    off_path_index = off_records + _RECORD.size * record_count
+    off_key_index = off_path_index + 4 * bucket_count
+    off_str_data = off_key_index + 4 * bucket_count
+
+    header = _HEADER.pack(
+        KEY_MAP_MAGIC,
+        KEY_MAP_VERSION,
+        record_count,
+        len(strings),
+        bucket_count,
+        off_str_offsets,
+        off_str_data,
+        off_records,
+        off_path_index,
+        off_key_index,
+    )
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(struct.pack(f"<{len(str_offsets)}I", *str_offsets))
+        f.write(b"".join(packed_records))
+        f.write(struct.pack(f"<{bucket_count}I", *path_index))
+        f.write(struct.pack(f"<{bucket_count}I", *key_index))
+        f.write(b"".join(strings))
+    os.replace(tmp_path, file_path)
+    return record_count
+
+
+class KeyMapStore:
+    """
+    Read-only view over a binary key map held in an mmap (or any bytes buffer).
+
+    Lookups by path or key string hash into the on-disk index and decode a
+    single record; decoded strings are memoized so shared parent paths are
+    decoded (and held) once.
+    """
+
+    def __init__(self, buffer: Union[mmap.mmap, bytes], source: str = "<bytes>"):
+        self._buf = buffer
+        self.source = source
+        if len(buffer) < _HEADER.size:
+            raise KeyMapFormatError(f"{source}: file too short for a key map header")
+        (
+            magic,
+            version,
+            self._record_count,
+            self._string_count,
+            self._bucket_count,
+            self._off_str_offsets,
+            self._off_str_data,
+            self._off_records,
+            self._off_path_index,
+            self._off_key_index,
+        ) = _HEADER.unpack_from(buffer, 0)
+        if magic != KEY_MAP_MAGIC:
+            raise KeyMapFormatError(f"{source}: not a binary key map")
+        if version not in (1, KEY_MAP_VERSION):
+            raise KeyMapFormatError(
+                f"{source}: unsupported key map version {version} (expected {KEY_MAP_VERSION})"
+            )
+        self.version = version
+        self._record_struct = _RECORD if version == KEY_MAP_VERSION else _RECORD_V1
+        record_size = self._record_struct.size
+        buckets = self._bucket_count
+        if (
+            buckets & (buckets - 1)
+            or buckets < self._record_count
+            or self._off_str_offsets + 4 * (self._string_count + 1) > self._off_records
+            or self._off_records + record_size * self._record_count > self._off_path_index
+            or self._off_path_index + 4 * buckets > self._off_key_index
+            or self._off_key_index + 4 * buckets > self._off_str_data
+            or self._off_str_data > len(buffer)
+        ):
+            raise KeyMapFormatError(f"{source}: inconsistent key map header")
+        str_data_len = _U32.unpack_from(
+            buffer, self._off_str_offsets + 4 * self._string_count
+        )[0]
+        if self._off_str_data + str_data_len > len(buffer):
+            raise KeyMapFormatError(f"{source}: truncated string table")
+        self._mask = buckets - 1
+        self._strings: Dict[int, str] = {}
+
+    @classmethod
+    def open(cls, file_path: str) -> "KeyMapStore":
+        """
+        Memory-map a key map file. Raises OSError or KeyMapFormatError.
+
+        On Windows the file is read into memory instead: a mapped file cannot be
+        renamed or replaced there, which generate_keys() does on every run.
+        """
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise KeyMapFormatError(f"{file_path}: empty key map file")
+            if os.name == "nt":
+                buffer: Union[mmap.mmap, bytes] = f.read()
+            else:
+                # The mapping stays valid after the file object is closed
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, source=file_path)
+
+    def __len__(self) -> int:
+        return self._record_count
+
+    def to_bytes(self) -> bytes:
+        """The raw file contents (used to pickle a store without its mmap)."""
+        return bytes(self._buf)
+
+    # --- Decoding ---
+
+    def _string(self, sid: int) -> str:
+        value = self._strings.get(sid)
+        if value is None:
+            start, end = struct.unpack_from("<II", self._buf, self._off_str_offsets + 4 * sid)
+            value = self._buf[self._off_str_data + start : self._off_str_data + end].decode(
+                "utf-8"
+            )
+            self._strings[sid] = value
+        return value
+
+    def _raw_string(self, sid: int) -> bytes:
+        start, end = struct.unpack_from("<II", self._buf, self._off_str_offsets + 4 * sid)
+        return self._buf[self._off_str_data + start : self._off_str_data + end]
+
+    def _record_sids(self, rec_idx: int) -> Tuple[int, ...]:
+        """(key_sid, path_sid, parent_sid, tier, [ordinal,] is_dir) of one record."""
+        record_struct = self._record_struct
+        return record_struct.unpack_from(
+            self._buf, self._off_records + record_struct.size * rec_idx
+        )
+
+    def _raw_records(self) -> Iterator[Tuple[int, ...]]:
+        start = self._off_records
+        end = start + self._record_struct.size * self._record_count
+        return self._record_struct.iter_unpack(self._buf[start:end])
+
+    def _all_strings(self) -> List[str]:
+        count = self._string_count
+        offsets = struct.unpack_from(f"<{count + 1}I", self._buf, self._off_str_offsets)
+        data = self._buf[self._off_str_data : self._off_str_data + offsets[-1]]
+        return [data[offsets[i] : offsets[i + 1]].decode("utf-8") for i in range(count)]
+
+    def record(self, rec_idx: int) -> RecordTuple:
+        """Decode one record as (key_string, norm_path, parent_path, tier, is_directory)."""
+        fields = self._record_sids(rec_idx)
+        key_sid, path_sid, parent_sid, tier, is_dir = fields[:4] + fields[-1:]
+        return (
+            self._string(key_sid),
+            self._string(path_sid),
+            None if parent_sid == _NO_PARENT else self._string(parent_sid),
+            tier,
+            bool(is_dir),
+        )
+
+    def records(self) -> Iterator[RecordTuple]:
+        """All records in file (insertion) order, decoding the string table in one pass."""
+        strings = self._all_strings()
+        for fields in self._raw_records():
+            key_sid, path_sid, parent_sid, tier, is_dir = fields[:4] + fields[-1:]
+            yield (
+                strings[key_sid],
+                strings[path_sid],
+                None if parent_sid == _NO_PARENT else strings[parent_sid],
+                tier,
+                bool(is_dir),
+            )
+
+    def key_ordinals(self) -> Optional[Dict[str, int]]:
+        """
+        key_string -> stored sort ordinal, decoding only the key strings.
+        None for version 1 files or files written without ordinals.
+        """
+        if self.version < 2:
+            return None
+        offsets_fmt = f"<{self._string_count + 1}I"
+        offsets = struct.unpack_from(offsets_fmt, self._buf, self._off_str_offsets)
+        base = self._off_str_data
+        ordinals: Dict[str, int] = {}
+        for key_sid, _path, _parent, _tier, ordinal, _is_dir in self._raw_records():
+            if ordinal == _NO_ORDINAL:
+                return None
+            key = self._buf[base + offsets[key_sid] : base + offsets[key_sid + 1]].decode("utf-8")
+            ordinals[key] = ordinal
+        return ordinals
+
+    # --- Hash lookups ---
+
+    def _probe(self, index_offset: int, field: int, value: str) -> Optional[int]:
+        encoded = value.encode("utf-8")
+        slot = _hash(encoded) & self._mask
+        for _ in range(self._bucket_count):
+            entry = _U32.unpack_from(self._buf, index_offset + 4 * slot)[0]
+            if not entry:
+                return None
+            rec_idx = entry - 1
+            if self._raw_string(self._record_sids(rec_idx)[field]) == encoded:
+                return rec_idx
+            slot = (slot + 1) & self._mask
+        return None
+
+    def find_path(self, norm_path: str) -> Optional[int]:
+        """Record index for a normalized path, or None."""
+        return self._probe(self._off_path_index, 1, norm_path)
+
+    def find_key(self, key_string: str) -> Optional[int]:
+        """Record index of the first entry with this exact key string, or None."""
+        return self._probe(self._off_key_index, 0, key_string)
@@ -0,0 +1,110 @@
+# core/key_snapshot.py
+
+"""
+Per-directory snapshot used for incremental key generation.
+
+For every directory generate_keys() assigned keys in, the snapshot records the
+directory's mtime, the key the directory itself had, and the keyed entries of
+its listing (name, is_dir, base key, tier) in key-assignment order. The keys a
+directory hands to its children depend only on its own key and its filtered
+listing, so when both are unchanged the next run can reuse the recorded child
+keys verbatim instead of listing the directory again.
+
+A directory's mtime changes whenever an entry is added, removed or renamed in
+it; file content edits do not affect keys. Directories modified within
+RACY_MTIME_WINDOW seconds of the listing are stored untrusted (mtime None),
+because a later change in the same timestamp tick would leave the mtime equal.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KEY_SNAPSHOT_VERSION = 1
+RACY_MTIME_WINDOW = 2.0  # Seconds; covers coarse (e.g. FAT) timestamp granularity
+
+# (name, is_dir, base key string, tier) for each keyed entry of a directory
+SnapshotChild = Tuple[str, bool, str, int]
+
+
+class KeySnapshot:
+    """
+    Directory path -> (mtime or None, directory key, keyed children).
+
+    Snapshots are only valid for the exclusion rules they were built with; load()
+    discards a snapshot whose filter fingerprint differs.
+    """
+
+    def __init__(
+        self,
+        fingerprint: str,
+        dirs: Optional[Dict[str, Tuple[Optional[float], str, List[SnapshotChild]]]] = None,
+    ):
+        self.fingerprint = fingerprint
+        self.dirs = dirs if dirs is not None else {}
+
+    def __len__(self) -> int:
+        return len(self.dirs)
+
+    def reusable_children(
+        self, dir_path: str, mtime: Optional[float], dir_key: str
+    ) -> Optional[List[SnapshotChild]]:
+        """Recorded children if the directory's mtime and key are unchanged, else None."""
+        entry = self.dirs.get(dir_path)
+        if entry is None or mtime is None:
+            return None
+        recorded_mtime, recorded_key, children = entry
+        if recorded_mtime is None or recorded_mtime != mtime or recorded_key != dir_key:
+            return None
+        return children
+
+    def record(
+        self,
+        dir_path: str,
+        mtime: Optional[float],
+        dir_key: str,
+        children: List[SnapshotChild],
+        listed_at: float,
+    ) -> None:
+        """Store a directory's keyed children; racy mtimes are stored as untrusted."""
+        if mtime is not None and mtime >= listed_at - RACY_MTIME_WINDOW:
+            mtime = None
+        self.dirs[dir_path] = (mtime, dir_key, children)
+
+    # --- Persistence ---
+
+    def save(self, file_path: str) -> None:
+        """Write the snapshot as compact JSON (atomically)."""
+        data = {
+            "version": KEY_SNAPSHOT_VERSION,
+            "fingerprint": self.fingerprint,
+            "dirs": self.dirs,
+        }
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            # json.dumps (unlike json.dump) runs the C encoder in one call
+            f.write(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str, fingerprint: str) -> Optional["KeySnapshot"]:
+        """Read a snapshot; None if missing, unreadable, or built for other exclusion rules."""
+        if not os.path.exists(file_path):
+            return None
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load key generation snapshot '{file_path}': {e}")
+            return None
+        if data.get("version") != KEY_SNAPSHOT_VERSION:
+            logger.info(f"Ignoring key generation snapshot with unknown version: {file_path}")
+            return None
+        if data.get("fingerprint") != fingerprint:
+            logger.info("Exclusion rules changed since the last run; regenerating all keys.")
+            return None
+        # Entries stay as the decoded JSON lists; they unpack like the recorded tuples
+        return cls(fingerprint, data.get("dirs", {}))
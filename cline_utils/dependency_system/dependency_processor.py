@@ -24,6 +24,7 @@ import logging  # 日志记录系统
 import os  # 操作系统接口
 import subprocess  # 子进程管理（用于运行外部命令）
 import sys  # 系统特定参数和函数
+import tempfile  # 临时文件（用于向子进程传递项目清单）
 from collections import defaultdict  # 默认字典（自动初始化）
 from logging import LogRecord  # 日志记录对象类型
 from typing import Any, Dict, List, Optional, Set, Tuple, Union  # 类型注解
@@ -46,10 +47,13 @@ from cline_utils.dependency_system.core.dependency_grid import (
     get_char_at,  # 获取压缩字符串中指定索引的字符
 )
 from cline_utils.dependency_system.core.key_manager import (
+    GlobalKeyMap,  # 带索引的全局键映射（dict兼容）
     KeyInfo,  # 键信息数据结构
-    get_sortable_parts_for_key,  # 获取键的可排序部分
+    as_global_key_map,  # 将普通字典包装为GlobalKeyMap
+    export_global_key_map_json,  # 将二进制全局键映射导出为JSON
     load_global_key_map,  # 加载全局键映射
     load_old_global_key_map,  # 加载旧版全局键映射（用于迁移）
+    sort_key_strings_hierarchically,  # 按预计算序数层级排序键字符串
 )
 
 # ========================================
@@ -73,6 +77,7 @@ from cline_utils.dependency_system.utils.path_utils import (
     get_project_root,  # 获取项目根目录
     normalize_path,  # 标准化路径
 )
+from cline_utils.dependency_system.utils.project_inventory import ProjectInventory  # 项目清单（单次遍历快照）
 from cline_utils.dependency_system.utils.template_generator import (
     add_code_doc_dependency_to_checklist,  # 添加代码-文档依赖到检查清单
 )
@@ -85,6 +90,9 @@ from cline_utils.dependency_system.utils.tracker_utils import (
     get_key_global_instance_string,  # 获取键的全局实例字符串（KEY#GI格式）
     read_grid_from_lines,  # 从文件行中读取网格数据
     read_key_definitions_from_lines,  # 从文件行中读取键定义
+    read_tracker_definitions,  # 读取跟踪器键定义（解析缓存）
+    find_tracker_row,  # 查找路径所在的网格行
+    read_tracker_grid_row,  # 读取单个网格行（必要时按偏移定位）
     resolve_key_global_instance_to_ki,  # 将KEY#GI字符串解析为KeyInfo对象
 )
 from cline_utils.dependency_system.utils.visualize_dependencies import (
@@ -108,7 +116,7 @@ KEY_DEFINITIONS_END_MARKER = "---KEY_DEFINITIONS_END---"  # 键定义结束标
 # 辅助函数 (Helper Functions)
 # ========================================
 
-def _load_global_map_or_exit() -> Dict[str, KeyInfo]:
+def _load_global_map_or_exit() -> GlobalKeyMap:
     """
     Loads the global key map, exiting if it fails.
 
@@ -118,7 +126,7 @@ def _load_global_map_or_exit() -> Dict[str, KeyInfo]:
     这是整个依赖跟踪系统的核心数据结构。
 
     Returns:
-        Dict[str, KeyInfo]: 路径到KeyInfo对象的映射
+        GlobalKeyMap: 路径到KeyInfo对象的映射（带键字符串/基础键索引）
 
     Exits:
         如果无法加载全局键映射，程序将以错误代码1退出
@@ -162,13 +170,10 @@ def is_parent_child(
     # ========================================
     # 步骤1: 从全局映射中查找两个键的KeyInfo对象
     # ========================================
-    # 使用生成器表达式查找匹配的KeyInfo
-    info1 = next(
-        (info for info in global_map.values() if info.key_string == key1_str), None
-    )
-    info2 = next(
-        (info for info in global_map.values() if info.key_string == key2_str), None
-    )
+    # 通过键字符串索引查找KeyInfo（O(1)）
+    key_map = as_global_key_map(global_map)
+    info1 = key_map.get_by_key(key1_str)
+    info2 = key_map.get_by_key(key2_str)
 
     # 检查是否找到了两个KeyInfo对象
     if not info1 or not info2:
@@ -338,6 +343,19 @@ def command_handler_analyze_project(args: argparse.Namespace) -> int:
 
         config_manager_instance.perform_resource_validation_and_adjustments()
 
+        # --- Project Inventory ---
+        # 单次遍历项目根目录，运行时检查器与所有分析阶段共享该快照
+        # One walk of the project roots, shared by the runtime inspector and every analysis phase
+        inventory_roots = sorted(
+            {
+                normalize_path(os.path.join(abs_project_root, r))
+                for r in config_manager_instance.get_code_root_directories()
+                + config_manager_instance.get_doc_directories()
+            }
+        )
+        inventory = ProjectInventory.scan(inventory_roots)
+        inventory_file: Optional[str] = None
+
         # --- Run Runtime Inspector ---
         try:
             # Construct path to runtime_inspector.py relative to this file
@@ -365,8 +383,21 @@ def command_handler_analyze_project(args: argparse.Namespace) -> int:
                 else:
                     env["PYTHONPATH"] = path_str
 
+                inspector_cmd = [sys.executable, runtime_inspector_path, abs_project_root]
+                try:
+                    fd, inventory_file = tempfile.mkstemp(
+                        prefix="project_inventory_", suffix=".json"
+                    )
+                    os.close(fd)
+                    inventory.save(inventory_file)
+                    inspector_cmd += ["--inventory", inventory_file]
+                except OSError as inv_err:
+                    logger.warning(
+                        f"Could not write project inventory for runtime inspector: {inv_err}"
+                    )
+
                 process = subprocess.run(
-                    [sys.executable, runtime_inspector_path, abs_project_root],
+                    inspector_cmd,
                     capture_output=True,
                     text=True,
                     check=False,
@@ -387,12 +418,17 @@ def command_handler_analyze_project(args: argparse.Namespace) -> int:
                 )
         except Exception as e:
             logger.error(f"Error running runtime inspector: {e}")
+        finally:
+            if inventory_file and os.path.exists(inventory_file):
+                os.remove(inventory_file)
 
         logger.debug(
             f"Analyzing project: {abs_project_root}, force_analysis={args.force_analysis}, force_embeddings={args.force_embeddings}"
         )
         results = analyze_project(
-            force_analysis=args.force_analysis, force_embeddings=args.force_embeddings
+            force_analysis=args.force_analysis,
+            force_embeddings=args.force_embeddings,
+            inventory=inventory,
         )
         logger.debug(
             f"All Suggestions before Tracker Update: {results.get('dependency_suggestion', {}).get('suggestions')}"
@@ -586,11 +622,7 @@ def handle_set_char(args: argparse.Namespace) -> int:
                 else "main"
             )
         )
-        f_to_m_map = {
-            _info.norm_path: _info.parent_path
-            for _info in global_map.values()
-            if not _info.is_directory and _info.parent_path
-        }
+        f_to_m_map = global_map.file_to_module_map()
 
         update_tracker(
             output_file_suggestion=tracker_file_path,
@@ -773,11 +805,7 @@ def handle_add_dependency(args: argparse.Namespace) -> int:
             )
             return 1
 
-    matching_source_infos = [
-        info
-        for info in global_map.values()
-        if info.key_string.split("#")[0] == src_base_key_str
-    ]
+    matching_source_infos = global_map.instances_of(src_base_key_str)
     if not matching_source_infos:
         print(
             f"Error: Base source key '{src_base_key_str}' not found in global key map."
@@ -788,10 +816,7 @@ def handle_add_dependency(args: argparse.Namespace) -> int:
     resolved_source_ki: Optional[KeyInfo] = None
     if src_user_global_instance_num is not None:
         source_key_to_find = f"{src_base_key_str}#{src_user_global_instance_num}"
-        found_ki = next(
-            (ki for ki in matching_source_infos if ki.key_string == source_key_to_find),
-            None,
-        )
+        found_ki = global_map.get_by_key(source_key_to_find)
         if found_ki:
             resolved_source_ki = found_ki
         else:
@@ -862,11 +887,7 @@ def handle_add_dependency(args: argparse.Namespace) -> int:
                 )
                 continue
 
-        matching_target_infos = [
-            info
-            for info in global_map.values()
-            if info.key_string.split("#")[0] == tgt_base_key_str
-        ]
+        matching_target_infos = global_map.instances_of(tgt_base_key_str)
         if not matching_target_infos:
             print(
                 f"Error: Base target key '{tgt_base_key_str}' not found in global key map."
@@ -880,14 +901,7 @@ def handle_add_dependency(args: argparse.Namespace) -> int:
         resolved_target_ki: Optional[KeyInfo] = None
         if tgt_user_global_instance_num is not None:
             target_key_to_find = f"{tgt_base_key_str}#{tgt_user_global_instance_num}"
-            found_ki = next(
-                (
-                    ki
-                    for ki in matching_target_infos
-                    if ki.key_string == target_key_to_find
-                ),
-                None,
-            )
+            found_ki = global_map.get_by_key(target_key_to_find)
             if found_ki:
                 resolved_target_ki = found_ki
             else:
@@ -1000,11 +1014,7 @@ def handle_add_dependency(args: argparse.Namespace) -> int:
             final_source_key_for_suggestion: final_target_keys_for_suggestion_list
         }
 
-    file_to_module_map = {
-        info.norm_path: info.parent_path
-        for info in global_map.values()
-        if not info.is_directory and info.parent_path
-    }
+    file_to_module_map = global_map.file_to_module_map()
 
     try:
         if suggestions_for_update_tracker:
@@ -1135,6 +1145,24 @@ def handle_export_tracker(args: argparse.Namespace) -> int:
         return 1
 
 
+def handle_export_key_map(args: argparse.Namespace) -> int:
+    """Handle the export-key-map command (binary global key map -> JSON)."""
+    try:
+        output_path = export_global_key_map_json(args.output, use_old_map=args.old)
+        if output_path is None:
+            print(
+                "Error: Global key map not found. Run 'analyze-project' first.",
+                file=sys.stderr,
+            )
+            return 1
+        print(f"Global key map exported to {output_path}")
+        return 0
+    except Exception as e_export:
+        logger.exception(f"Error export_key_map: {e_export}")
+        print(f"Error: {e_export}")
+        return 1
+
+
 def handle_update_config(args: argparse.Namespace) -> int:
     """Handle the update-config command."""
     config_manager = ConfigManager()
@@ -1203,11 +1231,7 @@ def handle_show_dependencies(args: argparse.Namespace) -> int:
 
     # Resolve the user-provided key to a specific KeyInfo object (target_ki_to_show)
     # This target_ki_to_show's path and global instance string will be the focus.
-    matching_source_infos = [
-        info
-        for info in current_global_map.values()
-        if info.key_string.split("#")[0] == base_key_to_show
-    ]
+    matching_source_infos = current_global_map.instances_of(base_key_to_show)
     if not matching_source_infos:
         print(
             f"Error: Base source key '{base_key_to_show}' not found in global key map."
@@ -1250,11 +1274,6 @@ def handle_show_dependencies(args: argparse.Namespace) -> int:
         f"\n--- Dependencies for: {target_key_gi_str_to_show} (Path: {target_ki_to_show.norm_path}) ---"
     )
 
-    # Pre-calculate global counts for display formatting
-    global_key_string_counts: defaultdict[str, int] = defaultdict(int)
-    for ki_count in current_global_map.values():
-        global_key_string_counts[ki_count.key_string] += 1
-
     all_tracker_paths = find_all_tracker_paths(config, project_root)
 
     # Structure: Dict[char_type, Dict[interacting_key_gi_str, List[origin_tracker_basename]]]
@@ -1270,48 +1289,31 @@ def handle_show_dependencies(args: argparse.Namespace) -> int:
             f"ShowDeps: Processing tracker '{os.path.basename(tracker_path)}' for key '{target_key_gi_str_to_show}'"
         )
         try:
-            with open(tracker_path, "r", encoding="utf-8") as f_tracker:
-                lines = f_tracker.readlines()
+            # Only the key's own row is read (parse cache; seeks if rows were released)
+            defs_in_this_tracker = read_tracker_definitions(tracker_path)
 
-            defs_in_this_tracker = read_key_definitions_from_lines(lines)
-            _grid_hdrs, grid_rows_in_this_tracker = read_grid_from_lines(lines)
-
-            if not defs_in_this_tracker or not grid_rows_in_this_tracker:
+            if not defs_in_this_tracker:
                 logger.debug(
                     f"  Skipping tracker {os.path.basename(tracker_path)}: no definitions or grid rows found."
                 )
                 continue
 
-            # Create a mapping from path_str_in_file to its index in this tracker's definitions
-            path_to_idx_in_this_tracker: Dict[str, int] = {}
-            # Also, map path_str_in_file to its original key_label_in_file for reverse lookups
-            path_to_key_label_in_this_tracker: Dict[str, str] = {}
-
-            for i, (k_label, p_str) in enumerate(defs_in_this_tracker):
-                if (
-                    p_str not in path_to_idx_in_this_tracker
-                ):  # First occurrence if path duplicated in defs
-                    path_to_idx_in_this_tracker[p_str] = i
-                    path_to_key_label_in_this_tracker[p_str] = k_label
-
             # Check if our target_ki_to_show.norm_path is defined in this tracker
-            source_row_idx_in_this_tracker = path_to_idx_in_this_tracker.get(
-                target_ki_to_show.norm_path
+            source_row_idx_in_this_tracker = find_tracker_row(
+                tracker_path, target_ki_to_show.norm_path
+            )
+            grid_row_in_this_tracker = (
+                read_tracker_grid_row(tracker_path, source_row_idx_in_this_tracker)
+                if source_row_idx_in_this_tracker is not None
+                else None
             )
 
             # 1. Process outgoing relationships (target_ki_to_show is the source)
-            if (
-                source_row_idx_in_this_tracker is not None
-                and source_row_idx_in_this_tracker < len(grid_rows_in_this_tracker)
-            ):
-                row_label_from_grid, compressed_row_data = grid_rows_in_this_tracker[
-                    source_row_idx_in_this_tracker
-                ]
+            if grid_row_in_this_tracker is not None:
+                row_label_from_grid, compressed_row_data = grid_row_in_this_tracker
 
                 # Sanity check: row_label from grid should match the key_label from definitions for this path
-                expected_row_label = path_to_key_label_in_this_tracker.get(
-                    target_ki_to_show.norm_path
-                )
+                expected_row_label = defs_in_this_tracker[source_row_idx_in_this_tracker][0]
                 if row_label_from_grid != expected_row_label:
                     logger.warning(
                         f"  Label mismatch in {os.path.basename(tracker_path)} for path {target_ki_to_show.norm_path}. Def label: {expected_row_label}, Grid row label: {row_label_from_grid}. Proceeding cautiously."
@@ -1374,9 +1376,8 @@ def handle_show_dependencies(args: argparse.Namespace) -> int:
             print("  None")
             continue
 
-        sorted_interacting_keys_gi = sorted(
-            deps_for_this_char.keys(),
-            key=lambda k_gi_str: get_sortable_parts_for_key(k_gi_str),
+        sorted_interacting_keys_gi = sort_key_strings_hierarchically(
+            list(deps_for_this_char.keys())
         )
 
         for interacting_key_gi in sorted_interacting_keys_gi:
@@ -1392,7 +1393,7 @@ def handle_show_dependencies(args: argparse.Namespace) -> int:
             # Prepare display name for the interacting key (use base key if not globally duplicated)
             interacting_base_key = interacting_key_gi.split("#")[0]
             display_name_interacting = interacting_key_gi
-            if global_key_string_counts.get(interacting_base_key, 0) <= 1:
+            if len(current_global_map.instances_of(interacting_base_key)) <= 1:
                 display_name_interacting = interacting_base_key
 
             origin_trackers_list = sorted(
@@ -1621,17 +1622,13 @@ def handle_show_placeholders(args: argparse.Namespace) -> int:
         print(
             f"Unverified dependencies {chars_to_check} in {os.path.basename(tracker_path)}:"
         )
-        sorted_source_keys = sorted(
-            unverified_deps.keys(), key=get_sortable_parts_for_key
-        )
+        sorted_source_keys = sort_key_strings_hierarchically(list(unverified_deps.keys()))
         for source_label in sorted_source_keys:
             source_path = key_to_path_map.get(source_label, "Path not found")
             print(f"\n--- Key: {source_label} (Path: {source_path}) ---")
             char_map = unverified_deps[source_label]
             for char_type in sorted(char_map.keys()):
-                target_labels = sorted(
-                    char_map[char_type], key=get_sortable_parts_for_key
-                )
+                target_labels = sort_key_strings_hierarchically(list(char_map[char_type]))
                 print(f"  {char_type}:")
                 for tgt in target_labels:
                     tgt_path = key_to_path_map.get(tgt, "Path not found")
@@ -1965,6 +1962,17 @@ def main():
     export_parser.add_argument("--output", "-o", help="Output file path")
     export_parser.set_defaults(func=handle_export_tracker)
 
+    export_key_map_parser = subparsers.add_parser(
+        "export-key-map", help="Export the global key map as JSON"
+    )
+    export_key_map_parser.add_argument(
+        "--output", "-o", help="Output file path (defaults to core/global_key_map.export.json)"
+    )
+    export_key_map_parser.add_argument(
+        "--old", action="store_true", help="Export the previous key map instead"
+    )
+    export_key_map_parser.set_defaults(func=handle_export_key_map)
+
     # --- Utility Commands ---
     clear_caches_parser = subparsers.add_parser(
         "clear-caches", help="Clear all internal caches"
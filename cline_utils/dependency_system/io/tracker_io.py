@@ -46,9 +46,12 @@ import logging  # 日志记录
 import os  # 操作系统接口
 import re  # 正则表达式
 import shutil  # 文件操作工具
+import threading  # 线程锁
 import time  # 时间处理
 from collections import defaultdict  # 默认字典
-from typing import Any, Dict, List, Optional, Set, Tuple  # 类型提示
+from concurrent.futures import ThreadPoolExecutor, as_completed  # 线程池
+from contextlib import contextmanager  # 上下文管理器
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple  # 类型提示
 
 # =============================================================================
 # 本地模块导入 (Local Module Imports)
@@ -62,11 +65,12 @@ from cline_utils.dependency_system.core.dependency_grid import (
     compress,           # 压缩依赖网格行
     create_initial_grid,# 创建初始依赖网格
     decompress,         # 解压缩依赖网格行
+    remap_grid_rows,    # 按索引置换重映射网格行
     validate_grid,      # 验证网格有效性
 )
 
 # --- 核心模块 - 键管理器 (Core Module - Key Manager) ---
-from cline_utils.dependency_system.core.key_manager import KeyInfo
+from cline_utils.dependency_system.core.key_manager import KeyInfo, as_global_key_map
 # KeyInfo类：存储路径到键的映射信息
 
 from cline_utils.dependency_system.core.key_manager import (
@@ -75,9 +79,9 @@ from cline_utils.dependency_system.core.key_manager import (
 # 从全局映射中获取路径对应的键字符串
 
 from cline_utils.dependency_system.core.key_manager import (
-    get_sortable_parts_for_key,      # 获取键的可排序部分
     load_global_key_map,             # 加载全局键映射
     load_old_global_key_map,         # 加载旧的全局键映射
+    sort_key_infos,                  # 按键序数与路径排序KeyInfo
     sort_key_strings_hierarchically, # 层级排序键字符串
 )
 
@@ -105,6 +109,7 @@ from cline_utils.dependency_system.io.update_mini_tracker import get_mini_tracke
 from cline_utils.dependency_system.utils.cache_manager import (
     cached,                        # 缓存装饰器
     check_file_modified,           # 检查文件修改状态
+    deferred_invalidation,         # 延迟并串行化缓存失效
     invalidate_dependent_entries,  # 使依赖缓存失效
 )
 
@@ -128,6 +133,9 @@ from cline_utils.dependency_system.utils.tracker_utils import (
     read_grid_from_lines,              # 从行读取网格
     read_key_definitions_from_lines,   # 从行读取键定义
     read_tracker_file_structured,      # 结构化读取追踪器文件
+    read_tracker_definitions,          # 读取追踪器键定义（解析缓存）
+    find_tracker_row,                  # 查找路径所在的网格行
+    read_tracker_grid_row,             # 读取单个网格行
     resolve_key_global_instance_to_ki, # 解析键全局实例到KeyInfo
 )
 
@@ -546,6 +554,60 @@ def validate_grid_ordered(
     return True
 
 
+# =============================================================================
+# 迷你追踪器暂存写入 (Staged Mini Tracker Writes)
+# =============================================================================
+
+# 暂存文件后缀（不匹配 *_module.md，因此不会被当作追踪器读取）
+# Suffix of staged files (does not match *_module.md, so never read as a tracker)
+STAGED_TRACKER_SUFFIX = ".staged"
+
+# 当前暂存阶段：{追踪器路径: 暂存文件路径}；None表示直接写入
+# Current staging stage: {tracker path: staged file path}; None writes in place
+_staged_tracker_writes: Optional[Dict[str, str]] = None
+_staged_tracker_lock = threading.Lock()
+
+
+def _tracker_write_path(tracker_path: str) -> str:
+    """
+    Path a mini tracker should be written to: its staged file while a
+    _staged_mini_tracker_writes() block is active, otherwise the tracker itself.
+    """
+    with _staged_tracker_lock:
+        if _staged_tracker_writes is None:
+            return tracker_path
+        staged_path = tracker_path + STAGED_TRACKER_SUFFIX
+        _staged_tracker_writes[tracker_path] = staged_path
+        return staged_path
+
+
+@contextmanager
+def _staged_mini_tracker_writes() -> Iterator[None]:
+    """
+    Stage mini tracker writes made inside the block and move them into place
+    (in sorted order) when it exits, so every update in the block reads the
+    trackers as they were when it started.
+    """
+    global _staged_tracker_writes
+    with _staged_tracker_lock:
+        if _staged_tracker_writes is not None:
+            raise RuntimeError("Mini tracker writes are already being staged.")
+        _staged_tracker_writes = {}
+    try:
+        yield
+    finally:
+        with _staged_tracker_lock:
+            staged, _staged_tracker_writes = _staged_tracker_writes, None
+        for tracker_path in sorted(staged):
+            staged_path = staged[tracker_path]
+            if not os.path.exists(staged_path):
+                continue  # Write failed before the file was created
+            try:
+                os.replace(staged_path, tracker_path)
+            except OSError as e:
+                logger.error(f"Could not move staged tracker into place '{tracker_path}': {e}")
+
+
 def _write_mini_tracker_with_template_preservation(
     output_file: str,
     lines_from_old_file: List[str],  # For preserving header/footer
@@ -598,7 +660,9 @@ def _write_mini_tracker_with_template_preservation(
         global_key_counts_for_display[ki_global.key_string] += 1
 
     try:
-        with open(output_file, "w", encoding="utf-8", newline="\n") as f:
+        with open(
+            _tracker_write_path(output_file), "w", encoding="utf-8", newline="\n"
+        ) as f:
             # 1. Write header (content before start marker or full template)
             if existing_content_start_idx != -1:  # Markers found, preserve header
                 for i in range(
@@ -1151,7 +1215,15 @@ def merge_trackers(
         return None
 
     # Path -> KeyInfo map for merged definitions, primary overwrites secondary for same path.
-    merged_key_info_objects_by_path: Dict[str, KeyInfo] = {}
+    merged_key_info_objects_by_path: Dict[str, KeyInfo] = {
+        ki_s.norm_path: ki_s for ki_s in sec_ki_list
+    }
+    merged_key_info_objects_by_path.update((ki_p.norm_path, ki_p) for ki_p in pri_ki_list)
+    # The sorted union of both definition lists, ordered by key ordinal then path. Each
+    # input is already in that order, so the integer-keyed sort just merges two runs.
+    final_merged_key_info_list_for_write = sort_key_infos(
+        merged_key_info_objects_by_path.values()
+    )
     final_merged_grid_comp: List[str]
     final_merged_last_key_edit: str
 
@@ -1159,41 +1231,18 @@ def merge_trackers(
         logger.info(
             f"Primary tracker {os.path.basename(primary_tracker_path)} content is empty/invalid. Using secondary tracker."
         )
-        for ki_s in sec_ki_list:
-            merged_key_info_objects_by_path[ki_s.norm_path] = ki_s
         final_merged_grid_comp = sec_grid_comp
         final_merged_last_key_edit = sec_data["last_key_edit"]
     elif not sec_ki_list:  # Secondary is empty
         logger.info(
             f"Secondary tracker {os.path.basename(secondary_tracker_path)} content is empty/invalid. Using primary tracker."
         )
-        for ki_p in pri_ki_list:
-            merged_key_info_objects_by_path[ki_p.norm_path] = ki_p
         final_merged_grid_comp = pri_grid_comp
         final_merged_last_key_edit = pri_data["last_key_edit"]
     else:  # Both have content
         logger.debug(
             f"Merging {len(pri_ki_list)} primary items and {len(sec_ki_list)} secondary items."
         )
-        for ki_s in sec_ki_list:
-            merged_key_info_objects_by_path[ki_s.norm_path] = ki_s
-        for ki_p in pri_ki_list:
-            merged_key_info_objects_by_path[ki_p.norm_path] = (
-                ki_p  # Primary path defs overwrite
-            )
-
-        # The final sorted list of KeyInfo for the merged tracker's structure
-        temp_merged_ki_list_sorted = sorted(
-            list(merged_key_info_objects_by_path.values()),
-            key=lambda ki_lambda: (
-                (
-                    get_sortable_parts_for_key(ki_lambda.key_string)
-                    if ki_lambda.key_string
-                    else []
-                ),
-                ki_lambda.norm_path,
-            ),
-        )
         # Ensure input grids align with their KI lists before merging
         # This check should ideally be inside _parse_tracker_for_merge or _merge_grids
         if len(pri_grid_comp) != len(pri_ki_list):
@@ -1236,24 +1285,12 @@ def merge_trackers(
             sec_grid_comp,
             pri_ki_list,
             sec_ki_list,  # These are the KI lists corresponding to the grid data passed
-            temp_merged_ki_list_sorted,  # This is the structure of the output grid
+            final_merged_key_info_list_for_write,  # This is the structure of the output grid
         )
         final_merged_last_key_edit = (
             pri_data["last_key_edit"] or sec_data["last_key_edit"]
         )
 
-    final_merged_key_info_list_for_write = sorted(
-        list(merged_key_info_objects_by_path.values()),
-        key=lambda ki_lambda_2: (
-            (
-                get_sortable_parts_for_key(ki_lambda_2.key_string)
-                if ki_lambda_2.key_string
-                else []
-            ),
-            ki_lambda_2.norm_path,
-        ),
-    )
-
     final_merged_last_grid_edit = f"Merged from {os.path.basename(primary_tracker_path)} and {os.path.basename(secondary_tracker_path)} on {datetime.datetime.now().isoformat()}"
 
     # Backup target file before writing merged content
@@ -1358,7 +1395,9 @@ def create_mini_tracker(
         if dirname:
             os.makedirs(dirname, exist_ok=True)
 
-        with open(output_file, "w", encoding="utf-8", newline="\n") as f:
+        with open(
+            _tracker_write_path(output_file), "w", encoding="utf-8", newline="\n"
+        ) as f:
             # Write template content, potentially formatted
             try:
                 f.write(template_content.format(module_name=module_name_for_template))
@@ -1399,9 +1438,9 @@ def create_mini_tracker(
                     found_module_as_ki, path_to_key_info_global, global_key_counts
                 )
 
-            # Use get_sortable_parts_for_key for correct sorting of keys in metadata message
-            sorted_new_keys_for_msg = sorted(
-                new_key_strings_for_this_tracker or [], key=get_sortable_parts_for_key
+            # Hierarchical order for the keys in the metadata message
+            sorted_new_keys_for_msg = sort_key_strings_hierarchically(
+                new_key_strings_for_this_tracker or []
             )
 
             last_key_edit_message = (
@@ -1444,48 +1483,25 @@ def create_mini_tracker(
 
 
 # --- Helper for Import Relationships: Reads a specific cell from another tracker ---
-# (Defined here for use by update_tracker's import logic; non-cached version)
+# (Defined here for use by update_tracker's import logic; reads through the tracker parse cache)
 def _get_char_from_specific_tracker(
     source_path_lookup: str,
     target_path_lookup: str,
     tracker_file_to_read: str,
     global_map_for_context: Dict[str, KeyInfo],  # Current global map
 ) -> Optional[str]:
-    if not os.path.exists(tracker_file_to_read):
-        return None
     try:
-        # Use read_tracker_file_structured to get its ordered definitions and grid
-        data = read_tracker_file_structured(tracker_file_to_read)
-        if (
-            not data
-            or not data.get("definitions_ordered")
-            or not data.get("grid_rows_ordered")
-        ):
-            return None
-
-        defs_ordered_in_other_tracker = data[
-            "definitions_ordered"
-        ]  # List[Tuple[key_str, path_str]]
-        grid_rows_ordered_in_other_tracker = data[
-            "grid_rows_ordered"
-        ]  # List[Tuple[label, compressed_row]]
-
-        # Create path -> index mapping for the definitions in the tracker_file_to_read
-        path_to_idx_in_other_tracker: Dict[str, int] = {}
-        for i, (key_str, path_str) in enumerate(defs_ordered_in_other_tracker):
-            if (
-                path_str not in path_to_idx_in_other_tracker
-            ):  # First occurrence if path duplicated
-                path_to_idx_in_other_tracker[path_str] = i
-
-        source_idx_in_other = path_to_idx_in_other_tracker.get(source_path_lookup)
-        target_idx_in_other = path_to_idx_in_other_tracker.get(target_path_lookup)
+        # Definitions and the one grid row come from the tracker parse cache
+        defs_ordered_in_other_tracker = read_tracker_definitions(
+            tracker_file_to_read
+        )  # List[Tuple[key_str, path_str]]
+        source_idx_in_other = find_tracker_row(tracker_file_to_read, source_path_lookup)
+        target_idx_in_other = find_tracker_row(tracker_file_to_read, target_path_lookup)
 
         if source_idx_in_other is not None and target_idx_in_other is not None:
-            if source_idx_in_other < len(grid_rows_ordered_in_other_tracker):
-                _row_label, compressed_row = grid_rows_ordered_in_other_tracker[
-                    source_idx_in_other
-                ]
+            grid_row = read_tracker_grid_row(tracker_file_to_read, source_idx_in_other)
+            if grid_row is not None:
+                _row_label, compressed_row = grid_row
                 # Check consistency: row label from grid should match key from definition
                 if defs_ordered_in_other_tracker[source_idx_in_other][0] != _row_label:
                     logger.warning(
@@ -1577,6 +1593,115 @@ def _load_ast_verified_links() -> List[Dict[str, str]]:
 # --- End of Helper ---
 
 
+# --- Grid Pipeline Helpers (used by update_tracker) ---
+def _apply_structural_dependencies(
+    grid: List[List[str]],
+    key_info_list: List[KeyInfo],
+    tracker_type: str,
+    rows: Optional[Set[int]] = None,
+) -> int:
+    """
+    Marks parent/child pairs 'x' in both directions and, in doc trackers, pairs
+    of a directory and an unrelated item 'n'. Only placeholder cells are set.
+
+    Parents are found by walking each item's ancestors, so the 'x' pass costs
+    O(items * depth) instead of comparing every pair. rows limits the pass to
+    pairs involving those indices (the rows new to the grid in incremental
+    mode; the other pairs were marked when their rows were new).
+    Returns the number of cells set.
+    """
+    index = {ki.norm_path: i for i, ki in enumerate(key_info_list)}
+    related: Dict[int, Set[int]] = defaultdict(set)
+    for c_idx, c_ki in enumerate(key_info_list):
+        ancestor = c_ki.norm_path
+        while True:
+            ancestor, sep, _name = ancestor.rpartition("/")
+            if not sep or not ancestor:
+                break
+            r_idx = index.get(ancestor)
+            if r_idx is not None and r_idx != c_idx and key_info_list[r_idx].is_directory:
+                related[r_idx].add(c_idx)
+                related[c_idx].add(r_idx)
+
+    changed = 0
+
+    def mark(row: int, col: int, char: str) -> None:
+        nonlocal changed
+        if grid[row][col] == PLACEHOLDER_CHAR:
+            grid[row][col] = char
+            changed += 1
+
+    for a in (related if rows is None else rows):
+        for b in related.get(a, ()):
+            mark(a, b, "x")
+            mark(b, a, "x")
+    if tracker_type == "doc":
+        is_dir = [ki.is_directory for ki in key_info_list]
+        for a in (range(len(key_info_list)) if rows is None else rows):
+            related_to_a = related.get(a, ())
+            for b in range(len(key_info_list)):
+                if a != b and b not in related_to_a and (is_dir[a] or is_dir[b]):
+                    mark(a, b, "n")
+                    mark(b, a, "n")
+    return changed
+
+
+def _consolidate_grid(
+    grid: List[List[str]],
+    key_info_list: List[KeyInfo],
+    rels_by_source: Dict[str, Dict[str, str]],
+    get_priority: Callable[[str], int],
+) -> int:
+    """
+    Raises cells to the globally authoritative relationship: a higher priority
+    char always wins, 'n' replaces 'p'/'s'/'S'/empty and 's'/'S' replace
+    'p'/empty.
+
+    Only cells with an authoritative relationship can change, so each row
+    visits the relationships of its own key instead of every column.
+    Returns the number of cells changed.
+    """
+    key_to_indices: Dict[str, List[int]] = defaultdict(list)
+    for idx, ki in enumerate(key_info_list):
+        key_to_indices[ki.key_string].append(idx)
+    changed = 0
+    for r_idx, r_ki in enumerate(key_info_list):
+        rels = rels_by_source.get(r_ki.key_string)
+        if not rels:
+            continue
+        if len(rels) > len(key_to_indices):
+            rels = {key: rels[key] for key in key_to_indices if key in rels}
+        row = grid[r_idx]
+        for tgt_key, auth_char in rels.items():
+            for c_idx in key_to_indices.get(tgt_key, ()):
+                current = row[c_idx]
+                if c_idx == r_idx or current == auth_char:
+                    continue
+                try:
+                    should_update = get_priority(auth_char) > get_priority(current)
+                except KeyError as e_prio:
+                    logger.warning(
+                        f"  Consolidation: Priority lookup failed for char '{e_prio}' comparing {r_ki.key_string}->{tgt_key}. Skipping cell."
+                    )
+                    continue
+                if not should_update and auth_char == "n":
+                    should_update = current in (PLACEHOLDER_CHAR, "s", "S", EMPTY_CHAR)
+                if not should_update and auth_char in ("s", "S"):
+                    should_update = current in (PLACEHOLDER_CHAR, EMPTY_CHAR)
+                if should_update:
+                    row[c_idx] = auth_char
+                    changed += 1
+    return changed
+
+
+def _select_grid_items(grid: List[List[str]], old_indices: List[int]) -> List[List[str]]:
+    """Sub-grid of the items at old_indices, in that order (diagonal reset)."""
+    selected = [[grid[r][c] for c in old_indices] for r in old_indices]
+    for i, row in enumerate(selected):
+        row[i] = DIAGONAL_CHAR
+    return selected
+
+
 def update_tracker(
     output_file_suggestion: str,
     path_to_key_info: Dict[str, KeyInfo],
@@ -1590,6 +1715,7 @@ def update_tracker(
     keys_to_explicitly_remove: Optional[Set[str]] = None,
     use_old_map_for_migration: bool = True,
     apply_ast_overrides: bool = True,
+    incremental: Optional[bool] = None,
 ) -> None:  # Returns None, modifies files directly.
     # --- AST Override for Doc Tracker ---
     if tracker_type == "doc":
@@ -1601,15 +1727,24 @@ def update_tracker(
     Performs path stability checks before migrating grid data.
     Calls tracker-specific logic for filtering, aggregation (main), and path determination.
     Uses hierarchical sorting for key strings.
+    Incremental mode (default: the performance incremental_tracker_updates
+    setting) limits structural rules to rows new to the grid and leaves the
+    file untouched when its definitions and grid come out unchanged.
     """
     logger.debug(
         f"--- update_tracker CALLED --- Suggestion: '{output_file_suggestion}', Type: '{tracker_type}', ForceSugg: {force_apply_suggestions}, ApplyAST: {apply_ast_overrides}"
     )
     # --- Initialize counters and flags ---
+    # Indexed map: key-string, parent and module lookups below are O(1)
+    path_to_key_info = as_global_key_map(path_to_key_info)
     project_root = get_project_root()
     config = ConfigManager()
     get_priority = config.get_char_priority
     min_positive_priority = max(2, get_priority("s"))
+    if incremental is None:
+        incremental = bool(
+            config.get_performance_setting("incremental_tracker_updates", True)
+        )
     abs_doc_roots_set = {
         normalize_path(os.path.join(project_root, p))
         for p in config.get_doc_directories()
@@ -1800,12 +1935,9 @@ def update_tracker(
         )
 
         # --- Mini-Tracker Relevance Logic (Populates relevant_key_infos_for_type) ---
-        internal_kis_mini = [
-            ki
-            for ki in path_to_key_info.values()
-            if ki.norm_path == module_path_for_mini
-            or ki.parent_path == module_path_for_mini
-        ]
+        internal_kis_mini = path_to_key_info.children_of(module_path_for_mini)
+        if module_path_for_mini in path_to_key_info:
+            internal_kis_mini.append(path_to_key_info[module_path_for_mini])
         current_rel_paths_set: Set[str] = {ki.norm_path for ki in internal_kis_mini}
         logger.debug(
             f"  Mini '{os.path.basename(output_file)}': Initial internal paths ({len(current_rel_paths_set)})."
@@ -1883,15 +2015,14 @@ def update_tracker(
                 except Exception:
                     pass
         if suggestions_external:  # suggestions_external is KEY#global_instance
-            excluded_abs_set = {
-                normalize_path(os.path.join(project_root, p))
-                for p in config.get_excluded_dirs()
-            }.union(set(config.get_excluded_paths()))
+            path_filter = config.get_path_filter()
             for src_gi_str, deps_gi_list in suggestions_external.items():
                 src_ki_sugg = resolve_key_global_instance_to_ki(
                     src_gi_str, path_to_key_info
                 )
-                if not src_ki_sugg or src_ki_sugg.norm_path in excluded_abs_set:
+                if not src_ki_sugg or path_filter.is_excluded(
+                    src_ki_sugg.norm_path, is_dir=src_ki_sugg.is_directory
+                ):
                     continue
                 src_is_internal_sugg = (
                     src_ki_sugg.norm_path == module_path_for_mini
@@ -1903,7 +2034,9 @@ def update_tracker(
                     tgt_ki_sugg = resolve_key_global_instance_to_ki(
                         tgt_gi_str, path_to_key_info
                     )
-                    if not tgt_ki_sugg or tgt_ki_sugg.norm_path in excluded_abs_set:
+                    if not tgt_ki_sugg or path_filter.is_excluded(
+                        tgt_ki_sugg.norm_path, is_dir=tgt_ki_sugg.is_directory
+                    ):
                         continue
                     tgt_is_internal_sugg = (
                         tgt_ki_sugg.norm_path == module_path_for_mini
@@ -1917,8 +2050,8 @@ def update_tracker(
         if keys_to_explicitly_remove:
             paths_to_remove = {
                 ki.norm_path
-                for ki in path_to_key_info.values()
-                if ki.key_string in keys_to_explicitly_remove
+                for key_to_remove in keys_to_explicitly_remove
+                if (ki := path_to_key_info.get_by_key(key_to_remove)) is not None
             }
             current_rel_paths_set -= paths_to_remove
             logger.debug(
@@ -1965,17 +2098,7 @@ def update_tracker(
         )
         return
 
-    final_key_info_list = sorted(
-        relevant_key_infos_for_type,
-        key=lambda ki_lambda_sort: (
-            (
-                get_sortable_parts_for_key(ki_lambda_sort.key_string)
-                if ki_lambda_sort.key_string
-                else []
-            ),
-            ki_lambda_sort.norm_path,
-        ),
-    )
+    final_key_info_list = sort_key_infos(relevant_key_infos_for_type)
     if not final_key_info_list:
         logger.warning(
             f"{tracker_type.capitalize()} tracker '{os.path.basename(output_file)}' (for module: '{module_path_for_mini if tracker_type=='mini' else 'N/A'}') has 0 relevant key-path instances for its grid. May result in an empty tracker."
@@ -1998,6 +2121,7 @@ def update_tracker(
     lines_from_old_file: List[str] = []
     tracker_exists_and_is_sound = False
     output_file_basename = os.path.basename(output_file)
+    is_reading_backup = False
 
     if os.path.exists(output_file):
         attempt_read_from_path = output_file
@@ -2177,6 +2301,8 @@ def update_tracker(
                     "ErrorReading",
                 )
         # End of read attempts loop
+    # Only a sound read of the file itself can be left as it is (incremental mode)
+    old_file_read_soundly = tracker_exists_and_is_sound and not is_reading_backup
 
     try:
         path_migration_info = build_path_migration_map(
@@ -2213,14 +2339,12 @@ def update_tracker(
         relevant_new_global_keys_in_this_tracker_strs: List[str] = []
         if new_keys:
             paths_in_final_tracker_set = {ki.norm_path for ki in final_key_info_list}
-            # Use get_sortable_parts_for_key for sorting
-            relevant_new_global_keys_in_this_tracker_strs = sorted(
+            relevant_new_global_keys_in_this_tracker_strs = sort_key_strings_hierarchically(
                 [
                     nk.key_string
                     for nk in new_keys
                     if nk.norm_path in paths_in_final_tracker_set
-                ],
-                key=get_sortable_parts_for_key,
+                ]
             )
 
         last_key_edit_msg = (
@@ -2263,9 +2387,7 @@ def update_tracker(
             )
             return
 
-        _temp_global_key_counts_update = defaultdict(int)
-        for _ki_global_update in path_to_key_info.values():
-            _temp_global_key_counts_update[_ki_global_update.key_string] += 1
+        _temp_global_key_counts_update = global_key_counts_for_update_tracker
 
         existing_key_path_pairs = [
             (
@@ -2290,10 +2412,7 @@ def update_tracker(
         lines_from_old_file = []  # Effectively a new file content-wise
         tracker_exists_and_is_sound = True  # It's now considered sound
 
-    # Backup the tracker file before major modifications (if it existed or was just created)
-    if os.path.exists(output_file) and output_file:
-        backup_tracker_file(output_file)
-    elif not output_file:  # Should have been caught by earlier checks
+    if not output_file:  # Should have been caught by earlier checks
         logger.error(
             "CRITICAL: output_file is empty before backup step post-creation. Aborting update."
         )
@@ -2315,13 +2434,12 @@ def update_tracker(
     relevant_new_global_keys_in_this_tracker_strs: List[str] = []
     if new_keys:
         paths_in_final_tracker_set = {ki.norm_path for ki in final_key_info_list}
-        relevant_new_global_keys_in_this_tracker_strs = sorted(
+        relevant_new_global_keys_in_this_tracker_strs = sort_key_strings_hierarchically(
             [
                 nk.key_string
                 for nk in new_keys
                 if nk.norm_path in paths_in_final_tracker_set
-            ],
-            key=get_sortable_parts_for_key,  # MODIFIED
+            ]
         )
     if relevant_new_global_keys_in_this_tracker_strs:
         final_last_key_edit = (
@@ -2347,12 +2465,9 @@ def update_tracker(
             )
 
     new_grid_item_count = len(final_key_info_list)
-    temp_decomp_grid_rows: List[List[str]] = [
-        [PLACEHOLDER_CHAR] * new_grid_item_count for _ in range(new_grid_item_count)
-    ]
-    for i_diag in range(new_grid_item_count):
-        if i_diag < new_grid_item_count:
-            temp_decomp_grid_rows[i_diag][i_diag] = DIAGONAL_CHAR
+    temp_decomp_grid_rows: List[List[str]] = []
+    # Rows filled from the old grid; the others are new to it (new keys, added items)
+    carried_rows: Set[int] = set()
 
     # This map is crucial for mapping resolved global KeyInfo paths to their local index in THIS tracker's grid
     final_path_to_new_idx = {
@@ -2407,159 +2522,57 @@ def update_tracker(
         logger.debug(
             f"Migrating old grid values for '{os.path.basename(output_file)}': {len(existing_grid_rows_data)} old rows to process."
         )
-        # Iterate using the structure of the OLD grid (existing_grid_rows_data and existing_key_path_pairs)
-        for old_row_idx, (old_row_label_in_file, compressed_row_str) in enumerate(
-            existing_grid_rows_data
-        ):
-            # Get the path for the current old row from the old tracker's definitions
-            # existing_key_path_pairs is List[Tuple[key_str_in_file, path_str_in_file]]
-            old_row_path_in_tracker_def = existing_key_path_pairs[old_row_idx][1]
-
-            # Find migration info for this path using the global path_migration_info map
-            migration_info_for_row_path = path_migration_info.get(
-                old_row_path_in_tracker_def
-            )
-
-            if (
-                not migration_info_for_row_path
-                or migration_info_for_row_path[1] is None
-            ):
+        # Resolve each old definition once: old row/column index -> index in the NEW grid (-1 = dropped).
+        # Rows and columns share the old definitions, so one permutation serves both axes.
+        old_to_new_idx: List[int] = []
+        for _old_key_in_file, old_path_in_tracker_def in existing_key_path_pairs:
+            migration_info_for_path = path_migration_info.get(old_path_in_tracker_def)
+            if not migration_info_for_path or migration_info_for_path[1] is None:
                 # Path from old tracker def is unstable or removed globally
                 skipped_instab_log += 1
-                # logger.debug(f"  Skip Row Migration: Path '{old_row_path_in_tracker_def}' (from old key '{old_row_label_in_file}') is unstable/removed globally.")
+                old_to_new_idx.append(-1)
                 continue
-
-            new_global_key_for_row = migration_info_for_row_path[
-                1
-            ]  # This is the CURRENT global key for old_row_path_in_tracker_def
-
-            # Find the KeyInfo object in the CURRENT global map (path_to_key_info) that corresponds to this new_global_key_for_row.
-            # The path of this KeyInfo might have changed if the item was renamed/moved but is logically the same.
-            current_row_ki = next(
-                (
-                    ki
-                    for ki in path_to_key_info.values()
-                    if ki.key_string == new_global_key_for_row
-                    and ki.norm_path == old_row_path_in_tracker_def
-                ),
-                None,
+            # The path of the current KeyInfo might have changed if the item was renamed/moved.
+            # Falls back to any current path for this key if the path changed or the key was reused.
+            current_ki = path_to_key_info.resolve(
+                migration_info_for_path[1], old_path_in_tracker_def
             )
-            if (
-                not current_row_ki
-            ):  # Path might have changed for this key, or key was reused. Find any current path for this new_global_key.
-                current_row_ki = next(
-                    (
-                        ki
-                        for ki in path_to_key_info.values()
-                        if ki.key_string == new_global_key_for_row
-                    ),
-                    None,
-                )
-
-            if (
-                not current_row_ki
-            ):  # Should not happen if new_global_key_for_row is not None
+            if not current_ki:
                 skipped_instab_log += 1
-                # logger.debug(f"  Skip Row Migration: Cannot map new global key '{new_global_key_for_row}' back to a current KeyInfo object.")
+                old_to_new_idx.append(-1)
                 continue
+            new_final_idx = final_path_to_new_idx.get(current_ki.norm_path)
+            # None: the item is not part of the new tracker's structure
+            old_to_new_idx.append(-1 if new_final_idx is None else new_final_idx)
 
-            # Get the index of this row in the NEW grid structure (based on final_key_info_list)
-            new_final_row_idx = final_path_to_new_idx.get(current_row_ki.norm_path)
-            if new_final_row_idx is None:
-                # This item (identified by its current path) is not part of the new tracker's structure.
-                # logger.debug(f"  Skip Row Migration: Path '{current_row_ki.norm_path}' (new key '{new_global_key_for_row}') not in this tracker's final structure.")
-                continue
-
-            try:
-                decomp_row_values = list(decompress(compressed_row_str))
-                # Decompressed row length must match the number of columns in the OLD grid (i.e., number of old defs)
-                if len(decomp_row_values) != len(
-                    existing_key_path_pairs
-                ):  # Or use len(existing_grid_column_headers) if that's more reliable
-                    logger.warning(
-                        f"  Grid Copy: Row for old path '{old_row_path_in_tracker_def}' (old key '{old_row_label_in_file}') has decompressed length {len(decomp_row_values)}, expected {len(existing_key_path_pairs)}. Skipping row."
-                    )
-                    row_proc_err_log += 1
-                    continue
-
-                for old_col_idx, value_char in enumerate(decomp_row_values):
-                    if value_char in (DIAGONAL_CHAR, PLACEHOLDER_CHAR, EMPTY_CHAR):
-                        continue
-
-                    # Get the path for the current old column from the old tracker's definitions
-                    old_col_path_in_tracker_def = existing_key_path_pairs[old_col_idx][
-                        1
-                    ]
-                    migration_info_for_col_path = path_migration_info.get(
-                        old_col_path_in_tracker_def
-                    )
-
-                    if (
-                        not migration_info_for_col_path
-                        or migration_info_for_col_path[1] is None
-                    ):
-                        skipped_instab_log += 1
-                        # logger.debug(f"  Skip Cell Migration: Col Path '{old_col_path_in_tracker_def}' unstable/removed globally.")
-                        continue
-                    new_global_key_for_col = migration_info_for_col_path[1]
-
-                    current_col_ki = next(
-                        (
-                            ki
-                            for ki in path_to_key_info.values()
-                            if ki.key_string == new_global_key_for_col
-                            and ki.norm_path == old_col_path_in_tracker_def
-                        ),
-                        None,
-                    ) or next(
-                        (
-                            ki
-                            for ki in path_to_key_info.values()
-                            if ki.key_string == new_global_key_for_col
-                        ),
-                        None,
-                    )
-                    if not current_col_ki:
-                        skipped_instab_log += 1
-                        # logger.debug(f"  Skip Cell Migration: Cannot map new col global key '{new_global_key_for_col}' to current KeyInfo.")
-                        continue
-
-                    new_final_col_idx = final_path_to_new_idx.get(
-                        current_col_ki.norm_path
-                    )
-                    if new_final_col_idx is None:
-                        # logger.debug(f"  Skip Cell Migration: Col Path '{current_col_ki.norm_path}' (new key '{new_global_key_for_col}') not in this tracker's final structure.")
-                        continue
-
-                    # Check bounds for temp_decomp_grid_rows (should be new_grid_item_count x new_grid_item_count)
-                    if (
-                        new_final_row_idx < new_grid_item_count
-                        and new_final_col_idx < new_grid_item_count
-                    ):
-                        if (
-                            temp_decomp_grid_rows[new_final_row_idx][new_final_col_idx]
-                            == PLACEHOLDER_CHAR
-                        ):
-                            temp_decomp_grid_rows[new_final_row_idx][
-                                new_final_col_idx
-                            ] = value_char
-                            copied_values_count_log += 1
-                        else:
-                            skipped_filled_log += 1
-                            # logger.debug(f"  Grid Copy: Target cell ({new_global_key_for_row}, {new_global_key_for_col}) already filled with '{temp_decomp_grid_rows[new_final_row_idx][new_final_col_idx]}'. Skipped copying '{value_char}'.")
-                    else:
-                        logger.warning(
-                            f"  Grid Copy: Index out of bounds for new grid assignment. RowIdx: {new_final_row_idx}, ColIdx: {new_final_col_idx}. Grid Size: {new_grid_item_count}. Value '{value_char}' not copied."
-                        )
-                        row_proc_err_log += (
-                            1  # Count as an error if we can't place it due to bounds
-                        )
-
-            except Exception as e_decompress_migrate:
+        try:
+            (
+                temp_decomp_grid_rows,
+                copied_values_count_log,
+                skipped_filled_log,
+                bad_old_rows,
+            ) = remap_grid_rows(
+                [compressed_row_str for _label, compressed_row_str in existing_grid_rows_data],
+                old_to_new_idx,
+                new_grid_item_count,
+            )
+            skipped_old_rows = set(bad_old_rows)
+            carried_rows = {
+                new_idx
+                for old_idx, new_idx in enumerate(old_to_new_idx)
+                if new_idx >= 0 and old_idx not in skipped_old_rows
+            }
+            for old_row_idx in bad_old_rows:
                 logger.warning(
-                    f"  Grid Copy Error during migration for row of old path '{old_row_path_in_tracker_def}': {e_decompress_migrate}"
+                    f"  Grid Copy: Row for old path '{existing_key_path_pairs[old_row_idx][1]}' (old key '{existing_grid_rows_data[old_row_idx][0]}') has a decompressed length different from the {len(existing_key_path_pairs)} old definitions. Skipping row."
                 )
-                row_proc_err_log += 1
+            row_proc_err_log += len(bad_old_rows)
+        except Exception as e_decompress_migrate:
+            logger.warning(
+                f"  Grid Copy Error during migration for '{os.path.basename(output_file)}': {e_decompress_migrate}. Old grid values not copied."
+            )
+            temp_decomp_grid_rows = []
+            row_proc_err_log += 1
         logger.debug(
             f"Grid migration for '{os.path.basename(output_file)}': Copied {copied_values_count_log}, Skipped(Unstable/Path Issue): {skipped_instab_log}, Skipped(Target Filled): {skipped_filled_log}, Row Errors: {row_proc_err_log}"
         )
@@ -2568,55 +2581,36 @@ def update_tracker(
             f"Skipping old grid value migration for '{os.path.basename(output_file)}' as old grid was not sane, non-existent, or empty."
         )
 
+    if not temp_decomp_grid_rows:
+        temp_decomp_grid_rows = [
+            [PLACEHOLDER_CHAR] * new_grid_item_count for _ in range(new_grid_item_count)
+        ]
+        for i_diag in range(new_grid_item_count):
+            temp_decomp_grid_rows[i_diag][i_diag] = DIAGONAL_CHAR
+
     # --- Structural Dependencies (Patched) ---
+    # Incremental mode only visits rows new to the grid: pairs of carried-over
+    # rows got their structural chars when they were added. A rebuilt tracker
+    # starts from the initial grid, so all its rows count as new.
+    new_rows_in_grid = set(range(new_grid_item_count))
+    if old_file_read_soundly:
+        new_rows_in_grid -= carried_rows
     structural_deps_applied_count = 0
     grid_content_changed_by_structural = False
     if tracker_type == "doc" or tracker_type == "mini":
         logger.debug(
             f"Calculating structural dependencies for {tracker_type} tracker '{output_file_basename}'..."
         )
-        structural_deps_applied_this_run = 0
-        for r_idx_s, r_ki_s in enumerate(final_key_info_list):
-            if not r_ki_s.is_directory:
-                continue  # Structural rules often originate from directories
-            for c_idx_s, c_ki_s in enumerate(final_key_info_list):
-                if r_idx_s == c_idx_s:
-                    continue  # Skip diagonal
-
-                # Parent-child ('x')
-                if is_subpath(
-                    c_ki_s.norm_path, r_ki_s.norm_path
-                ):  # c_ki is child of r_ki (directory)
-                    if temp_decomp_grid_rows[r_idx_s][c_idx_s] == PLACEHOLDER_CHAR:
-                        temp_decomp_grid_rows[r_idx_s][c_idx_s] = "x"
-                        grid_content_changed_by_structural = True
-                        structural_deps_applied_this_run += 1
-                    if (
-                        temp_decomp_grid_rows[c_idx_s][r_idx_s] == PLACEHOLDER_CHAR
-                    ):  # Reciprocal
-                        temp_decomp_grid_rows[c_idx_s][r_idx_s] = "x"
-                        grid_content_changed_by_structural = True
-                        structural_deps_applied_this_run += 1
-
-                # For Doc trackers, unrelated items can be marked 'n' if they were placeholders
-                # This is a broad rule and might need more nuance based on actual doc structure.
-                # It should only apply if no other rule (parent-child, suggestion, etc.) has already set a value.
-                elif tracker_type == "doc":
-                    # Check if not parent-child (already handled) and not already set by other means
-                    if not is_subpath(
-                        r_ki_s.norm_path, c_ki_s.norm_path
-                    ) and not is_subpath(c_ki_s.norm_path, r_ki_s.norm_path):
-                        if temp_decomp_grid_rows[r_idx_s][c_idx_s] == PLACEHOLDER_CHAR:
-                            temp_decomp_grid_rows[r_idx_s][c_idx_s] = "n"
-                            grid_content_changed_by_structural = True
-                            structural_deps_applied_this_run += 1
-                        if temp_decomp_grid_rows[c_idx_s][r_idx_s] == PLACEHOLDER_CHAR:
-                            temp_decomp_grid_rows[c_idx_s][r_idx_s] = "n"
-                            grid_content_changed_by_structural = True
-                            structural_deps_applied_this_run += 1
-        if structural_deps_applied_this_run > 0:
+        structural_deps_applied_count = _apply_structural_dependencies(
+            temp_decomp_grid_rows,
+            final_key_info_list,
+            tracker_type,
+            rows=new_rows_in_grid if incremental else None,
+        )
+        grid_content_changed_by_structural = structural_deps_applied_count > 0
+        if structural_deps_applied_count > 0:
             logger.debug(
-                f"Applied {structural_deps_applied_this_run} structural dependency cells for '{output_file_basename}'."
+                f"Applied {structural_deps_applied_count} structural dependency cells for '{output_file_basename}'."
             )
 
     # --- Import Established Relationships (Mini-Trackers - Path Based - Detailed) ---
@@ -2649,86 +2643,59 @@ def update_tracker(
             f"  Import: Native items: {len(native_ki_in_current_tracker)}, Foreign items: {len(foreign_ki_in_current_tracker)}"
         )
 
-        # Helper to get relationship char from a specified home tracker file
-        # This helper needs to be robust.
-        @cached(
-            "home_tracker_rel_char",
-            key_func=lambda p1, p2, htf: f"htrc:{p1}:{p2}:{htf}:{(os.path.getmtime(htf) if os.path.exists(htf) else 0)}",
-        )
-        def get_char_from_home_tracker_cached(
+        # Helper to get relationship char from a specified home tracker file.
+        # Each home tracker is parsed once per update and its rows are
+        # decompressed on first use: {file: (path -> def idx, def count, rows, decompressed rows)}
+        home_tracker_grids: Dict[
+            str, Tuple[Dict[str, int], int, List[Tuple[str, str]], Dict[int, str]]
+        ] = {}
+
+        def get_char_from_home_tracker(
             path1_norm: str, path2_norm: str, home_tracker_file_norm: str
         ) -> Optional[str]:
-            if not os.path.exists(home_tracker_file_norm):
-                logger.debug(
-                    f"    Home tracker {home_tracker_file_norm} not found for char lookup."
+            home_grid = home_tracker_grids.get(home_tracker_file_norm)
+            if home_grid is None:
+                home_data = read_tracker_file_structured(home_tracker_file_norm)
+                home_path_to_def_idx_map: Dict[str, int] = {}
+                for i, (_k_str, p_str) in enumerate(home_data["definitions_ordered"]):
+                    # Take first occurrence if path duplicated in defs (should not happen)
+                    home_path_to_def_idx_map.setdefault(p_str, i)
+                home_grid = home_tracker_grids[home_tracker_file_norm] = (
+                    home_path_to_def_idx_map,
+                    len(home_data["definitions_ordered"]),
+                    home_data["grid_rows_ordered"],
+                    {},
                 )
+            home_path_to_def_idx_map, home_def_count, home_grid_rows_data, home_rows = (
+                home_grid
+            )
+            idx1_in_home_defs = home_path_to_def_idx_map.get(path1_norm)
+            idx2_in_home_defs = home_path_to_def_idx_map.get(path2_norm)
+            if (
+                idx1_in_home_defs is None
+                or idx2_in_home_defs is None
+                or idx1_in_home_defs >= len(home_grid_rows_data)
+            ):
                 return None
-            try:
-                with open(home_tracker_file_norm, "r", encoding="utf-8") as hf:
-                    home_lines = hf.readlines()
-                home_defs_pairs = read_key_definitions_from_lines(
-                    home_lines
-                )  # List[(key_str, path_str)]
-                _home_col_hdrs, home_grid_rows_data = read_grid_from_lines(
-                    home_lines
-                )  # List[(row_label_str, comp_data_str)]
-
-                # Build path -> index map for the home tracker's definitions
-                home_path_to_def_idx_map: Dict[str, int] = {}
-                for i, (_k_str, p_str) in enumerate(home_defs_pairs):
-                    if (
-                        p_str not in home_path_to_def_idx_map
-                    ):  # Take first occurrence if path duplicated in defs (should not happen)
-                        home_path_to_def_idx_map[p_str] = i
-
-                idx1_in_home_defs = home_path_to_def_idx_map.get(path1_norm)
-                idx2_in_home_defs = home_path_to_def_idx_map.get(path2_norm)
-
-                if idx1_in_home_defs is not None and idx2_in_home_defs is not None:
-                    # Ensure the row we are looking for (idx1_in_home_defs) exists in the grid data read
-                    # The grid rows are ordered as per definitions.
-                    if idx1_in_home_defs < len(home_grid_rows_data):
-                        # The label of the grid row should match the key_string from definitions if consistent
-                        # home_grid_rows_data[idx1_in_home_defs] is (row_label_str, compressed_data_str)
-                        _row_label, compressed_row = home_grid_rows_data[
-                            idx1_in_home_defs
-                        ]
-                        # Optional: Check if _row_label matches home_defs_pairs[idx1_in_home_defs][0]
-
-                        decomp_row_chars = decompress(compressed_row)
-
-                        # The decompressed row length must match the number of items in home_defs_pairs
-                        if len(decomp_row_chars) != len(home_defs_pairs):
-                            logger.warning(
-                                f"    Home tracker {os.path.basename(home_tracker_file_norm)}: Row for path '{path1_norm}' (def idx {idx1_in_home_defs}) has length {len(decomp_row_chars)}, expected {len(home_defs_pairs)}. Cannot get char."
-                            )
-                            return None
-
-                        if idx2_in_home_defs < len(decomp_row_chars):
-                            found_char = decomp_row_chars[idx2_in_home_defs]
-                            logger.debug(
-                                f"    Home tracker {os.path.basename(home_tracker_file_norm)}: Found '{found_char}' for {path1_norm} -> {path2_norm}"
-                            )
-                            return found_char
-                        else:
-                            logger.debug(
-                                f"    Home tracker {os.path.basename(home_tracker_file_norm)}: Target path index {idx2_in_home_defs} out of bounds for decompressed row of '{path1_norm}'."
-                            )
-                    else:
-                        logger.debug(
-                            f"    Home tracker {os.path.basename(home_tracker_file_norm)}: Source path index {idx1_in_home_defs} out of bounds for grid data rows."
-                        )
-                else:
-                    logger.debug(
-                        f"    Home tracker {os.path.basename(home_tracker_file_norm)}: Path(s) not in definitions: p1({path1_norm})-{idx1_in_home_defs is not None}, p2({path2_norm})-{idx2_in_home_defs is not None}."
+            decomp_row_chars = home_rows.get(idx1_in_home_defs)
+            if decomp_row_chars is None:
+                try:
+                    decomp_row_chars = decompress(
+                        home_grid_rows_data[idx1_in_home_defs][1]
                     )
-
-            except Exception as e_home_read:
-                logger.warning(
-                    f"    Error reading/parsing home tracker {home_tracker_file_norm} for import: {e_home_read}",
-                    exc_info=False,
-                )  # Reduce noise
-            return None
+                except Exception as e_home_read:
+                    logger.warning(
+                        f"    Error parsing home tracker {home_tracker_file_norm} for import: {e_home_read}"
+                    )
+                    decomp_row_chars = ""
+                home_rows[idx1_in_home_defs] = decomp_row_chars
+            # The decompressed row length must match the number of items in the home definitions
+            if len(decomp_row_chars) != home_def_count:
+                logger.debug(
+                    f"    Home tracker {os.path.basename(home_tracker_file_norm)}: Row for path '{path1_norm}' has length {len(decomp_row_chars)}, expected {home_def_count}. Cannot get char."
+                )
+                return None
+            return decomp_row_chars[idx2_in_home_defs]
 
         abs_doc_roots_set = {
             normalize_path(os.path.join(project_root, p))
@@ -2769,13 +2736,13 @@ def update_tracker(
                     and home_tracker_file_of_foreign != output_file
                 ):  # Not self
                     # Path N -> Path F in Foreign's Home Tracker
-                    char_nf_in_home = get_char_from_home_tracker_cached(
+                    char_nf_in_home = get_char_from_home_tracker(
                         native_ki.norm_path,
                         foreign_ki.norm_path,
                         home_tracker_file_of_foreign,
                     )
                     # Path F -> Path N in Foreign's Home Tracker
-                    char_fn_in_home = get_char_from_home_tracker_cached(
+                    char_fn_in_home = get_char_from_home_tracker(
                         foreign_ki.norm_path,
                         native_ki.norm_path,
                         home_tracker_file_of_foreign,
@@ -2880,11 +2847,11 @@ def update_tracker(
                     common_home_tracker and common_home_tracker != output_file
                 ):  # Not self
                     # Path F1 -> Path F2 in their common home
-                    char_f1f2_in_home = get_char_from_home_tracker_cached(
+                    char_f1f2_in_home = get_char_from_home_tracker(
                         f_ki1.norm_path, f_ki2.norm_path, common_home_tracker
                     )
                     # Path F2 -> Path F1 in their common home
-                    char_f2f1_in_home = get_char_from_home_tracker_cached(
+                    char_f2f1_in_home = get_char_from_home_tracker(
                         f_ki2.norm_path, f_ki1.norm_path, common_home_tracker
                     )
 
@@ -3197,13 +3164,10 @@ def update_tracker(
                     all_tracker_paths_for_agg, path_migration_info, path_to_key_info, show_progress=False
                 )
 
-                global_authoritative_rels: Dict[Tuple[str, str], str] = {
-                    link_tuple: char_val
-                    for link_tuple, (
-                        char_val,
-                        _origins,
-                    ) in globally_aggregated_links_with_origins.items()
-                }
+                # Index the authoritative relationships by source key, keeping only
+                # sources in this tracker ('p' never changes a cell)
+                keys_in_this_tracker = {ki.key_string for ki in final_key_info_list}
+                key_in_scope: Callable[[str], bool] = lambda _key_str: True
 
                 # DOC TRACKER CONSOLIDATION SCOPE
                 if tracker_type == "doc":
@@ -3214,90 +3178,41 @@ def update_tracker(
                     key_string_to_kis = defaultdict(list)
                     for ki in path_to_key_info.values():
                         key_string_to_kis[ki.key_string].append(ki)
+                    key_in_doc_root_memo: Dict[str, bool] = {}
 
                     def key_in_doc_root(key_str: str) -> bool:
-                        kis = key_string_to_kis.get(key_str)
-                        if not kis:
-                            return False
-                        return any(
-                            is_path_in_doc_roots(ki.norm_path, abs_doc_roots_set)
-                            for ki in kis
-                        )
+                        in_root = key_in_doc_root_memo.get(key_str)
+                        if in_root is None:
+                            in_root = key_in_doc_root_memo[key_str] = any(
+                                is_path_in_doc_roots(ki.norm_path, abs_doc_roots_set)
+                                for ki in key_string_to_kis.get(key_str, ())
+                            )
+                        return in_root
 
-                    scoped_rels = {
-                        (src_key, tgt_key): char
-                        for (
-                            src_key,
-                            tgt_key,
-                        ), char in global_authoritative_rels.items()
-                        if key_in_doc_root(src_key) and key_in_doc_root(tgt_key)
-                    }
+                    key_in_scope = key_in_doc_root
 
-                    logger.debug(
-                        f"Scoped consolidation from {len(global_authoritative_rels)} to {len(scoped_rels)} relationships for doc_tracker."
-                    )
-                    global_authoritative_rels = scoped_rels
+                rels_by_source: Dict[str, Dict[str, str]] = defaultdict(dict)
+                scoped_rels_ct = 0
+                for (
+                    src_key,
+                    tgt_key,
+                ), (char_val, _origins) in globally_aggregated_links_with_origins.items():
+                    if not key_in_scope(src_key) or not key_in_scope(tgt_key):
+                        continue
+                    scoped_rels_ct += 1
+                    if char_val != PLACEHOLDER_CHAR and src_key in keys_in_this_tracker:
+                        rels_by_source[src_key][tgt_key] = char_val
 
                 logger.debug(
-                    f"Retrieved {len(global_authoritative_rels)} globally authoritative relationships for consolidation."
+                    f"Retrieved {scoped_rels_ct} of {len(globally_aggregated_links_with_origins)} globally authoritative relationships for consolidation."
                 )
 
-                # Iterate through the current temp_decomp_grid_rows using final_key_info_list
-                # which defines its structure. The key_strings in KeyInfo are global keys.
-                for r_idx, r_ki in enumerate(final_key_info_list):
-                    # r_ki.key_string is the current global key string for the row item
-                    for c_idx, c_ki in enumerate(final_key_info_list):
-                        if r_idx == c_idx:
-                            continue  # Skip diagonal
-
-                        # c_ki.key_string is the current global key string for the column item
-                        authoritative_char = global_authoritative_rels.get(
-                            (r_ki.key_string, c_ki.key_string), PLACEHOLDER_CHAR
-                        )
-                        current_char_in_grid = temp_decomp_grid_rows[r_idx][c_idx]
-
-                        if (
-                            authoritative_char != PLACEHOLDER_CHAR
-                        ):  # Global view has a defined non-'p' relationship
-                            try:
-                                auth_prio = get_priority(authoritative_char)
-                                curr_prio = get_priority(current_char_in_grid)
-
-                                # Update if authoritative is strictly higher priority
-                                should_update_consolidate = auth_prio > curr_prio
-                                # Also update if authoritative is 'n' (verified no dep) and current is overwritable ('p','s','S','.' EMPTY)
-                                if (
-                                    not should_update_consolidate
-                                    and authoritative_char == "n"
-                                    and current_char_in_grid
-                                    in (PLACEHOLDER_CHAR, "s", "S", EMPTY_CHAR)
-                                ):
-                                    should_update_consolidate = True
-                                # Also allow authoritative 's'/'S' to overwrite placeholders or empty
-                                if (
-                                    not should_update_consolidate
-                                    and authoritative_char in ("s", "S")
-                                    and current_char_in_grid
-                                    in (PLACEHOLDER_CHAR, EMPTY_CHAR)
-                                ):
-                                    should_update_consolidate = True
-
-                                if should_update_consolidate:
-                                    if (
-                                        temp_decomp_grid_rows[r_idx][c_idx]
-                                        != authoritative_char
-                                    ):
-                                        logger.debug(
-                                            f"  Consolidating '{r_ki.key_string}' -> '{c_ki.key_string}' (Paths: '{r_ki.norm_path}' -> '{c_ki.norm_path}'): From '{current_char_in_grid}' to '{authoritative_char}' based on global view."
-                                        )
-                                        temp_decomp_grid_rows[r_idx][
-                                            c_idx
-                                        ] = authoritative_char
-                                        consolidation_changes_ct += 1
-                            except KeyError as e_prio_consolidate:
-                                logger.warning(
-                                    f"  Consolidation: Priority lookup failed for char '{str(e_prio_consolidate)}' comparing {r_ki.key_string}->{c_ki.key_string}. Skipping cell."
-                                )
+                consolidation_changes_ct = _consolidate_grid(
+                    temp_decomp_grid_rows,
+                    final_key_info_list,
+                    rels_by_source,
+                    get_priority,
+                )
 
                 if consolidation_changes_ct > 0:
                     logger.debug(
@@ -3433,84 +3348,29 @@ def update_tracker(
                     grid_structure_changed_flag = True
 
                 # Rebuild final_key_info_list
-                final_key_info_list = [
+                final_key_info_list = sort_key_infos(
                     ki
                     for ki in original_final_key_info_list_before_pruning
                     if ki.norm_path in paths_to_keep_after_pruning_set
-                ]
-                final_key_info_list.sort(
-                    key=lambda ki_sort: (
-                        (
-                            get_sortable_parts_for_key(ki_sort.key_string)
-                            if ki_sort.key_string
-                            else []
-                        ),
-                        ki_sort.norm_path,
-                    )
                 )
 
                 new_grid_item_count = len(final_key_info_list)  # Update count
 
                 # Rebuild temp_decomp_grid_rows for the new, smaller size
-                rebuilt_temp_decomp_grid_rows = [
-                    [PLACEHOLDER_CHAR] * new_grid_item_count
-                    for _ in range(new_grid_item_count)
-                ]
-                for i_rebuild in range(new_grid_item_count):
-                    rebuilt_temp_decomp_grid_rows[i_rebuild][
-                        i_rebuild
-                    ] = DIAGONAL_CHAR  # Set diagonals
-
+                orig_idx_by_path = {
+                    ki_orig.norm_path: i
+                    for i, ki_orig in enumerate(
+                        original_final_key_info_list_before_pruning
+                    )
+                }
+                rebuilt_temp_decomp_grid_rows = _select_grid_items(
+                    original_temp_decomp_grid_rows_before_pruning,
+                    [orig_idx_by_path[ki.norm_path] for ki in final_key_info_list],
+                )
                 pruned_path_to_new_idx_map = {
                     ki.norm_path: i for i, ki in enumerate(final_key_info_list)
                 }
 
-                # Iterate through the NEW (pruned) structure to populate the rebuilt grid
-                for new_r_idx, new_r_ki in enumerate(final_key_info_list):
-                    # Find corresponding row index in the grid *before* pruning
-                    orig_r_idx = next(
-                        (
-                            i
-                            for i, ki_orig in enumerate(
-                                original_final_key_info_list_before_pruning
-                            )
-                            if ki_orig.norm_path == new_r_ki.norm_path
-                        ),
-                        None,
-                    )
-                    if orig_r_idx is None:
-                        continue  # Should not happen if new_r_ki came from original
-
-                    for new_c_idx, new_c_ki in enumerate(final_key_info_list):
-                        if new_r_idx == new_c_idx:
-                            continue  # Diagonal already set
-
-                        # Find corresponding col index in the grid *before* pruning
-                        orig_c_idx = next(
-                            (
-                                i
-                                for i, ki_orig in enumerate(
-                                    original_final_key_info_list_before_pruning
-                                )
-                                if ki_orig.norm_path == new_c_ki.norm_path
-                            ),
-                            None,
-                        )
-                        if orig_c_idx is None:
-                            continue  # Should not happen
-
-                        # Copy the value from the correct cell of the grid *before* pruning
-                        if orig_r_idx < len(
-                            original_temp_decomp_grid_rows_before_pruning
-                        ) and orig_c_idx < len(
-                            original_temp_decomp_grid_rows_before_pruning[orig_r_idx]
-                        ):
-                            rebuilt_temp_decomp_grid_rows[new_r_idx][new_c_idx] = (
-                                original_temp_decomp_grid_rows_before_pruning[
-                                    orig_r_idx
-                                ][orig_c_idx]
-                            )
-
                 # Update the main grid variables to the new pruned state
                 temp_decomp_grid_rows = rebuilt_temp_decomp_grid_rows
                 final_path_to_new_idx = pruned_path_to_new_idx_map
@@ -3553,70 +3413,22 @@ def update_tracker(
             ]
 
             final_key_info_list = pruned_key_info_list
-            final_key_info_list.sort(
-                key=lambda ki_sort: (
-                    (
-                        get_sortable_parts_for_key(ki_sort.key_string)
-                        if ki_sort.key_string
-                        else []
-                    ),
-                    ki_sort.norm_path,
-                )
-            )
+            final_key_info_list[:] = sort_key_infos(final_key_info_list)
 
             new_grid_item_count = len(final_key_info_list)
 
-            rebuilt_temp_decomp_grid_rows = [
-                [PLACEHOLDER_CHAR] * new_grid_item_count
-                for _ in range(new_grid_item_count)
-            ]
-            for i_rebuild in range(new_grid_item_count):
-                rebuilt_temp_decomp_grid_rows[i_rebuild][i_rebuild] = DIAGONAL_CHAR
-
+            orig_idx_by_path = {
+                ki_orig.norm_path: i
+                for i, ki_orig in enumerate(original_final_key_info_list_before_pruning)
+            }
+            rebuilt_temp_decomp_grid_rows = _select_grid_items(
+                original_temp_decomp_grid_rows_before_pruning,
+                [orig_idx_by_path[ki.norm_path] for ki in final_key_info_list],
+            )
             pruned_path_to_new_idx_map = {
                 ki.norm_path: i for i, ki in enumerate(final_key_info_list)
             }
 
-            for new_r_idx, new_r_ki in enumerate(final_key_info_list):
-                orig_r_idx = next(
-                    (
-                        i
-                        for i, ki_orig in enumerate(
-                            original_final_key_info_list_before_pruning
-                        )
-                        if ki_orig.norm_path == new_r_ki.norm_path
-                    ),
-                    None,
-                )
-                if orig_r_idx is None:
-                    continue
-                for new_c_idx, new_c_ki in enumerate(final_key_info_list):
-                    if new_r_idx == new_c_idx:
-                        continue
-                    orig_c_idx = next(
-                        (
-                            i
-                            for i, ki_orig in enumerate(
-                                original_final_key_info_list_before_pruning
-                            )
-                            if ki_orig.norm_path == new_c_ki.norm_path
-                        ),
-                        None,
-                    )
-                    if orig_c_idx is None:
-                        continue
-
-                    if orig_r_idx < len(
-                        original_temp_decomp_grid_rows_before_pruning
-                    ) and orig_c_idx < len(
-                        original_temp_decomp_grid_rows_before_pruning[orig_r_idx]
-                    ):
-                        rebuilt_temp_decomp_grid_rows[new_r_idx][new_c_idx] = (
-                            original_temp_decomp_grid_rows_before_pruning[orig_r_idx][
-                                orig_c_idx
-                            ]
-                        )
-
             temp_decomp_grid_rows = rebuilt_temp_decomp_grid_rows
             final_path_to_new_idx = pruned_path_to_new_idx_map
 
@@ -3712,16 +3524,7 @@ def update_tracker(
 
                 if added_any:
                     # Re-sort the list deterministically (by hierarchical key then path)
-                    final_key_info_list.sort(
-                        key=lambda ki_sort: (
-                            (
-                                get_sortable_parts_for_key(ki_sort.key_string)
-                                if ki_sort.key_string
-                                else []
-                            ),
-                            ki_sort.norm_path,
-                        )
-                    )
+                    final_key_info_list[:] = sort_key_infos(final_key_info_list)
                     # Rebuild path->index mapping
                     path_to_final_idx.clear()
                     path_to_final_idx.update(
@@ -3968,13 +3771,47 @@ def update_tracker(
         final_grid_comp_ordered = [compress("".join(r)) for r in temp_decomp_grid_rows]
     # --- END OF SECTION: Compress final grid ---
 
+    # --- Incremental: Skip Unchanged Tracker ---
+    # Only the edit timestamps would change (forced suggestions included: the
+    # analysis pass forces every suggestion, most of which are already set)
+    if incremental and old_file_read_soundly:
+        final_display_keys = [
+            _get_display_key_for_tracker(
+                ki, path_to_key_info, global_key_counts_for_update_tracker
+            )
+            for ki in final_key_info_list
+        ]
+        unchanged_on_disk = (
+            final_last_key_edit == current_last_key_edit
+            and final_display_keys == existing_grid_column_headers
+            and list(zip(final_display_keys, (ki.norm_path for ki in final_key_info_list)))
+            == list(existing_key_path_pairs)
+            and final_grid_comp_ordered == [row for _label, row in existing_grid_rows_data]
+        )
+        if unchanged_on_disk and tracker_type == "mini":
+            # The write would add missing template markers
+            stripped_old_lines = {line.strip() for line in lines_from_old_file}
+            unchanged_on_disk = all(
+                marker in stripped_old_lines
+                for marker in get_mini_tracker_data()["markers"]
+            )
+        if unchanged_on_disk:
+            logger.debug(
+                f"Tracker '{os.path.basename(output_file)}' unchanged "
+                f"({len(final_key_info_list) - len(carried_rows)} new rows checked). Skipping write."
+            )
+            return
+    # --- END OF SECTION: Incremental: Skip Unchanged Tracker ---
+
     # --- Final Write ---
     logger.debug(f"Finalizing write for tracker: {output_file}")
 
-    # Precompute global key counts ONCE before final write for efficiency
-    final_global_key_counts = defaultdict(int)
-    for ki_global_final_write in path_to_key_info.values():
-        final_global_key_counts[ki_global_final_write.key_string] += 1
+    # Backup the tracker file before it is rewritten
+    if os.path.exists(output_file):
+        backup_tracker_file(output_file)
+
+    # Global key counts were computed once at the start (the map is not mutated here)
+    final_global_key_counts = global_key_counts_for_update_tracker
 
     # Ensure final_key_info_list is used for definitions and grid keys
     grid_keys_for_final_write = [ki.key_string for ki in final_key_info_list]
@@ -4037,6 +3874,180 @@ def update_tracker(
     # --- END OF SECTION: Cache Invalidation ---
 
 
+# --- Parallel Mini Tracker Stage ---
+def partition_suggestions_by_module(
+    module_paths: List[str],
+    path_to_key_info: Dict[str, KeyInfo],
+    suggestions: Optional[Dict[str, List[Tuple[str, str]]]],
+) -> Dict[str, Dict[str, List[Tuple[str, str]]]]:
+    """
+    Splits KEY#global_instance suggestions into the share each module's mini
+    tracker update can use.
+
+    A mini tracker only applies links whose two ends are in its grid, and the
+    grid is drawn from the module's own items, the foreign ends of links
+    touching them and the items already defined in its tracker file. Each
+    module gets the links between those candidates, in their original order,
+    so update_tracker() produces the same tracker as with all suggestions.
+    """
+    path_to_key_info = as_global_key_map(path_to_key_info)
+    partitioned: Dict[str, Dict[str, List[Tuple[str, str]]]] = {
+        module_path: {} for module_path in module_paths
+    }
+    if not suggestions:
+        return partitioned
+
+    resolved_paths: Dict[str, Optional[str]] = {}
+
+    def path_of(gi_str: str) -> Optional[str]:
+        if gi_str not in resolved_paths:
+            ki = resolve_key_global_instance_to_ki(gi_str, path_to_key_info)
+            resolved_paths[gi_str] = ki.norm_path if ki else None
+        return resolved_paths[gi_str]
+
+    # links[i] = (src_gi, tgt_gi, char, src_path, tgt_path), in suggestion order
+    links: List[Tuple[str, str, str, str, str]] = []
+    links_by_path: Dict[str, List[int]] = defaultdict(list)
+    for src_gi, deps_gi in suggestions.items():
+        src_path = path_of(src_gi)
+        if src_path is None:
+            continue  # Never relevant to any tracker
+        for tgt_gi, dep_char in deps_gi:
+            tgt_path = path_of(tgt_gi)
+            if tgt_path is None:
+                continue
+            links_by_path[src_path].append(len(links))
+            if tgt_path != src_path:
+                links_by_path[tgt_path].append(len(links))
+            links.append((src_gi, tgt_gi, dep_char, src_path, tgt_path))
+
+    for module_path, module_suggestions in partitioned.items():
+        internal_paths = {module_path}
+        internal_paths.update(
+            ki.norm_path for ki in path_to_key_info.children_of(module_path)
+        )
+        candidates = set(internal_paths)
+        for path in internal_paths:
+            for idx in links_by_path.get(path, ()):
+                candidates.update(links[idx][3:])
+        tracker_path = get_mini_tracker_path(module_path)
+        if os.path.exists(tracker_path):
+            candidates.update(
+                path
+                for _key, path in read_tracker_file_structured(tracker_path)[
+                    "definitions_ordered"
+                ]
+            )
+        selected = sorted(
+            {
+                idx
+                for path in candidates
+                for idx in links_by_path.get(path, ())
+                if links[idx][3] in candidates and links[idx][4] in candidates
+            }
+        )
+        for idx in selected:
+            src_gi, tgt_gi, dep_char = links[idx][:3]
+            module_suggestions.setdefault(src_gi, []).append((tgt_gi, dep_char))
+    return partitioned
+
+
+def update_mini_trackers(
+    module_paths: List[str],
+    path_to_key_info: Dict[str, KeyInfo],
+    suggestions_external: Optional[Dict[str, List[Tuple[str, str]]]] = None,
+    file_to_module: Optional[Dict[str, str]] = None,
+    new_keys: Optional[List[KeyInfo]] = None,
+    force_apply_suggestions: bool = False,
+    use_old_map_for_migration: bool = True,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Dict[str, str]:
+    """
+    Updates the mini trackers of several modules in worker threads.
+
+    Suggestions are partitioned per module up front. Every update sees the
+    trackers and caches as they were when the stage started: mini tracker
+    writes are staged and moved into place when all updates are done, then
+    the cache invalidations they queued are applied serially. The result does
+    not depend on the number of workers or the order they finish in. The
+    first module runs alone so the shared caches (dependency aggregation, home
+    tracker lookups) are filled once instead of by every worker.
+
+    Args:
+        module_paths: Module directories whose mini trackers to update.
+        max_workers: Worker threads (defaults to the performance
+            mini_tracker_workers setting, then the CPU count; 1 is serial).
+        progress: Called with each module path as it finishes, from the
+            calling thread.
+        Other arguments are passed to update_tracker() for every module.
+    Returns:
+        {module_path: "success" or "failure"}
+    """
+    path_to_key_info = as_global_key_map(path_to_key_info)
+    module_paths = list(dict.fromkeys(normalize_path(p) for p in module_paths))
+    results: Dict[str, str] = {}
+    if not module_paths:
+        return results
+    if not max_workers:
+        max_workers = (
+            ConfigManager().get_performance_setting("mini_tracker_workers")
+            or os.cpu_count()
+            or 1
+        )
+    partitioned = partition_suggestions_by_module(
+        module_paths, path_to_key_info, suggestions_external
+    )
+
+    def update_module(module_path: str) -> None:
+        update_tracker(
+            output_file_suggestion=get_mini_tracker_path(module_path),
+            path_to_key_info=path_to_key_info,
+            tracker_type="mini",
+            suggestions_external=partitioned[module_path],
+            file_to_module=file_to_module,
+            new_keys=new_keys,
+            force_apply_suggestions=force_apply_suggestions,
+            use_old_map_for_migration=use_old_map_for_migration,
+        )
+
+    def record(module_path: str, error: Optional[BaseException]) -> None:
+        if error is None:
+            results[module_path] = "success"
+        else:
+            logger.error(
+                f"Error updating mini tracker for module '{module_path}': {error}",
+                exc_info=error,
+            )
+            results[module_path] = "failure"
+        if progress:
+            progress(module_path)
+
+    with deferred_invalidation(), _staged_mini_tracker_writes():
+        first, rest = module_paths[0], module_paths[1:]
+        try:
+            update_module(first)
+            record(first, None)
+        except Exception as e:
+            record(first, e)
+        if rest:
+            with ThreadPoolExecutor(
+                max_workers=min(max_workers, len(rest)),
+                thread_name_prefix="mini-tracker",
+            ) as executor:
+                futures = {
+                    executor.submit(update_module, module_path): module_path
+                    for module_path in rest
+                }
+                for future in as_completed(futures):
+                    record(futures[future], future.exception())
+    logger.info(
+        f"Updated {len(results)} mini trackers with {max_workers} workers "
+        f"({sum(1 for r in results.values() if r != 'success')} failures)."
+    )
+    return {module_path: results[module_path] for module_path in module_paths}
+
+
 # --- remove_path_from_tracker (REFACTORED from remove_key_from_tracker) ---
 def remove_path_from_tracker(output_file_path_str: str, path_to_remove_str: str):
     """
@@ -4105,11 +4116,7 @@ def remove_path_from_tracker(output_file_path_str: str, path_to_remove_str: str)
     tracker_type_val = (
         "mini" if is_mini else ("doc" if "doc_tracker.md" in output_file else "main")
     )
-    f_to_m_map = {
-        _info.norm_path: _info.parent_path
-        for _info in (global_path_map_full).values()
-        if not _info.is_directory and _info.parent_path
-    }
+    f_to_m_map = global_path_map_full.file_to_module_map()
     key_str_of_removed: Optional[str] = (
         global_path_map_full.get(
             path_to_remove, KeyInfo("", "", None, 0, False)
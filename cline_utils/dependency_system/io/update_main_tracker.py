@@ -226,83 +226,119 @@ def main_key_filter(project_root: str, path_to_key_info: Dict[str, KeyInfo]) ->
 # 层级辅助函数 (Hierarchical Helper Functions)
 # =============================================================================
 
-def _get_descendants_paths(parent_path: str, hierarchy: Dict[str, List[str]]) -> Set[str]:
+# 相同优先级下合并为'x'的方向字符 / Direction chars that merge to 'x' at equal priority
+_BIDIRECTIONAL_CHARS = frozenset({'<', '>', 'x'})
+
+
+def _merge_dependency(
+    targets: Dict[str, Tuple[str, int]],
+    target_path: str,
+    dep_char: str,
+    priority: int
+) -> None:
     """
-    获取所有后代路径辅助函数 (Get All Descendant Paths Helper)
-    =========================================================
+    优先级合并辅助函数 (Priority-Aware Merge Helper)
+    ===============================================
 
     功能说明 (Description):
-        获取给定父路径的所有后代路径（包括父路径自身）。
-        使用广度优先搜索(BFS)遍历层级结构。
+        将一个依赖字符合并到目标映射中：更高优先级覆盖更低优先级；
+        相同优先级下'<'、'>'与回滚产生的'x'合并为'x'（双向依赖），
+        因此回滚结果与合并顺序无关。其他相等情况保留已存储的值。
 
     参数 (Args):
-        parent_path (str): 父路径（可能未规范化）
-        hierarchy (Dict[str, List[str]]): 层级映射表
-            - 键：父路径
-            - 值：直接子路径列表
+        targets (Dict[str, Tuple[str, int]]): 目标模块路径 -> (依赖字符, 优先级)
+        target_path (str): 目标模块路径
+        dep_char (str): 要合并的依赖字符
+        priority (int): 依赖字符的优先级
+    """
+    stored_char, stored_priority = targets.get(target_path, (PLACEHOLDER_CHAR, -1))
+    if priority > stored_priority:
+        # 更高优先级，覆盖存储的依赖
+        targets[target_path] = (dep_char, priority)
+    elif (
+        priority == stored_priority
+        and priority > -1
+        and dep_char != stored_char
+        and {dep_char, stored_char} <= _BIDIRECTIONAL_CHARS
+    ):
+        # 相同优先级的方向字符合并为'x'
+        targets[target_path] = ('x', priority)
+
+
+def _rollup_module_dependencies(
+    module_paths: List[str],
+    aggregated_deps_prio: Dict[str, Dict[str, Tuple[str, int]]]
+) -> None:
+    """
+    自底向上层级回滚辅助函数 (Bottom-Up Hierarchical Rollup Helper)
+    ==============================================================
 
-    返回值 (Returns):
-        Set[str]: 包含父路径及其所有后代路径的集合
+    功能说明 (Description):
+        父模块继承子模块（及其所有后代）的外部依赖关系，
+        目标是父模块自身或其后代的依赖除外。结果直接写入aggregated_deps_prio。
 
     算法 (Algorithm):
-        - 使用广度优先搜索(BFS)遍历层级树
-        - 使用队列存储待处理的路径
-        - 使用集合避免重复处理
+        - 通过os.path.dirname在模块集合中查找父模块，构建 父 -> 子 映射（O(n)）
+        - 一次深度优先遍历：先序编号给出每个子树的区间，
+          "目标是否为后代"变为O(1)的区间判断
+        - 后序（子模块先于父模块）合并：每个子模块的依赖集在其完全聚合后
+          只合并到父模块一次，使用与直接依赖相同的优先级合并
 
-    示例 (Example):
-        >>> hierarchy = {
-        ...     "/project/src": ["/project/src/utils", "/project/src/core"],
-        ...     "/project/src/utils": ["/project/src/utils/helpers"]
-        ... }
-        >>> descendants = _get_descendants_paths("/project/src", hierarchy)
-        >>> # 返回：{"/project/src", "/project/src/utils", "/project/src/core", ...}
+    参数 (Args):
+        module_paths (List[str]): 主追踪器的模块路径（已规范化）
+        aggregated_deps_prio (Dict[str, Dict[str, Tuple[str, int]]]):
+            源模块路径 -> {目标模块路径: (依赖字符, 优先级)}
     """
+    module_set = set(module_paths)
 
     # -------------------------------------------------------------------------
-    # 步骤1: 规范化父路径 (Step 1: Normalize Parent Path)
-    # -------------------------------------------------------------------------
-    # 确保路径从一开始就是规范化的，即使调用者没有保证
-    norm_parent_path = normalize_path(parent_path)
-
-    # -------------------------------------------------------------------------
-    # 步骤2: 初始化结果集合 (Step 2: Initialize Result Set)
-    # -------------------------------------------------------------------------
-    # 创建集合，包含父路径自身（因为函数说明中提到包括self）
-    descendants = {norm_parent_path}
-
-    # -------------------------------------------------------------------------
-    # 步骤3: 初始化BFS队列 (Step 3: Initialize BFS Queue)
-    # -------------------------------------------------------------------------
-    # 使用适当的队列/栈进行广度优先搜索(BFS)
-    # 获取父路径的直接子路径，并规范化后加入队列
-    queue = [normalize_path(p) for p in hierarchy.get(norm_parent_path, [])]
-
-    # 创建已处理路径集合，避免重复处理
-    processed = {norm_parent_path}
-
-    # -------------------------------------------------------------------------
-    # 步骤4: BFS遍历 (Step 4: BFS Traversal)
-    # -------------------------------------------------------------------------
-    while queue:  # 当队列不为空时继续循环
-        # 从队列前端取出一个子路径（BFS风格）
-        child_path = queue.pop(0)
-
-        # 检查该路径是否已经处理过
-        if child_path not in processed:
-            # 将子路径添加到后代集合中
-            descendants.add(child_path)
-            # 标记为已处理
-            processed.add(child_path)
-
-            # 获取当前子路径的所有子路径（孙路径）
-            # 规范化后添加到队列中，继续遍历
-            grandchildren = [normalize_path(p) for p in hierarchy.get(child_path, [])]
-            queue.extend(grandchildren)  # 将孙路径添加到队列末尾
-
-    # -------------------------------------------------------------------------
-    # 步骤5: 返回结果 (Step 5: Return Result)
+    # 构建层级映射 (Build Hierarchy Mapping)
     # -------------------------------------------------------------------------
-    return descendants  # 返回包含所有后代路径的集合
+    # 父路径 -> 直接子路径（按路径排序），以及层级根
+    children: Dict[str, List[str]] = defaultdict(list)
+    roots: List[str] = []
+    for path in sorted(module_set):
+        parent_path = normalize_path(os.path.dirname(path))
+        if parent_path != path and parent_path in module_set:
+            children[parent_path].append(path)
+        else:
+            roots.append(path)
+
+    # -------------------------------------------------------------------------
+    # 单次后序遍历 (Single Post-Order Traversal)
+    # -------------------------------------------------------------------------
+    # 先序编号：模块T是P的后代（或P自身）当且仅当 order[P] <= order[T] < subtree_end[P]
+    order: Dict[str, int] = {}
+    subtree_end: Dict[str, int] = {}
+    post_order: List[str] = []
+    for root in roots:
+        stack = [(root, False)]
+        while stack:
+            path, children_done = stack.pop()
+            if children_done:
+                subtree_end[path] = len(order)
+                post_order.append(path)
+                continue
+            order[path] = len(order)
+            stack.append((path, True))
+            # 逆序入栈，使子模块按路径顺序被访问
+            stack.extend((child, False) for child in reversed(children.get(path, [])))
+
+    # 子模块总是在父模块之前完成，因此合并时子模块的依赖集已是最终结果
+    for parent_path in post_order:
+        child_paths = children.get(parent_path)
+        if not child_paths:
+            continue
+        start, end = order[parent_path], subtree_end[parent_path]
+        parent_targets = aggregated_deps_prio.setdefault(parent_path, {})
+        for child_path in child_paths:
+            for target_path, (dep_char, priority) in aggregated_deps_prio.get(child_path, {}).items():
+                if priority <= -1:
+                    continue  # 无意义的依赖
+                target_order = order.get(target_path)
+                if target_order is not None and start <= target_order < end:
+                    continue  # 目标是父模块自身或其后代
+                _merge_dependency(parent_targets, target_path, dep_char, priority)
 
 # =============================================================================
 # 依赖聚合逻辑 (Dependency Aggregation Logic)
@@ -417,11 +453,10 @@ def aggregate_dependencies_contextual(
     # 初始化聚合依赖存储结构 (Initialize Aggregated Dependencies Storage)
     # -------------------------------------------------------------------------
     # 存储结构：module_path -> target_module_path -> (highest_priority_char, highest_priority)
-    # 使用嵌套的defaultdict自动初始化新条目
-    # 外层：源模块路径 -> 内层字典
+    # 外层：源模块路径 -> 内层字典（按需创建）
     # 内层：目标模块路径 -> (依赖字符, 优先级) 元组
-    # 默认值：(PLACEHOLDER_CHAR, -1) 表示无依赖
-    aggregated_deps_prio = defaultdict(lambda: defaultdict(lambda: (PLACEHOLDER_CHAR, -1)))
+    # 缺失的条目视为(PLACEHOLDER_CHAR, -1)，表示无依赖
+    aggregated_deps_prio: Dict[str, Dict[str, Tuple[str, int]]] = defaultdict(dict)
 
     # 记录开始聚合的日志
     logger.info(f"Starting aggregation for {len(filtered_modules)} main tracker modules...")
@@ -603,27 +638,13 @@ def aggregate_dependencies_contextual(
                         # .................................................
                         # 只处理跨模块的依赖关系（源模块 != 目标模块）
                         if target_module_path != actual_source_module_path:
-                            # 使用模块路径作为aggregated_deps_prio的键
-
-                            # 获取当前依赖字符的优先级
-                            current_priority = get_priority(dep_char)
-
-                            # 获取已存储的依赖字符和优先级
-                            _stored_char, stored_priority = aggregated_deps_prio[actual_source_module_path][target_module_path]
-
-                            # 优先级比较和更新
-                            if current_priority > stored_priority:
-                                # 当前优先级更高，更新存储的依赖
-                                aggregated_deps_prio[actual_source_module_path][target_module_path] = (dep_char, current_priority)
-
-                            elif current_priority == stored_priority and current_priority > -1:
-                                # 处理优先级相等的冲突
-                                # 特殊情况：'<'和'>'合并为'x'（双向依赖）
-                                if {dep_char, _stored_char} == {'<', '>'}:
-                                    if aggregated_deps_prio[actual_source_module_path][target_module_path][0] != 'x':
-                                        # 更新为双向依赖标记'x'
-                                        aggregated_deps_prio[actual_source_module_path][target_module_path] = ('x', current_priority)
-                                # 其他相等优先级冲突：保持现有值
+                            # 使用模块路径作为aggregated_deps_prio的键，按优先级合并
+                            _merge_dependency(
+                                aggregated_deps_prio[actual_source_module_path],
+                                target_module_path,
+                                dep_char,
+                                get_priority(dep_char)
+                            )
 
                 except Exception as decomp_err:
                     # 解压或处理行时出错
@@ -645,111 +666,8 @@ def aggregate_dependencies_contextual(
 
     logger.info("Performing hierarchical rollup...")  # 记录开始层级回滚
 
-    # -------------------------------------------------------------------------
-    # 构建层级映射 (Build Hierarchy Mapping)
-    # -------------------------------------------------------------------------
-    # 使用filtered_modules中的规范化路径构建 父路径 -> 直接子路径 的映射
-    hierarchy: Dict[str, List[str]] = defaultdict(list)
-
-    # 获取所有模块路径的排序列表
-    module_paths_list = sorted(list(filtered_modules.keys()))
-
-    # 遍历所有模块路径对，建立父子关系
-    for p_path in module_paths_list:
-        # p_path: 潜在的父路径（已规范化）
-
-        for c_path in module_paths_list:
-            # c_path: 潜在的子路径（已规范化）
-
-            # 跳过相同的路径
-            if p_path == c_path:
-                continue
-
-            # 检查c_path是否直接位于p_path内部
-            # 条件1：c_path以"p_path/"开头
-            # 条件2：c_path的父目录就是p_path（确保是直接子目录，而非孙目录）
-            if c_path.startswith(p_path + os.sep) and normalize_path(os.path.dirname(c_path)) == p_path:
-                hierarchy[p_path].append(c_path)  # 添加到子路径列表
-
-    # -------------------------------------------------------------------------
-    # 迭代传播依赖关系 (Iteratively Propagate Dependencies)
-    # -------------------------------------------------------------------------
-    # 使用多轮迭代确保依赖关系从子模块完全传播到父模块
-
-    changed_in_pass = True  # 标记：本轮是否有变化
-    max_passes = len(module_paths_list)  # 安全断路：最大迭代次数
-    current_pass = 0  # 当前迭代轮数
-
-    # 当有变化且未超过最大轮数时继续迭代
-    while changed_in_pass and current_pass < max_passes:
-        changed_in_pass = False  # 重置变化标记
-        current_pass += 1  # 轮数加1
-
-        logger.debug(f"Hierarchy Rollup Pass {current_pass}")  # 记录当前轮数
-
-        # 遍历所有潜在的父模块
-        for parent_path in module_paths_list:
-            # parent_path: 当前处理的父路径
-
-            # .................................................................
-            # 计算所有后代路径 (Calculate All Descendant Paths)
-            # .................................................................
-            # 每个父路径每轮只计算一次所有后代路径
-            all_descendants_paths = _get_descendants_paths(parent_path, hierarchy)
-
-            # .................................................................
-            # 检查直接子模块以继承依赖 (Check Direct Children for Inheritance)
-            # .................................................................
-            # 遍历父模块的直接子模块
-            for child_path in hierarchy.get(parent_path, []):
-                # child_path: 当前子模块路径
-
-                # 获取子模块的所有依赖关系（复制为列表以避免迭代时修改）
-                child_deps = list(aggregated_deps_prio.get(child_path, {}).items())
-
-                # 遍历子模块的每个依赖关系
-                for target_path, (dep_char, priority) in child_deps:
-                    # target_path: 依赖的目标模块路径
-                    # dep_char: 依赖字符
-                    # priority: 依赖优先级
-
-                    # .........................................................
-                    # 继承条件检查 (Inheritance Conditions Check)
-                    # .........................................................
-                    # 满足以下所有条件时才继承依赖：
-                    # 1. 依赖是有意义的（优先级 > -1）
-                    # 2. 目标不是父模块自身
-                    # 3. 目标不是父模块的另一个后代
-                    if priority > -1 and target_path != parent_path and target_path not in all_descendants_paths:
-
-                        # 获取父模块当前存储的依赖信息
-                        _parent_stored_char, parent_stored_priority = aggregated_deps_prio[parent_path][target_path]
-
-                        # .....................................................
-                        # 优先级比较和更新 (Priority Comparison and Update)
-                        # .....................................................
-
-                        if priority > parent_stored_priority:
-                            # 子模块的优先级更高，继承该依赖
-                            aggregated_deps_prio[parent_path][target_path] = (dep_char, priority)
-                            changed_in_pass = True  # 标记有变化
-
-                        elif priority == parent_stored_priority and priority > -1:
-                            # 优先级相等的情况
-                            # 将'<'和'>'合并为'x'（双向依赖）
-                            if {_parent_stored_char, dep_char} == {'<', '>'}:
-                                if aggregated_deps_prio[parent_path][target_path][0] != 'x':
-                                    # 更新为双向依赖标记'x'
-                                    aggregated_deps_prio[parent_path][target_path] = ('x', priority)
-                                    changed_in_pass = True  # 标记有变化
-                            # 其他相等优先级情况：保持现有值
-
-    # -------------------------------------------------------------------------
-    # 检查是否达到最大轮数 (Check Maximum Passes Reached)
-    # -------------------------------------------------------------------------
-    if current_pass == max_passes and changed_in_pass:
-        # 如果达到最大轮数但仍有变化，可能存在循环或非常深的嵌套
-        logger.warning("Hierarchical rollup reached max passes, potentially indicating a cycle or very deep nesting.")
+    # 子模块先于父模块完成聚合，每个子模块的依赖集只合并到父模块一次
+    _rollup_module_dependencies(list(filtered_modules.keys()), aggregated_deps_prio)
 
     # =========================================================================
     # 第3步：转换为最终输出格式 (Step 3: Convert to Final Output Format)
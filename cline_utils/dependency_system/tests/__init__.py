@@ -15,6 +15,24 @@
 - test_phase_tracker.py: 阶段追踪器测试 (v8.0)
 - test_resource_validator.py: 资源验证器测试 (v8.0)
 - test_runtime_inspector.py: 运行时检查器测试 (v8.0)
+- test_batch_processor.py: 批处理器超时与取消测试
+- test_path_filter.py: 路径排除匹配器测试
+- test_project_inventory.py: 项目清单单次遍历测试
+- test_global_key_map.py: 全局键映射索引测试
+- test_key_map_store.py: 二进制全局键映射存储测试
+- test_key_snapshot.py: 增量键生成（目录快照）测试
+- test_grid_remap.py: 网格索引置换重映射测试
+- test_path_intern.py: 路径驻留与内存基准测试
+- test_key_ordinals.py: 键排序序数测试
+- test_main_tracker_rollup.py: 主追踪器层级回滚与基准测试
+- test_parallel_mini_trackers.py: 并行迷你追踪器更新阶段测试
+- test_incremental_tracker_update.py: 增量追踪器更新测试
+- test_tracker_parse_cache.py: 追踪器解析缓存测试
+- test_similarity_index.py: 全项目相似度索引测试
+- test_embedding_store.py: 嵌入存储测试
+- test_ann_index.py: 近似最近邻（IVF）索引测试
+- test_chunked_embeddings.py: 分块（多向量）嵌入测试
+- test_token_counter.py: 词元计数缓存与估算测试
 - verify_rerank_caching.py: 重排序缓存验证 (v8.0)
 
 测试覆盖范围:
@@ -0,0 +1,192 @@
+"""
+测试模块：近似最近邻（IVF）索引测试
+Test Module: Approximate Nearest-Neighbour (IVF) Index Tests
+
+本模块测试嵌入存储上的IVF-flat索引，包括：
+- 召回率基准：与精确搜索比较召回率与查询时间；探测全部列表时结果精确
+- 持久化与增量更新：修改、删除、新增的条目被重新分配，变化过多时重新训练
+- get_similarity_index在文件数超过阈值时切换到近似索引
+
+This module tests the IVF-flat index over the embedding store, including:
+- Recall benchmark: recall and query time against exact search; probing every list is exact
+- Persistence and incremental updates: changed, removed and new entries are reassigned; too many changes retrain
+- get_similarity_index switches to the approximate index above the file-count threshold
+"""
+
+# 导入操作系统接口与时间 / Import operating system interface and time
+import os
+import time
+
+# 导入数值计算库与pytest测试框架 / Import numerical library and pytest testing framework
+import numpy as np
+import pytest
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.analysis.ann_index import (
+    ANN_INDEX_FILENAME,
+    IVFIndex,
+    load_or_build_ivf_index,
+    recall_at_k,
+)
+from cline_utils.dependency_system.analysis.embedding_manager import (
+    ApproximateSimilarityIndex,
+    SimilarityIndex,
+    get_similarity_index,
+    invalidate_similarity_index,
+)
+from cline_utils.dependency_system.analysis.embedding_store import (
+    EmbeddingStore,
+    close_embedding_stores,
+    open_embedding_store,
+)
+from cline_utils.dependency_system.core.key_manager import GlobalKeyMap, KeyInfo
+from cline_utils.dependency_system.utils.cache_manager import clear_all_caches
+from cline_utils.dependency_system.utils.config_manager import ConfigManager
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+
+
+def _clustered(count, dim, clusters, noise, seed):
+    """
+    簇内带噪声的归一化向量 / Normalized vectors scattered around cluster centres
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(0, clusters, count)] + noise * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _fill(store, vectors, prefix="/p/src"):
+    paths = []
+    for i, vector in enumerate(vectors):
+        path = f"{prefix}/f{i}.py"
+        store.put(path, vector, key=f"1A{i + 1}", content_hash=f"h{i}")
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def embeddings_dir(tmp_path):
+    close_embedding_stores()
+    invalidate_similarity_index()
+    clear_all_caches()
+    yield normalize_path(str(tmp_path / "embeddings"))
+    close_embedding_stores()
+    invalidate_similarity_index()
+    clear_all_caches()
+
+
+class TestIVFIndex:
+    """
+    测试类：IVF索引功能测试
+    Test Class: IVF Index Functionality Tests
+    """
+
+    def test_recall_benchmark_against_exact_search(self, embeddings_dir):
+        """
+        测试用例：基准——20000个向量上的recall@10与查询时间；探测全部列表时召回率为1
+        Test Case: Benchmark - recall@10 and query time on 20,000 vectors; probing every list gives recall 1
+        """
+        store = EmbeddingStore(embeddings_dir)
+        paths = _fill(store, _clustered(20000, 64, clusters=200, noise=1.0, seed=0))
+        start = time.perf_counter()
+        index = IVFIndex.train(store)
+        train_time = time.perf_counter() - start
+        sample = [paths[i] for i in np.random.default_rng(1).choice(len(paths), 100, replace=False)]
+
+        matrix = np.stack(store.vectors(paths))
+        start = time.perf_counter()
+        for path in sample:
+            np.argpartition(-(matrix @ store.get(path)), 10)[:10]
+        exact_time = (time.perf_counter() - start) / len(sample)
+        report = [f"\nIVF over 20000 vectors: {index.nlist} lists, trained in {train_time:.2f}s, exact {exact_time * 1000:.2f} ms/query"]
+        recalls = {}
+        for nprobe in (1, 4, 16):
+            start = time.perf_counter()
+            for path in sample:
+                index.search(store, store.get(path), 10, nprobe, exclude=path)
+            query_time = (time.perf_counter() - start) / len(sample)
+            recalls[nprobe] = recall_at_k(store, index, 10, nprobe, sample)
+            report.append(f"nprobe {nprobe}: recall@10 {recalls[nprobe]:.3f}, {query_time * 1000:.2f} ms/query")
+        print("\n".join(report))
+
+        assert recalls[1] <= recalls[4] <= recalls[16]
+        assert recalls[16] >= 0.9
+        assert recall_at_k(store, index, 10, index.nlist, sample[:20]) == 1.0
+
+    def test_search_results(self, embeddings_dir):
+        """
+        测试用例：搜索结果按分数降序，满足阈值，排除查询本身
+        Test Case: Results are best first, above the threshold, and exclude the query itself
+        """
+        store = EmbeddingStore(embeddings_dir)
+        paths = _fill(store, _clustered(500, 16, clusters=5, noise=0.5, seed=2))
+        index = IVFIndex.train(store, nlist=8)
+        results = index.search(store, store.get(paths[0]), 20, 8, min_score=0.5, exclude=paths[0])
+        scores = [score for _, score in results]
+        assert 0 < len(results) <= 20 and scores == sorted(scores, reverse=True)
+        assert min(scores) >= 0.5 and paths[0] not in [p for p, _ in results]
+        exact = sorted((float(v @ store.get(paths[0])) for v in store.vectors(paths[1:])), reverse=True)
+        assert scores == pytest.approx(exact[:20], abs=1e-5)
+
+    def test_persisted_and_updated_incrementally(self, embeddings_dir):
+        """
+        测试用例：索引保存后可重新加载；修改、删除、新增的条目被增量处理；变化过多时重新训练
+        Test Case: The saved index reloads; changed, removed and new entries are handled incrementally; too many changes retrain
+        """
+        store = EmbeddingStore(embeddings_dir)
+        vectors = _clustered(400, 16, clusters=8, noise=0.5, seed=3)
+        paths = _fill(store, vectors)
+        first = load_or_build_ivf_index(store, nlist=8)
+        assert os.path.exists(os.path.join(embeddings_dir, ANN_INDEX_FILENAME))
+        reloaded = IVFIndex.load(os.path.join(embeddings_dir, ANN_INDEX_FILENAME))
+        assert reloaded.assignments == first.assignments
+        np.testing.assert_array_equal(reloaded.centroids, first.centroids)
+
+        store.put(paths[0], vectors[399], content_hash="changed")
+        store.remove(paths[1])
+        store.put("/p/src/new.py", vectors[398], content_hash="new")
+        store.compact()  # 行号改变 / Rows move
+        updated = load_or_build_ivf_index(store, nlist=8)
+        np.testing.assert_array_equal(updated.centroids, first.centroids)  # 未重新训练 / Not retrained
+        assert updated.changes_since_training == 3 and paths[1] not in updated.assignments
+        assert updated.search(store, vectors[398], 1, 8, exclude=paths[398])[0][0] == "/p/src/new.py"
+        assert updated.search(store, vectors[399], 1, 8, exclude=paths[399])[0][0] == paths[0]
+
+        for i in range(2, 300):
+            store.put(paths[i], vectors[i], content_hash=f"edit{i}")
+        retrained = load_or_build_ivf_index(store, nlist=8)
+        assert retrained.changes_since_training == 0 and len(retrained) == len(store)
+
+
+def test_similarity_index_switches_to_ann(embeddings_dir, monkeypatch):
+    """
+    测试用例：超过ann_min_files时使用近似索引；探测全部列表时邻居与精确索引相同
+    Test Case: Above ann_min_files the approximate index is used; probing every list gives the exact neighbours
+    """
+    store = open_embedding_store(embeddings_dir, "/p")
+    vectors = _clustered(300, 16, clusters=6, noise=0.6, seed=4)
+    paths = _fill(store, vectors)
+    store.save()
+    path_to_key_info = GlobalKeyMap(
+        {path: KeyInfo(f"1A{i + 1}", path, "/p/src", 1, False) for i, path in enumerate(paths)}
+    )
+    exact = get_similarity_index(embeddings_dir, path_to_key_info, "/p", 0.4)
+    assert isinstance(exact, SimilarityIndex)
+
+    settings = {"ann_min_files": 100, "ann_nlist": 4, "ann_nprobe": 4}
+    real_setting = ConfigManager.get_performance_setting
+    monkeypatch.setattr(
+        ConfigManager,
+        "get_performance_setting",
+        lambda self, name, default=None: settings[name]
+        if name in settings
+        else real_setting(self, name, default),
+    )
+    invalidate_similarity_index()
+    approximate = get_similarity_index(embeddings_dir, path_to_key_info, "/p", 0.4)
+    assert isinstance(approximate, ApproximateSimilarityIndex)
+    for path in paths[:30]:
+        expected = exact.neighbours(path)
+        found = approximate.neighbours(path)
+        assert [p for p, _ in found] == [p for p, _ in expected]
+        assert [s for _, s in found] == pytest.approx([s for _, s in expected], abs=1e-5)
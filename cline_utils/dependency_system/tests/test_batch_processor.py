@@ -0,0 +1,188 @@
+"""
+测试模块：批处理器测试
+Test Module: Batch Processor Tests
+
+本模块测试BatchProcessor的超时与取消功能，包括：
+- 结果顺序与错误处理
+- 单项超时（被放弃的项目记录在结果中）
+- 阶段截止时间
+- 外部取消令牌
+- 处理函数内的协作式取消检查
+
+This module tests BatchProcessor timeout and cancellation, including:
+- Result ordering and error handling
+- Per-item timeouts (abandoned items are recorded in the results)
+- Phase deadlines
+- External cancellation tokens
+- Cooperative cancellation checks inside processor functions
+"""
+
+# 导入线程模块用于阻塞事件 / Import threading for blocking events
+import threading
+# 导入时间模块用于时间操作 / Import time module for time operations
+import time
+
+# 导入pytest测试框架 / Import pytest testing framework
+import pytest
+
+# 导入被测试的批处理器组件 / Import batch processor components under test
+from cline_utils.dependency_system.utils.batch_processor import (
+    BatchProcessor,
+    CancellationToken,
+    OperationCancelledError,
+    check_cancelled,
+    current_cancel_token,
+    process_items,
+)
+
+
+class TestCancellationToken:
+    """
+    测试类：CancellationToken功能测试
+    Test Class: CancellationToken Functionality Tests
+    """
+
+    def test_cancel_keeps_first_reason(self):
+        """
+        测试用例：取消令牌并保留首个原因
+        Test Case: Cancelling keeps the first reason
+        """
+        token = CancellationToken()
+        assert not token.cancelled
+        token.cancel("user")
+        token.cancel("other")
+        assert token.cancelled
+        assert token.reason == "user"
+        with pytest.raises(OperationCancelledError):
+            token.raise_if_cancelled()
+
+    def test_deadline_and_child(self):
+        """
+        测试用例：截止时间传递给子令牌
+        Test Case: Deadlines expire and propagate to children
+        """
+        parent = CancellationToken(timeout=0.05)
+        child = parent.child(timeout=10)
+        assert child.deadline == parent.deadline
+        assert child.remaining() <= 0.05
+        time.sleep(0.08)
+        assert child.cancelled
+        assert child.reason == "timeout"
+
+    def test_check_cancelled_outside_batch_is_noop(self):
+        """
+        测试用例：批处理之外调用check_cancelled不做任何操作
+        Test Case: check_cancelled is a no-op outside a batch
+        """
+        assert current_cancel_token() is None
+        check_cancelled()
+
+
+class TestBatchProcessor:
+    """
+    测试类：BatchProcessor超时与取消测试
+    Test Class: BatchProcessor Timeout and Cancellation Tests
+    """
+
+    def test_results_keep_input_order(self):
+        """
+        测试用例：结果顺序与输入一致，失败项目为None
+        Test Case: Results follow input order and failed items are None
+        """
+
+        def _square(x):
+            if x == 3:
+                raise ValueError("boom")
+            return x * x
+
+        results = process_items(list(range(6)), _square, show_progress=False)
+        assert results == [0, 1, 4, None, 16, 25]
+
+    def test_item_timeout_records_and_continues(self):
+        """
+        测试用例：超时项目被记录，其余项目继续处理
+        Test Case: Timed-out items are recorded and the rest still complete
+        """
+        release = threading.Event()
+
+        def _work(x):
+            if x == "hang":
+                release.wait(5)  # Simulates a stuck call that ignores cancellation
+            return x.upper()
+
+        processor = BatchProcessor(
+            max_workers=2,
+            show_progress=False,
+            item_timeout=0.2,
+            timeout_result=lambda item: f"timeout:{item}",
+        )
+        start = time.monotonic()
+        results = processor.process_items(["a", "hang", "b", "c"], _work)
+        elapsed = time.monotonic() - start
+        release.set()
+
+        assert results == ["A", "timeout:hang", "B", "C"]
+        assert processor.timed_out_items == ["hang"]
+        assert processor.cancelled_items == []
+        assert elapsed < 2
+
+    def test_cooperative_timeout_via_check_cancelled(self):
+        """
+        测试用例：处理函数轮询check_cancelled后提前退出
+        Test Case: A processor polling check_cancelled stops early
+        """
+        polls = []
+
+        def _work(x):
+            while True:
+                polls.append(x)
+                check_cancelled()
+                time.sleep(0.01)
+
+        processor = BatchProcessor(max_workers=1, show_progress=False, item_timeout=0.1)
+        results = processor.process_items(["slow"], _work)
+
+        assert results == [None]
+        assert processor.timed_out_items == ["slow"]
+        assert polls
+
+    def test_phase_deadline_cancels_remaining(self):
+        """
+        测试用例：阶段截止时间取消剩余项目
+        Test Case: The phase deadline cancels the remaining items
+        """
+
+        def _work(x):
+            time.sleep(0.1)
+            return x
+
+        processor = BatchProcessor(
+            max_workers=1,
+            batch_size=8,
+            show_progress=False,
+            phase_deadline=0.25,
+        )
+        items = list(range(16))
+        results = processor.process_items(items, _work)
+
+        completed = [r for r in results if r is not None]
+        assert 1 <= len(completed) < len(items)
+        assert len(completed) + len(processor.cancelled_items) == len(items)
+        assert processor.timed_out_items == []
+
+    def test_external_cancel_token(self):
+        """
+        测试用例：外部取消令牌停止整个运行
+        Test Case: An external cancel token stops the whole run
+        """
+        token = CancellationToken()
+        token.cancel("shutdown")
+        processor = BatchProcessor(
+            show_progress=False,
+            cancel_token=token,
+            timeout_result=lambda item: (item, [], []),
+        )
+        results = processor.process_items(["x", "y"], lambda item: (item, [1], [2]))
+
+        assert results == [("x", [], []), ("y", [], [])]
+        assert processor.cancelled_items == ["x", "y"]
@@ -0,0 +1,256 @@
+"""
+测试模块：分块（多向量）嵌入测试
+Test Module: Chunked (Multi-Vector) Embedding Tests
+
+本模块测试长文件的分块嵌入，包括：
+- 按标题或符号边界切分为固定大小的窗口
+- generate_embeddings为长文件存储多个块向量及其归一化均值，文件变短或被删除时移除多余的块；内容相同的副本复用全部块
+- 相似度聚合：max（最佳块对）与mean（均值向量），精确索引与逐对计算一致
+
+This module tests chunked embedding of long files, including:
+- Splitting into fixed-size windows at heading or symbol boundaries
+- generate_embeddings stores several chunk vectors plus their normalized mean for long files, and drops extra chunks when a file shrinks or is deleted; an identical copy reuses all the chunks
+- Similarity aggregation: max (best chunk pair) and mean (mean vector), with the exact index agreeing with per-pair calculation
+"""
+
+# 导入操作系统接口 / Import operating system interface
+import os
+
+# 导入数值计算库与pytest测试框架 / Import numerical library and pytest testing framework
+import numpy as np
+import pytest
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.analysis import embedding_manager
+from cline_utils.dependency_system.analysis.embedding_store import (
+    EmbeddingStore,
+    chunk_entry_path,
+    chunk_owner,
+    close_embedding_stores,
+    open_embedding_store,
+)
+from cline_utils.dependency_system.core.key_manager import GlobalKeyMap, KeyInfo
+from cline_utils.dependency_system.utils.cache_manager import clear_all_caches
+from cline_utils.dependency_system.utils.config_manager import ConfigManager
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+
+
+def _unit(seed, dim=8):
+    vector = np.random.default_rng(seed).normal(size=dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def embeddings_dir(tmp_path):
+    close_embedding_stores()
+    embedding_manager.invalidate_similarity_index()
+    clear_all_caches()
+    yield normalize_path(str(tmp_path / "embeddings"))
+    close_embedding_stores()
+    embedding_manager.invalidate_similarity_index()
+    clear_all_caches()
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """
+    可修改的嵌入配置覆盖 / Mutable embedding setting overrides
+    """
+    overrides = {}
+    real_setting = ConfigManager.get_embedding_setting
+    monkeypatch.setattr(
+        ConfigManager,
+        "get_embedding_setting",
+        lambda self, name, default=None: overrides[name]
+        if name in overrides
+        else real_setting(self, name, default),
+    )
+    return overrides
+
+
+def test_split_into_chunks_at_boundaries():
+    """
+    测试用例：在标题处切分，窗口不超过预算，超长行按字符切分，后续窗口重复文件头
+    Test Case: Cuts at headings, windows stay within budget, over-long lines are cut by characters, later windows repeat the file header
+    """
+    text = "# A\n" + "alpha " * 30 + "\n# B\n" + "beta " * 30 + "\n# C\n" + "gamma\n"
+    chunks = embedding_manager.split_into_chunks(text, 60)  # 约4个字符一个词元 / About 4 characters per token
+    assert "".join(chunks) == text
+    assert [chunk.splitlines()[0] for chunk in chunks] == ["# A", "# B"]
+    assert all(len(chunk) // 4 <= 60 for chunk in chunks)
+
+    ses = "[FILE: m.py | TYPE: py | MOD: 1]\nFUNCTIONS:\n  f(x)\n    DOC: one\n  g(y)\n    DOC: two\n"
+    chunks = embedding_manager.split_into_chunks(ses, 20)
+    assert all(chunk.startswith("[FILE: m.py") for chunk in chunks)
+    assert any(chunk.endswith("  g(y)\n    DOC: two\n") for chunk in chunks)  # 成员与其DOC不分开 / A member stays with its DOC
+
+    long_line = "x" * 1000
+    chunks = embedding_manager.split_into_chunks(long_line, 50)
+    assert "".join(chunks) == long_line and max(map(len, chunks)) <= 200
+
+
+def test_store_chunk_entries(embeddings_dir):
+    """
+    测试用例：块条目的命名、均值行、读取与删除
+    Test Case: Chunk entry naming, the mean row, reading and removal
+    """
+    assert chunk_owner(chunk_entry_path("/p/a.py", 3)) == "/p/a.py"
+    assert chunk_owner("/p/a.py") is None
+    store = EmbeddingStore(embeddings_dir)
+    chunks = np.stack([_unit(1), _unit(2), _unit(3)])
+    store.put_chunks("/p/a.py", chunks, key="1A1", content_hash="h")
+    store.put("/p/b.py", _unit(4))
+    mean = chunks.mean(axis=0)
+    np.testing.assert_allclose(store.get("/p/a.py"), mean / np.linalg.norm(mean), atol=1e-6)
+    np.testing.assert_array_equal(store.chunks("/p/a.py"), chunks)
+    assert store.chunks("/p/b.py") is None and store.file_paths() == ["/p/a.py", "/p/b.py"]
+
+    store.put_chunks("/p/a.py", chunks[:2])
+    assert len(store.chunks("/p/a.py")) == 2 and len(store.tombstones) == 1
+    store.remove("/p/a.py")
+    assert store.file_paths() == ["/p/b.py"] and len(store) == 1
+
+
+@pytest.fixture
+def project(embeddings_dir, tmp_path, monkeypatch, settings):
+    """
+    含长文档与短文档的项目，以及确定性的模拟模型 / A project with long and short docs and a deterministic mock model
+    """
+    root = normalize_path(str(tmp_path / "proj"))
+    os.makedirs(f"{root}/docs")
+    encoded = []
+
+    class Model:
+        def encode(self, texts, **kwargs):
+            encoded.extend(texts)
+            return np.stack([_unit(sum(map(ord, text))) for text in texts])
+
+    monkeypatch.setattr(embedding_manager, "MODEL_INSTANCE", Model())
+    monkeypatch.setattr(
+        embedding_manager, "SELECTED_MODEL_CONFIG", {"type": "sentence-transformer", "name": "mock"}
+    )
+    monkeypatch.setattr(embedding_manager, "_load_model", lambda *args, **kwargs: True)
+    monkeypatch.setattr(embedding_manager, "_unload_model", lambda: None)
+    monkeypatch.setattr(embedding_manager, "_get_tokenizer", lambda: None)
+    monkeypatch.setattr(embedding_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(ConfigManager, "get_path", lambda self, name, default=None: embeddings_dir)
+    settings["chunk_tokens"] = 100
+    path_to_key_info = GlobalKeyMap({f"{root}/docs": KeyInfo("1A", f"{root}/docs", None, 1, True)})
+
+    def write(name, text, key):
+        with open(f"{root}/docs/{name}", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.utime(f"{root}/docs/{name}", (os.path.getmtime(f"{root}/docs/{name}") + 10,) * 2)
+        path_to_key_info[f"{root}/docs/{name}"] = KeyInfo(key, f"{root}/docs/{name}", f"{root}/docs", 1, False)
+
+    def run():
+        return embedding_manager.generate_embeddings([root], path_to_key_info, symbol_map={})
+
+    sections = [f"# Part {i}\n" + f"word{i} " * 60 + "\n" for i in range(5)]
+    write("long.md", "".join(sections), "1A1")
+    write("short.md", "# Short\nbrief\n", "1A2")
+    write("other.md", sections[3], "1A3")  # 与long.md的一块相同 / Same as one chunk of long.md
+    return {"root": root, "write": write, "run": run, "encoded": encoded, "map": path_to_key_info, "sections": sections}
+
+
+def test_generate_embeddings_stores_chunk_vectors(project, embeddings_dir):
+    """
+    测试用例：长文件不被截断而是按块嵌入；文件变短时移除多余的块，被删除时移除所有块
+    Test Case: Long files are embedded in chunks instead of truncated; extra chunks go when a file shrinks, all of them when it is deleted
+    """
+    root = project["root"]
+    assert project["run"]()
+    store = open_embedding_store(embeddings_dir, root)
+    chunks = store.chunks(f"{root}/docs/long.md")
+    assert len(chunks) == 5 and store.chunks(f"{root}/docs/short.md") is None
+    assert set(project["sections"]) <= set(project["encoded"])
+    np.testing.assert_allclose(chunks[2], _unit(sum(map(ord, project["sections"][2]))), atol=1e-6)
+    mean = chunks.mean(axis=0)
+    np.testing.assert_allclose(store.get(f"{root}/docs/long.md"), mean / np.linalg.norm(mean), atol=1e-6)
+
+    project["write"]("long.md", "".join(project["sections"][:3]), "1A1")
+    assert project["run"]()
+    store = open_embedding_store(embeddings_dir, root)
+    assert len(store.chunks(f"{root}/docs/long.md")) == 3
+
+    del project["map"][f"{root}/docs/long.md"]
+    assert project["run"]()
+    store = open_embedding_store(embeddings_dir, root)
+    assert not [path for path in store.entries if chunk_owner(path) == f"{root}/docs/long.md"]
+
+
+def test_identical_copy_of_chunked_file_reuses_all_chunks(project, embeddings_dir):
+    """
+    测试用例：与已分块文件内容相同的新文件复用其全部块向量，而不是单个块
+    Test Case: A new file with the same text as a chunked file reuses all its chunk vectors, not a single chunk
+    """
+    root = project["root"]
+    assert project["run"]()
+    encoded = len(project["encoded"])
+    project["write"]("copy.md", "".join(project["sections"]), "1A4")
+    assert project["run"]()
+    assert len(project["encoded"]) == encoded  # 无需推理 / No inference needed
+    store = open_embedding_store(embeddings_dir, root)
+    original = store.chunks(f"{root}/docs/long.md")
+    copy = store.chunks(f"{root}/docs/copy.md")
+    assert copy is not None and len(copy) == len(original) == 5
+    np.testing.assert_array_equal(copy, original)
+    np.testing.assert_array_equal(store.get(f"{root}/docs/copy.md"), store.get(f"{root}/docs/long.md"))
+
+
+@pytest.mark.parametrize("aggregation", ["max", "mean"])
+def test_chunk_aggregation(project, embeddings_dir, settings, aggregation):
+    """
+    测试用例：max聚合取最佳块对，mean聚合取均值向量；精确索引与calculate_similarity一致
+    Test Case: max aggregation takes the best chunk pair, mean takes the mean vectors; the exact index agrees with calculate_similarity
+    """
+    root = project["root"]
+    assert project["run"]()
+    settings["chunk_aggregation"] = aggregation
+    store = open_embedding_store(embeddings_dir, root)
+    long_path, other_path = f"{root}/docs/long.md", f"{root}/docs/other.md"
+    if aggregation == "max":
+        expected = float(np.clip(np.max(store.chunks(long_path) @ store.get(other_path)), 0, 1))
+        assert expected == pytest.approx(1.0, abs=1e-5)  # other.md与一块相同 / other.md equals one chunk
+    else:
+        expected = float(np.clip(store.get(long_path) @ store.get(other_path), 0, 1))
+        assert expected < 0.99
+
+    clear_all_caches()
+    args = (embeddings_dir, project["map"], root, [], [])
+    assert embedding_manager.calculate_similarity("1A1", "1A3", *args) == pytest.approx(expected, abs=1e-5)
+    index = embedding_manager.get_similarity_index(embeddings_dir, project["map"], root, 0.0)
+    scores = dict(index.neighbours(long_path))
+    assert scores.get(other_path, 0.0) == pytest.approx(expected, abs=1e-5)
+    short_path = f"{root}/docs/short.md"
+    assert dict(index.neighbours(short_path)).get(long_path, 0.0) == pytest.approx(
+        embedding_manager.calculate_similarity("1A2", "1A1", *args), abs=1e-5
+    )
+
+
+@pytest.mark.parametrize("tile_bytes", [64, 64 * 1024 * 1024])
+def test_similarity_index_max_sim_matches_brute_force(tile_bytes):
+    """
+    测试用例：单向量与多块向量混合时，分块计算的max-sim分数与逐对暴力计算一致（与分块大小无关）
+    Test Case: With single and multi-chunk files mixed, tiled max-sim scores match brute force regardless of tile size
+    """
+    rng = np.random.default_rng(7)
+    vectors = []
+    for i in range(12):
+        count = int(rng.integers(1, 4))
+        block = rng.normal(size=(count, 8)).astype(np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        vectors.append(block[0] if count == 1 and i % 2 else block)
+    vectors.append(None)
+    paths = tuple(f"/p/f{i}.py" for i in range(len(vectors)))
+    index = embedding_manager.SimilarityIndex(paths, vectors, 0.1, 100, tile_bytes)
+    for i, source in enumerate(vectors[:-1]):
+        expected = []
+        for j, target in enumerate(vectors[:-1]):
+            score = float(np.clip(np.max(np.atleast_2d(source) @ np.atleast_2d(target).T), 0, 1))
+            if i != j and score >= 0.1:
+                expected.append((paths[j], score))
+        found = index.neighbours(paths[i])
+        assert [p for p, _ in found] == [p for p, _ in expected]
+        assert [s for _, s in found] == pytest.approx([s for _, s in expected], abs=1e-6)
+    assert index.neighbours(paths[-1]) == []
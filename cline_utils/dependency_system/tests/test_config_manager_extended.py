@@ -290,3 +290,31 @@ class TestConfigManagerExtended:
         assert any("limited CPU" in r for r in recommendations)
         # 断言：应包含释放磁盘空间的建议 / Assertion: Should contain recommendation to free disk space
         assert any("freeing up disk space" in r for r in recommendations)
+
+    def test_excluded_file_patterns_not_expanded(self, clean_config_manager):
+        """
+        测试用例：排除文件模式不预先展开
+        Test Case: Excluded file patterns are not pre-expanded
+
+        目的：验证get_excluded_paths不遍历文件系统，文件模式由PathFilter在遍历时惰性匹配
+        Purpose: Verify get_excluded_paths never walks the filesystem; file patterns are
+        matched lazily by the PathFilter while walking
+        """
+        # 任何glob调用都视为失败 / Any glob call counts as a failure
+        with patch("glob.glob", side_effect=AssertionError("glob must not be called")), patch(
+            "cline_utils.dependency_system.utils.config_manager.get_project_root",
+            return_value="/proj",
+        ), patch(
+            "cline_utils.dependency_system.utils.path_filter.get_project_root",
+            return_value="/proj",
+        ):
+            excluded = clean_config_manager.get_excluded_paths()
+            path_filter = clean_config_manager.get_path_filter()
+
+        # 断言：仅返回显式配置的路径 / Assertion: Only explicitly configured paths are returned
+        assert "/proj/src/node_modules" in excluded
+        assert len(excluded) == len(DEFAULT_CONFIG["excluded_paths"])
+        # 断言：文件模式在检查时匹配 / Assertion: File patterns match at check time
+        assert path_filter.is_excluded("/proj/src/pkg/core_module.md")
+        assert path_filter.is_excluded("/proj/docs/implementation_plan_x.md")
+        assert not path_filter.is_excluded("/proj/src/pkg/core.py")
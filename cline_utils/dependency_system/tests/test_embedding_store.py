@@ -0,0 +1,562 @@
+"""
+测试模块：嵌入存储测试
+Test Module: Embedding Store Tests
+
+本模块测试内存映射的嵌入存储（EmbeddingStore），包括：
+- 写入、原地更新、扩容追加与重新加载
+- 删除留下墓碑行，压缩回收墓碑行（可转换为float16）
+- 从旧的逐文件.npy布局迁移
+- generate_embeddings写入存储：未变化的文件不重新嵌入，修改的文件原地更新，删除的文件被移除
+- 内容哈希（文本、模型、n_ctx）决定是否过期：仅被touch的文件不推理，相同文本只推理一次；更换模型后所有文件重新嵌入
+- 上下文长度按2的幂分桶，每个桶只加载一次模型；超长文本被截断
+- GGUF模型按批调用embed，并报告每种配置（线程数、批大小）的每秒词元数
+- 流水线模式：准备线程、推理与写入线程重叠，失败时干净退出；单个文件或批次失败不影响其他文件
+- 量化存储：float16与逐向量缩放的int8；与float32相比的top-k邻居重合度与内存基准
+
+This module tests the memory-mapped embedding store (EmbeddingStore), including:
+- Writes, in-place updates, appends that grow the file, and reloading
+- Removals leave tombstones; compaction reclaims them (optionally converting to float16)
+- Migration from the old per-file .npy layout
+- generate_embeddings writes the store: unchanged files are not re-embedded, modified ones are updated in place, deleted ones are dropped
+- The content hash (text, model, n_ctx) decides staleness: touched files are not re-embedded and identical texts share one inference; a model switch re-embeds every file
+- Context lengths fall into power-of-two buckets with one model load per bucket; over-long texts are truncated
+- GGUF models embed whole batches, and tokens/sec is reported per configuration (threads, batch size)
+- Pipelined mode: preparation workers, inference and the writer thread overlap and stop cleanly on failure; a failing file or batch does not lose the others
+- Quantized storage: float16 and per-vector-scaled int8; a benchmark of top-k neighbour overlap with float32 and memory
+"""
+
+# 导入操作系统接口、JSON、线程与时间 / Import operating system interface, JSON, threading and time
+import json
+import os
+import threading
+import time
+
+# 导入数值计算库与pytest测试框架 / Import numerical library and pytest testing framework
+import numpy as np
+import pytest
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.analysis import embedding_manager
+from cline_utils.dependency_system.analysis.embedding_store import (
+    INITIAL_CAPACITY,
+    EmbeddingStore,
+    close_embedding_stores,
+    open_embedding_store,
+    quantization_topk_overlap,
+)
+from cline_utils.dependency_system.core.key_manager import GlobalKeyMap, KeyInfo
+from cline_utils.dependency_system.utils.cache_manager import clear_all_caches
+from cline_utils.dependency_system.utils.config_manager import ConfigManager
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+
+
+def _unit(seed, dim=8):
+    vector = np.random.default_rng(seed).normal(size=dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def embeddings_dir(tmp_path):
+    """
+    空的嵌入目录，测试前后关闭进程级存储 / An empty embeddings dir; process-wide stores closed around the test
+    """
+    close_embedding_stores()
+    clear_all_caches()
+    yield normalize_path(str(tmp_path / "embeddings"))
+    close_embedding_stores()
+    clear_all_caches()
+
+
+class TestEmbeddingStore:
+    """
+    测试类：嵌入存储功能测试
+    Test Class: Embedding Store Functionality Tests
+    """
+
+    def test_put_update_grow_and_reload(self, embeddings_dir):
+        """
+        测试用例：超过初始容量的追加、原地更新、保存后重新加载得到相同向量
+        Test Case: Appends past the initial capacity, in-place updates, and a reload returning the same vectors
+        """
+        store = EmbeddingStore(embeddings_dir)
+        count = INITIAL_CAPACITY + 5
+        for i in range(count):
+            assert store.put(f"/p/f{i}.py", _unit(i), key=f"1A{i}", mtime=float(i)) == i
+        assert store.capacity == 2 * INITIAL_CAPACITY
+        assert store.put("/p/f3.py", _unit(100), key="1A3", content_hash="h") == 3
+        store.save()
+        assert os.path.getsize(store.matrix_path) == store.capacity * 8 * 4
+
+        loaded = EmbeddingStore.load(embeddings_dir)
+        assert len(loaded) == count and loaded.row_count == count
+        assert loaded.get_entry("/p/f3.py") == (3, "1A3", "h", None, 0.0)
+        np.testing.assert_array_equal(loaded.get("/p/f3.py"), _unit(100))
+        vectors = loaded.vectors(["/p/f7.py", "/p/missing.py", "/p/f0.py"])
+        np.testing.assert_array_equal(vectors[0], _unit(7))
+        assert vectors[1] is None
+        np.testing.assert_array_equal(vectors[2], _unit(0))
+
+    def test_tombstones_and_compaction(self, embeddings_dir):
+        """
+        测试用例：删除留下墓碑；超过比例时压缩，行连续且向量不变；可压缩为float16
+        Test Case: Removals leave tombstones; compaction past the ratio packs rows and keeps vectors; compaction can convert to float16
+        """
+        store = EmbeddingStore(embeddings_dir)
+        for i in range(10):
+            store.put(f"/p/f{i}.py", _unit(i))
+        for i in (1, 4, 5):
+            assert store.remove(f"/p/f{i}.py")
+        assert not store.remove("/p/f1.py")
+        assert store.tombstones == [1, 4, 5]
+        assert store.compact_if_needed(0.5) == 0
+
+        assert store.compact_if_needed(0.25) == 3
+        assert sorted(entry.row for entry in store.entries.values()) == list(range(7))
+        assert store.get_entry("/p/f6.py").row == 3  # 相对顺序不变 / Relative order kept
+        for i in (0, 2, 3, 6, 7, 8, 9):
+            np.testing.assert_array_equal(store.get(f"/p/f{i}.py"), _unit(i))
+        assert store.tombstones == [] and store.row_count == 7
+
+        store.compact("float16")
+        store.save()
+        loaded = EmbeddingStore.load(embeddings_dir)
+        assert loaded.dtype == np.float16
+        assert os.path.getsize(loaded.matrix_path) == loaded.capacity * 8 * 2
+        np.testing.assert_allclose(loaded.get("/p/f9.py"), _unit(9), atol=1e-3)
+
+        # 维度变化（更换模型）清空存储 / A dimension change (new model) clears the store
+        loaded.put("/p/f0.py", _unit(0, dim=4))
+        assert len(loaded) == 1 and loaded.dim == 4
+
+    def test_int8_rows_with_scales(self, embeddings_dir):
+        """
+        测试用例：int8存储按行缩放，读取时反量化；缩放因子随矩阵扩容、保存与压缩；可转换回float32
+        Test Case: int8 rows are scaled per row and dequantized on read; scales follow growth, saves and compaction; converts back to float32
+        """
+        store = EmbeddingStore(embeddings_dir, "int8")
+        count = INITIAL_CAPACITY + 5
+        for i in range(count):
+            store.put(f"/p/f{i}.py", _unit(i))
+        store.put("/p/zero.py", np.zeros(8, dtype=np.float32))
+        store.remove("/p/f3.py")
+        store.save()
+        loaded = EmbeddingStore.load(embeddings_dir)
+        assert loaded.dtype == np.int8
+        assert os.path.getsize(loaded.matrix_path) == loaded.capacity * 8
+        assert os.path.getsize(loaded.scales_path) == loaded.capacity * 4
+        for i in (0, 7, count - 1):
+            vector = loaded.get(f"/p/f{i}.py")
+            assert vector.dtype == np.float32
+            np.testing.assert_allclose(vector, _unit(i), atol=np.abs(_unit(i)).max() / 254 + 1e-7)
+        np.testing.assert_array_equal(loaded.get("/p/zero.py"), np.zeros(8))
+
+        assert loaded.compact() == 1
+        np.testing.assert_allclose(loaded.get("/p/f9.py"), _unit(9), atol=1e-2)
+        before = loaded.get("/p/f9.py")
+        loaded.compact("float32")
+        assert not os.path.exists(loaded.scales_path)
+        np.testing.assert_array_equal(loaded.get("/p/f9.py"), before)
+
+    def test_migrates_per_file_layout(self, embeddings_dir, tmp_path):
+        """
+        测试用例：旧布局的.npy迁移到存储（键来自旧元数据，mtime来自.npy），随后删除
+        Test Case: Old-layout .npy files move into the store (keys from the old metadata, mtimes from the .npy) and are deleted
+        """
+        root = normalize_path(str(tmp_path / "proj"))
+        legacy = {"a/x.py": _unit(1), "a/b/y.py": _unit(2), "z.md": _unit(3, dim=4)}
+        for rel_path, vector in legacy.items():
+            npy_path = os.path.join(embeddings_dir, rel_path) + ".npy"
+            os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+            np.save(npy_path, vector)
+        with open(os.path.join(embeddings_dir, "metadata.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": "2.0_SES", "model": "m", "keys": {"1A1": {"path": f"{root}/a/x.py", "mtime": 1}}},
+                f,
+            )
+        npy_mtime = os.path.getmtime(os.path.join(embeddings_dir, "a", "x.py.npy"))
+
+        store = open_embedding_store(embeddings_dir, root)
+        assert sorted(store.entries) == [f"{root}/a/b/y.py", f"{root}/a/x.py"]
+        assert store.get_entry(f"{root}/a/x.py")[1:] == ("1A1", None, "m", npy_mtime)
+        np.testing.assert_array_equal(store.get(f"{root}/a/b/y.py"), _unit(2))
+        assert sorted(os.listdir(embeddings_dir)) == ["embeddings.bin", "metadata.json"]
+        assert open_embedding_store(embeddings_dir, root) is store
+
+
+def _set_embedding_settings(monkeypatch, **settings):
+    """
+    覆盖部分嵌入配置 / Override some embedding settings
+    """
+    real_setting = ConfigManager.get_embedding_setting
+    monkeypatch.setattr(
+        ConfigManager,
+        "get_embedding_setting",
+        lambda self, name, default=None: settings[name]
+        if name in settings
+        else real_setting(self, name, default),
+    )
+
+
+@pytest.fixture
+def mock_model(monkeypatch):
+    """
+    基于文本的确定性嵌入模型 / A deterministic text-based embedding model
+    """
+    encoded = []
+
+    class Model:
+        def encode(self, texts, **kwargs):
+            encoded.extend(texts)
+            return np.stack([_unit(sum(map(ord, text))) for text in texts])
+
+    monkeypatch.setattr(embedding_manager, "MODEL_INSTANCE", Model())
+    monkeypatch.setattr(
+        embedding_manager, "SELECTED_MODEL_CONFIG", {"type": "sentence-transformer", "name": "mock"}
+    )
+    monkeypatch.setattr(embedding_manager, "_load_model", lambda *args, **kwargs: True)
+    monkeypatch.setattr(embedding_manager, "_unload_model", lambda: None)
+    monkeypatch.setattr(embedding_manager, "_get_tokenizer", lambda: None)
+    return encoded
+
+
+def test_generate_embeddings_writes_store(embeddings_dir, tmp_path, monkeypatch, mock_model):
+    """
+    测试用例：generate_embeddings只嵌入新的或修改的文件，原地更新行，删除已移除的文件
+    Test Case: generate_embeddings embeds only new or modified files, updates rows in place and drops deleted files
+    """
+    root = normalize_path(str(tmp_path / "proj"))
+    os.makedirs(f"{root}/src")
+    infos = [KeyInfo("1A", f"{root}/src", None, 1, True)]
+    for i in range(3):
+        with open(f"{root}/src/m{i}.py", "w", encoding="utf-8") as f:
+            f.write(f"def f{i}(): pass\n")
+        infos.append(KeyInfo(f"1A{i + 1}", f"{root}/src/m{i}.py", f"{root}/src", 1, False))
+    path_to_key_info = GlobalKeyMap({ki.norm_path: ki for ki in infos})
+    monkeypatch.setattr(embedding_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(ConfigManager, "get_path", lambda self, name, default=None: embeddings_dir)
+
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, symbol_map={})
+    assert len(mock_model) == 3
+    store = open_embedding_store(embeddings_dir, root)
+    assert store.get_entry(f"{root}/src/m1.py").key == "1A2"
+    assert not any(name.endswith(".npy") for _d, _s, names in os.walk(embeddings_dir) for name in names)
+
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, symbol_map={})
+    assert len(mock_model) == 3  # 未变化 / Unchanged
+
+    row = store.get_entry(f"{root}/src/m1.py").row
+    with open(f"{root}/src/m1.py", "w", encoding="utf-8") as f:
+        f.write("class Changed: pass\n")
+    os.utime(f"{root}/src/m1.py", (os.path.getmtime(f"{root}/src/m1.py") + 10,) * 2)
+    del path_to_key_info[f"{root}/src/m2.py"]
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, symbol_map={})
+    assert len(mock_model) == 4
+    store = open_embedding_store(embeddings_dir, root)
+    assert store.get_entry(f"{root}/src/m1.py").row == row
+    # 1/3的行是墓碑，超过默认比例0.25，因此已压缩 / 1 of 3 rows tombstoned exceeds the default 0.25 ratio, so it was compacted
+    assert f"{root}/src/m2.py" not in store
+    assert store.tombstones == [] and store.row_count == 2
+    expected = _unit(sum(map(ord, mock_model[-1])))
+    np.testing.assert_allclose(store.get(f"{root}/src/m1.py"), expected, atol=1e-6)
+
+
+def test_generate_embeddings_skips_unchanged_and_duplicate_texts(
+    embeddings_dir, tmp_path, monkeypatch, mock_model
+):
+    """
+    测试用例：内容哈希决定是否重新嵌入——仅被touch的文件不推理，相同文本只推理一次或复用已有向量
+    Test Case: The content hash decides staleness - touched files are not re-embedded, identical texts share one inference or reuse a stored vector
+    """
+    root = normalize_path(str(tmp_path / "proj"))
+    os.makedirs(f"{root}/docs")
+    infos = [KeyInfo("1A", f"{root}/docs", None, 1, True)]
+    path_to_key_info = GlobalKeyMap({infos[0].norm_path: infos[0]})
+
+    def write(name, text, key):
+        with open(f"{root}/docs/{name}", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.utime(f"{root}/docs/{name}", (os.path.getmtime(f"{root}/docs/{name}") + 10,) * 2)
+        path_to_key_info[f"{root}/docs/{name}"] = KeyInfo(key, f"{root}/docs/{name}", f"{root}/docs", 1, False)
+
+    write("a.md", "# Shared\n", "1A1")
+    write("b.md", "# Shared\n", "1A2")
+    write("c.md", "# Other\n", "1A3")
+    monkeypatch.setattr(embedding_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(ConfigManager, "get_path", lambda self, name, default=None: embeddings_dir)
+
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, symbol_map={})
+    assert sorted(mock_model) == ["# Other\n", "# Shared\n"]  # a.md与b.md共享一次推理 / a.md and b.md share one inference
+    store = open_embedding_store(embeddings_dir, root)
+    assert store.get_entry(f"{root}/docs/a.md").content_hash == store.get_entry(f"{root}/docs/b.md").content_hash
+
+    # 仅touch：文本未变，不推理，但记录新的mtime / Touch only: text unchanged, no inference, newer mtime recorded
+    write("a.md", "# Shared\n", "1A1")
+    # 新文件的文本与已存储的c.md相同：复用其向量 / A new file with c.md's stored text reuses its vector
+    write("d.md", "# Other\n", "1A4")
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, symbol_map={})
+    assert len(mock_model) == 2
+    store = open_embedding_store(embeddings_dir, root)
+    assert store.get_entry(f"{root}/docs/a.md").mtime == os.path.getmtime(f"{root}/docs/a.md")
+    np.testing.assert_array_equal(store.get(f"{root}/docs/d.md"), store.get(f"{root}/docs/c.md"))
+    assert store.get_entry(f"{root}/docs/d.md").key == "1A4"
+
+    write("b.md", "# Changed\n", "1A2")
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, symbol_map={})
+    assert mock_model[2:] == ["# Changed\n"]
+    store = open_embedding_store(embeddings_dir, root)
+    np.testing.assert_allclose(store.get(f"{root}/docs/a.md"), _unit(sum(map(ord, "# Shared\n"))), atol=1e-6)
+
+    # 强制重新生成绕过哈希检查 / Forced regeneration bypasses the hash check
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, force=True, symbol_map={})
+    assert len(mock_model) == 6
+
+
+def test_model_switch_reembeds_unchanged_files(embeddings_dir, tmp_path, monkeypatch, mock_model):
+    """
+    测试用例：更换模型后未修改的文件也重新嵌入；新模型维度不同时存储被清空后所有文件都重新写入
+    Test Case: After a model switch unchanged files are re-embedded too; with a new dimension the cleared store gets every file back
+    """
+    root = normalize_path(str(tmp_path / "proj"))
+    os.makedirs(f"{root}/src")
+    infos = [KeyInfo("1A", f"{root}/src", None, 1, True)]
+    for i in range(3):
+        with open(f"{root}/src/m{i}.py", "w", encoding="utf-8") as f:
+            f.write(f"def f{i}(): pass\n")
+        infos.append(KeyInfo(f"1A{i + 1}", f"{root}/src/m{i}.py", f"{root}/src", 1, False))
+    path_to_key_info = GlobalKeyMap({ki.norm_path: ki for ki in infos})
+    monkeypatch.setattr(embedding_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(ConfigManager, "get_path", lambda self, name, default=None: embeddings_dir)
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, symbol_map={})
+    assert len(mock_model) == 3
+
+    class WideModel:
+        def encode(self, texts, **kwargs):
+            mock_model.extend(texts)
+            return np.stack([_unit(sum(map(ord, text)), dim=16) for text in texts])
+
+    monkeypatch.setattr(embedding_manager, "MODEL_INSTANCE", WideModel())
+    monkeypatch.setattr(
+        embedding_manager, "SELECTED_MODEL_CONFIG", {"type": "sentence-transformer", "name": "wide"}
+    )
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, symbol_map={})
+    assert len(mock_model) == 6
+    store = open_embedding_store(embeddings_dir, root)
+    assert len(store) == 3 and store.dim == 16
+    assert {store.get_entry(f"{root}/src/m{i}.py").model for i in range(3)} == {"wide"}
+
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, symbol_map={})
+    assert len(mock_model) == 6  # 同一模型下未变化 / Unchanged under the same model
+
+
+def test_context_buckets_load_model_once_per_bucket(embeddings_dir, tmp_path, monkeypatch, mock_model):
+    """
+    测试用例：上下文长度按2的幂分桶，每个桶只加载一次模型（从小到大）；超长文本被确定性截断
+    Test Case: Context lengths fall into power-of-two buckets, the model loads once per bucket (smallest first); over-long texts are cut deterministically
+    """
+    assert embedding_manager._context_bucket(10) == 8192
+    assert embedding_manager._context_bucket(8192 - 512) == 8192
+    assert embedding_manager._context_bucket(8192 - 511) == 16384
+    assert embedding_manager._context_bucket(10**6) == embedding_manager.MAX_CONTEXT_LENGTH
+    text, tokens = embedding_manager._truncate_to_context("x" * 200_000, 50_000)
+    assert tokens == embedding_manager.MAX_CONTEXT_LENGTH - 512 and text == "x" * (tokens * 4)
+    assert embedding_manager._truncate_to_context("short", 1) == ("short", 1)
+
+    root = normalize_path(str(tmp_path / "proj"))
+    os.makedirs(f"{root}/docs")
+    path_to_key_info = GlobalKeyMap({f"{root}/docs": KeyInfo("1A", f"{root}/docs", None, 1, True)})
+    # 无分词器时约4个字符一个词元 / About 4 characters per token without a tokenizer
+    sizes = {"a.md": 100, "b.md": 31000, "c.md": 200, "d.md": 30900, "e.md": 300}
+    for i, (name, size) in enumerate(sizes.items()):
+        with open(f"{root}/docs/{name}", "w", encoding="utf-8") as f:
+            f.write(name[0] * size)
+        path_to_key_info[f"{root}/docs/{name}"] = KeyInfo(f"1A{i + 1}", f"{root}/docs/{name}", f"{root}/docs", 1, False)
+    loads = []
+    monkeypatch.setattr(embedding_manager, "_load_model", lambda n_ctx=8192: loads.append(n_ctx))
+    monkeypatch.setattr(embedding_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(ConfigManager, "get_path", lambda self, name, default=None: embeddings_dir)
+    _set_embedding_settings(monkeypatch, pipeline_workers=0)
+
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, batch_size=2, symbol_map={})
+    assert loads == [8192, 16384]
+    assert [text[0] for text in mock_model] == ["a", "c", "e", "d", "b"]
+
+    # 流水线模式：较大上下文的文本推迟到最后，每个桶仍只加载一次
+    # Pipelined mode: larger-context texts wait until the end, still one load per bucket
+    loads.clear()
+    mock_model.clear()
+    _set_embedding_settings(monkeypatch, pipeline_workers=3)
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, force=True, batch_size=2, symbol_map={})
+    assert loads == sorted(set(loads)) and loads[-1] == 16384
+    assert sorted(text[0] for text in mock_model) == ["a", "b", "c", "d", "e"]
+    if loads[0] == 8192:
+        assert [text[0] for text in mock_model[-2:]] == ["d", "b"]
+
+
+def test_gguf_batches_embed_calls_and_reports_throughput(embeddings_dir, tmp_path, monkeypatch, caplog):
+    """
+    测试用例：GGUF模型每批只调用一次embed（传入列表）；记录每种配置的词元吞吐量；基准按线程数重新加载模型
+    Test Case: GGUF models get one embed call per batch (with a list); throughput is logged per configuration; the benchmark reloads the model per thread count
+    """
+    calls = []
+
+    class GGUFModel:
+        def embed(self, texts, return_count=False):
+            calls.append(list(texts))
+            vectors = [_unit(sum(map(ord, text))).tolist() for text in texts]
+            return (vectors, 7 * len(texts)) if return_count else vectors
+
+    loads = []
+    monkeypatch.setattr(embedding_manager, "MODEL_INSTANCE", GGUFModel())
+    monkeypatch.setattr(embedding_manager, "SELECTED_MODEL_CONFIG", {"type": "gguf", "name": "mock-gguf"})
+    monkeypatch.setattr(
+        embedding_manager, "_load_model", lambda n_ctx=8192, n_threads=None: loads.append((n_ctx, n_threads))
+    )
+    monkeypatch.setattr(embedding_manager, "_unload_model", lambda: None)
+    monkeypatch.setattr(embedding_manager, "_get_tokenizer", lambda: None)
+
+    root = normalize_path(str(tmp_path / "proj"))
+    os.makedirs(f"{root}/docs")
+    path_to_key_info = GlobalKeyMap({f"{root}/docs": KeyInfo("1A", f"{root}/docs", None, 1, True)})
+    for i in range(5):
+        with open(f"{root}/docs/d{i}.md", "w", encoding="utf-8") as f:
+            f.write(f"# Doc {i}\n")
+        path_to_key_info[f"{root}/docs/d{i}.md"] = KeyInfo(f"1A{i + 1}", f"{root}/docs/d{i}.md", f"{root}/docs", 1, False)
+    monkeypatch.setattr(embedding_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(ConfigManager, "get_path", lambda self, name, default=None: embeddings_dir)
+
+    with caplog.at_level("INFO", logger=embedding_manager.logger.name):
+        assert embedding_manager.generate_embeddings([root], path_to_key_info, batch_size=2, symbol_map={})
+    assert [len(batch) for batch in calls] == [2, 2, 1]
+    assert "5 texts, 35 tokens" in caplog.text and "tokens/s" in caplog.text
+    assert len(open_embedding_store(embeddings_dir, root)) == 5
+
+    monkeypatch.setattr(ConfigManager, "get_embedding_setting", lambda self, name, default=None: 3)
+    assert embedding_manager._gguf_thread_count() == 3
+    loads.clear()
+    results = embedding_manager.benchmark_embedding_throughput(["a", "b", "c"], thread_counts=[1, 2], batch_sizes=[1, 3])
+    assert [n_threads for _, n_threads in loads] == [1, 2]
+    assert [(r["n_threads"], r["batch_size"], r["tokens"]) for r in results] == [(1, 1, 21), (1, 3, 21), (2, 1, 21), (2, 3, 21)]
+
+
+def test_pipeline_stops_cleanly_when_model_fails(embeddings_dir, tmp_path, monkeypatch, mock_model):
+    """
+    测试用例：流水线模式下模型加载失败时返回False，准备线程与写入线程全部结束
+    Test Case: In pipelined mode a model load failure returns False and every preparation and writer thread exits
+    """
+    root = normalize_path(str(tmp_path / "proj"))
+    os.makedirs(f"{root}/docs")
+    path_to_key_info = GlobalKeyMap({f"{root}/docs": KeyInfo("1A", f"{root}/docs", None, 1, True)})
+    for i in range(60):
+        with open(f"{root}/docs/d{i}.md", "w", encoding="utf-8") as f:
+            f.write(f"# Doc {i}\n")
+        path_to_key_info[f"{root}/docs/d{i}.md"] = KeyInfo(f"1A{i + 1}", f"{root}/docs/d{i}.md", f"{root}/docs", 1, False)
+
+    def fail(n_ctx=8192):
+        raise RuntimeError("no model")
+
+    monkeypatch.setattr(embedding_manager, "_load_model", fail)
+    monkeypatch.setattr(embedding_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(ConfigManager, "get_path", lambda self, name, default=None: embeddings_dir)
+    _set_embedding_settings(monkeypatch, pipeline_workers=2)
+
+    assert not embedding_manager.generate_embeddings([root], path_to_key_info, batch_size=2, symbol_map={})
+    assert mock_model == []
+    assert not [t for t in threading.enumerate() if t.name.startswith("embedding-")]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_failed_files_and_batches_do_not_stop_the_run(embeddings_dir, tmp_path, monkeypatch, mock_model, workers):
+    """
+    测试用例：某个文件准备失败时其他文件仍被嵌入；某批推理失败时返回False，已嵌入的文件被保存，失败的文件下次重试
+    Test Case: A file failing to prepare does not stop the others; a failed batch returns False, embedded files are saved and failed ones are retried next run
+    """
+    root = normalize_path(str(tmp_path / "proj"))
+    os.makedirs(f"{root}/docs")
+    path_to_key_info = GlobalKeyMap({f"{root}/docs": KeyInfo("1A", f"{root}/docs", None, 1, True)})
+    for i in range(12):
+        with open(f"{root}/docs/d{i}.md", "w", encoding="utf-8") as f:
+            f.write(f"# Doc {i}\n")
+        path_to_key_info[f"{root}/docs/d{i}.md"] = KeyInfo(f"1A{i + 1}", f"{root}/docs/d{i}.md", f"{root}/docs", 1, False)
+    real_prepare = embedding_manager._prepare_embedding_text
+
+    def prepare(key_info, *args, **kwargs):
+        if key_info.norm_path.endswith("/d3.md"):
+            raise ValueError("unreadable")
+        return real_prepare(key_info, *args, **kwargs)
+
+    monkeypatch.setattr(embedding_manager, "_prepare_embedding_text", prepare)
+    monkeypatch.setattr(embedding_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(ConfigManager, "get_path", lambda self, name, default=None: embeddings_dir)
+    _set_embedding_settings(monkeypatch, pipeline_workers=workers)
+
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, batch_size=2, symbol_map={})
+    store = open_embedding_store(embeddings_dir, root)
+    assert sorted(store.file_paths()) == sorted(f"{root}/docs/d{i}.md" for i in range(12) if i != 3)
+
+    monkeypatch.setattr(embedding_manager, "_prepare_embedding_text", real_prepare)
+    real_encode = embedding_manager._encode_batch
+
+    def encode(texts):
+        if "# Doc 3\n" in texts:
+            raise RuntimeError("inference failed")
+        return real_encode(texts)
+
+    monkeypatch.setattr(embedding_manager, "_encode_batch", encode)
+    with open(f"{root}/docs/d5.md", "w", encoding="utf-8") as f:
+        f.write("# Doc 5 changed\n")
+    os.utime(f"{root}/docs/d5.md", (os.path.getmtime(f"{root}/docs/d5.md") + 10,) * 2)
+    assert not embedding_manager.generate_embeddings([root], path_to_key_info, batch_size=1, symbol_map={})
+    store = open_embedding_store(embeddings_dir, root)
+    assert f"{root}/docs/d3.md" not in store
+    assert store.get_entry(f"{root}/docs/d5.md").mtime == os.path.getmtime(f"{root}/docs/d5.md")
+    assert not [t for t in threading.enumerate() if t.name.startswith("embedding-")]
+
+    monkeypatch.setattr(embedding_manager, "_encode_batch", real_encode)
+    assert embedding_manager.generate_embeddings([root], path_to_key_info, batch_size=2, symbol_map={})
+    assert f"{root}/docs/d3.md" in open_embedding_store(embeddings_dir, root)
+
+
+def test_quantized_storage_accuracy_and_memory(embeddings_dir):
+    """
+    测试用例：基准——float16与int8相对float32的top-10邻居重合度、矩阵大小与相似度索引；反量化的索引与逐块计算一致
+    Test Case: Benchmark - top-10 neighbour overlap of float16 and int8 against float32, matrix size and similarity index; the dequantized index matches per-block scoring
+    """
+    rng = np.random.default_rng(0)
+    centres = rng.normal(size=(40, 384))
+    vectors = centres[rng.integers(0, 40, 3000)] + 0.8 * rng.normal(size=(3000, 384))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+    paths = tuple(f"/p/f{i}.py" for i in range(len(vectors)))
+    report = ["\nQuantized storage over 3000 x 384 vectors:"]
+    overlaps = {}
+    for dtype in ("float32", "float16", "int8"):
+        store = EmbeddingStore(os.path.join(embeddings_dir, dtype), dtype)
+        for path, vector in zip(paths, vectors):
+            store.put(path, vector)
+        store.save()
+        rows = store.quantized_rows(np.arange(len(paths)))
+        start = time.perf_counter()
+        index = embedding_manager.SimilarityIndex.from_rows(
+            paths, np.arange(len(paths)), rows, 0.3, 10, 4 * 1024 * 1024
+        )
+        build_time = time.perf_counter() - start
+        overlaps[dtype] = quantization_topk_overlap(vectors, dtype)
+        resident = rows.values.nbytes + (rows.scales.nbytes if rows.scales is not None else 0)
+        report.append(
+            f"{dtype}: top-10 overlap {overlaps[dtype]:.3f}, {os.path.getsize(store.matrix_path) / 1e6:.2f} MB on disk, "
+            f"{resident / 1e6:.2f} MB resident, index built in {build_time:.2f}s"
+        )
+        if dtype == "int8":
+            # 逐块反量化（列分块）的结果与一次性反量化相同 / Column-blocked dequantization matches dequantizing at once
+            whole = embedding_manager.SimilarityIndex(paths, list(rows.dequantize()), 0.3, 10, 1 << 30)
+            for path in paths[:50]:
+                assert [p for p, _ in index.neighbours(path)] == [p for p, _ in whole.neighbours(path)]
+                assert [s for _, s in index.neighbours(path)] == pytest.approx(
+                    [s for _, s in whole.neighbours(path)], abs=1e-5
+                )
+            assert resident < 0.3 * len(vectors) * 384 * 4
+        store.close()
+    print("\n".join(report))
+
+    assert overlaps["float32"] == 1.0
+    assert overlaps["float16"] >= 0.99
+    assert overlaps["int8"] >= 0.95
@@ -0,0 +1,142 @@
+"""
+测试模块：全局键映射索引测试
+Test Module: Global Key Map Index Tests
+
+本模块测试GlobalKeyMap类的功能，包括：
+- 与dict接口兼容
+- 键字符串、基础键、父目录与模块索引
+- 修改后索引失效
+- 序列化（pickle）不包含派生索引
+- 普通字典只包装一次
+
+This module tests GlobalKeyMap class functionality, including:
+- Compatibility with the dict interface
+- Key string, base key, parent directory and module indexes
+- Index invalidation after mutation
+- Serialization (pickle) without the derived indexes
+- A plain dict is wrapped only once
+"""
+
+# 导入pickle用于序列化测试 / Import pickle for serialization tests
+import pickle
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.core.key_manager import (
+    GlobalKeyMap,
+    KeyInfo,
+    as_global_key_map,
+)
+from cline_utils.dependency_system.utils.tracker_utils import (
+    resolve_key_global_instance_to_ki,
+)
+
+ROOT = "/proj/src"
+
+
+def _build_map() -> GlobalKeyMap:
+    """
+    构建包含重复基础键的小型映射
+    Build a small map with a duplicated base key
+    """
+    infos = [
+        KeyInfo("1A", ROOT, None, 1, True),
+        KeyInfo("1A1", f"{ROOT}/main.py", ROOT, 1, False),
+        KeyInfo("1Aa", f"{ROOT}/pkg", ROOT, 1, True),
+        KeyInfo("1Aa1#2", f"{ROOT}/pkg/b.py", f"{ROOT}/pkg", 1, False),
+        KeyInfo("1Aa1#1", f"{ROOT}/pkg/a.py", f"{ROOT}/pkg", 1, False),
+    ]
+    return GlobalKeyMap((ki.norm_path, ki) for ki in infos)
+
+
+class TestGlobalKeyMap:
+    """
+    测试类：GlobalKeyMap功能测试
+    Test Class: GlobalKeyMap Functionality Tests
+    """
+
+    def test_dict_compatible(self):
+        """
+        测试用例：行为与普通dict一致
+        Test Case: Behaves like a plain dict
+        """
+        key_map = _build_map()
+        assert isinstance(key_map, dict)
+        assert key_map[f"{ROOT}/main.py"].key_string == "1A1"
+        assert dict(key_map) == {ki.norm_path: ki for ki in key_map.values()}
+        assert isinstance(key_map.copy(), GlobalKeyMap)
+        assert as_global_key_map(key_map) is key_map
+
+    def test_key_and_base_key_lookups(self):
+        """
+        测试用例：按键字符串和基础键查找，实例按#GI排序
+        Test Case: Lookups by key string and base key, instances ordered by #GI
+        """
+        key_map = _build_map()
+        assert key_map.get_by_key("1Aa1#1").norm_path == f"{ROOT}/pkg/a.py"
+        assert key_map.get_by_key("1Aa1") is None
+        assert [ki.key_string for ki in key_map.instances_of("1Aa1")] == ["1Aa1#1", "1Aa1#2"]
+        assert [ki.key_string for ki in key_map.instances_of("1Aa1#2")] == ["1Aa1#1", "1Aa1#2"]
+        # 路径上的键匹配时优先返回该路径 / The entry at the given path wins when it carries the key
+        assert key_map.resolve("1A1", f"{ROOT}/main.py").norm_path == f"{ROOT}/main.py"
+        assert key_map.resolve("1A1", f"{ROOT}/moved.py").norm_path == f"{ROOT}/main.py"
+        assert resolve_key_global_instance_to_ki("1Aa", key_map).norm_path == f"{ROOT}/pkg"
+
+    def test_parent_and_module_indexes(self):
+        """
+        测试用例：父目录子项、文件所属模块与file_to_module映射
+        Test Case: Parent children, owning module and the file_to_module map
+        """
+        key_map = _build_map()
+        assert [ki.key_string for ki in key_map.children_of(ROOT)] == ["1A1", "1Aa"]
+        assert key_map.module_of(f"{ROOT}/pkg/a.py").key_string == "1Aa"
+        assert key_map.module_of(ROOT) is None
+        assert key_map.file_to_module_map() == {
+            f"{ROOT}/main.py": ROOT,
+            f"{ROOT}/pkg/b.py": f"{ROOT}/pkg",
+            f"{ROOT}/pkg/a.py": f"{ROOT}/pkg",
+        }
+
+    def test_mutation_invalidates_indexes(self):
+        """
+        测试用例：修改映射后索引重新构建
+        Test Case: Indexes are rebuilt after the map changes
+        """
+        key_map = _build_map()
+        assert key_map.get_by_key("1A2") is None
+        key_map[f"{ROOT}/util.py"] = KeyInfo("1A2", f"{ROOT}/util.py", ROOT, 1, False)
+        assert key_map.get_by_key("1A2").norm_path == f"{ROOT}/util.py"
+        del key_map[f"{ROOT}/main.py"]
+        assert key_map.get_by_key("1A1") is None
+        key_map.pop(f"{ROOT}/util.py")
+        assert [ki.key_string for ki in key_map.children_of(ROOT)] == ["1Aa"]
+
+    def test_pickle_roundtrip(self):
+        """
+        测试用例：pickle往返保留映射但不保留索引
+        Test Case: A pickle round trip keeps the mapping but not the indexes
+        """
+        key_map = _build_map()
+        key_map.get_by_key("1A")  # Build indexes
+        restored = pickle.loads(pickle.dumps(key_map))
+        assert isinstance(restored, GlobalKeyMap)
+        assert restored == key_map
+        assert restored._indexes is None
+        assert restored.get_by_key("1Aa1#2").norm_path == f"{ROOT}/pkg/b.py"
+
+    def test_plain_dict_is_wrapped_once(self):
+        """
+        测试用例：同一普通字典的包装与索引被复用，字典大小改变后重新包装
+        Test Case: The wrapper and indexes of one plain dict are reused, and it is rewrapped once its size changes
+        """
+        plain = dict(_build_map())
+        key_map = as_global_key_map(plain)
+        assert resolve_key_global_instance_to_ki("1Aa1#2", plain).norm_path == f"{ROOT}/pkg/b.py"
+        indexes = key_map._indexes
+        for key in ("1A", "1A1", "1Aa"):
+            assert resolve_key_global_instance_to_ki(key, plain) is plain[key_map.get_by_key(key).norm_path]
+        assert as_global_key_map(plain) is key_map and key_map._indexes is indexes
+        assert as_global_key_map(dict(plain)) is not key_map  # 另一个字典对象 / Another dict object
+
+        plain[f"{ROOT}/util.py"] = KeyInfo("1A2", f"{ROOT}/util.py", ROOT, 1, False)
+        assert resolve_key_global_instance_to_ki("1A2", plain).norm_path == f"{ROOT}/util.py"
+        assert as_global_key_map({}) == {}
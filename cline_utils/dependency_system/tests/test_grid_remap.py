@@ -0,0 +1,133 @@
+"""
+测试模块：网格重映射测试
+Test Module: Grid Remap Tests
+
+本模块测试按索引置换重映射依赖网格（remap_grid_rows），包括：
+- 与逐单元格复制的结果完全一致（删除、重排、多对一映射）
+- 长度错误的行被跳过
+- 大网格重映射的性能
+
+This module tests remapping a dependency grid through an index permutation (remap_grid_rows), including:
+- Results identical to the cell-by-cell copy (drops, reordering, many-to-one mappings)
+- Rows with a bad length are skipped
+- Remap performance on a large grid
+"""
+
+# 导入随机数与时间 / Import random and time
+import random
+import time
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.core.dependency_grid import (
+    DIAGONAL_CHAR,
+    EMPTY_CHAR,
+    PLACEHOLDER_CHAR,
+    compress,
+    decompress,
+    remap_grid_rows,
+)
+
+
+def _reference_remap(compressed_rows, old_to_new, new_size):
+    """
+    逐单元格复制的参考实现（update_tracker原有的语义）
+    Cell-by-cell reference implementation (update_tracker's original semantics)
+    """
+    grid = [[PLACEHOLDER_CHAR] * new_size for _ in range(new_size)]
+    for i in range(new_size):
+        grid[i][i] = DIAGONAL_CHAR
+    copied = skipped = 0
+    bad = []
+    for old_row, compressed_row in enumerate(compressed_rows):
+        new_row = old_to_new[old_row]
+        if new_row < 0:
+            continue
+        values = decompress(compressed_row)
+        if len(values) != len(old_to_new):
+            bad.append(old_row)
+            continue
+        for old_col, value in enumerate(values):
+            new_col = old_to_new[old_col]
+            if value in (DIAGONAL_CHAR, PLACEHOLDER_CHAR, EMPTY_CHAR) or new_col < 0:
+                continue
+            if grid[new_row][new_col] == PLACEHOLDER_CHAR:
+                grid[new_row][new_col] = value
+                copied += 1
+            else:
+                skipped += 1
+    return grid, copied, skipped, bad
+
+
+def _random_grid(rng, size):
+    """
+    生成随机压缩网格 / Generate a random compressed grid
+    """
+    rows = []
+    for i in range(size):
+        row = [rng.choice("<>xdsSnp..") for _ in range(size)]
+        row[i] = DIAGONAL_CHAR
+        rows.append(compress("".join(row)))
+    return rows
+
+
+class TestGridRemap:
+    """
+    测试类：网格重映射功能测试
+    Test Class: Grid Remap Functionality Tests
+    """
+
+    def test_matches_cell_by_cell_copy(self):
+        """
+        测试用例：随机删除、重排与多对一映射时与参考实现一致
+        Test Case: Matches the reference for random drops, reordering and many-to-one mappings
+        """
+        rng = random.Random(7)
+        for _ in range(30):
+            old_size = rng.randint(0, 25)
+            new_size = rng.randint(0, 25)
+            rows = _random_grid(rng, old_size)
+            targets = list(range(new_size))
+            rng.shuffle(targets)
+            many_to_one = rng.random() < 0.3
+            old_to_new = []
+            for i in range(old_size):
+                if rng.random() < 0.2 or (not targets and not many_to_one) or new_size == 0:
+                    old_to_new.append(-1)
+                elif many_to_one:
+                    old_to_new.append(rng.randrange(new_size))
+                else:
+                    old_to_new.append(targets.pop())
+            assert remap_grid_rows(rows, old_to_new, new_size) == _reference_remap(
+                rows, old_to_new, new_size
+            )
+
+    def test_bad_length_rows_are_skipped(self):
+        """
+        测试用例：长度错误的行整行跳过，其余行正常复制
+        Test Case: A row with a bad length is skipped entirely; other rows are copied
+        """
+        rows = ["o<>", "<o", ">do"]
+        grid, copied, skipped, bad = remap_grid_rows(rows, [1, 0, 2], 3)
+        assert bad == [1]
+        assert grid == [
+            [DIAGONAL_CHAR, PLACEHOLDER_CHAR, PLACEHOLDER_CHAR],
+            ["<", DIAGONAL_CHAR, ">"],
+            ["d", ">", DIAGONAL_CHAR],
+        ]
+        assert (copied, skipped) == (4, 0)
+
+    def test_large_grid_remap_is_fast(self):
+        """
+        测试用例：2000键网格的重映射在秒级以内完成
+        Test Case: Remapping a 2000-key grid completes well within seconds
+        """
+        size = 2000
+        rng = random.Random(3)
+        pattern = ("<" + "." * 30 + "d" * 5) * (size // 36 + 2)
+        rows = [compress(pattern[i % 36 :][:size]) for i in range(size)]
+        old_to_new = list(range(size))
+        rng.shuffle(old_to_new)
+        start = time.perf_counter()
+        grid, copied, _skipped, bad = remap_grid_rows(rows, old_to_new, size)
+        assert time.perf_counter() - start < 5.0
+        assert bad == [] and len(grid) == size and copied > 0
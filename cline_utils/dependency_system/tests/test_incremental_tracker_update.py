@@ -0,0 +1,299 @@
+"""
+测试模块：增量追踪器更新测试
+Test Module: Incremental Tracker Update Tests
+
+本模块测试update_tracker的增量模式及其网格辅助函数，包括：
+- 结构依赖：祖先遍历与逐对路径比较结果相同，可限定为新行
+- 合并：按源键索引的合并与逐单元格比较结果相同
+- 定义与网格未变化时不重写文件、不备份
+- 增量模式与完整模式生成相同的追踪器
+
+This module tests update_tracker's incremental mode and its grid helpers, including:
+- Structural dependencies: the ancestor walk matches pairwise path comparison and can be limited to new rows
+- Consolidation indexed by source key matches the cell-by-cell comparison
+- Unchanged definitions and grid leave the file unwritten and unbacked-up
+- Incremental and full mode produce the same trackers
+"""
+
+# 导入操作系统接口与随机数 / Import operating system interface and random
+import os
+import random
+
+# 导入pytest测试框架 / Import pytest testing framework
+import pytest
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.core import key_manager
+from cline_utils.dependency_system.core.key_manager import KeyInfo
+from cline_utils.dependency_system.io import tracker_io
+from cline_utils.dependency_system.utils import config_manager
+from cline_utils.dependency_system.utils.cache_manager import clear_all_caches
+from cline_utils.dependency_system.utils.config_manager import CHARACTER_PRIORITIES
+from cline_utils.dependency_system.utils.path_filter import PathFilter
+from cline_utils.dependency_system.utils.path_utils import is_subpath, normalize_path
+from cline_utils.dependency_system.utils.tracker_utils import (
+    get_key_global_instance_string,
+)
+
+CLINERULES = """
+[CODE_ROOT_DIRECTORIES]
+- src
+[DOC_DIRECTORIES]
+- docs
+"""
+
+ITEMS = [
+    ("1A", "/p/docs", True),
+    ("1A1", "/p/docs/intro.md", False),
+    ("1Aa", "/p/docs/guide", True),
+    ("1Aa1", "/p/docs/guide/setup.md", False),
+    ("1Aa2", "/p/docs/guide/usage.md", False),
+    ("1Ab", "/p/docs/guide/deep", True),
+    ("1Ab1", "/p/docs/guide/deep/notes.md", False),
+    ("2A", "/p/docs-old", True),
+    ("2A1", "/p/docs-old/intro.md", False),
+]
+
+
+def _key_infos():
+    return [
+        KeyInfo(key, path, os.path.dirname(path), 1, is_dir)
+        for key, path, is_dir in ITEMS
+    ]
+
+
+def _empty_grid(n):
+    grid = [[tracker_io.PLACEHOLDER_CHAR] * n for _ in range(n)]
+    for i in range(n):
+        grid[i][i] = tracker_io.DIAGONAL_CHAR
+    return grid
+
+
+def _reference_structural(grid, key_infos, tracker_type):
+    """
+    原有的逐对比较 / The original pairwise comparison
+    """
+    for r, r_ki in enumerate(key_infos):
+        for c, c_ki in enumerate(key_infos):
+            if r == c or grid[r][c] != tracker_io.PLACEHOLDER_CHAR:
+                continue
+            if (r_ki.is_directory and is_subpath(c_ki.norm_path, r_ki.norm_path)) or (
+                c_ki.is_directory and is_subpath(r_ki.norm_path, c_ki.norm_path)
+            ):
+                grid[r][c] = "x"
+            elif tracker_type == "doc" and (r_ki.is_directory or c_ki.is_directory):
+                grid[r][c] = "n"
+
+
+def _reference_consolidation(grid, key_infos, rels):
+    """
+    原有的逐单元格合并 / The original cell-by-cell consolidation
+    """
+    prio = CHARACTER_PRIORITIES.get
+    for r, r_ki in enumerate(key_infos):
+        for c, c_ki in enumerate(key_infos):
+            auth = rels.get((r_ki.key_string, c_ki.key_string), tracker_io.PLACEHOLDER_CHAR)
+            current = grid[r][c]
+            if r == c or auth == tracker_io.PLACEHOLDER_CHAR:
+                continue
+            update = prio(auth, 0) > prio(current, 0)
+            update |= auth == "n" and current in ("p", "s", "S", tracker_io.EMPTY_CHAR)
+            update |= auth in ("s", "S") and current in ("p", tracker_io.EMPTY_CHAR)
+            if update:
+                grid[r][c] = auth
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """
+    创建含两个模块的临时项目并生成键
+    Create a temporary project with two modules and generate its keys
+    """
+    for pkg in range(2):
+        for f in range(4):
+            path = tmp_path / "src" / f"pkg{pkg}" / f"mod{f}.py"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("import os\n")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "readme.md").write_text("# Readme")
+    (tmp_path / ".clinerules").write_text(CLINERULES)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config_manager.ConfigManager, "_instance", None)
+    root = normalize_path(str(tmp_path))
+    monkeypatch.setattr(key_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(
+        key_manager, "KEY_SNAPSHOT_FILENAME", str(tmp_path / "key_snapshot.json")
+    )
+    clear_all_caches()
+    path_to_key_info, new_keys = key_manager.generate_keys(
+        [f"{root}/docs", f"{root}/src"], path_filter=PathFilter(root), incremental=False
+    )
+    yield root, path_to_key_info, new_keys
+    clear_all_caches()
+
+
+def _suggestions(path_to_key_info, seed):
+    """
+    文件之间的随机建议 / Random suggestions between files
+    """
+    rng = random.Random(seed)
+    files = sorted(
+        (ki for ki in path_to_key_info.values() if not ki.is_directory),
+        key=lambda ki: ki.norm_path,
+    )
+    suggestions = {}
+    for ki in files:
+        for target in rng.sample(files, 2):
+            if target is not ki:
+                suggestions.setdefault(
+                    get_key_global_instance_string(ki, path_to_key_info), []
+                ).append(
+                    (get_key_global_instance_string(target, path_to_key_info), rng.choice("<>ds"))
+                )
+    return suggestions
+
+
+def _update_modules(root, path_to_key_info, new_keys, suggestions, incremental):
+    """
+    更新每个模块的迷你追踪器，返回各追踪器内容（不含时间戳行）
+    Update every module's mini tracker and return each tracker's content (timestamp lines dropped)
+    """
+    contents = {}
+    for pkg in range(2):
+        tracker_path = tracker_io.get_mini_tracker_path(f"{root}/src/pkg{pkg}")
+        tracker_io.update_tracker(
+            tracker_path,
+            path_to_key_info,
+            "mini",
+            suggestions_external=suggestions,
+            file_to_module=path_to_key_info.file_to_module_map(),
+            new_keys=new_keys,
+            force_apply_suggestions=True,
+            use_old_map_for_migration=False,
+            incremental=incremental,
+        )
+        with open(tracker_path, encoding="utf-8") as f:
+            contents[tracker_path] = [
+                line for line in f if not line.startswith("last_GRID_edit")
+            ]
+    return contents
+
+
+class TestIncrementalTrackerUpdate:
+    """
+    测试类：增量追踪器更新功能测试
+    Test Class: Incremental Tracker Update Functionality Tests
+    """
+
+    @pytest.mark.parametrize("tracker_type", ["mini", "doc"])
+    def test_structural_matches_pairwise_comparison(self, tracker_type):
+        """
+        测试用例：祖先遍历与逐对比较结果相同（'/p/docs-old'不是'/p/docs'的子路径）
+        Test Case: The ancestor walk matches pairwise comparison ('/p/docs-old' is not under '/p/docs')
+        """
+        key_infos = _key_infos()
+        expected = _empty_grid(len(key_infos))
+        _reference_structural(expected, key_infos, tracker_type)
+        grid = _empty_grid(len(key_infos))
+        changed = tracker_io._apply_structural_dependencies(grid, key_infos, tracker_type)
+        assert grid == expected
+        assert changed == sum(row.count("x") + row.count("n") for row in grid)
+        assert grid[0][7] == ("n" if tracker_type == "doc" else "p")
+
+        # 旧行已有结构字符，只处理新行得到相同结果
+        # Old rows already carry their structural chars; processing only the new rows gives the same grid
+        new_rows = {3, 6}
+        partial = [list(row) for row in expected]
+        for i in new_rows:
+            for j in range(len(key_infos)):
+                if i != j:
+                    partial[i][j] = partial[j][i] = "p"
+        tracker_io._apply_structural_dependencies(partial, key_infos, tracker_type, rows=new_rows)
+        assert partial == expected
+
+    def test_consolidation_matches_cell_by_cell(self):
+        """
+        测试用例：按源键索引的合并与逐单元格合并结果相同
+        Test Case: Consolidation indexed by source key matches the cell-by-cell loop
+        """
+        key_infos = _key_infos()
+        keys = [ki.key_string for ki in key_infos] + ["9Z"]
+        chars = ["p", "<", ">", "x", "d", "s", "S", "n"]
+        rng = random.Random(5)
+        for _trial in range(20):
+            grid = _empty_grid(len(key_infos))
+            for r in range(len(key_infos)):
+                for c in range(len(key_infos)):
+                    if r != c:
+                        grid[r][c] = rng.choice(chars)
+            rels = {
+                (rng.choice(keys), rng.choice(keys)): rng.choice(chars[1:])
+                for _ in range(30)
+            }
+            original = [list(row) for row in grid]
+            expected = [list(row) for row in grid]
+            _reference_consolidation(expected, key_infos, rels)
+            rels_by_source = {}
+            for (src, tgt), char in rels.items():
+                rels_by_source.setdefault(src, {})[tgt] = char
+            changed = tracker_io._consolidate_grid(
+                grid, key_infos, rels_by_source, CHARACTER_PRIORITIES.__getitem__
+            )
+            assert grid == expected
+            assert changed == sum(
+                a != b
+                for row_a, row_b in zip(original, grid)
+                for a, b in zip(row_a, row_b)
+            )
+
+    def test_unchanged_tracker_is_not_rewritten(self, project, monkeypatch):
+        """
+        测试用例：相同输入的第二次更新不写文件、不备份；完整模式仍会重写
+        Test Case: A second update with the same input neither writes nor backs up; full mode still rewrites
+        """
+        root, path_to_key_info, new_keys = project
+        suggestions = _suggestions(path_to_key_info, seed=1)
+        # 第二次更新合并第一次写入的其他追踪器 / The second update consolidates the trackers written by the first
+        for _run in range(2):
+            clear_all_caches()
+            _update_modules(root, path_to_key_info, new_keys, suggestions, incremental=True)
+        tracker_path = tracker_io.get_mini_tracker_path(f"{root}/src/pkg0")
+        with open(tracker_path, encoding="utf-8") as f:
+            before = f.read()
+        os.utime(tracker_path, ns=(0, 0))
+
+        backups = []
+        monkeypatch.setattr(tracker_io, "backup_tracker_file", backups.append)
+        clear_all_caches()
+        _update_modules(root, path_to_key_info, new_keys, suggestions, incremental=True)
+        assert backups == []
+        assert os.stat(tracker_path).st_mtime_ns == 0
+        with open(tracker_path, encoding="utf-8") as f:
+            assert f.read() == before
+
+        _update_modules(root, path_to_key_info, new_keys, suggestions, incremental=False)
+        assert tracker_path in backups
+        assert os.stat(tracker_path).st_mtime_ns != 0
+
+    def test_incremental_matches_full_update(self, project):
+        """
+        测试用例：先后两组建议下，增量模式与完整模式生成相同的追踪器
+        Test Case: With two successive suggestion sets, incremental and full mode produce the same trackers
+        """
+        root, path_to_key_info, new_keys = project
+        results = {}
+        for incremental in (True, False):
+            for pkg in range(2):
+                tracker_path = tracker_io.get_mini_tracker_path(f"{root}/src/pkg{pkg}")
+                if os.path.exists(tracker_path):
+                    os.remove(tracker_path)
+            clear_all_caches()
+            _update_modules(
+                root, path_to_key_info, new_keys, _suggestions(path_to_key_info, 1), incremental
+            )
+            clear_all_caches()
+            results[incremental] = _update_modules(
+                root, path_to_key_info, new_keys, _suggestions(path_to_key_info, 2), incremental
+            )
+        assert results[True] == results[False]
+        assert any("<" in "".join(lines) for lines in results[True].values())
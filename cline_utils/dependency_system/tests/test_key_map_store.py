@@ -0,0 +1,161 @@
+"""
+测试模块：二进制全局键映射存储测试
+Test Module: Binary Global Key Map Storage Tests
+
+本模块测试key_map_store与MappedGlobalKeyMap的功能，包括：
+- 写入后读取的往返一致性（顺序、None父路径、重复键字符串）
+- 单点查找不会物化整个映射
+- 序列化（pickle）与格式校验
+- JSON导出默认不使用加载器回退读取的文件名
+
+This module tests key_map_store and MappedGlobalKeyMap functionality, including:
+- Write/read round trip (order, None parents, duplicated key strings)
+- Point lookups do not materialize the whole map
+- Serialization (pickle) and format validation
+- JSON exports default to a name the loaders never fall back to
+"""
+
+# 导入pickle用于序列化测试 / Import pickle for serialization tests
+import pickle
+
+# 导入pytest测试框架 / Import pytest testing framework
+import pytest
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.core import key_manager
+from cline_utils.dependency_system.core.key_manager import (
+    GlobalKeyMap,
+    KeyInfo,
+    MappedGlobalKeyMap,
+    export_global_key_map_json,
+    load_global_key_map,
+)
+from cline_utils.dependency_system.core.key_map_store import (
+    KeyMapFormatError,
+    KeyMapStore,
+    write_key_map,
+)
+from cline_utils.dependency_system.utils.cache_manager import clear_all_caches
+
+ROOT = "/proj/src"
+
+INFOS = [
+    KeyInfo("1A", ROOT, None, 1, True),
+    KeyInfo("1A1", f"{ROOT}/main.py", ROOT, 1, False),
+    KeyInfo("1Aa", f"{ROOT}/pkg", ROOT, 1, True),
+    KeyInfo("1Aa1#2", f"{ROOT}/pkg/b.py", f"{ROOT}/pkg", 1, False),
+    KeyInfo("1Aa1#1", f"{ROOT}/pkg/a.py", f"{ROOT}/pkg", 1, False),
+    KeyInfo("2Ba", f"{ROOT}/pkg/ünï", f"{ROOT}/pkg", 2, True),
+]
+
+
+@pytest.fixture
+def mapped_map(tmp_path):
+    """
+    写入二进制文件并以延迟映射打开
+    Write a binary file and open it as a lazy map
+    """
+    map_file = tmp_path / "global_key_map.bin"
+    assert write_key_map(str(map_file), INFOS) == len(INFOS)
+    return MappedGlobalKeyMap(KeyMapStore.open(str(map_file)))
+
+
+class TestKeyMapStore:
+    """
+    测试类：二进制键映射存储功能测试
+    Test Class: Binary Key Map Storage Functionality Tests
+    """
+
+    def test_point_lookups_stay_lazy(self, mapped_map):
+        """
+        测试用例：按路径与键字符串查找不会物化映射
+        Test Case: Lookups by path and key string do not materialize the map
+        """
+        assert len(mapped_map) == len(INFOS)
+        assert mapped_map[f"{ROOT}/pkg/a.py"] == INFOS[4]
+        assert mapped_map.get(f"{ROOT}/missing.py") is None
+        assert f"{ROOT}/pkg/ünï" in mapped_map
+        assert mapped_map.get_by_key("1Aa1#2").norm_path == f"{ROOT}/pkg/b.py"
+        assert mapped_map.get_by_key("9Z") is None
+        assert mapped_map.resolve("1A1", f"{ROOT}/main.py") == INFOS[1]
+        assert mapped_map.module_of(f"{ROOT}/pkg/b.py") == INFOS[2]
+        with pytest.raises(KeyError):
+            mapped_map[f"{ROOT}/missing.py"]
+        assert not mapped_map.is_materialized
+
+    def test_round_trip_matches_source(self, mapped_map):
+        """
+        测试用例：完整访问时内容与顺序与原始映射一致
+        Test Case: Full access yields the original content and order
+        """
+        expected = GlobalKeyMap((ki.norm_path, ki) for ki in INFOS)
+        assert list(mapped_map.items()) == list(expected.items())
+        assert mapped_map.is_materialized
+        assert dict(mapped_map) == dict(expected)
+        assert [ki.key_string for ki in mapped_map.instances_of("1Aa1")] == [
+            "1Aa1#1",
+            "1Aa1#2",
+        ]
+
+    def test_mutation_and_pickle(self, mapped_map):
+        """
+        测试用例：修改前后均可序列化，修改会先物化
+        Test Case: Picklable before and after mutation; mutation materializes first
+        """
+        restored = pickle.loads(pickle.dumps(mapped_map))
+        assert isinstance(restored, MappedGlobalKeyMap)
+        assert not restored.is_materialized
+        assert restored.get_by_key("1Aa") == INFOS[2]
+
+        new_ki = KeyInfo("1A2", f"{ROOT}/util.py", ROOT, 1, False)
+        mapped_map[new_ki.norm_path] = new_ki
+        assert len(mapped_map) == len(INFOS) + 1
+        assert mapped_map.get_by_key("1A2") == new_ki
+        assert pickle.loads(pickle.dumps(mapped_map)) == dict(mapped_map)
+
+    def test_empty_map(self, tmp_path):
+        """
+        测试用例：空映射可写入与读取
+        Test Case: An empty map can be written and read
+        """
+        map_file = tmp_path / "empty.bin"
+        write_key_map(str(map_file), [])
+        empty = MappedGlobalKeyMap(KeyMapStore.open(str(map_file)))
+        assert len(empty) == 0
+        assert empty.get(ROOT) is None
+        assert dict(empty) == {}
+
+    def test_rejects_bad_files(self, tmp_path):
+        """
+        测试用例：拒绝非键映射、截断或未知版本的文件
+        Test Case: Rejects non key map, truncated or unknown-version files
+        """
+        map_file = tmp_path / "global_key_map.bin"
+        write_key_map(str(map_file), INFOS)
+        data = map_file.read_bytes()
+
+        with pytest.raises(KeyMapFormatError):
+            KeyMapStore(b'{"not": "binary"}' * 4)
+        with pytest.raises(KeyMapFormatError):
+            KeyMapStore(data[: len(data) // 2])
+        with pytest.raises(KeyMapFormatError):
+            KeyMapStore(data[:8] + (99).to_bytes(4, "little") + data[12:])
+
+    def test_export_is_not_loaded_as_legacy_map(self, tmp_path, monkeypatch):
+        """
+        测试用例：默认导出文件与旧版JSON文件名不同，删除二进制映射后不会被加载
+        Test Case: The default export is not named like the legacy JSON file, so it is not loaded once the binary map is gone
+        """
+        monkeypatch.setattr(key_manager, "_key_map_file_path", lambda name: str(tmp_path / name))
+        clear_all_caches()
+        map_file = tmp_path / key_manager.GLOBAL_KEY_MAP_FILENAME
+        write_key_map(str(map_file), INFOS)
+
+        exported = export_global_key_map_json()
+        assert exported == str(tmp_path / "global_key_map.export.json")
+        assert not (tmp_path / key_manager.LEGACY_GLOBAL_KEY_MAP_FILENAME).exists()
+
+        map_file.unlink()
+        clear_all_caches()
+        assert load_global_key_map() is None
+        clear_all_caches()
@@ -0,0 +1,168 @@
+"""
+测试模块：键排序序数测试
+Test Module: Key Sort Ordinal Tests
+
+本模块测试预计算的层级排序序数，包括：
+- 按序数排序与逐键解析排序结果相同
+- 不在全局映射中的键回退到解析排序
+- 二进制键映射（版本2）持久化序数，版本1文件仍可读取
+
+This module tests precomputed hierarchical sort ordinals, including:
+- Sorting by ordinal gives the same order as parsing every key
+- Keys outside the global map fall back to parsed sorting
+- The binary key map (version 2) persists ordinals; version 1 files stay readable
+"""
+
+# 导入随机数 / Import random
+import random
+
+# 导入pytest测试框架 / Import pytest testing framework
+import pytest
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.core import key_manager, key_map_store
+from cline_utils.dependency_system.core.key_manager import (
+    GlobalKeyMap,
+    KeyInfo,
+    MappedGlobalKeyMap,
+    compute_key_ordinals,
+    get_sortable_parts_for_key,
+    register_key_ordinals,
+    sort_key_infos,
+    sort_key_strings_hierarchically,
+)
+from cline_utils.dependency_system.core.key_map_store import KeyMapStore, write_key_map
+
+KEYS = ["1A", "1A1", "1A2", "1A10", "1Ba", "1Ba2", "2Aa", "2Aa11", "2Aa3", "10B1", "1A1#2", "1A1#10"]
+
+
+def _infos():
+    """
+    每个键一个KeyInfo（路径逆序，以检查按键排序） / One KeyInfo per key (paths reversed to check key order)
+    """
+    return [
+        KeyInfo(key, f"/p/{len(KEYS) - i:02d}", None, 1, False) for i, key in enumerate(KEYS)
+    ]
+
+
+def _as_version_1(data: bytes) -> bytes:
+    """
+    将版本2文件转换为版本1布局（删除序数列）
+    Convert a version 2 file to the version 1 layout (drop the ordinal column)
+    """
+    fields = list(key_map_store._HEADER.unpack_from(data, 0))
+    count, off_records = fields[2], fields[7]
+    v2, v1 = key_map_store._RECORD, key_map_store._RECORD_V1
+    records = b"".join(
+        v1.pack(*(rec[:4] + rec[-1:]))
+        for rec in v2.iter_unpack(data[off_records : off_records + v2.size * count])
+    )
+    shrink = (v2.size - v1.size) * count
+    fields[1] = 1
+    for i in (6, 8, 9):  # str_data, path_index, key_index 偏移 / offsets
+        fields[i] -= shrink
+    return (
+        key_map_store._HEADER.pack(*fields)
+        + data[key_map_store._HEADER.size : off_records]
+        + records
+        + data[off_records + v2.size * count :]
+    )
+
+
+@pytest.fixture(autouse=True)
+def _no_registered_map():
+    """
+    每个测试前后清除已注册的映射 / Clear the registered map around each test
+    """
+    register_key_ordinals(None)
+    yield
+    register_key_ordinals(None)
+
+
+class TestKeyOrdinals:
+    """
+    测试类：键排序序数功能测试
+    Test Class: Key Sort Ordinal Functionality Tests
+    """
+
+    def test_ordinal_order_matches_parsed_order(self):
+        """
+        测试用例：按序数排序与按解析部分排序相同（含#GI键与1A10/1A2）
+        Test Case: Ordinal order equals parsed-parts order (including #GI keys and 1A10/1A2)
+        """
+        expected = sorted(KEYS, key=get_sortable_parts_for_key)
+        ordinals = compute_key_ordinals(KEYS + [None, ""])
+        assert sorted(ordinals.values()) == list(range(len(KEYS)))
+        assert sorted(KEYS, key=ordinals.__getitem__) == expected
+        assert expected.index("1A2") < expected.index("1A10")
+
+        register_key_ordinals(GlobalKeyMap({ki.norm_path: ki for ki in _infos()}))
+        shuffled = KEYS[:]
+        random.Random(7).shuffle(shuffled)
+        assert sort_key_strings_hierarchically(shuffled) == expected
+
+    def test_unknown_keys_fall_back_to_parsing(self, monkeypatch):
+        """
+        测试用例：列表包含未知键时回退到解析排序
+        Test Case: Lists with unknown keys fall back to parsed sorting
+        """
+        register_key_ordinals(GlobalKeyMap({ki.norm_path: ki for ki in _infos()}))
+        keys = ["1A10", "3C2", "1A2", "3C10", None]
+        assert sort_key_strings_hierarchically(keys) == ["1A2", "1A10", "3C2", "3C10"]
+
+        parsed = []
+        real_parts = key_manager.get_sortable_parts_for_key
+        monkeypatch.setattr(
+            key_manager,
+            "get_sortable_parts_for_key",
+            lambda key: parsed.append(key) or real_parts(key),
+        )
+        assert sort_key_strings_hierarchically(["1A10", "1A2"]) == ["1A2", "1A10"]
+        assert parsed == []  # 已知键不再解析 / Known keys are not parsed again
+
+    def test_sort_key_infos_ties_broken_by_path(self):
+        """
+        测试用例：KeyInfo按键排序，相同键按路径排序
+        Test Case: KeyInfo objects sort by key, equal keys by path
+        """
+        infos = _infos()
+        register_key_ordinals(GlobalKeyMap({ki.norm_path: ki for ki in infos}))
+        duplicate = KeyInfo("1A2", "/p/00", None, 1, False)
+        result = sort_key_infos(reversed(infos + [duplicate]))
+        expected = sorted(KEYS, key=get_sortable_parts_for_key)
+        assert [ki.key_string for ki in result] == sorted(
+            expected + ["1A2"], key=expected.index
+        )
+        first, second = [ki for ki in result if ki.key_string == "1A2"]
+        assert first is duplicate and second.norm_path > duplicate.norm_path
+
+        register_key_ordinals(None)  # 解析回退给出相同顺序 / The parsed fallback gives the same order
+        assert sort_key_infos(reversed(infos + [duplicate])) == result
+
+    def test_binary_map_persists_ordinals(self, tmp_path):
+        """
+        测试用例：版本2文件保存序数，映射视图无需物化即可读取；版本1文件仍可读取
+        Test Case: Version 2 files store ordinals, readable without materializing; version 1 files still load
+        """
+        infos = _infos()
+        ordinals = GlobalKeyMap({ki.norm_path: ki for ki in infos}).key_ordinals()
+        map_file = tmp_path / "global_key_map.bin"
+        write_key_map(str(map_file), infos, ordinals)
+
+        store = KeyMapStore.open(str(map_file))
+        assert store.version == key_map_store.KEY_MAP_VERSION
+        assert store.key_ordinals() == ordinals
+        mapped = MappedGlobalKeyMap(store)
+        assert mapped.key_ordinals() == ordinals
+        assert not mapped.is_materialized
+
+        write_key_map(str(map_file), infos)  # 无序数 / Without ordinals
+        assert KeyMapStore.open(str(map_file)).key_ordinals() is None
+
+        write_key_map(str(map_file), infos, ordinals)
+        v1_store = KeyMapStore(_as_version_1(map_file.read_bytes()))
+        assert v1_store.version == 1
+        assert v1_store.key_ordinals() is None
+        assert list(v1_store.records()) == list(store.records())
+        assert v1_store.record(v1_store.find_key("1A10")) == store.record(store.find_key("1A10"))
+        assert MappedGlobalKeyMap(v1_store).key_ordinals() == ordinals
@@ -0,0 +1,168 @@
+"""
+测试模块：增量键生成测试
+Test Module: Incremental Key Generation Tests
+
+本模块测试基于目录快照的增量键生成，包括：
+- 增量结果与完整重新生成完全相同（新增、删除、新目录）
+- 未变化的目录不再被列出
+- 排除规则变化或修改时间过新时不复用快照
+- 键差异（新键与迁移映射）
+
+This module tests incremental key generation from the directory snapshot, including:
+- Incremental results are identical to a full regeneration (adds, removals, new dirs)
+- Unchanged directories are not listed again
+- The snapshot is not reused after exclusion changes or for racy mtimes
+- The key delta (new keys and migration map)
+"""
+
+# 导入操作系统接口与时间 / Import operating system interface and time
+import os
+import time
+
+# 导入pytest测试框架 / Import pytest testing framework
+import pytest
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.core import key_manager
+from cline_utils.dependency_system.core.key_manager import KeyInfo, diff_key_maps
+from cline_utils.dependency_system.core.key_snapshot import KeySnapshot
+from cline_utils.dependency_system.io.tracker_io import build_path_migration_map
+from cline_utils.dependency_system.utils.path_filter import PathFilter
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+
+
+def _age_changed_dirs(root: str) -> None:
+    """
+    将最近修改的目录时间设为过去（避开快照的“过新”窗口）
+    Move recently modified directories into the past (outside the snapshot's racy window)
+    """
+    old = time.time() - 100
+    for dir_path, _dirs, _files in os.walk(root):
+        if os.stat(dir_path).st_mtime > old + 50:
+            os.utime(dir_path, (old, old))
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """
+    创建含层级提升的项目树，并使用临时快照文件
+    Create a project tree with tier promotion and use a temporary snapshot file
+    """
+    for rel in [
+        "src/a/b/c/f.py",
+        "src/a/b/g.py",
+        "src/a/h.py",
+        "src/z.py",
+        "src/a/b2/i.py",
+        "docs/readme.md",
+    ]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    root = normalize_path(str(tmp_path))
+    monkeypatch.setattr(key_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(
+        key_manager, "KEY_SNAPSHOT_FILENAME", str(tmp_path / "key_snapshot.json")
+    )
+    _age_changed_dirs(root)
+    return root, PathFilter(root), [f"{root}/docs", f"{root}/src"]
+
+
+class TestIncrementalKeyGeneration:
+    """
+    测试类：增量键生成功能测试
+    Test Class: Incremental Key Generation Functionality Tests
+    """
+
+    def test_incremental_matches_full_regeneration(self, project):
+        """
+        测试用例：多次修改后增量结果与完整重新生成完全相同（包括顺序）
+        Test Case: After several changes the incremental result equals a full regeneration (including order)
+        """
+        root, path_filter, roots = project
+        key_manager.generate_keys(roots, path_filter=path_filter)
+
+        changes = [
+            lambda: open(f"{root}/src/a/b/a0.py", "w").close(),  # 新文件在前 / New file sorts first
+            lambda: os.remove(f"{root}/src/a/h.py"),
+            lambda: os.makedirs(f"{root}/src/a/b1/x"),  # 新的被提升目录 / New promoted dir
+            lambda: os.rename(f"{root}/src/z.py", f"{root}/src/y.py"),
+        ]
+        for change in changes:
+            change()
+            _age_changed_dirs(root)
+            incremental, _ = key_manager.generate_keys(roots, path_filter=path_filter)
+            full, full_new = key_manager.generate_keys(
+                roots, path_filter=path_filter, incremental=False
+            )
+            assert list(incremental.items()) == list(full.items())
+            assert full_new == []  # 第二次运行与前一次相同 / The second run matches the first
+
+    def test_unchanged_directories_are_not_listed(self, project, monkeypatch):
+        """
+        测试用例：只有修改过的目录被重新列出
+        Test Case: Only modified directories are listed again
+        """
+        root, path_filter, roots = project
+        before, _ = key_manager.generate_keys(roots, path_filter=path_filter)
+
+        open(f"{root}/src/a/b/new.py", "w").close()
+        _age_changed_dirs(root)
+        listed = []
+        real_scandir = os.scandir
+
+        def _tracking_scandir(path):
+            listed.append(normalize_path(path))
+            return real_scandir(path)
+
+        monkeypatch.setattr(key_manager.os, "scandir", _tracking_scandir)
+        after, new_keys = key_manager.generate_keys(roots, path_filter=path_filter)
+
+        assert listed == [f"{root}/src/a/b"]
+        assert [ki.norm_path for ki in new_keys] == [f"{root}/src/a/b/new.py"]
+        assert after[f"{root}/src/a/b/new.py"].key_string == "2A2"
+        assert {p: k for p, k in after.items() if p in before} == before
+
+    def test_snapshot_not_reused(self, project, tmp_path):
+        """
+        测试用例：排除规则变化或修改时间过新时不复用快照
+        Test Case: The snapshot is not reused after exclusion changes or for racy mtimes
+        """
+        root, path_filter, roots = project
+        key_manager.generate_keys(roots, path_filter=path_filter)
+        snapshot_file = key_manager.KEY_SNAPSHOT_FILENAME
+        snapshot = KeySnapshot.load(snapshot_file, path_filter.fingerprint)
+        assert snapshot is not None and f"{root}/src/a" in snapshot.dirs
+        assert KeySnapshot.load(snapshot_file, PathFilter(root, ["b2"]).fingerprint) is None
+
+        # 刚修改的目录以不可信状态保存 / Just-modified directories are stored untrusted
+        open(f"{root}/src/a/new.py", "w").close()
+        key_manager.generate_keys(roots, path_filter=path_filter)
+        snapshot = KeySnapshot.load(snapshot_file, path_filter.fingerprint)
+        mtime, dir_key, _children = snapshot.dirs[f"{root}/src/a"]
+        assert mtime is None and dir_key == "1Ba"
+        assert snapshot.reusable_children(f"{root}/src/a", 0.0, "1Ba") is None
+
+    def test_key_delta_migration_map(self):
+        """
+        测试用例：由差异构建的迁移映射与build_path_migration_map一致
+        Test Case: The migration map built from the delta matches build_path_migration_map
+        """
+        old = {
+            "/p/a": KeyInfo("1A", "/p/a", None, 1, True),
+            "/p/a/x.py": KeyInfo("1A1", "/p/a/x.py", "/p/a", 1, False),
+            "/p/a/y.py": KeyInfo("1A2", "/p/a/y.py", "/p/a", 1, False),
+        }
+        new = {
+            "/p/a": KeyInfo("1A", "/p/a", None, 1, True),
+            "/p/a/w.py": KeyInfo("1A1", "/p/a/w.py", "/p/a", 1, False),
+            "/p/a/x.py": KeyInfo("1A2", "/p/a/x.py", "/p/a", 1, False),
+        }
+        delta = diff_key_maps(old, new)
+        assert delta.changed == {"/p/a/w.py": None, "/p/a/x.py": "1A1"}
+        assert delta.removed == {"/p/a/y.py": "1A2"}
+        assert delta.changed_key_infos(new) == [new["/p/a/w.py"], new["/p/a/x.py"]]
+        assert delta.migration_map(new) == build_path_migration_map(old, new)
+        assert diff_key_maps(None, new).migration_map(new) == build_path_migration_map(
+            None, new
+        )
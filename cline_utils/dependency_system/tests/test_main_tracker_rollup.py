@@ -0,0 +1,167 @@
+"""
+测试模块：主追踪器层级回滚测试
+Test Module: Main Tracker Hierarchical Rollup Tests
+
+本模块测试主追踪器依赖的自底向上层级回滚（_rollup_module_dependencies），包括：
+- 与原有多轮迭代回滚的结果一致
+- 父模块不继承指向自身或其后代的依赖
+- 基准：5层、2000个模块的合成模块树
+
+This module tests the bottom-up hierarchical rollup of main tracker dependencies
+(_rollup_module_dependencies), including:
+- Results identical to the original multi-pass rollup
+- Parents do not inherit dependencies on themselves or their descendants
+- Benchmark: a synthetic 5-level, 2,000-module tree
+"""
+
+# 导入操作系统接口、随机数与时间 / Import operating system interface, random and time
+import os
+import random
+import time
+from collections import defaultdict
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.io.update_main_tracker import (
+    _merge_dependency,
+    _rollup_module_dependencies,
+)
+from cline_utils.dependency_system.utils.config_manager import CHARACTER_PRIORITIES
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+
+# 相同优先级只有'<'和'>'（与'x'合并），结果与合并顺序无关
+# Only '<' and '>' share a priority (they merge into 'x'), so results do not depend on merge order
+CHARS = ["<", ">", "d", "s"]
+
+
+def _reference_rollup(module_paths, aggregated):
+    """
+    原有的多轮迭代回滚（逐模块重新计算后代集合），使用相同的合并函数
+    The original multi-pass rollup (descendant sets recomputed per module), using the same merge
+    """
+    hierarchy = defaultdict(list)
+    paths = sorted(module_paths)
+    for p_path in paths:
+        for c_path in paths:
+            if p_path != c_path and c_path.startswith(p_path + "/") and normalize_path(
+                os.path.dirname(c_path)
+            ) == p_path:
+                hierarchy[p_path].append(c_path)
+
+    def descendants(parent):
+        found, queue = {parent}, list(hierarchy.get(parent, []))
+        while queue:
+            child = queue.pop(0)
+            if child not in found:
+                found.add(child)
+                queue.extend(hierarchy.get(child, []))
+        return found
+
+    changed = True
+    while changed:
+        changed = False
+        for parent in paths:
+            below = descendants(parent)
+            for child in hierarchy.get(parent, []):
+                for target, (char, prio) in list(aggregated.get(child, {}).items()):
+                    if prio > -1 and target not in below:
+                        targets = aggregated.setdefault(parent, {})
+                        before = targets.get(target)
+                        _merge_dependency(targets, target, char, prio)
+                        changed |= targets.get(target) != before
+
+
+def _module_tree(levels, total, fanout=8):
+    """
+    生成指定层数与模块数的模块树 / Generate a module tree with the given depth and size
+    """
+    paths, frontier = ["/proj/src"], ["/proj/src"]
+    for _level in range(1, levels):
+        next_frontier = []
+        for parent in frontier:
+            for c in range(fanout):
+                if len(paths) == total:
+                    break
+                child = f"{parent}/m{c}"
+                paths.append(child)
+                next_frontier.append(child)
+        frontier = next_frontier
+    return paths
+
+
+def _direct_deps(paths, per_module, seed):
+    """
+    每个模块若干随机的直接外部依赖 / A few random direct foreign dependencies per module
+    """
+    rng = random.Random(seed)
+    aggregated = {}
+    for source in paths:
+        targets = {}
+        for target in rng.sample(paths, per_module):
+            if target != source:
+                char = rng.choice(CHARS)
+                _merge_dependency(targets, target, char, CHARACTER_PRIORITIES[char])
+        aggregated[source] = targets
+    return aggregated
+
+
+def _copy(aggregated):
+    return {source: dict(targets) for source, targets in aggregated.items()}
+
+
+class TestHierarchicalRollup:
+    """
+    测试类：层级回滚功能测试
+    Test Class: Hierarchical Rollup Functionality Tests
+    """
+
+    def test_parent_inherits_foreign_dependencies_only(self):
+        """
+        测试用例：父模块继承子孙的外部依赖，'<'与'>'合并为'x'，不继承指向自身子树的依赖
+        Test Case: Parents inherit descendants' foreign deps, '<' and '>' merge to 'x', deps into their own subtree are dropped
+        """
+        paths = ["/p/a", "/p/a/b", "/p/a/b/c", "/p/a/d", "/p/e"]
+        aggregated = {
+            "/p/a/b/c": {"/p/e": ("<", 4), "/p/a/d": ("d", 3), "/p/a/b": ("s", 2)},
+            "/p/a/d": {"/p/e": (">", 4), "/p/a/b/c": ("s", 2)},
+        }
+        _rollup_module_dependencies(paths, aggregated)
+        assert aggregated["/p/a/b"] == {"/p/e": ("<", 4), "/p/a/d": ("d", 3)}
+        assert aggregated["/p/a"] == {"/p/e": ("x", 4)}
+        assert "/p/e" not in aggregated  # 叶模块不变 / Leaf modules are untouched
+
+    def test_matches_multi_pass_rollup(self):
+        """
+        测试用例：随机模块树上与原有多轮迭代回滚结果一致
+        Test Case: Same result as the original multi-pass rollup on random module trees
+        """
+        for seed in range(5):
+            paths = _module_tree(levels=4, total=120, fanout=5)
+            random.Random(seed).shuffle(paths)
+            aggregated = _direct_deps(paths, per_module=4, seed=seed)
+            expected = _copy(aggregated)
+            _reference_rollup(paths, expected)
+            _rollup_module_dependencies(paths, aggregated)
+            assert {s: t for s, t in aggregated.items() if t} == {
+                s: t for s, t in expected.items() if t
+            }
+
+    def test_benchmark_5_level_2000_modules(self):
+        """
+        测试用例：基准——5层、2000个模块的模块树
+        Test Case: Benchmark - a 5-level, 2,000-module tree
+        """
+        paths = _module_tree(levels=5, total=2000)
+        assert len(paths) == 2000 and max(p.count("/") for p in paths) - 2 == 4
+        aggregated = _direct_deps(paths, per_module=3, seed=42)
+        expected = _copy(aggregated)
+
+        start = time.perf_counter()
+        _reference_rollup(paths, expected)
+        multi_pass = time.perf_counter() - start
+        start = time.perf_counter()
+        _rollup_module_dependencies(paths, aggregated)
+        single_pass = time.perf_counter() - start
+
+        print(f"\nRollup of 2000 modules: multi-pass {multi_pass:.3f}s, single pass {single_pass:.3f}s")
+        assert aggregated == expected
+        assert single_pass < multi_pass
@@ -0,0 +1,244 @@
+"""
+测试模块：并行迷你追踪器更新测试
+Test Module: Parallel Mini Tracker Update Tests
+
+本模块测试并行的迷你追踪器更新阶段（update_mini_trackers），包括：
+- 按模块划分建议：保留模块相关链接及其原有顺序
+- 延迟缓存失效：块内排队，退出最外层块时串行应用
+- 暂存写入：阶段结束前追踪器文件保持不变
+- 多线程结果与单线程结果、与未划分的建议结果完全相同
+
+This module tests the parallel mini tracker update stage (update_mini_trackers), including:
+- Per-module suggestion partitioning keeps the module's links in their original order
+- Deferred cache invalidation: queued inside the block, applied serially when the outermost block exits
+- Staged writes: tracker files stay unchanged until the stage ends
+- Results with several threads equal one thread and unpartitioned suggestions
+"""
+
+# 导入操作系统接口与随机数 / Import operating system interface and random
+import os
+import random
+
+# 导入pytest测试框架 / Import pytest testing framework
+import pytest
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.core import key_manager
+from cline_utils.dependency_system.core.key_manager import GlobalKeyMap, KeyInfo
+from cline_utils.dependency_system.io import tracker_io
+from cline_utils.dependency_system.utils import config_manager
+from cline_utils.dependency_system.utils.cache_manager import (
+    cache_manager,
+    clear_all_caches,
+    deferred_invalidation,
+    invalidate_dependent_entries,
+)
+from cline_utils.dependency_system.utils.path_filter import PathFilter
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+from cline_utils.dependency_system.utils.tracker_utils import (
+    get_key_global_instance_string,
+)
+
+CLINERULES = """
+[CODE_ROOT_DIRECTORIES]
+- src
+[DOC_DIRECTORIES]
+- docs
+"""
+
+
+def _small_map():
+    """
+    两个模块、各两个文件的键映射 / A key map with two modules of two files each
+    """
+    infos = [
+        KeyInfo("1A", "/p/src", None, 1, True),
+        KeyInfo("1Aa", "/p/src/a", "/p/src", 1, True),
+        KeyInfo("1Aa1", "/p/src/a/x.py", "/p/src/a", 1, False),
+        KeyInfo("1Aa2", "/p/src/a/y.py", "/p/src/a", 1, False),
+        KeyInfo("1Ab", "/p/src/b", "/p/src", 1, True),
+        KeyInfo("1Ab1", "/p/src/b/z.py", "/p/src/b", 1, False),
+        KeyInfo("1Ab2", "/p/src/b/w.py", "/p/src/b", 1, False),
+    ]
+    return GlobalKeyMap({ki.norm_path: ki for ki in infos})
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """
+    创建含多个模块的临时项目并生成键
+    Create a temporary project with several modules and generate its keys
+    """
+    for pkg in range(3):
+        for sub in range(3):
+            for f in range(3):
+                path = tmp_path / "src" / f"pkg{pkg}" / f"sub{sub}" / f"mod{f}.py"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text("import os\n")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "readme.md").write_text("# Readme")
+    (tmp_path / ".clinerules").write_text(CLINERULES)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config_manager.ConfigManager, "_instance", None)
+    root = normalize_path(str(tmp_path))
+    monkeypatch.setattr(key_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(
+        key_manager, "KEY_SNAPSHOT_FILENAME", str(tmp_path / "key_snapshot.json")
+    )
+    clear_all_caches()
+    path_to_key_info, new_keys = key_manager.generate_keys(
+        [f"{root}/docs", f"{root}/src"], path_filter=PathFilter(root), incremental=False
+    )
+    yield root, path_to_key_info, new_keys
+    clear_all_caches()
+
+
+def _suggestions(path_to_key_info, seed=3):
+    """
+    文件之间的随机建议 / Random suggestions between files
+    """
+    rng = random.Random(seed)
+    files = [ki for ki in path_to_key_info.values() if not ki.is_directory]
+    suggestions = {}
+    for ki in files:
+        for target in rng.sample(files, 3):
+            if target is not ki:
+                suggestions.setdefault(
+                    get_key_global_instance_string(ki, path_to_key_info), []
+                ).append(
+                    (get_key_global_instance_string(target, path_to_key_info), rng.choice("<>ds"))
+                )
+    return suggestions
+
+
+def _run_stage(root, path_to_key_info, new_keys, suggestions, max_workers):
+    """
+    从空白状态运行迷你追踪器阶段，返回各追踪器内容
+    Run the mini tracker stage from scratch and return every tracker's content
+    """
+    modules = sorted(
+        ki.norm_path
+        for ki in path_to_key_info.values()
+        if ki.is_directory and ki.norm_path.startswith(f"{root}/src")
+    )
+    for module_path in modules:
+        tracker_path = tracker_io.get_mini_tracker_path(module_path)
+        if os.path.exists(tracker_path):
+            os.remove(tracker_path)
+    clear_all_caches()
+    results = tracker_io.update_mini_trackers(
+        modules,
+        path_to_key_info,
+        suggestions_external=suggestions,
+        file_to_module=path_to_key_info.file_to_module_map(),
+        new_keys=new_keys,
+        force_apply_suggestions=True,
+        use_old_map_for_migration=False,
+        max_workers=max_workers,
+    )
+    assert results == {module_path: "success" for module_path in modules}
+    contents = {}
+    for module_path in modules:
+        with open(tracker_io.get_mini_tracker_path(module_path), encoding="utf-8") as f:
+            # last_GRID_edit带有时间戳 / last_GRID_edit carries a timestamp
+            contents[module_path] = [
+                line for line in f if not line.startswith("last_GRID_edit")
+            ]
+    assert not any(
+        name.endswith(tracker_io.STAGED_TRACKER_SUFFIX)
+        for _dir, _dirs, names in os.walk(root)
+        for name in names
+    )
+    return contents
+
+
+class TestParallelMiniTrackers:
+    """
+    测试类：并行迷你追踪器更新功能测试
+    Test Class: Parallel Mini Tracker Update Functionality Tests
+    """
+
+    def test_partition_keeps_module_links_in_order(self):
+        """
+        测试用例：每个模块只得到触及其内部项或在其候选项之间的链接，顺序不变
+        Test Case: Each module gets only links touching its items or between its candidates, in order
+        """
+        path_to_key_info = _small_map()
+        suggestions = {
+            "1Aa1": [("1Ab1", "<"), ("1Aa2", "d")],
+            "1Ab2": [("1Ab1", ">")],
+            "1Ab1": [("1Aa2", "s"), ("9Z9", "<")],
+        }
+        partitioned = tracker_io.partition_suggestions_by_module(
+            ["/p/src/a", "/p/src/b"], path_to_key_info, suggestions
+        )
+        assert partitioned["/p/src/a"] == {
+            "1Aa1": [("1Ab1", "<"), ("1Aa2", "d")],
+            "1Ab1": [("1Aa2", "s")],
+        }
+        # x.py和y.py都是b的候选项，因此x->y也包括在内
+        # x.py and y.py are both candidates of b, so x->y is included too
+        assert partitioned["/p/src/b"] == {
+            "1Aa1": [("1Ab1", "<"), ("1Aa2", "d")],
+            "1Ab2": [("1Ab1", ">")],
+            "1Ab1": [("1Aa2", "s")],
+        }
+        assert list(partitioned["/p/src/b"]) == ["1Aa1", "1Ab2", "1Ab1"]
+
+    def test_deferred_invalidation_applies_on_outermost_exit(self):
+        """
+        测试用例：块内的失效被排队，退出最外层块后才应用
+        Test Case: Invalidations inside the block are queued and applied when the outermost block exits
+        """
+        cache = cache_manager.get_cache("parallel_mini_test")
+        cache.set("entry:1", 1)
+        cache.set("entry:2", 2)
+        with deferred_invalidation():
+            with deferred_invalidation():
+                invalidate_dependent_entries("parallel_mini_test", "entry:1")
+                invalidate_dependent_entries("parallel_mini_test", "entry:1")
+            assert cache.get("entry:1") == 1  # 仍在排队 / Still queued
+            invalidate_dependent_entries("parallel_mini_test", "entry:2")
+        assert cache.get("entry:1") is None and cache.get("entry:2") is None
+        cache.set("entry:1", 1)
+        invalidate_dependent_entries("parallel_mini_test", "entry:1")
+        assert cache.get("entry:1") is None
+
+    def test_staged_writes_move_into_place_at_end(self, tmp_path):
+        """
+        测试用例：暂存期间写入暂存文件，阶段结束时替换原文件
+        Test Case: Writes go to the staged file during the stage and replace the tracker at the end
+        """
+        tracker_path = str(tmp_path / "m_module.md")
+        with open(tracker_path, "w", encoding="utf-8") as f:
+            f.write("old")
+        with tracker_io._staged_mini_tracker_writes():
+            write_path = tracker_io._tracker_write_path(tracker_path)
+            assert write_path == tracker_path + tracker_io.STAGED_TRACKER_SUFFIX
+            with open(write_path, "w", encoding="utf-8") as f:
+                f.write("new")
+            with open(tracker_path, encoding="utf-8") as f:
+                assert f.read() == "old"
+        with open(tracker_path, encoding="utf-8") as f:
+            assert f.read() == "new"
+        assert not os.path.exists(write_path)
+        assert tracker_io._tracker_write_path(tracker_path) == tracker_path
+
+    def test_parallel_matches_single_worker_and_full_suggestions(self, project, monkeypatch):
+        """
+        测试用例：4个线程与1个线程结果相同，与不划分建议的结果也相同
+        Test Case: 4 threads give the same trackers as 1 thread and as unpartitioned suggestions
+        """
+        root, path_to_key_info, new_keys = project
+        suggestions = _suggestions(path_to_key_info)
+        single = _run_stage(root, path_to_key_info, new_keys, suggestions, 1)
+        parallel = _run_stage(root, path_to_key_info, new_keys, suggestions, 4)
+        assert parallel == single
+        assert any("<" in "".join(lines) for lines in single.values())
+
+        monkeypatch.setattr(
+            tracker_io,
+            "partition_suggestions_by_module",
+            lambda module_paths, _map, full: {m: full for m in module_paths},
+        )
+        assert _run_stage(root, path_to_key_info, new_keys, suggestions, 4) == single
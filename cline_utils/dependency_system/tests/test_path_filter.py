@@ -0,0 +1,130 @@
+"""
+测试模块：路径排除匹配器测试
+Test Module: Path Exclusion Matcher Tests
+
+本模块测试PathFilter类的功能，包括：
+- 任意深度的排除目录名
+- 排除路径前缀树（绝对路径与相对路径）
+- 排除路径中的通配符（如 **/__pycache__）
+- 文件扩展名与文件名模式（含路径分隔符的模式匹配项目相对路径）
+
+This module tests PathFilter class functionality, including:
+- Excluded directory names at any depth
+- Excluded path prefix trie (absolute and relative paths)
+- Glob entries in excluded paths (e.g. **/__pycache__)
+- File extensions and file name patterns (patterns with a separator match the project-relative path)
+"""
+
+# 导入pytest测试框架 / Import pytest testing framework
+import pytest
+
+# 导入被测试的PathFilter类 / Import PathFilter class to be tested
+from cline_utils.dependency_system.utils.path_filter import PathFilter
+
+ROOT = "/proj"
+
+
+@pytest.fixture
+def path_filter():
+    """
+    创建带有代表性排除规则的PathFilter
+    Create a PathFilter with representative exclusion rules
+    """
+    return PathFilter(
+        ROOT,
+        excluded_dirs=["node_modules", "__pycache__", "cline_utils/dependency_system/analysis/embeddings"],
+        excluded_paths=["src/generated", "/elsewhere/vendor", "**/.mypy_cache"],
+        excluded_extensions=[".pyc", ".log"],
+        excluded_file_patterns=["*_module.md", "implementation_plan_*.md"],
+    )
+
+
+class TestPathFilter:
+    """
+    测试类：PathFilter功能测试
+    Test Class: PathFilter Functionality Tests
+    """
+
+    def test_plain_files_are_kept(self, path_filter):
+        """
+        测试用例：普通文件不被排除
+        Test Case: Ordinary files are not excluded
+        """
+        assert not path_filter.is_excluded(f"{ROOT}/src/app/main.py")
+        assert not path_filter.is_excluded_dir(f"{ROOT}/src/app")
+        assert not path_filter.is_excluded_dir(ROOT)
+
+    def test_excluded_dir_names_any_depth(self, path_filter):
+        """
+        测试用例：排除目录名在任意深度生效
+        Test Case: Excluded directory names apply at any depth
+        """
+        assert path_filter.is_excluded_dir(f"{ROOT}/node_modules")
+        assert path_filter.is_excluded(f"{ROOT}/src/web/node_modules/react/index.js")
+        assert path_filter.is_excluded(f"{ROOT}/src/pkg/__pycache__/mod.cpython-311.py")
+        # 名称必须完全匹配路径组件 / The name must match a whole path component
+        assert not path_filter.is_excluded(f"{ROOT}/src/node_modules_backup/a.js")
+
+    def test_excluded_paths_trie(self, path_filter):
+        """
+        测试用例：排除路径及其子路径被排除，前缀必须在组件边界
+        Test Case: Excluded paths and their children are excluded, on component boundaries only
+        """
+        assert path_filter.is_excluded_dir(f"{ROOT}/src/generated")
+        assert path_filter.is_excluded(f"{ROOT}/src/generated/deep/file.py")
+        assert not path_filter.is_excluded(f"{ROOT}/src/generated_docs/file.py")
+        assert path_filter.is_excluded("/elsewhere/vendor/lib.py")
+        assert path_filter.is_excluded(
+            f"{ROOT}/cline_utils/dependency_system/analysis/embeddings/a.npy"
+        )
+
+    def test_glob_excluded_paths(self, path_filter):
+        """
+        测试用例：带 **/ 的排除路径匹配任意层级
+        Test Case: Excluded paths starting with **/ match at any level
+        """
+        assert path_filter.is_excluded_dir(f"{ROOT}/.mypy_cache")
+        assert path_filter.is_excluded(f"{ROOT}/src/a/.mypy_cache/3.11/x.json")
+        assert not path_filter.is_excluded(f"{ROOT}/src/a/mypy_cache/x.json")
+
+    def test_extensions_and_patterns(self, path_filter):
+        """
+        测试用例：扩展名（不区分大小写）与文件名模式
+        Test Case: Extensions (case-insensitive) and file name patterns
+        """
+        assert path_filter.is_excluded(f"{ROOT}/src/a.pyc")
+        assert path_filter.is_excluded(f"{ROOT}/src/run.LOG")
+        # 扩展名只对文件生效 / Extensions only apply to files
+        assert not path_filter.is_excluded(f"{ROOT}/src/archive.log", is_dir=True)
+        assert path_filter.is_excluded(f"{ROOT}/src/core_module.md")
+        assert path_filter.is_excluded(f"{ROOT}/docs/implementation_plan_v2.md")
+        assert not path_filter.is_excluded(f"{ROOT}/docs/plan.md")
+
+    def test_unnormalized_input(self, path_filter):
+        """
+        测试用例：未归一化的路径先归一化再检查
+        Test Case: Unnormalized paths are normalized before checking
+        """
+        assert path_filter.is_excluded(f"{ROOT}/src/./generated/x.py")
+        assert path_filter.is_excluded(f"{ROOT}\\src\\pkg\\node_modules\\x.js")
+
+    def test_file_patterns_with_separators(self):
+        """
+        测试用例：含'/'的文件模式匹配项目相对路径（可从任意层级开始），其余模式只匹配文件名
+        Test Case: File patterns containing '/' match the project-relative path (starting at any depth), the others only the basename
+        """
+        path_filter = PathFilter(
+            ROOT,
+            excluded_file_patterns=["docs/*.md", "**/generated/*.py", "*.tmp"],
+        )
+        assert path_filter.is_excluded(f"{ROOT}/docs/guide.md")
+        assert path_filter.is_excluded(f"{ROOT}/src/docs/api.md")
+        assert path_filter.is_excluded(f"{ROOT}/generated/models.py")
+        assert path_filter.is_excluded(f"{ROOT}/src/pkg/generated/models.py")
+        assert path_filter.is_excluded(f"{ROOT}/src/cache/a.tmp")
+        # '*'不跨越目录，基本名模式不匹配目录部分 / '*' does not cross directories, basename patterns ignore the directories
+        assert not path_filter.is_excluded(f"{ROOT}/docs/sub/guide.md")
+        assert not path_filter.is_excluded(f"{ROOT}/src/generated/sub/models.py")
+        assert not path_filter.is_excluded(f"{ROOT}/mydocs/guide.md")
+        assert not path_filter.is_excluded(f"{ROOT}/src/a.tmp.py")
+        assert not path_filter.matches_file_pattern("guide.md")
@@ -0,0 +1,164 @@
+"""
+测试模块：路径驻留测试
+Test Module: Path Interning Tests
+
+本模块测试PathInterner与键映射的路径共享，包括：
+- 规范字符串表与清空
+- 加载的键映射共享同一个字符串对象；normalize_path不驻留，clear_all_caches清空驻留表
+- 内存基准：每个被跟踪文件的字节数（驻留前后）
+
+This module tests PathInterner and path sharing in key maps, including:
+- The canonical string table and clearing it
+- Loaded key maps share one string object; normalize_path does not intern, clear_all_caches empties the table
+- Memory benchmark: bytes per tracked file (before and after interning)
+"""
+
+# 导入内存跟踪与唯一标识 / Import memory tracing and unique ids
+import gc
+import tracemalloc
+import uuid
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.core import key_manager
+from cline_utils.dependency_system.core.key_manager import (
+    KeyInfo,
+    MappedGlobalKeyMap,
+    diff_key_maps,
+)
+from cline_utils.dependency_system.core.key_map_store import KeyMapStore, write_key_map
+from cline_utils.dependency_system.utils.cache_manager import clear_all_caches
+from cline_utils.dependency_system.utils.path_intern import (
+    PathInterner,
+    get_path_interner,
+    intern_path,
+)
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+from cline_utils.dependency_system.utils.tracker_utils import read_key_definitions_from_lines
+
+
+def _synthetic_infos(root: str, dirs: int, files_per_dir: int, renamed: bool = False):
+    """
+    生成两级目录的KeyInfo列表 / Generate KeyInfo records for a two-level tree
+    """
+    infos = [KeyInfo("1A", root, None, 1, True)]
+    for d in range(dirs):
+        dir_path = f"{root}/package_{d:04d}/module"
+        infos.append(KeyInfo(f"{d + 2}A", dir_path, root, d + 2, True))
+        for f in range(files_per_dir):
+            name = f"file_{f:03d}{'_v2' if renamed and f == 0 else ''}.py"
+            key = f"{d + 2}A{f + 1}"
+            infos.append(KeyInfo(key, f"{dir_path}/{name}", dir_path, d + 2, False))
+    return infos
+
+
+def _working_set_bytes(tmp_path) -> float:
+    """
+    测量一次典型运行保留的内存（每个文件的字节数）：旧映射、新映射、派生索引、迁移映射与追踪器定义
+    Measure memory retained by a typical run (bytes per file): old and new maps, derived
+    indexes, the migration map and a tracker's key definitions
+    """
+    root = f"/bench/{uuid.uuid4().hex}/project/src"  # 避免命中缓存 / Avoid cache hits
+    old_file = tmp_path / f"old_{uuid.uuid4().hex}.bin"
+    new_file = tmp_path / f"new_{uuid.uuid4().hex}.bin"
+    new_infos = _synthetic_infos(root, 80, 25, renamed=True)
+    write_key_map(str(old_file), _synthetic_infos(root, 80, 25))
+    write_key_map(str(new_file), new_infos)
+    tracker_lines = ["---KEY_DEFINITIONS_START---"]
+    tracker_lines += [f"{ki.key_string}: {ki.norm_path}" for ki in new_infos]
+    tracker_lines.append("---KEY_DEFINITIONS_END---")
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    old_map = MappedGlobalKeyMap(KeyMapStore.open(str(old_file)))
+    new_map = MappedGlobalKeyMap(KeyMapStore.open(str(new_file)))
+    working_set = (
+        old_map,
+        new_map,
+        new_map.file_to_module_map(),
+        diff_key_maps(old_map, new_map).migration_map(new_map),
+        read_key_definitions_from_lines(tracker_lines),
+    )
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert len(working_set[2]) == 80 * 25 and len(working_set[4]) == len(new_infos)
+    return retained / len(new_map)
+
+
+class TestPathInterner:
+    """
+    测试类：路径驻留功能测试
+    Test Class: Path Interning Functionality Tests
+    """
+
+    def test_canonical_strings_and_clear(self):
+        """
+        测试用例：相等的路径返回同一字符串对象，清空后已返回的字符串仍有效
+        Test Case: Equal paths return one string object, and returned strings stay valid after clear
+        """
+        interner = PathInterner()
+        first = interner.canonical("/p/src/main.py")
+        copy = "".join(["/p/src/", "main.py"])
+        assert interner.canonical(copy) is first
+        assert len(interner) == 1 and "/p/src/main.py" in interner
+        assert "/p/src" not in interner  # 不为祖先目录建条目 / No entries for ancestors
+
+        interner.clear()
+        assert len(interner) == 0 and first == "/p/src/main.py"
+        assert interner.canonical(copy) is copy
+
+    def test_normalize_and_loaded_maps_share_strings(self, tmp_path):
+        """
+        测试用例：多次加载的映射中KeyInfo的norm_path与parent_path引用同一字符串
+        Test Case: KeyInfo.norm_path and parent_path reference the same string across loaded maps
+        """
+        root = normalize_path(str(tmp_path))
+        infos = _synthetic_infos(root, 2, 2)
+        map_file = tmp_path / "global_key_map.bin"
+        write_key_map(str(map_file), infos)
+        first = MappedGlobalKeyMap(KeyMapStore.open(str(map_file)))
+        second = MappedGlobalKeyMap(KeyMapStore.open(str(map_file)))
+
+        path = infos[2].norm_path
+        lazy_ki = first[path]
+        assert second[path].norm_path is lazy_ki.norm_path
+        assert dict(first) == dict(second)  # 物化 / Materializes both
+        for ki in second.values():
+            assert ki.norm_path is first[ki.norm_path].norm_path
+            if ki.parent_path is not None:
+                assert ki.parent_path is second[ki.parent_path].norm_path
+        module_dir = second[infos[-1].parent_path].norm_path
+        assert intern_path("".join([root, "/package_0001/module"])) is module_dir
+
+    def test_only_keyed_paths_are_interned(self, tmp_path):
+        """
+        测试用例：normalize_path的临时路径不进入驻留表；clear_all_caches清空驻留表
+        Test Case: Transient paths passed to normalize_path stay out of the table; clear_all_caches empties it
+        """
+        interner = get_path_interner()
+        transient = normalize_path(str(tmp_path / "candidate" / "module.py"))
+        assert transient not in interner
+
+        root = normalize_path(str(tmp_path))
+        map_file = tmp_path / "global_key_map.bin"
+        write_key_map(str(map_file), _synthetic_infos(root, 1, 2))
+        dict(MappedGlobalKeyMap(KeyMapStore.open(str(map_file))))
+        assert f"{root}/package_0000/module/file_001.py" in interner
+        assert f"{root}/package_0000" not in interner  # 未建键的祖先 / Unkeyed ancestor
+
+        clear_all_caches()
+        assert len(interner) == 0
+
+    def test_memory_per_tracked_file(self, tmp_path, monkeypatch):
+        """
+        测试用例：内存基准——驻留后每个被跟踪文件占用的字节数更少
+        Test Case: Memory benchmark - fewer bytes per tracked file with interning
+        """
+        with monkeypatch.context() as patch:
+            # 驻留前：路径字符串不共享 / Before interning: path strings are not shared
+            patch.setattr(key_manager, "intern_path", lambda path: path)
+            before_run = _working_set_bytes(tmp_path)
+        after_run = _working_set_bytes(tmp_path)
+        print(f"\nBytes per tracked file: before {before_run:.0f}, after {after_run:.0f}")
+        assert after_run < before_run * 0.95
@@ -0,0 +1,190 @@
+"""
+测试模块：项目清单测试
+Test Module: Project Inventory Tests
+
+本模块测试ProjectInventory类的功能，包括：
+- 单次遍历记录条目、大小、修改时间与文件类型
+- 排除状态（被排除的目录不再深入遍历）
+- 有序的目录列表与深度优先遍历
+- JSON保存与加载
+- generate_keys使用清单时生成相同的密钥
+
+This module tests ProjectInventory class functionality, including:
+- A single walk records entries, sizes, mtimes and file types
+- Exclusion status (excluded directories are not descended into)
+- Sorted directory listings and depth-first walking
+- JSON save and load
+- generate_keys produces identical keys when given an inventory
+"""
+
+# 导入操作系统接口 / Import operating system interface
+import os
+
+# 导入pytest测试框架 / Import pytest testing framework
+import pytest
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.core import key_manager
+from cline_utils.dependency_system.utils.path_filter import PathFilter
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+from cline_utils.dependency_system.utils.project_inventory import (
+    ProjectInventory,
+)
+
+
+@pytest.fixture
+def project(tmp_path):
+    """
+    创建一个小型项目目录树
+    Create a small project tree
+    """
+    files = {
+        "src/b.py": "print('b')\n",
+        "src/a.py": "x = 1\n",
+        "src/pkg/mod.js": "export const m = 1;\n",
+        "src/pkg/deep/util.py": "",
+        "src/node_modules/dep/index.js": "module.exports = {};\n",
+        "src/run.log": "log\n",
+        "docs/guide.md": "# Guide\n",
+    }
+    for rel, content in files.items():
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    root = normalize_path(str(tmp_path))
+    path_filter = PathFilter(
+        root, excluded_dirs=["node_modules"], excluded_extensions=[".log"]
+    )
+    return root, path_filter
+
+
+class TestProjectInventory:
+    """
+    测试类：ProjectInventory功能测试
+    Test Class: ProjectInventory Functionality Tests
+    """
+
+    def test_scan_records_metadata(self, project):
+        """
+        测试用例：扫描记录大小、修改时间与文件类型
+        Test Case: Scanning records size, mtime and file type
+        """
+        root, path_filter = project
+        inventory = ProjectInventory.scan(
+            [f"{root}/src", f"{root}/docs"], path_filter=path_filter, max_workers=4
+        )
+        entry = inventory.get(f"{root}/src/b.py")
+        assert entry is not None
+        assert not entry.is_dir
+        assert entry.size == os.path.getsize(f"{root}/src/b.py")
+        assert entry.mtime == os.path.getmtime(f"{root}/src/b.py")
+        assert entry.file_type == "py"
+        assert entry.parent == f"{root}/src"
+        assert inventory.get(f"{root}/src/pkg").file_type == "directory"
+        assert inventory.get(f"{root}/docs/guide.md").file_type == "md"
+
+    def test_exclusions_are_flagged_not_descended(self, project):
+        """
+        测试用例：排除项被标记，被排除的目录不再遍历
+        Test Case: Excluded entries are flagged and excluded dirs are not descended
+        """
+        root, path_filter = project
+        inventory = ProjectInventory.scan(
+            [f"{root}/src"], path_filter=path_filter, max_workers=2
+        )
+        assert inventory.get(f"{root}/src/node_modules").excluded
+        assert inventory.children(f"{root}/src/node_modules") is None
+        assert inventory.get(f"{root}/src/node_modules/dep/index.js") is None
+        assert inventory.get(f"{root}/src/run.log").excluded
+
+        files = [e.path for e in inventory.files()]
+        assert f"{root}/src/run.log" not in files
+        assert f"{root}/src/run.log" in [
+            e.path for e in inventory.files(include_excluded=True)
+        ]
+
+    def test_sorted_listing_and_walk(self, project):
+        """
+        测试用例：目录列表按名称排序，遍历为深度优先
+        Test Case: Listings are sorted by name and walking is depth-first
+        """
+        root, path_filter = project
+        inventory = ProjectInventory.scan(
+            [f"{root}/src"], path_filter=path_filter, max_workers=3
+        )
+        names = [e.name for e in inventory.children(f"{root}/src")]
+        assert names == sorted(names)
+        assert [e.path for e in inventory.files()] == [
+            f"{root}/src/a.py",
+            f"{root}/src/b.py",
+            f"{root}/src/pkg/deep/util.py",
+            f"{root}/src/pkg/mod.js",
+        ]
+
+    def test_save_and_load_roundtrip(self, project, tmp_path):
+        """
+        测试用例：保存后加载得到相同的快照
+        Test Case: Loading a saved snapshot gives the same entries
+        """
+        root, path_filter = project
+        inventory = ProjectInventory.scan(
+            [f"{root}/src", f"{root}/docs"], path_filter=path_filter, max_workers=2
+        )
+        inventory_file = str(tmp_path / "inventory.json")
+        inventory.save(inventory_file)
+        loaded = ProjectInventory.load(inventory_file)
+        assert loaded is not None
+        assert loaded.roots == inventory.roots
+        assert list(loaded.walk()) == list(inventory.walk())
+        assert ProjectInventory.load(str(tmp_path / "missing.json")) is None
+
+    def test_generate_keys_uses_inventory(self, project, monkeypatch):
+        """
+        测试用例：generate_keys使用清单时不再列出目录且结果相同
+        Test Case: generate_keys with an inventory skips directory listing and gives the same keys
+        """
+        root, path_filter = project
+        roots = [f"{root}/docs", f"{root}/src"]
+        monkeypatch.setattr(key_manager, "get_project_root", lambda: root)
+        expected, _ = key_manager.generate_keys(roots, path_filter=path_filter)
+
+        inventory = ProjectInventory.scan(roots, path_filter=path_filter, max_workers=2)
+
+        def _no_scandir(path):
+            raise AssertionError(f"unexpected os.scandir({path})")
+
+        monkeypatch.setattr(key_manager.os, "scandir", _no_scandir)
+        actual, _ = key_manager.generate_keys(
+            roots, path_filter=path_filter, inventory=inventory
+        )
+        assert actual == expected
+        assert f"{root}/src/node_modules" not in actual
+
+    def test_parallel_scan_matches_serial_keys(self, tmp_path, monkeypatch):
+        """
+        测试用例：并行扫描生成的密钥（含层级提升）与串行遍历完全相同
+        Test Case: Keys from the parallel scan (including tier promotion) match the serial walk
+        """
+        for rel in ["src/a/b/c/f.py", "src/a/b/g.py", "src/a/h.py", "src/z.py", "src/a/b2/i.py"]:
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("")
+        root = normalize_path(str(tmp_path))
+        path_filter = PathFilter(root)
+        monkeypatch.setattr(key_manager, "get_project_root", lambda: root)
+
+        parallel, _ = key_manager.generate_keys([f"{root}/src"], path_filter=path_filter)
+        # 空清单强制每个目录回退到串行os.scandir / An empty inventory forces the serial os.scandir fallback
+        serial, _ = key_manager.generate_keys(
+            [f"{root}/src"],
+            path_filter=path_filter,
+            inventory=ProjectInventory([], {}, {}),
+            incremental=False,
+        )
+        assert parallel == serial
+        keys = {path[len(root) + 1:]: ki.key_string for path, ki in parallel.items()}
+        assert keys["src/a"] == "1Aa"
+        assert keys["src/a/b"] == "2A"  # 子目录中的目录被提升 / Dirs inside a subdir are promoted
+        assert keys["src/a/b2"] == "2B"
+        assert keys["src/a/b/c"] == "2Aa"
+        assert keys["src/a/b/c/f.py"] == "2Aa1"
@@ -0,0 +1,163 @@
+"""
+测试模块：全项目相似度索引测试
+Test Module: Whole-Project Similarity Index Tests
+
+本模块测试分块矩阵乘法构建的相似度索引（get_similarity_index），包括：
+- 邻居与逐对calculate_similarity的结果相同（分数、阈值与顺序）
+- 结果与分块大小无关；每个文件最多保留top_k个最高分邻居
+- 维度不同或缺失的嵌入得分为0；索引在存储变化或更低阈值时重建
+
+This module tests the similarity index built with blocked matrix products (get_similarity_index), including:
+- Neighbours match pairwise calculate_similarity (scores, threshold and order)
+- Results do not depend on the tile size; at most top_k highest-scoring neighbours are kept per file
+- Embeddings of another dimension or missing ones score 0; the index is rebuilt on a store change or a lower threshold
+"""
+
+# 导入数值计算库与pytest测试框架 / Import numerical library and pytest testing framework
+import numpy as np
+import pytest
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.analysis import embedding_manager
+from cline_utils.dependency_system.analysis.embedding_manager import (
+    SimilarityIndex,
+    calculate_similarity,
+    get_similarity_index,
+    invalidate_similarity_index,
+)
+from cline_utils.dependency_system.analysis.embedding_store import (
+    close_embedding_stores,
+    open_embedding_store,
+)
+from cline_utils.dependency_system.core.key_manager import GlobalKeyMap, KeyInfo
+from cline_utils.dependency_system.utils.cache_manager import clear_all_caches
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+
+
+def _clustered_vectors(count, dim, seed):
+    """
+    几个簇中的归一化随机向量（分数分布较广）
+    Normalized random vectors in a few clusters (a wide spread of scores)
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(4, dim))
+    vectors = centres[rng.integers(0, 4, count)] + 0.8 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.fixture
+def project(tmp_path):
+    """
+    写入随机嵌入的项目：一个目录、40个文件（一个缺失嵌入）
+    A project with random embeddings: one directory and 40 files (one without an embedding)
+    """
+    clear_all_caches()
+    invalidate_similarity_index()
+    close_embedding_stores()
+    root = normalize_path(str(tmp_path / "proj"))
+    embeddings_dir = normalize_path(str(tmp_path / "embeddings"))
+    store = open_embedding_store(embeddings_dir, root)
+    infos = [KeyInfo("1A", f"{root}/src", None, 1, True)]
+    for i, vec in enumerate(_clustered_vectors(40, 16, seed=7)):
+        ki = KeyInfo(f"1A{i + 1}", f"{root}/src/f{i}.py", f"{root}/src", 1, False)
+        infos.append(ki)
+        if i != 5:
+            store.put(ki.norm_path, vec, key=ki.key_string)
+    store.save()
+    yield root, embeddings_dir, GlobalKeyMap({ki.norm_path: ki for ki in infos})
+    invalidate_similarity_index()
+    close_embedding_stores()
+    clear_all_caches()
+
+
+def _pairwise(source, path_to_key_info, root, embeddings_dir):
+    """
+    原有的逐对比较 / The original pairwise comparison
+    """
+    return [
+        (ki.norm_path, calculate_similarity(
+            source.key_string, ki.key_string, embeddings_dir, path_to_key_info, root, [], []
+        ))
+        for ki in path_to_key_info.values()
+        if not ki.is_directory and ki is not source
+    ]
+
+
+class TestSimilarityIndex:
+    """
+    测试类：相似度索引功能测试
+    Test Class: Similarity Index Functionality Tests
+    """
+
+    def test_neighbours_match_pairwise_similarity(self, project):
+        """
+        测试用例：每个文件的邻居与逐对计算在阈值以上的结果相同（顺序一致）
+        Test Case: Each file's neighbours equal the pairwise results above the threshold, in the same order
+        """
+        root, embeddings_dir, path_to_key_info = project
+        index = get_similarity_index(embeddings_dir, path_to_key_info, root, 0.3)
+        kept = 0
+        for source in path_to_key_info.values():
+            if source.is_directory:
+                continue
+            expected = [
+                (path, score)
+                for path, score in _pairwise(source, path_to_key_info, root, embeddings_dir)
+                if score >= 0.3
+            ]
+            neighbours = index.neighbours(source.norm_path)
+            assert [path for path, _ in neighbours] == [path for path, _ in expected]
+            assert [score for _, score in neighbours] == pytest.approx(
+                [score for _, score in expected], abs=1e-6
+            )
+            kept += len(neighbours)
+        assert 0 < kept < 39 * 40
+        assert index.neighbours(f"{root}/src/f5.py") == []
+
+    def test_tile_size_and_top_k(self, project):
+        """
+        测试用例：单行分块与整块结果相同；top_k只保留分数最高的邻居；不同维度的向量没有邻居
+        Test Case: One-row tiles equal a single tile; top_k keeps only the highest-scoring neighbours;
+        a vector of another dimension has no neighbours
+        """
+        root, embeddings_dir, path_to_key_info = project
+        paths = tuple(ki.norm_path for ki in path_to_key_info.values() if not ki.is_directory)
+        vectors = open_embedding_store(embeddings_dir, root).vectors(paths)
+        vectors[9] = _clustered_vectors(1, 8, seed=1)[0]
+        whole = SimilarityIndex(paths, vectors, 0.0, 1000, 1 << 30)
+        tiled = SimilarityIndex(paths, vectors, 0.0, 1000, 1)
+        top3 = SimilarityIndex(paths, vectors, 0.0, 3, 1)
+        for path in paths:
+            # BLAS可能按块大小改变求和顺序 / BLAS may change the summation order with the tile size
+            assert [p for p, _ in tiled.neighbours(path)] == [p for p, _ in whole.neighbours(path)]
+            assert [s for _, s in tiled.neighbours(path)] == pytest.approx(
+                [s for _, s in whole.neighbours(path)], abs=1e-6
+            )
+            best = sorted(whole.neighbours(path), key=lambda item: -item[1])[:3]
+            neighbours = top3.neighbours(path)
+            assert sorted(score for _, score in neighbours) == pytest.approx(
+                sorted(s for _, s in best), abs=1e-6
+            )
+            assert neighbours == sorted(neighbours, key=lambda item: paths.index(item[0]))
+            assert paths[9] not in [p for p, _ in whole.neighbours(path)]
+        assert whole.neighbours(paths[9]) == []
+
+    def test_index_is_reused_and_rebuilt(self, project):
+        """
+        测试用例：相同输入复用索引；更低阈值、存储变化或失效后重建
+        Test Case: The index is reused for the same inputs and rebuilt for a lower threshold, a store change or invalidation
+        """
+        root, embeddings_dir, path_to_key_info = project
+        first = get_similarity_index(embeddings_dir, path_to_key_info, root, 0.3)
+        assert get_similarity_index(embeddings_dir, path_to_key_info, root, 0.4) is first
+        lower = get_similarity_index(embeddings_dir, path_to_key_info, root, 0.2)
+        assert lower is not first and lower.min_score == 0.2
+
+        store = open_embedding_store(embeddings_dir, root)
+        store.put(f"{root}/src/f5.py", _clustered_vectors(1, 16, seed=2)[0], key="1A6")
+        store.save()
+        rebuilt = get_similarity_index(embeddings_dir, path_to_key_info, root, 0.3)
+        assert rebuilt is not lower
+        invalidate_similarity_index()
+        assert embedding_manager._SIMILARITY_INDEX is None
+        assert get_similarity_index(embeddings_dir, path_to_key_info, root, 0.3) is not rebuilt
@@ -0,0 +1,250 @@
+"""
+测试模块：词元计数缓存与估算测试
+Test Module: Token Count Cache and Estimator Tests
+
+本模块测试用于嵌入与重排序规划的TokenCounter，包括：
+- 按文本哈希缓存精确计数，跨运行持久化；每个分词器有各自的缓存文件
+- 校准后的估算：远离边界时不调用分词器，接近边界时使用精确计数，规划结果与精确计数一致
+- generate_embeddings第二次运行不再对未变化的文本分词
+- 重排序器按批分词，不预先对所有提示分词
+
+This module tests the TokenCounter used for embedding and reranker planning, including:
+- Exact counts cached by text hash and persisted across runs; each tokenizer has its own cache file
+- Calibrated estimates: no tokenizer call far from boundaries, exact counts near them, and the same plan as exact counts
+- A second generate_embeddings run does not tokenize unchanged texts again
+- The reranker tokenizes batch by batch instead of every prompt up front
+"""
+
+# 导入操作系统接口与正则表达式 / Import operating system interface and regular expressions
+import os
+import re
+
+# 导入数值计算库、PyTorch与pytest测试框架 / Import numerical library, PyTorch and pytest testing framework
+import numpy as np
+import pytest
+import torch
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.analysis import embedding_manager
+from cline_utils.dependency_system.analysis.embedding_store import close_embedding_stores
+from cline_utils.dependency_system.analysis.token_counter import (
+    CALIBRATION_MIN_SAMPLES,
+    TokenCounter,
+    get_token_counter,
+    reset_token_counters,
+    save_token_counters,
+    token_counts_path,
+)
+from cline_utils.dependency_system.core.key_manager import GlobalKeyMap, KeyInfo
+from cline_utils.dependency_system.utils.cache_manager import clear_all_caches
+from cline_utils.dependency_system.utils.config_manager import ConfigManager
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+
+
+class WordTokenizer:
+    """
+    按单词与标点分词并记录调用的模拟分词器 / A mock tokenizer splitting words and punctuation, recording its calls
+    """
+
+    def __init__(self, name="words"):
+        self.name_or_path = name
+        self.encoded = []
+
+    def encode(self, text, add_special_tokens=False):
+        self.encoded.append(text)
+        return re.findall(r"\w+|[^\w\s]", text)
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+def _text(seed, words):
+    rng = np.random.default_rng(seed)
+    return " ".join(f"w{value}" for value in rng.integers(0, 1000, words))
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    reset_token_counters()
+    yield normalize_path(str(tmp_path / "embeddings"))
+    reset_token_counters()
+
+
+def test_exact_counts_are_cached_across_runs(cache_dir):
+    """
+    测试用例：同一文本只分词一次；保存后新计数器直接读取缓存；其他分词器不使用该缓存
+    Test Case: A text is tokenized once; after saving, a new counter reads the cache; another tokenizer ignores it
+    """
+    tokenizer = WordTokenizer()
+    counter = get_token_counter(tokenizer, cache_dir)
+    assert counter.count("def f(x): pass") == 7
+    assert counter.count("def f(x): pass") == 7
+    assert len(tokenizer.encoded) == 1
+    counter.save()
+    assert os.path.exists(token_counts_path(cache_dir, tokenizer))
+
+    reset_token_counters()
+    tokenizer = WordTokenizer()
+    counter = get_token_counter(tokenizer, cache_dir)
+    assert counter.count("def f(x): pass") == 7 and tokenizer.encoded == []
+
+    other = TokenCounter.load(WordTokenizer("other"), token_counts_path(cache_dir, tokenizer))
+    assert other.counts == {}
+    assert TokenCounter().count("x" * 40) == 10  # 无分词器时按4个字符估算 / 4 characters per token without a tokenizer
+
+
+def test_tokenizers_sharing_a_directory_keep_their_counts(cache_dir):
+    """
+    测试用例：嵌入与重排序分词器交替使用同一目录时各自保留计数，保存后都可重新加载
+    Test Case: The embedding and reranker tokenizers alternating on one directory keep their own counts, and both reload after saving
+    """
+    embedder, reranker = WordTokenizer("embedder"), WordTokenizer("reranker")
+    for _round in range(3):
+        assert get_token_counter(embedder, cache_dir).count("alpha beta") == 2
+        assert get_token_counter(reranker, cache_dir).count("gamma, delta") == 3
+    assert embedder.encoded == ["alpha beta"] and reranker.encoded == ["gamma, delta"]
+    assert token_counts_path(cache_dir, embedder) != token_counts_path(cache_dir, reranker)
+
+    reloaded = WordTokenizer("embedder")  # 同名分词器重新加载 / Same-name tokenizer reloaded
+    assert get_token_counter(reloaded, cache_dir).count("alpha beta") == 2 and reloaded.encoded == []
+
+    save_token_counters()
+    reset_token_counters()
+    embedder, reranker = WordTokenizer("embedder"), WordTokenizer("reranker")
+    assert get_token_counter(embedder, cache_dir).count("alpha beta") == 2
+    assert get_token_counter(reranker, cache_dir).count("gamma, delta") == 3
+    assert embedder.encoded == [] and reranker.encoded == []
+
+
+def test_estimates_away_from_boundaries(cache_dir):
+    """
+    测试用例：校准前精确计数；校准后远离边界的文本只估算，跨越边界的文本精确计数，两者得到相同的桶与分块决定
+    Test Case: Exact counts until calibrated; afterwards texts far from a boundary are estimated and those straddling one are counted, giving the same buckets and chunking decisions
+    """
+    tokenizer = WordTokenizer()
+    counter = TokenCounter(tokenizer)
+    for seed in range(CALIBRATION_MIN_SAMPLES):
+        counter.count(_text(seed, 200))
+    assert counter.calibrated and len(tokenizer.encoded) == CALIBRATION_MIN_SAMPLES
+
+    boundaries = embedding_manager._planning_boundaries(chunk_tokens=1000)
+    assert boundaries == [7680, 15872, 32256, 1000]
+    tokenizer.encoded.clear()
+    far = _text(100, 300)
+    estimate = counter.plan(far, boundaries)
+    assert tokenizer.encoded == [] and abs(estimate - 300) <= 30
+    near = _text(101, 995)
+    assert counter.plan(near, boundaries) == 995 and tokenizer.encoded == [near]
+
+    for seed, words in enumerate([50, 700, 990, 1010, 1500, 7600, 7700, 16000, 40000]):
+        text = _text(200 + seed, words)
+        planned = counter.plan(text, boundaries)
+        exact = len(tokenizer.encode(text))
+        assert (planned > 1000) == (exact > 1000)
+        assert embedding_manager._context_bucket(planned) == embedding_manager._context_bucket(exact)
+        assert (planned > 32256) == (exact > 32256)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """
+    含若干文档的项目，模拟模型与计数分词器 / A project of a few docs with a mock model and a counting tokenizer
+    """
+    close_embedding_stores()
+    embedding_manager.invalidate_similarity_index()
+    clear_all_caches()
+    reset_token_counters()
+    root = normalize_path(str(tmp_path / "proj"))
+    embeddings_dir = normalize_path(str(tmp_path / "embeddings"))
+    os.makedirs(f"{root}/docs")
+    tokenizer = WordTokenizer()
+
+    class Model:
+        def encode(self, texts, **kwargs):
+            return np.stack(
+                [np.eye(8, dtype=np.float32)[sum(map(ord, text)) % 8] for text in texts]
+            )
+
+    monkeypatch.setattr(embedding_manager, "MODEL_INSTANCE", Model())
+    monkeypatch.setattr(
+        embedding_manager, "SELECTED_MODEL_CONFIG", {"type": "sentence-transformer", "name": "mock"}
+    )
+    monkeypatch.setattr(embedding_manager, "_load_model", lambda *args, **kwargs: True)
+    monkeypatch.setattr(embedding_manager, "_unload_model", lambda: None)
+    monkeypatch.setattr(embedding_manager, "_get_tokenizer", lambda: tokenizer)
+    monkeypatch.setattr(embedding_manager, "get_project_root", lambda: root)
+    monkeypatch.setattr(ConfigManager, "get_path", lambda self, name, default=None: embeddings_dir)
+    path_to_key_info = GlobalKeyMap({f"{root}/docs": KeyInfo("1A", f"{root}/docs", None, 1, True)})
+    for i in range(5):
+        path = f"{root}/docs/d{i}.md"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# Doc {i}\n{_text(i, 100)}\n")
+        path_to_key_info[path] = KeyInfo(f"1A{i + 1}", path, f"{root}/docs", 1, False)
+    yield {"root": root, "map": path_to_key_info, "tokenizer": tokenizer, "dir": embeddings_dir}
+    close_embedding_stores()
+    embedding_manager.invalidate_similarity_index()
+    clear_all_caches()
+    reset_token_counters()
+
+
+def test_unchanged_texts_are_not_tokenized_again(project):
+    """
+    测试用例：文件仅被touch后重新运行（新进程），未变化的文本不再分词
+    Test Case: Rerunning (in a new process) after the files were only touched does not tokenize the unchanged texts again
+    """
+    root, tokenizer = project["root"], project["tokenizer"]
+    assert embedding_manager.generate_embeddings([root], project["map"], symbol_map={})
+    assert len(tokenizer.encoded) == 5
+    assert os.path.exists(token_counts_path(project["dir"], tokenizer))
+
+    reset_token_counters()  # 模拟新进程 / Simulate a new process
+    tokenizer.encoded.clear()
+    for i in range(5):
+        path = f"{root}/docs/d{i}.md"
+        os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+    assert embedding_manager.generate_embeddings([root], project["map"], symbol_map={})
+    assert tokenizer.encoded == []
+
+
+def test_reranker_tokenizes_batch_by_batch(project, monkeypatch):
+    """
+    测试用例：重排序器按规划的长度排序并分批，每批分词一次且使用长度上限，所有候选都得到分数
+    Test Case: The reranker sorts and batches by planned lengths, tokenizes each batch once with the length cap, and scores every candidate
+    """
+    calls = []
+
+    class Tokenizer(WordTokenizer):
+        def __call__(self, texts, **kwargs):
+            calls.append((len(texts), kwargs["max_length"]))
+            return {"input_ids": [[1] * len(self.encode(text)) for text in texts]}
+
+        def pad(self, inputs, **kwargs):
+            width = max(len(item["input_ids"]) for item in inputs)
+            return {
+                "input_ids": torch.ones((len(inputs), width), dtype=torch.long),
+                "attention_mask": torch.ones((len(inputs), width), dtype=torch.long),
+            }
+
+    class Model(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.weight = torch.nn.Parameter(torch.zeros(1))
+
+        def forward(self, input_ids, attention_mask):
+            logits = torch.zeros((input_ids.shape[0], input_ids.shape[1], 4))
+            logits[:, -1, 2] = attention_mask.sum(dim=1).float() / 100
+            return type("Output", (), {"logits": logits})()
+
+    tokenizer = Tokenizer()
+    monkeypatch.setattr(embedding_manager, "_load_reranker_model", lambda: (tokenizer, Model()))
+    monkeypatch.setattr(embedding_manager, "RERANKER_FALSE_ID", 1)
+    monkeypatch.setattr(embedding_manager, "RERANKER_TRUE_ID", 2)
+    monkeypatch.setattr(embedding_manager, "_get_available_ram", lambda: 2.0)
+    monkeypatch.setattr(embedding_manager, "_calculate_dynamic_batch_size", lambda mem, length, device: 3)
+
+    candidates = [_text(i, 10 * (i + 1)) for i in range(7)]
+    results = embedding_manager.rerank_candidates_with_qwen3.__wrapped__("query", candidates, top_k=7)
+    assert sorted(index for index, _ in results) == list(range(7))
+    assert [size for size, _ in calls] == [3, 3, 1]
+    assert {cap for _, cap in calls} == {embedding_manager.RERANKER_MAX_LENGTH}
+    assert results[0][0] == 6  # 最长的文档得分最高（模拟模型）/ The longest doc scores highest (mock model)
@@ -0,0 +1,183 @@
+"""
+测试模块：追踪器解析缓存测试
+Test Module: Tracker Parse Cache Tests
+
+本模块测试进程级的追踪器解析缓存，包括：
+- 解析结果与逐行解析函数相同，未变化的文件不再读取
+- 文件签名（大小、修改时间）变化或tracker_modified时重新解析
+- 网格行被释放后，单行读取按记录的字节偏移定位（含CRLF与非ASCII路径）
+
+This module tests the process-wide tracker parse cache, including:
+- Parsed data equals the line-based parsers, and unchanged files are not read again
+- A changed file signature (size, mtime) or tracker_modified triggers a new parse
+- Once grid rows are released, single-row reads seek to the recorded byte offsets (CRLF and non-ASCII paths included)
+"""
+
+# 导入操作系统接口 / Import operating system interface
+import builtins
+import os
+
+# 导入pytest测试框架 / Import pytest testing framework
+import pytest
+
+# 导入被测试的组件 / Import components under test
+from cline_utils.dependency_system.utils import tracker_utils
+from cline_utils.dependency_system.utils.cache_manager import (
+    clear_all_caches,
+    tracker_modified,
+)
+from cline_utils.dependency_system.utils.config_manager import ConfigManager
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+from cline_utils.dependency_system.utils.tracker_utils import (
+    find_tracker_row,
+    read_grid_from_lines,
+    read_key_definitions_from_lines,
+    read_tracker_definitions,
+    read_tracker_file_structured,
+    read_tracker_grid_row,
+)
+
+TRACKER = """---KEY_DEFINITIONS_START---
+Key Definitions:
+1A: /p/a
+1A1: /p/a/über.py
+1A2: /p/a/y.py
+---KEY_DEFINITIONS_END---
+
+last_KEY_edit: Assigned keys: 1A1
+last_GRID_edit: Grid content updated
+
+---GRID_START---
+X 1A 1A1 1A2
+1A = oxx
+1A1 = xo<
+1A2 = x>o
+---GRID_END---
+"""
+
+
+def _write(path, text, newline="\n"):
+    with open(path, "w", encoding="utf-8", newline=newline) as f:
+        f.write(text)
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    """
+    写入示例追踪器并清空缓存 / Write a sample tracker and clear caches
+    """
+    clear_all_caches()
+    path = normalize_path(str(tmp_path / "a_module.md"))
+    _write(path, TRACKER)
+    yield path
+    clear_all_caches()
+
+
+def _count_opens(monkeypatch, path):
+    """
+    统计对path的open调用 / Count open() calls on path
+    """
+    opens = []
+    real_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        if normalize_path(str(file)) == path:
+            opens.append(file)
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", counting_open)
+    return opens
+
+
+class TestTrackerParseCache:
+    """
+    测试类：追踪器解析缓存功能测试
+    Test Class: Tracker Parse Cache Functionality Tests
+    """
+
+    def test_parse_matches_line_parsers_and_is_reused(self, tracker, monkeypatch):
+        """
+        测试用例：解析结果与逐行解析相同；第二次读取不打开文件
+        Test Case: Parsed data equals the line parsers; a second read does not open the file
+        """
+        with open(tracker, encoding="utf-8") as f:
+            lines = f.readlines()
+        headers, rows = read_grid_from_lines(lines)
+        opens = _count_opens(monkeypatch, tracker)
+
+        data = read_tracker_file_structured(tracker)
+        assert data["definitions_ordered"] == read_key_definitions_from_lines(lines)
+        assert data["grid_headers_ordered"] == headers
+        assert data["grid_rows_ordered"] == rows
+        assert data["last_key_edit"] == "Assigned keys: 1A1"
+        assert data["last_grid_edit"] == "Grid content updated"
+        assert len(opens) == 1
+
+        assert read_tracker_file_structured(tracker) is data
+        assert read_tracker_definitions(tracker) == data["definitions_ordered"]
+        assert find_tracker_row(tracker, "/p/a/y.py") == 2
+        assert read_tracker_grid_row(tracker, 1) == ("1A1", "xo<")
+        assert read_tracker_grid_row(tracker, 3) is None
+        assert len(opens) == 1
+
+    def test_changed_signature_and_tracker_modified_reparse(self, tracker):
+        """
+        测试用例：文件变化或tracker_modified后重新解析
+        Test Case: A changed file or tracker_modified triggers a new parse
+        """
+        first = read_tracker_file_structured(tracker)
+        _write(tracker, TRACKER.replace("1A1 = xo<", "1A1 = xod"))
+        assert read_tracker_grid_row(tracker, 1) == ("1A1", "xod")
+        second = read_tracker_file_structured(tracker)
+        assert second is not first
+
+        # 签名未变（相同大小、恢复修改时间）时，tracker_modified强制重新解析
+        # With an unchanged signature (same size, mtime restored), tracker_modified forces a new parse
+        stat = os.stat(tracker)
+        _write(tracker, TRACKER.replace("1A1 = xo<", "1A1 = xo>"))
+        os.utime(tracker, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert read_tracker_file_structured(tracker) is second
+        tracker_modified(tracker, "mini", os.path.dirname(tracker))
+        assert read_tracker_grid_row(tracker, 1) == ("1A1", "xo>")
+
+        os.remove(tracker)
+        assert read_tracker_file_structured(tracker)["grid_rows_ordered"] == []
+        assert read_tracker_grid_row(tracker, 0) is None
+
+    @pytest.mark.parametrize("newline", ["\n", "\r\n"])
+    def test_released_rows_are_read_by_seeking(self, tracker, monkeypatch, newline):
+        """
+        测试用例：预算为0时网格行被释放，单行读取按偏移定位，结果与完整解析相同
+        Test Case: With a zero budget rows are released; single rows are read by seeking and match the full parse
+        """
+        _write(tracker, TRACKER, newline)
+        expected_rows = read_tracker_file_structured(tracker)["grid_rows_ordered"]
+        other = normalize_path(os.path.join(os.path.dirname(tracker), "b_module.md"))
+        _write(other, TRACKER)
+
+        real_setting = ConfigManager.get_performance_setting
+        monkeypatch.setattr(
+            ConfigManager,
+            "get_performance_setting",
+            lambda self, name, default=None: 0
+            if name == "tracker_parse_cache_mb"
+            else real_setting(self, name, default),
+        )
+        read_tracker_file_structured(other)  # 释放第一个追踪器的行 / Releases the first tracker's rows
+        entry, data = tracker_utils._load_parsed_tracker(tracker, need_rows=False)
+        assert data is None and entry.data is None
+
+        reads = []
+        real_parse = tracker_utils._parse_tracker_bytes
+        monkeypatch.setattr(
+            tracker_utils,
+            "_parse_tracker_bytes",
+            lambda *args: reads.append(args[0]) or real_parse(*args),
+        )
+        assert [read_tracker_grid_row(tracker, i) for i in range(3)] == expected_rows
+        assert find_tracker_row(tracker, "/p/a/über.py") == 1
+        assert reads == []  # 没有重新解析 / No new parse
+
+        # 需要全部行时重新解析 / Needing every row parses again
+        assert read_tracker_file_structured(tracker)["grid_rows_ordered"] == expected_rows
+        assert reads == [tracker]
@@ -10,6 +10,9 @@
 - batch_processor.py: 批处理器，智能批处理大规模操作
 - cache_manager.py: 缓存管理器 (v8.0 增强)，多层缓存策略和压缩
 - config_manager.py: 配置管理器 (v8.0 增强)，中央配置管理
+- path_filter.py: 路径排除匹配器，由配置一次性编译并被所有遍历器共享
+- project_inventory.py: 项目清单，单次并行遍历供所有分析阶段共享
+- path_intern.py: 路径驻留，键映射共享的规范路径字符串表
 - path_utils.py: 路径工具，跨平台路径处理和标准化
 - phase_tracker.py: 阶段追踪器 (v8.0 新增)，实时进度条和 ETA 估计
 - resource_validator.py: 资源验证器 (v8.0 新增)，系统资源检查
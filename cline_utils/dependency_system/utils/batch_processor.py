@@ -10,9 +10,12 @@ Provides efficient parallel execution of tasks with adaptive batch sizing.
 """
 
 # ==================== 导入依赖模块 - Import Dependencies ====================
+import contextlib  # 上下文管理工具 - Context manager helpers
 import functools  # 函数工具库，用于传递关键字参数 - Function tools for passing kwargs
 import logging  # 日志记录模块 - Logging module
 import os  # 操作系统接口模块 - OS interface module
+import queue  # 线程安全队列 - Thread-safe queues for supervised batches
+import threading  # 线程与事件 - Threads and events for cancellation
 import time  # 时间处理模块 - Time handling module
 from concurrent.futures import ThreadPoolExecutor, as_completed  # 线程池执行器和任务完成迭代器 - Thread pool executor and task completion iterator
 from typing import Any, Callable, Dict, List, Optional, TypeVar  # 类型提示 - Type hints
@@ -30,6 +33,99 @@ logger = logging.getLogger(__name__)  # 获取当前模块的日志记录器 - G
 T = TypeVar("T")  # 输入项目的泛型类型 - Generic type for input items
 R = TypeVar("R")  # 处理结果的泛型类型 - Generic type for processing results
 
+# 监督模式下的轮询间隔（秒）- Poll interval (seconds) of the supervisor loop
+_SUPERVISOR_POLL_INTERVAL = 0.05
+
+# 当前工作线程正在处理的项目的取消令牌 - Cancellation token of the item the current worker thread is processing
+_thread_state = threading.local()
+
+
+# ==================== 取消支持 - Cancellation Support ====================
+class OperationCancelledError(Exception):
+    """
+    Raised inside a processor function when its cancellation token has been tripped.
+    当处理函数的取消令牌被触发时抛出
+    """
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation token with an optional deadline.
+    带可选截止时间的协作式取消令牌
+
+    A token is cancelled when cancel() is called, when its deadline passes, or when
+    its parent token is cancelled. Long-running code polls `cancelled` (or calls
+    raise_if_cancelled()) at convenient points; nothing is interrupted forcibly.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,  # 相对超时（秒）- Relative timeout in seconds
+        parent: Optional["CancellationToken"] = None,  # 父令牌 - Parent token
+    ):
+        self._event = threading.Event()
+        self.parent = parent
+        self.reason: Optional[str] = None
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        # 子令牌的截止时间不能晚于父令牌 - A child never outlives its parent's deadline
+        if parent is not None and parent.deadline is not None:
+            deadline = parent.deadline if deadline is None else min(deadline, parent.deadline)
+        self.deadline: Optional[float] = deadline
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Cancel the token. The first reason given is kept."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once the token was cancelled, its deadline passed, or its parent was cancelled."""
+        if self._event.is_set():
+            return True
+        if self.parent is not None and self.parent.cancelled:
+            self.cancel(self.parent.reason or "cancelled")
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("timeout")
+            return True
+        return False
+
+    def raise_if_cancelled(self) -> None:
+        """Raise OperationCancelledError if the token is cancelled."""
+        if self.cancelled:
+            raise OperationCancelledError(self.reason or "cancelled")
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline (None if there is no deadline)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def child(self, timeout: Optional[float] = None) -> "CancellationToken":
+        """Create a token that is cancelled together with this one."""
+        return CancellationToken(timeout=timeout, parent=self)
+
+
+def current_cancel_token() -> Optional[CancellationToken]:
+    """
+    Return the cancellation token of the batch item being processed on this thread.
+    返回当前线程正在处理的批处理项目的取消令牌（不在批处理中时为None）
+    """
+    return getattr(_thread_state, "token", None)
+
+
+def check_cancelled() -> None:
+    """
+    Raise OperationCancelledError if the current batch item was cancelled or timed out.
+    Safe to call from anywhere: it is a no-op outside a supervised batch.
+    如果当前批处理项目已取消或超时则抛出异常；在批处理之外调用时不做任何操作
+    """
+    token = current_cancel_token()
+    if token is not None:
+        token.raise_if_cancelled()
+
 
 # ==================== BatchProcessor 批处理器类 ====================
 class BatchProcessor:
@@ -44,6 +140,10 @@ class BatchProcessor:
         batch_size: Optional[int] = None,  # 批次大小 - Batch size
         show_progress: bool = True,  # 是否显示进度 - Whether to show progress
         phase_name: str = "Processing",  # 阶段名称 - Phase name
+        item_timeout: Optional[float] = None,  # 单项超时（秒）- Per-item timeout in seconds
+        phase_deadline: Optional[float] = None,  # 阶段截止时间（秒）- Phase deadline in seconds
+        cancel_token: Optional[CancellationToken] = None,  # 外部取消令牌 - External cancellation token
+        timeout_result: Optional[Callable[[T], R]] = None,  # 超时项目的占位结果 - Placeholder result for timed-out items
     ):
         """
         Initialize the batch processor.
@@ -58,6 +158,15 @@ class BatchProcessor:
                           是否显示进度信息（输出到标准输出）
             phase_name: Name of the phase for the progress tracker
                        进度跟踪器的阶段名称
+            item_timeout: Seconds a single item may run before it is abandoned
+                         单个项目被放弃前可运行的秒数
+            phase_deadline: Seconds the whole run may take; remaining items are cancelled
+                           整个运行可用的秒数；剩余项目将被取消
+            cancel_token: Token that cancels the whole run when tripped
+                         触发时取消整个运行的令牌
+            timeout_result: Called with the item to build the result stored for timed-out
+                           or cancelled items (None is stored otherwise)
+                           为超时或取消的项目生成结果（否则存储None）
         """
         # ========== 步骤1: 计算CPU核心数 - Calculate CPU Core Count ==========
         cpu_count = os.cpu_count() or 8  # 获取CPU核心数，如果失败则默认为8 - Get CPU count, default to 8 if fails
@@ -78,6 +187,23 @@ class BatchProcessor:
         self.processed_items = 0  # 已处理项目数 - Processed items count
         self.start_time = 0.0  # 开始时间戳 - Start time timestamp
 
+        # ========== 步骤5: 超时与取消设置 - Timeout and Cancellation Settings ==========
+        self.item_timeout = item_timeout if item_timeout and item_timeout > 0 else None
+        self.phase_deadline = phase_deadline if phase_deadline and phase_deadline > 0 else None
+        self.cancel_token = cancel_token
+        self.timeout_result = timeout_result
+        self.timed_out_items: List[T] = []  # 超时被放弃的项目 - Items abandoned after their timeout
+        self.cancelled_items: List[T] = []  # 因阶段取消而未完成的项目 - Items not finished because the phase was cancelled
+
+    @property
+    def supervised(self) -> bool:
+        """True when items run under timeout/cancellation supervision."""
+        return (
+            self.item_timeout is not None
+            or self.phase_deadline is not None
+            or self.cancel_token is not None
+        )
+
     # <<< MODIFIED: Accept **kwargs >>>
     def process_items(
         self, items: List[T], processor_func: Callable[..., R], **kwargs: Any
@@ -86,6 +212,11 @@ class BatchProcessor:
         Process a list of items in parallel batches.
         Extra keyword arguments (**kwargs) are passed directly to the processor_func.
 
+        When a timeout, deadline or cancel token is configured, items that exceed
+        their time (or are cancelled) are abandoned, recorded in `timed_out_items`
+        / `cancelled_items`, and get `timeout_result(item)` as their result so the
+        rest of the phase can continue with partial output.
+
         Args:
             items: List of items to process
             processor_func: Function to process each item (can accept kwargs)
@@ -98,6 +229,8 @@ class BatchProcessor:
             raise TypeError("processor_func must be a callable")  # Use TypeError
 
         self.total_items = len(items)
+        self.timed_out_items = []
+        self.cancelled_items = []
         if not self.total_items:
             logger.info("No items to process")
             return []
@@ -112,53 +245,52 @@ class BatchProcessor:
 
         # Create a results list pre-filled with None to maintain order
         results: List[Optional[R]] = [None] * self.total_items
-        items_processed_in_batches = 0
+
+        # 阶段令牌：外部令牌的子令牌，并带有阶段截止时间
+        # Phase token: child of the external token, carrying the phase deadline
+        phase_token: Optional[CancellationToken] = None
+        if self.supervised:
+            phase_token = CancellationToken(
+                timeout=self.phase_deadline, parent=self.cancel_token
+            )
 
         # Use PhaseTracker if progress is enabled
         self.tracker = None
-        context_manager = PhaseTracker(total=self.total_items, phase_name=self.phase_name) if self.show_progress else None
-        
-        if context_manager:
-            with context_manager as tracker:
-                self.tracker = tracker
-                for i in range(0, self.total_items, actual_batch_size):
-                    batch_indices = range(i, min(i + actual_batch_size, self.total_items))
-                    batch_items = [items[idx] for idx in batch_indices]
-
-                    if not batch_items:
-                        continue
-
-                    # Pass kwargs to the batch processing function
-                    batch_results_map = self._process_batch(
-                        batch_items, processor_func, **kwargs
-                    )
-
-                    # Place results back into the main list using original indices
-                    for original_idx, result_value in batch_results_map.items():
-                        global_index = i + original_idx
-                        if 0 <= global_index < self.total_items:
-                            results[global_index] = result_value
-                        else:
-                            logger.error(
-                                f"Calculated invalid global index {global_index} from batch index {original_idx} (batch start {i})"
-                            )
-
-                    items_processed_in_batches += len(batch_items)
-                    self.processed_items = items_processed_in_batches
-                    tracker.update(len(batch_items))
-        else:
-             # No progress bar logic
-             for i in range(0, self.total_items, actual_batch_size):
+        with (
+            PhaseTracker(total=self.total_items, phase_name=self.phase_name)
+            if self.show_progress
+            else contextlib.nullcontext()
+        ) as tracker:
+            self.tracker = tracker
+            for i in range(0, self.total_items, actual_batch_size):
                 batch_indices = range(i, min(i + actual_batch_size, self.total_items))
                 batch_items = [items[idx] for idx in batch_indices]
 
                 if not batch_items:
                     continue
 
-                batch_results_map = self._process_batch(
-                    batch_items, processor_func, **kwargs
-                )
+                if phase_token is not None and phase_token.cancelled:
+                    # 阶段已取消：剩余项目全部记为已取消 - Phase cancelled: mark every remaining item
+                    for idx in range(i, self.total_items):
+                        self.cancelled_items.append(items[idx])
+                        results[idx] = self._placeholder_result(items[idx])
+                    logger.warning(
+                        f"{self.phase_name}: phase cancelled ({phase_token.reason}); "
+                        f"skipping {self.total_items - i} remaining items."
+                    )
+                    break
 
+                # Pass kwargs to the batch processing function
+                if phase_token is not None:
+                    batch_results_map = self._process_batch_supervised(
+                        batch_items, processor_func, phase_token, **kwargs
+                    )
+                else:
+                    batch_results_map = self._process_batch(
+                        batch_items, processor_func, **kwargs
+                    )
+
+                # Place results back into the main list using original indices
                 for original_idx, result_value in batch_results_map.items():
                     global_index = i + original_idx
                     if 0 <= global_index < self.total_items:
@@ -167,13 +299,20 @@ class BatchProcessor:
                         logger.error(
                             f"Calculated invalid global index {global_index} from batch index {original_idx} (batch start {i})"
                         )
-                
-                items_processed_in_batches += len(batch_items)
-                self.processed_items = items_processed_in_batches
+
+                self.processed_items += len(batch_items)
+                if tracker is not None:
+                    tracker.update(len(batch_items))
 
         final_time = time.time() - self.start_time
         logger.debug(f"Processed {self.total_items} items in {final_time:.2f} seconds")
-        
+
+        if self.timed_out_items or self.cancelled_items:
+            logger.warning(
+                f"{self.phase_name}: {len(self.timed_out_items)} item(s) timed out, "
+                f"{len(self.cancelled_items)} item(s) cancelled. Continuing with partial results."
+            )
+
         # Filter out potential None values if errors occurred and weren't replaced
         # Or raise an error if None is found, depending on desired strictness
         final_results = [res for res in results if res is not None]
@@ -312,6 +451,141 @@ class BatchProcessor:
 
         return batch_results_map
 
+    def _placeholder_result(self, item: T) -> Optional[R]:
+        """Result stored for an item that timed out or was cancelled."""
+        if self.timeout_result is None:
+            return None
+        try:
+            return self.timeout_result(item)
+        except Exception as e:
+            logger.error(f"timeout_result failed for {item!r}: {e}")
+            return None
+
+    def _process_batch_supervised(
+        self,
+        batch: List[T],
+        processor_func: Callable[..., R],
+        phase_token: CancellationToken,
+        **kwargs: Any,
+    ) -> Dict[int, R]:
+        """
+        Process a batch on supervised daemon threads with per-item timeouts.
+        在受监督的守护线程上处理批次，并支持单项超时
+
+        Python threads cannot be killed, so an item that exceeds its timeout is
+        abandoned: its token is cancelled (so cooperative code can bail out), its
+        placeholder result is recorded, and a replacement worker takes over the
+        remaining items. Whatever the abandoned call eventually returns is dropped.
+        Daemon threads are used so a stuck call never blocks interpreter exit.
+
+        Returns:
+            Dictionary mapping batch index (0-based) to the result for that item.
+            Items that failed processing will be missing from the dictionary.
+        """
+        if not batch:
+            return {}
+
+        batch_results_map: Dict[int, R] = {}
+        partial_func = functools.partial(processor_func, **kwargs)
+
+        pending: "queue.Queue[int]" = queue.Queue()
+        for idx in range(len(batch)):
+            pending.put(idx)
+        finished: "queue.Queue[tuple]" = queue.Queue()
+        running: Dict[int, CancellationToken] = {}
+        abandoned: set = set()
+        lock = threading.Lock()
+
+        def _worker() -> None:
+            while not phase_token.cancelled:
+                try:
+                    idx = pending.get_nowait()
+                except queue.Empty:
+                    return
+                token = phase_token.child(self.item_timeout)
+                with lock:
+                    running[idx] = token
+                _thread_state.token = token
+                try:
+                    token.raise_if_cancelled()
+                    outcome = ("ok", partial_func(batch[idx]))
+                except OperationCancelledError:
+                    outcome = ("cancelled", None)
+                except Exception as e:
+                    outcome = ("error", e)
+                finally:
+                    _thread_state.token = None
+                with lock:
+                    running.pop(idx, None)
+                    if idx in abandoned:
+                        # 监督者已放弃该项目并启动了替代线程 - Supervisor gave up on it and started a replacement
+                        return
+                finished.put((idx, outcome))
+
+        def _start_worker() -> None:
+            threading.Thread(
+                target=_worker, name=f"{self.phase_name}-worker", daemon=True
+            ).start()
+
+        for _ in range(min(self.max_workers, len(batch))):
+            _start_worker()
+
+        def _record_unfinished(idx: int) -> None:
+            item = batch[idx]
+            if phase_token.cancelled:
+                self.cancelled_items.append(item)
+            else:
+                self.timed_out_items.append(item)
+                logger.warning(
+                    f"{self.phase_name}: item timed out after {self.item_timeout}s: {_short_repr(item)}"
+                )
+            placeholder = self._placeholder_result(item)
+            if placeholder is not None:
+                batch_results_map[idx] = placeholder
+
+        outstanding = len(batch)
+        while outstanding > 0:
+            try:
+                idx, (status, value) = finished.get(timeout=_SUPERVISOR_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+            else:
+                outstanding -= 1
+                if status == "ok":
+                    batch_results_map[idx] = value
+                elif status == "cancelled":
+                    _record_unfinished(idx)
+                else:
+                    logger.error(
+                        f"Error processing item (batch index {idx}): {_short_repr(batch[idx])} -> {value}",
+                        exc_info=value,
+                    )
+                continue
+
+            # 放弃超时或已取消的运行项 - Abandon running items whose token tripped
+            with lock:
+                expired = [idx for idx, token in running.items() if token.cancelled]
+                for idx in expired:
+                    running.pop(idx)
+                    abandoned.add(idx)
+            for idx in expired:
+                outstanding -= 1
+                _record_unfinished(idx)
+                if not phase_token.cancelled:
+                    _start_worker()
+
+            if phase_token.cancelled:
+                # 阶段取消：未开始的项目不再运行 - Phase cancelled: never start pending items
+                while True:
+                    try:
+                        idx = pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    outstanding -= 1
+                    _record_unfinished(idx)
+
+        return batch_results_map
+
     def _show_progress(self) -> None:
         """Show progress information to stdout."""
         elapsed_time = time.time() - self.start_time
@@ -348,6 +622,12 @@ class BatchProcessor:
         # No newline here, handled after the loop finishes
 
 
+def _short_repr(item: Any, limit: int = 100) -> str:
+    """repr() of an item, truncated for log messages."""
+    item_repr = repr(item)
+    return item_repr if len(item_repr) <= limit else item_repr[:limit] + "..."
+
+
 # --- Convenience Functions ---
 
 # Caching these convenience functions is generally not recommended
@@ -362,13 +642,26 @@ def process_items(
     batch_size: Optional[int] = None,
     show_progress: bool = True,
     phase_name: str = "Processing",
+    item_timeout: Optional[float] = None,
+    phase_deadline: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    timeout_result: Optional[Callable[[T], R]] = None,
     **kwargs: Any,
 ) -> List[R]:
     """
     Convenience function to process items in parallel using BatchProcessor.
     Extra keyword arguments (**kwargs) are passed directly to the processor_func.
     """
-    processor = BatchProcessor(max_workers, batch_size, show_progress, phase_name=phase_name)
+    processor = BatchProcessor(
+        max_workers,
+        batch_size,
+        show_progress,
+        phase_name=phase_name,
+        item_timeout=item_timeout,
+        phase_deadline=phase_deadline,
+        cancel_token=cancel_token,
+        timeout_result=timeout_result,
+    )
     return processor.process_items(items, processor_func, **kwargs)
 
 
@@ -13,9 +13,12 @@ import re
 import threading
 import time
 import uuid
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, cast
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, cast
+
+from .path_intern import clear_interned_paths
 
 logger = logging.getLogger(__name__)
 
@@ -412,16 +415,19 @@ class CacheManager:
     def __init__(self, persist: bool = False):
         self.caches: Dict[str, Cache] = {}
         self.persist = persist
+        self._lock = threading.RLock()  # Guards creation/removal of caches across threads
         if persist:
             os.makedirs(CACHE_DIR, exist_ok=True)
             self._load_persistent_caches()
 
     def get_cache(self, cache_name: str, ttl: int = DEFAULT_TTL) -> Cache:
         """Retrieve or create a cache by name."""
-        if cache_name not in self.caches or self.caches[cache_name].is_expired():
-            self.caches[cache_name] = Cache(cache_name, ttl)
-            logger.debug(f"Spun up new cache: {cache_name} with TTL {ttl}s")
-        return self.caches[cache_name]
+        with self._lock:
+            cache = self.caches.get(cache_name)
+            if cache is None or cache.is_expired():
+                cache = self.caches[cache_name] = Cache(cache_name, ttl)
+                logger.debug(f"Spun up new cache: {cache_name} with TTL {ttl}s")
+            return cache
 
     def cleanup(self) -> None:
         """Remove expired caches."""
@@ -431,9 +437,11 @@ class CacheManager:
         for name in expired:
             if self.persist:
                 self._save_cache(name)
-            if name in self.caches:
-                del self.caches[name]
-                logger.debug(f"Spun down expired cache: {name}")
+            with self._lock:
+                cache = self.caches.get(name)
+                if cache is not None and cache.is_expired():  # Not recreated meanwhile
+                    del self.caches[name]
+                    logger.debug(f"Spun down expired cache: {name}")
         for cache in list(self.caches.values()):
             cache.cleanup_expired()
 
@@ -587,16 +595,57 @@ def get_tracker_cache_key(tracker_path: str, tracker_type: str) -> str:
 
 
 def clear_all_caches() -> None:
-    """Clear all caches in the manager."""
+    """Clear all caches in the manager, and the interned path strings."""
     cache_manager.clear_all()
+    clear_interned_paths()
+
+
+# Invalidations queued by deferred_invalidation(), applied when the outermost block exits
+_deferred_invalidations: Optional[List[Tuple[str, str]]] = None
+_deferred_depth = 0
+_deferred_lock = threading.Lock()
 
 
 def invalidate_dependent_entries(cache_name: str, key_pattern: str) -> None:
     """Invalidate cache entries matching a key pattern in a specific cache."""
+    with _deferred_lock:
+        if _deferred_invalidations is not None:
+            _deferred_invalidations.append((cache_name, key_pattern))
+            return
     cache = cache_manager.get_cache(cache_name)
     cache.invalidate(key_pattern)
 
 
+@contextmanager
+def deferred_invalidation() -> Iterator[None]:
+    """
+    Queue invalidate_dependent_entries() calls made (from any thread) inside the
+    block and apply them serially, in order and without duplicates, when the
+    outermost block exits.
+
+    Used while trackers are updated in parallel: every worker keeps seeing the
+    caches as they were when the stage started, and the invalidations do not
+    race with one another or with workers filling the same caches.
+    """
+    global _deferred_invalidations, _deferred_depth
+    with _deferred_lock:
+        if _deferred_depth == 0:
+            _deferred_invalidations = []
+        _deferred_depth += 1
+    try:
+        yield
+    finally:
+        with _deferred_lock:
+            _deferred_depth -= 1
+            pending = None
+            if _deferred_depth == 0:
+                pending, _deferred_invalidations = _deferred_invalidations, None
+        if pending:
+            for cache_name, key_pattern in dict.fromkeys(pending):
+                cache_manager.get_cache(cache_name).invalidate(key_pattern)
+            logger.debug(f"Applied {len(pending)} deferred cache invalidations.")
+
+
 def file_modified(file_path: str, project_root: str, cache_type: str = "all") -> None:
     """Invalidate caches when a file is modified."""
     from .path_utils import normalize_path
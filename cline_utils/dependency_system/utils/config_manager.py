@@ -5,15 +5,17 @@ Configuration module for dependency tracking system.
 Handles reading and writing configuration settings.
 """
 
-import glob
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 from .path_utils import get_project_root, normalize_path
 from .resource_validator import ResourceValidator
 
+if TYPE_CHECKING:
+    from .path_filter import PathFilter
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -134,6 +136,12 @@ DEFAULT_CONFIG = {
         "mpnet_embedding_dim": 384,
         "mpnet_context_length": 512,
         "reranker_model_path": "models/Qwen3-Reranker-0.6B",  # New reranker model path
+        "store_dtype": "float32",  # Embedding store matrix dtype: "float32", "float16" (half the disk and page cache) or "int8" (a quarter, one scale per vector)
+        "store_compact_ratio": 0.25,  # Compact the embedding store once tombstoned rows exceed this fraction
+        "gguf_n_threads": None,  # llama.cpp threads for GGUF embedding (None: physical CPU cores)
+        "pipeline_workers": 2,  # Threads preparing SES texts while the model embeds (0: prepare all texts first)
+        "chunk_tokens": 0,  # Embed texts longer than this many tokens as several chunk vectors (0: one truncated vector)
+        "chunk_aggregation": "max",  # Similarity of chunked files: "max" (best chunk pair) or "mean" (mean vector)
     },
     "paths": {
         "doc_dir": "docs",
@@ -172,10 +180,24 @@ DEFAULT_CONFIG = {
         "embedding_batch_size": 16,  # Smaller batch for embedding generation
         "enable_parallel_processing": True,  # Enable parallel file analysis
         "max_workers": None,  # None = auto-detect based on CPU cores
+        "scan_max_workers": 16,  # Concurrent directory listings during project scans (bounds open fds)
+        "mini_tracker_workers": None,  # Threads updating mini trackers in parallel (None = CPU count, 1 = serial)
+        "incremental_key_generation": True,  # Reuse keys of unchanged directories from the last run's snapshot
+        "incremental_tracker_updates": True,  # Re-derive structural chars only for new grid rows and skip rewriting unchanged trackers
+        "tracker_parse_cache_mb": 64,  # Grid rows of parsed trackers kept in memory; beyond it single rows are read with a seek
+        "similarity_tile_mb": 64,  # Memory bound for each block of the whole-project similarity product
+        "semantic_neighbours_top_k": 256,  # Semantic neighbours kept per file in the similarity index
+        "ann_min_files": 20000,  # Use the approximate (IVF) similarity index from this many embedded files (None/0 = always exact)
+        "ann_nlist": None,  # IVF lists (None = sqrt of the embedded file count); more lists = faster queries, lower recall
+        "ann_nprobe": 16,  # IVF lists scanned per query; more = higher recall, slower queries
+        "ann_kmeans_iterations": 10,  # k-means iterations when (re)training the IVF centroids
         "cache_size_limit": 5000,  # Maximum cache entries
         "cache_ttl_seconds": 300,  # Cache time-to-live (5 minutes)
         "memory_limit_mb": 2048,  # Memory limit for analysis
         "strict_mode": False,  # Fail on warnings if True
+        "analysis_item_timeout_seconds": 120,  # Abandon analyze_file after this long (None/0 = no limit)
+        "suggestion_item_timeout_seconds": 900,  # Abandon suggest_dependencies after this long (None/0 = no limit)
+        "phase_deadline_seconds": None,  # Cancel the rest of a batch phase after this long (None = no deadline)
     },
     # Enhanced analysis configuration
     "analysis": {
@@ -529,6 +551,11 @@ class ConfigManager:
         """
         Get list of excluded paths from configuration.
 
+        Only the explicitly configured "excluded_paths" are returned, as absolute
+        normalized paths. "excluded_file_patterns" are never expanded against the
+        filesystem; they are matched lazily against candidate paths while walking
+        (see get_path_filter()).
+
         Returns:
             List of excluded path patterns or absolute paths
         """
@@ -543,39 +570,37 @@ class ConfigManager:
             excluded_paths_config = self.config.get(
                 "excluded_paths", DEFAULT_CONFIG["excluded_paths"]
             )
-            excluded_file_patterns = self.config.get(
-                "excluded_file_patterns",
-                DEFAULT_CONFIG.get("excluded_file_patterns", []),
-            )  # Get file patterns, default to empty list if not set
-
-            excluded_paths = []
             project_root = get_project_root()
+            return [
+                (
+                    normalize_path(os.path.join(project_root, p))
+                    if not os.path.isabs(p)
+                    else normalize_path(p)
+                )
+                for p in excluded_paths_config
+            ]
 
-            # 1. Explicitly excluded paths
-            excluded_paths.extend(
-                [
-                    (
-                        normalize_path(os.path.join(project_root, p))
-                        if not os.path.isabs(p)
-                        else normalize_path(p)
-                    )
-                    for p in excluded_paths_config
-                ]
-            )
+        return _get_excluded_paths(self)
+
+    def get_path_filter(self) -> "PathFilter":
+        """
+        Get the compiled exclusion matcher shared by all project walkers.
+        Rebuilt only when the configuration file changes.
 
-            # 2. Paths from excluded file patterns
-            for pattern in excluded_file_patterns:
-                # Construct the full pattern relative to the project root
-                full_pattern = normalize_path(
-                    os.path.join(project_root, "**", pattern)
-                )  # Use '**' for recursion
-                # Use glob with recursive=True to find matching paths
-                matching_paths = glob.glob(full_pattern, recursive=True)
-                excluded_paths.extend([normalize_path(p) for p in matching_paths])
+        Returns:
+            PathFilter combining excluded dirs, paths, extensions and file patterns
+        """
+        from .cache_manager import cached
+        from .path_filter import PathFilter
 
-            return excluded_paths
+        @cached(
+            "path_filter",
+            key_func=lambda self: f"path_filter:{get_project_root()}:{os.path.getmtime(self.config_path) if os.path.exists(self.config_path) else 'missing'}",
+        )
+        def _get_path_filter(self) -> PathFilter:
+            return PathFilter.from_config(self)
 
-        return _get_excluded_paths(self)
+        return _get_path_filter(self)
 
     def get_threshold(self, threshold_type: str) -> float:
         """
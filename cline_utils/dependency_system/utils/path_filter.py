@@ -0,0 +1,274 @@
+# utils/path_filter.py
+
+"""
+Compiled path-exclusion matcher.
+Combines every exclusion rule from the configuration (excluded directory names,
+excluded paths, excluded extensions and excluded file patterns) into a single
+object that is built once and shared by all project walkers. Checks are pure
+string operations: O(path depth), with no filesystem calls.
+"""
+
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Pattern
+
+from .path_utils import get_project_root, normalize_path
+
+logger = logging.getLogger(__name__)
+
+_GLOB_MAGIC = re.compile(r"[*?\[]")
+_TRIE_END = ""  # Marker key for "an excluded path ends at this node" (never a valid component)
+
+
+def _split(norm_path: str) -> List[str]:
+    """Split a normalized (forward-slash) path into its non-empty components."""
+    return [part for part in norm_path.split("/") if part]
+
+
+def _needs_normalizing(path: str) -> bool:
+    """Cheap test for paths that are not already in normalize_path() form."""
+    return (
+        "\\" in path
+        or "/." in path
+        or "//" in path
+        or path.endswith("/")
+        or not os.path.isabs(path)
+    )
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """
+    Translate a project-relative path glob into a regex fragment.
+    '**/' matches any number of leading directories, '*' and '?' never cross '/'.
+    """
+    out: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                body = pattern[i + 1 : end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+class PathFilter:
+    """
+    Exclusion matcher compiled from configuration.
+
+    - excluded_dirs: directory names excluded at any depth below the project root.
+      Entries containing '/' are treated as project-relative paths instead.
+    - excluded_paths: absolute or project-relative paths, excluded with everything
+      below them (prefix trie over path components). Entries containing glob
+      characters (e.g. '**/__pycache__') are matched as project-relative globs.
+    - excluded_extensions: file extensions (compared case-insensitively).
+    - excluded_file_patterns: fnmatch patterns matched against entry basenames,
+      compiled into one regex. Patterns containing '/' (e.g. 'docs/*.md',
+      '**/generated/*.py') are matched against the project-relative path
+      instead, ending at any depth, like the recursive glob they replace.
+    """
+
+    def __init__(
+        self,
+        project_root: str,
+        excluded_dirs: Iterable[str] = (),
+        excluded_paths: Iterable[str] = (),
+        excluded_extensions: Iterable[str] = (),
+        excluded_file_patterns: Iterable[str] = (),
+    ):
+        excluded_dirs = [e for e in excluded_dirs if e]
+        excluded_paths = [e for e in excluded_paths if e]
+        self.project_root = normalize_path(project_root)
+        self._root_parts = _split(self.project_root)
+        self._trie: Dict[str, Any] = {}
+        self.excluded_names = set()
+        self.excluded_extensions = {ext.lower() for ext in excluded_extensions if ext}
+        self.excluded_file_patterns = [p for p in excluded_file_patterns if p]
+        # Stable digest of the rules, so persisted results can tell when exclusions changed
+        self.fingerprint = hashlib.sha1(
+            json.dumps(
+                [
+                    self.project_root,
+                    sorted(excluded_dirs),
+                    sorted(excluded_paths),
+                    sorted(self.excluded_extensions),
+                    sorted(self.excluded_file_patterns),
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+
+        path_globs: List[str] = []
+        for entry in excluded_dirs:
+            if not entry:
+                continue
+            entry = entry.replace("\\", "/").strip("/")
+            if "/" in entry:
+                self._add_path(entry)
+            else:
+                self.excluded_names.add(entry)
+        for entry in excluded_paths:
+            if not entry:
+                continue
+            entry = entry.replace("\\", "/")
+            if _GLOB_MAGIC.search(entry):
+                path_globs.append(entry.strip("/"))
+            else:
+                self._add_path(entry)
+
+        # Path globs match the excluded entry itself and everything below it
+        self._path_glob_regex: Optional[Pattern[str]] = (
+            re.compile(
+                "^(?:"
+                + "|".join(_glob_to_regex(g) for g in path_globs)
+                + ")(?:/.*)?$"
+            )
+            if path_globs
+            else None
+        )
+        name_patterns: List[str] = []
+        relative_patterns: List[str] = []
+        for pattern in self.excluded_file_patterns:
+            pattern = pattern.replace("\\", "/")
+            if "/" in pattern.strip("/"):
+                relative_patterns.append(pattern.strip("/"))
+            else:
+                name_patterns.append(pattern.strip("/"))
+        # One alternation for all basename patterns (fnmatch semantics)
+        self._file_pattern_regex: Optional[Pattern[str]] = (
+            re.compile(
+                "|".join(
+                    f"(?:{fnmatch.translate(os.path.normcase(p))})"
+                    for p in name_patterns
+                )
+            )
+            if name_patterns
+            else None
+        )
+        # Path patterns were globbed as <root>/**/<pattern>: they may start at any
+        # depth, and exclude what they match with everything below it
+        self._relative_pattern_regex: Optional[Pattern[str]] = (
+            re.compile(
+                "^(?:.*/)?(?:"
+                + "|".join(_glob_to_regex(p) for p in relative_patterns)
+                + ")(?:/.*)?$",
+                re.IGNORECASE if os.name == "nt" else 0,
+            )
+            if relative_patterns
+            else None
+        )
+
+    @classmethod
+    def from_config(cls, config: Any = None) -> "PathFilter":
+        """Build a filter from the ConfigManager settings."""
+        if config is None:
+            from .config_manager import ConfigManager
+
+            config = ConfigManager()
+        raw = config.config
+        return cls(
+            get_project_root(),
+            excluded_dirs=config.get_excluded_dirs() or [],
+            excluded_paths=raw.get("excluded_paths", []) or [],
+            excluded_extensions=config.get_excluded_extensions() or [],
+            excluded_file_patterns=raw.get("excluded_file_patterns", []) or [],
+        )
+
+    def _add_path(self, entry: str) -> None:
+        """Insert an absolute or project-relative path into the prefix trie."""
+        if os.path.isabs(entry):
+            norm = normalize_path(entry)
+        else:
+            norm = normalize_path(os.path.join(self.project_root, entry))
+        node = self._trie
+        for part in _split(norm):
+            node = node.setdefault(part, {})
+        node[_TRIE_END] = True
+
+    def _in_trie(self, parts: List[str]) -> bool:
+        node = self._trie
+        for part in parts:
+            if _TRIE_END in node:
+                return True
+            node = node.get(part)
+            if node is None:
+                return False
+        return _TRIE_END in node
+
+    def _relative_parts(self, parts: List[str]) -> Optional[List[str]]:
+        """Components below the project root, or None if the path is outside it."""
+        root_len = len(self._root_parts)
+        if parts[:root_len] != self._root_parts:
+            return None
+        return parts[root_len:]
+
+    def matches_file_pattern(self, name: str) -> bool:
+        """True if a basename matches one of the excluded_file_patterns without a '/'."""
+        return bool(
+            self._file_pattern_regex
+            and self._file_pattern_regex.match(os.path.normcase(name))
+        )
+
+    def has_excluded_extension(self, name: str) -> bool:
+        """True if a file name has one of the excluded extensions."""
+        return os.path.splitext(name)[1].lower() in self.excluded_extensions
+
+    def is_excluded(self, path: str, is_dir: bool = False) -> bool:
+        """
+        Check whether a path is excluded. The path is normalized first; pass an
+        already-normalized path to skip that work. Extension checks only apply
+        to files (is_dir=False).
+        """
+        if _needs_normalizing(path):
+            path = normalize_path(path)
+        parts = _split(path)
+        if self._trie and self._in_trie(parts):
+            return True
+        if not parts:
+            return False
+        name = parts[-1]
+        if self.matches_file_pattern(name):
+            return True
+        if not is_dir and self.has_excluded_extension(name):
+            return True
+        rel_parts = self._relative_parts(parts)
+        if rel_parts:
+            if self.excluded_names and not self.excluded_names.isdisjoint(rel_parts):
+                return True
+            if self._path_glob_regex or self._relative_pattern_regex:
+                rel_path = "/".join(rel_parts)
+                if self._path_glob_regex and self._path_glob_regex.match(rel_path):
+                    return True
+                if self._relative_pattern_regex and self._relative_pattern_regex.match(
+                    rel_path
+                ):
+                    return True
+        return False
+
+    def is_excluded_dir(self, path: str) -> bool:
+        """Shorthand for is_excluded(path, is_dir=True)."""
+        return self.is_excluded(path, is_dir=True)
@@ -0,0 +1,72 @@
+# utils/path_intern.py
+
+"""
+Process-wide interning of keyed paths.
+
+Every path the dependency system tracks is held by many structures at once: the
+new and old global key maps (norm_path and parent_path of each KeyInfo), their
+file_to_module indexes, the path migration map and every tracker's key
+definitions. Without interning each of those holds its own copy of the same
+absolute path string.
+
+PathInterner keeps one canonical string per path, and every caller asking for
+that path gets the same string object back, so all those structures share a
+single copy. Only key_manager interns, where KeyInfo objects are built
+(generate_keys and key map loads), so the table holds the tracked paths and
+nothing transient. clear_all_caches() empties it.
+"""
+
+import threading
+from typing import Dict, Optional
+
+
+class PathInterner:
+    """
+    Table of canonical path strings.
+
+    Lookups of known paths are a single dict probe. Entries are never evicted
+    one by one; clear() drops them all.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._paths
+
+    def canonical(self, path: str) -> str:
+        """The interned string equal to path (the argument itself if it is new)."""
+        interned = self._paths.get(path)
+        if interned is None:
+            with self._lock:
+                interned = self._paths.setdefault(path, path)
+        return interned
+
+    def clear(self) -> None:
+        """Drop all entries. Strings already handed out stay valid."""
+        with self._lock:
+            self._paths = {}
+
+
+_path_interner = PathInterner()
+
+
+def get_path_interner() -> PathInterner:
+    """The process-wide PathInterner shared by the key maps."""
+    return _path_interner
+
+
+def intern_path(path: Optional[str]) -> Optional[str]:
+    """Canonical (shared) string for a normalized path; None and "" pass through."""
+    if not path:
+        return path
+    return _path_interner.canonical(path)
+
+
+def clear_interned_paths() -> None:
+    """Forget every interned path (called by clear_all_caches())."""
+    _path_interner.clear()
@@ -30,7 +30,9 @@ def normalize_path(path: str) -> str:
     """
     from .cache_manager import cached  # Keep import near usage if re-enabled
 
-    @cached("path_normalization", key_func=lambda p: f"normalize:{p if p else 'empty'}")
+    # Keyed by the argument itself: the cache has its own namespace, and a prefixed
+    # key would hold one more copy of every path
+    @cached("path_normalization", key_func=lambda p: p if p else "empty")
     def _normalize_path(p: str) -> str:
         if not p:
             return ""
@@ -0,0 +1,262 @@
+# utils/project_inventory.py
+
+"""
+Single-walk project inventory.
+Scans the project roots once (parallel os.scandir) and records every entry's
+type, size, mtime, file type and exclusion status. Analysis phases (key
+generation, file identification, embedding freshness checks, the runtime
+inspector) consume this snapshot instead of walking or stat-ing the tree again.
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+from .path_filter import PathFilter
+from .path_utils import get_file_type, normalize_path
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_VERSION = 1
+
+
+class InventoryEntry(NamedTuple):
+    """One file or directory seen during the inventory walk."""
+
+    path: str  # Normalized absolute path
+    name: str
+    parent: Optional[str]  # Normalized parent path (None for roots)
+    is_dir: bool
+    size: int  # -1 if the entry could not be stat-ed
+    mtime: float
+    file_type: str  # get_file_type() for files, "directory" for directories
+    excluded: bool  # Excluded entries are recorded but excluded dirs are not descended
+
+
+class ProjectInventory:
+    """
+    Immutable snapshot of the project roots.
+
+    Directory listings are kept sorted by name so consumers that depend on
+    ordering (key generation) get the same order as a sorted os.scandir().
+    """
+
+    def __init__(
+        self,
+        roots: List[str],
+        entries: Dict[str, InventoryEntry],
+        children: Dict[str, List[str]],
+        scanned_at: float = 0.0,
+    ):
+        self.roots = roots
+        self._entries = entries
+        self._children = children
+        # time.time() when the scan started (0.0 if unknown); entries with an mtime
+        # this recent may have changed again within the filesystem's timestamp granularity
+        self.scanned_at = scanned_at
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._entries
+
+    def get(self, path: str) -> Optional[InventoryEntry]:
+        """Entry for a normalized path, or None if it was not seen."""
+        return self._entries.get(path)
+
+    def children(self, dir_path: str) -> Optional[List[InventoryEntry]]:
+        """
+        Sorted entries of a scanned directory, or None if the directory was not
+        scanned (outside the roots, excluded, or unreadable).
+        """
+        names = self._children.get(dir_path)
+        if names is None:
+            return None
+        return [self._entries[p] for p in names]
+
+    def walk(self, root: Optional[str] = None) -> Iterator[InventoryEntry]:
+        """
+        Yield entries in sorted pre-order (each directory before its contents),
+        below root or below all roots if root is None.
+        """
+        for start in [root] if root else self.roots:
+            stack = [iter(self._children.get(start, ()))]
+            while stack:
+                path = next(stack[-1], None)
+                if path is None:
+                    stack.pop()
+                    continue
+                entry = self._entries[path]
+                yield entry
+                if entry.is_dir and path in self._children:
+                    stack.append(iter(self._children[path]))
+
+    def files(
+        self, root: Optional[str] = None, include_excluded: bool = False
+    ) -> List[InventoryEntry]:
+        """All files below root (or all roots), skipping excluded ones by default."""
+        return [
+            e
+            for e in self.walk(root)
+            if not e.is_dir and (include_excluded or not e.excluded)
+        ]
+
+    # --- Building ---
+
+    @classmethod
+    def scan(
+        cls,
+        root_paths: Iterable[str],
+        path_filter: Optional[PathFilter] = None,
+        max_workers: Optional[int] = None,
+    ) -> "ProjectInventory":
+        """
+        Walk the given roots once with a bounded pool of scandir workers.
+
+        Args:
+            root_paths: Root directories (absolute, or relative to the CWD).
+            path_filter: Exclusion matcher; defaults to the shared config filter.
+            max_workers: Concurrent directory listings (defaults to the performance
+                scan_max_workers setting). Each worker holds at most one open
+                directory handle, so this also bounds file descriptor use.
+        """
+        if path_filter is None or not max_workers:
+            from .config_manager import ConfigManager
+
+            config = ConfigManager()
+            if path_filter is None:
+                path_filter = config.get_path_filter()
+            if not max_workers:
+                max_workers = config.get_performance_setting("scan_max_workers") or 16
+
+        roots: List[str] = []
+        for root in root_paths:
+            norm_root = normalize_path(root)
+            if norm_root not in roots:
+                roots.append(norm_root)
+
+        entries: Dict[str, InventoryEntry] = {}
+        children: Dict[str, List[str]] = {}
+        scanned_at = time.time()
+
+        def _scan_dir(dir_path: str) -> Optional[List[InventoryEntry]]:
+            listing: List[InventoryEntry] = []
+            try:
+                # Drain and close the handle before stat-ing entries
+                with os.scandir(dir_path) as it:
+                    dir_entries = list(it)
+            except OSError as e:
+                logger.error(f"Error accessing directory '{dir_path}': {e}")
+                return None
+            prefix = dir_path.rstrip("/")
+            for de in dir_entries:
+                path = f"{prefix}/{de.name}"
+                try:
+                    is_dir = de.is_dir()
+                    if not is_dir and not de.is_file():
+                        continue  # Sockets, broken links, etc.
+                except OSError:
+                    continue
+                try:
+                    st = de.stat()
+                    size, mtime = st.st_size, st.st_mtime
+                except OSError:
+                    size, mtime = -1, 0.0
+                listing.append(
+                    InventoryEntry(
+                        path,
+                        de.name,
+                        dir_path,
+                        is_dir,
+                        size,
+                        mtime,
+                        "directory" if is_dir else get_file_type(de.name),
+                        path_filter.is_excluded(path, is_dir=is_dir),
+                    )
+                )
+            listing.sort(key=lambda e: e.name)
+            return listing
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            pending: Dict[Future, str] = {}
+            queued: Set[str] = set()  # Directories already submitted (overlapping roots)
+            for root in roots:
+                if not os.path.isdir(root):
+                    logger.warning(f"Inventory root not found: {root}")
+                    continue
+                st = os.stat(root)
+                excluded = path_filter.is_excluded_dir(root)
+                entries[root] = InventoryEntry(
+                    root,
+                    os.path.basename(root),
+                    None,
+                    True,
+                    st.st_size,
+                    st.st_mtime,
+                    "directory",
+                    excluded,
+                )
+                if not excluded and root not in queued:
+                    queued.add(root)
+                    pending[executor.submit(_scan_dir, root)] = root
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dir_path = pending.pop(future)
+                    listing = future.result()
+                    if listing is None:
+                        continue
+                    children[dir_path] = [e.path for e in listing]
+                    for entry in listing:
+                        entries[entry.path] = entry
+                        if (
+                            entry.is_dir
+                            and not entry.excluded
+                            and entry.path not in queued
+                        ):
+                            queued.add(entry.path)
+                            pending[executor.submit(_scan_dir, entry.path)] = entry.path
+
+        logger.debug(
+            f"Project inventory: {len(entries)} entries under {len(roots)} root(s)."
+        )
+        return cls(roots, entries, children, scanned_at)
+
+    # --- Persistence (lets the runtime inspector subprocess reuse the snapshot) ---
+
+    def save(self, file_path: str) -> None:
+        """Write the snapshot to a JSON file."""
+        data = {
+            "version": INVENTORY_VERSION,
+            "roots": self.roots,
+            "scanned_at": self.scanned_at,
+            "entries": [list(e) for e in self._entries.values()],
+            "children": self._children,
+        }
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, file_path: str) -> Optional["ProjectInventory"]:
+        """Read a snapshot written by save(); returns None if missing or incompatible."""
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load project inventory '{file_path}': {e}")
+            return None
+        if data.get("version") != INVENTORY_VERSION:
+            logger.warning(f"Ignoring project inventory with unknown version: {file_path}")
+            return None
+        entries = {e[0]: InventoryEntry(*e) for e in data.get("entries", [])}
+        return cls(
+            data.get("roots", []),
+            entries,
+            data.get("children", {}),
+            data.get("scanned_at", 0.0),
+        )
@@ -255,40 +255,13 @@ def _get_code_and_doc_files(
     """Filters global key map for code and documentation files, respecting exclusions."""
     code_files: List[KeyInfo] = []
     doc_files: List[KeyInfo] = []
-    resolved_excluded_paths_abs = config.get_excluded_paths()
-    excluded_extensions_config = set(config.get_excluded_extensions())
-    excluded_dirs_config_rel = config.get_excluded_dirs()
-    excluded_dirs_abs_set = {
-        normalize_path(os.path.join(project_root, p)) for p in excluded_dirs_config_rel
-    }
-    # Combine all absolute exclusion paths for efficient checking
-    all_specific_excluded_paths_abs = set(resolved_excluded_paths_abs)
+    path_filter = config.get_path_filter()
 
     for key_info in global_key_map.values():
         if key_info.is_directory:
             continue
         norm_item_path = key_info.norm_path
-        item_basename = os.path.basename(norm_item_path)
-        _, item_ext = os.path.splitext(item_basename)
-        item_ext = item_ext.lower()
-        if item_ext in excluded_extensions_config:
-            # logger.debug(f"Excluding by extension: {norm_item_path}")
-            continue
-        if norm_item_path in all_specific_excluded_paths_abs:
-            continue
-        is_in_excluded_dir_name = False
-        for (
-            excluded_dir_abs_path
-        ) in (
-            excluded_dirs_abs_set
-        ):  # Check against dir names/paths from "excluded_dirs"
-            if (
-                is_subpath(norm_item_path, excluded_dir_abs_path)
-                or norm_item_path == excluded_dir_abs_path
-            ):
-                is_in_excluded_dir_name = True
-                break
-        if is_in_excluded_dir_name:
+        if path_filter.is_excluded(norm_item_path):
             continue
         # Use get_item_type to classify
         item_type = get_item_type(norm_item_path, config, project_root)
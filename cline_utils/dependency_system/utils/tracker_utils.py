@@ -5,6 +5,7 @@ import hashlib
 import logging
 import os
 import re
+import threading
 from collections import defaultdict
 from typing import Any, Dict, List, Optional, Set, Tuple
 
@@ -13,9 +14,13 @@ from cline_utils.dependency_system.core.dependency_grid import (
     EMPTY_CHAR,
     decompress,
 )
-from cline_utils.dependency_system.core.key_manager import KeyInfo, validate_key
+from cline_utils.dependency_system.core.key_manager import (
+    KeyInfo,
+    as_global_key_map,
+    validate_key,
+)
 
-from .cache_manager import cached
+from .cache_manager import cache_manager, cached
 from .config_manager import ConfigManager
 from .path_utils import normalize_path
 
@@ -35,11 +40,9 @@ def resolve_key_global_instance_to_ki(
     """
     if not key_hash_instance_str:
         return None
-
-    for ki in current_global_path_to_key_info.values():
-        if ki.key_string == key_hash_instance_str:
-            return ki
-    return None
+    return as_global_key_map(current_global_path_to_key_info).get_by_key(
+        key_hash_instance_str
+    )
 
 
 # (This was moved from project_analyzer.py and made more generic)
@@ -86,14 +89,13 @@ def get_globally_resolved_key_info_for_cli(
     key_to_find = (
         f"{base_key_str}#{user_instance_num}" if user_instance_num else base_key_str
     )
-    for ki in global_map.values():
-        if ki.key_string == key_to_find:
-            return ki
+    key_map = as_global_key_map(global_map)
+    found_ki = key_map.get_by_key(key_to_find)
+    if found_ki:
+        return found_ki
 
     # Handle ambiguity or not found
-    matching_infos = [
-        info for info in global_map.values() if info.key_string.startswith(base_key_str)
-    ]
+    matching_infos = key_map.instances_of(base_key_str)
     if not matching_infos:
         print(
             f"Error: Base {key_role} key '{base_key_str}' not found in global key map."
@@ -154,15 +156,43 @@ def read_grid_from_lines(lines: List[str]) -> Tuple[List[str], List[Tuple[str, s
     Reads grid from lines. Returns: (grid_column_header_key_strings, list_of_grid_rows)
     where list_of_grid_rows is List[(row_key_string_label, compressed_row_data_string)]
     """
+    grid_column_header_keys_gi, grid_rows_data_gi, _row_line_numbers = (
+        _read_grid_section(lines)
+    )
+    return grid_column_header_keys_gi, grid_rows_data_gi
+
+
+# Regex for row labels now includes optional #instance part
+_GRID_ROW_PATTERN = re.compile(rf"^({KEY_GI_PATTERN_PART})\s*=\s*(.*)$")
+
+
+def _parse_grid_row_line(line_content: str) -> Optional[Tuple[str, str]]:
+    """Parses a stripped 'KEY = data' grid line into (label, compressed_data)."""
+    match = _GRID_ROW_PATTERN.match(line_content)  # Use updated pattern
+    if not match:
+        # logger.debug(f"ReadGrid: Line did not match row data pattern: '{line_content}'")
+        return None
+    k_label_gi, v_data = match.groups()  # k_label_gi is KEY or KEY#GI
+    if not validate_key(k_label_gi):  # Should be caught by regex
+        logger.warning(
+            f"TrackerUtils.ReadGrid: Skipping row with invalid key label format '{k_label_gi}'."
+        )
+        return None
+    return k_label_gi, v_data.strip()
+
+
+def _read_grid_section(
+    lines: List[str],
+) -> Tuple[List[str], List[Tuple[str, str]], List[int]]:
+    """read_grid_from_lines() plus the index in lines of each grid row."""
     grid_column_header_keys_gi: List[str] = []  # Will store KEY or KEY#GI
     grid_rows_data_gi: List[Tuple[str, str]] = []  # (KEY or KEY#GI, compressed_data)
+    row_line_numbers: List[int] = []
     in_section = False
     grid_start_pattern = re.compile(r"^---GRID_START---$", re.IGNORECASE)
     grid_end_pattern = re.compile(r"^---GRID_END---$", re.IGNORECASE)
-    # Regex for row labels now includes optional #instance part
-    row_label_pattern = re.compile(rf"^({KEY_GI_PATTERN_PART})\s*=\s*(.*)$")
 
-    for line in lines:
+    for line_number, line in enumerate(lines):
         if grid_end_pattern.match(line.strip()):
             break
         if in_section:
@@ -181,34 +211,231 @@ def read_grid_from_lines(lines: List[str]) -> Tuple[List[str], List[Tuple[str, s
             if not line_content or line_content == "X":
                 continue
 
-            match = row_label_pattern.match(line_content)  # Use updated pattern
-            if match:
-                k_label_gi, v_data = match.groups()  # k_label_gi is KEY or KEY#GI
-                if validate_key(k_label_gi):
-                    grid_rows_data_gi.append((k_label_gi, v_data.strip()))
-                else:  # Should be caught by regex
-                    logger.warning(
-                        f"TrackerUtils.ReadGrid: Skipping row with invalid key label format '{k_label_gi}'."
-                    )
-            # else: logger.debug(f"ReadGrid: Line did not match row data pattern: '{line_content}'")
+            row = _parse_grid_row_line(line_content)
+            if row:
+                grid_rows_data_gi.append(row)
+                row_line_numbers.append(line_number)
         elif grid_start_pattern.match(line.strip()):
             in_section = True
 
     # Consistency check in read_tracker_file_structured will compare with definitions count
-    return grid_column_header_keys_gi, grid_rows_data_gi
+    return grid_column_header_keys_gi, grid_rows_data_gi, row_line_numbers
 
 
 # --- END OF PARSING HELPERS ---
 
 
-@cached(
-    "tracker_data_structured",
-    key_func=lambda tracker_path: f"tracker_data_structured:{normalize_path(tracker_path)}:{(os.path.getmtime(tracker_path) if os.path.exists(tracker_path) else 0)}",
-)
+# --- TRACKER PARSE CACHE ---
+# Parsed trackers are shared process-wide through the "tracker_data_structured"
+# cache, keyed by path and the file's (size, mtime) signature, so an edited file
+# is never served stale. tracker_modified() and the writers in tracker_io drop a
+# path's entries explicitly. Grid rows of the least recently used trackers are
+# released beyond the tracker_parse_cache_mb budget; their definitions and the
+# byte span of every grid row line are kept so single rows are read with a seek.
+TRACKER_PARSE_CACHE_NAME = "tracker_data_structured"
+_LAST_KEY_EDIT_PATTERN = re.compile(r"^last_KEY_edit\s*:\s*(.*)$", re.IGNORECASE)
+_LAST_GRID_EDIT_PATTERN = re.compile(r"^last_GRID_edit\s*:\s*(.*)$", re.IGNORECASE)
+
+TrackerSignature = Tuple[int, int]  # (st_size, st_mtime_ns)
+
+
+class ParsedTracker:
+    """A parsed tracker file, as held by the tracker parse cache."""
+
+    __slots__ = (
+        "signature",
+        "definitions",
+        "row_spans",
+        "data",
+        "grid_bytes",
+        "last_used",
+        "_row_of_path",
+    )
+
+    def __init__(
+        self,
+        signature: TrackerSignature,
+        data: Dict[str, Any],
+        row_spans: List[Tuple[int, int]],
+    ):
+        self.signature = signature
+        self.definitions: List[Tuple[str, str]] = data["definitions_ordered"]
+        self.row_spans = row_spans  # (byte offset, byte length) of each grid row line
+        self.data: Optional[Dict[str, Any]] = data  # None once its rows are released
+        self.grid_bytes = sum(length for _offset, length in row_spans)
+        self.last_used = 0
+        self._row_of_path: Optional[Dict[str, int]] = None
+
+    def row_of_path(self, item_path: str) -> Optional[int]:
+        """Index of the first definition of item_path (its grid row)."""
+        if self._row_of_path is None:
+            row_of_path: Dict[str, int] = {}
+            for i, (_key, path) in enumerate(self.definitions):
+                row_of_path.setdefault(path, i)
+            self._row_of_path = row_of_path
+        return self._row_of_path.get(item_path)
+
+
+_parse_cache_lock = threading.Lock()
+_parse_cache_clock = 0
+
+
+def _tracker_signature(tracker_path: str) -> Optional[TrackerSignature]:
+    try:
+        st = os.stat(tracker_path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _parse_cache_key(tracker_path: str, signature: TrackerSignature) -> str:
+    return f"{TRACKER_PARSE_CACHE_NAME}:{tracker_path}:{signature[0]}:{signature[1]}"
+
+
+def _get_parse_cache():
+    cache = cache_manager.get_cache(TRACKER_PARSE_CACHE_NAME)
+    # Entries are handed out as they are; compression would pickle them on every get
+    cache.enable_compression = False
+    return cache
+
+
+def invalidate_tracker_parse_cache(tracker_path: Optional[str] = None) -> None:
+    """Drops the parsed data of one tracker (or of all trackers when None)."""
+    pattern = (
+        rf"^{TRACKER_PARSE_CACHE_NAME}:{re.escape(normalize_path(tracker_path))}:.*"
+        if tracker_path
+        else rf"^{TRACKER_PARSE_CACHE_NAME}:.*"
+    )
+    _get_parse_cache().invalidate(pattern)
+
+
+def _parse_tracker_bytes(
+    tracker_path: str, raw: bytes, signature: TrackerSignature
+) -> ParsedTracker:
+    """Parses raw tracker bytes, recording the byte span of each grid row line."""
+    raw_lines = raw.splitlines(keepends=True)
+    lines = [line.decode("utf-8") for line in raw_lines]
+    line_offsets = [0] * len(raw_lines)
+    offset = 0
+    for i, raw_line in enumerate(raw_lines):
+        line_offsets[i] = offset
+        offset += len(raw_line)
+
+    definitions = read_key_definitions_from_lines(lines)
+    grid_headers, grid_rows, row_line_numbers = _read_grid_section(lines)
+    row_spans = [(line_offsets[n], len(raw_lines[n])) for n in row_line_numbers]
+    last_key_edit = last_grid_edit = None
+    for line in lines:
+        if last_key_edit is None:
+            match = _LAST_KEY_EDIT_PATTERN.match(line.rstrip("\r\n"))
+            if match:
+                last_key_edit = match.group(1).strip()
+                continue
+        if last_grid_edit is None:
+            match = _LAST_GRID_EDIT_PATTERN.match(line.rstrip("\r\n"))
+            if match:
+                last_grid_edit = match.group(1).strip()
+        if last_key_edit is not None and last_grid_edit is not None:
+            break
+
+    # Basic consistency check based on what was read from file directly
+    if (
+        definitions
+        and grid_headers
+        and grid_rows
+        and not (len(definitions) == len(grid_headers) == len(grid_rows))
+    ):
+        logger.warning(
+            f"ReadStructured: Inconsistent counts in '{os.path.basename(tracker_path)}'. Defs: {len(definitions)}, Headers: {len(grid_headers)}, Rows: {len(grid_rows)}. Data might be misaligned."
+        )
+    elif (
+        definitions
+        and grid_rows
+        and not grid_headers
+        and len(definitions) == len(grid_rows)
+    ):
+        logger.debug(
+            f"ReadStructured: Grid headers missing but defs and rows match for '{os.path.basename(tracker_path)}'. Imputing headers from defs."
+        )
+        grid_headers = [d[0] for d in definitions]
+
+    logger.debug(
+        f"Read structured tracker '{os.path.basename(tracker_path)}': "
+        f"{len(definitions)} defs, {len(grid_headers)} grid headers, {len(grid_rows)} grid rows."
+    )
+    return ParsedTracker(
+        signature,
+        {
+            "definitions_ordered": definitions,
+            "grid_headers_ordered": grid_headers,
+            "grid_rows_ordered": grid_rows,
+            "last_key_edit": last_key_edit or "",
+            "last_grid_edit": last_grid_edit or "",
+        },
+        row_spans,
+    )
+
+
+def _release_grid_rows(cache, keep: ParsedTracker) -> None:
+    """Releases the grid rows of the least recently used trackers beyond the budget."""
+    budget = ConfigManager().get_performance_setting("tracker_parse_cache_mb", 64)
+    if budget is None:
+        return
+    budget_bytes = int(float(budget) * 1024 * 1024)
+    held = [
+        entry
+        for entry, _access_time, _expiry in list(cache.data.values())
+        if isinstance(entry, ParsedTracker) and entry.data is not None
+    ]
+    total = sum(entry.grid_bytes for entry in held)
+    for entry in sorted(held, key=lambda e: e.last_used):
+        if total <= budget_bytes:
+            break
+        if entry is not keep:
+            entry.data = None
+            total -= entry.grid_bytes
+
+
+def _load_parsed_tracker(
+    tracker_path: str, need_rows: bool = True
+) -> Tuple[Optional[ParsedTracker], Optional[Dict[str, Any]]]:
+    """
+    Returns the cached parse of a tracker file and its structured data (None if
+    its rows are released and not needed). The file is (re)parsed when its
+    signature changed, it is not cached or its rows are needed but released.
+    (None, None) if the file does not exist.
+    """
+    global _parse_cache_clock
+    signature = _tracker_signature(tracker_path)
+    if signature is None:
+        return None, None
+    cache = _get_parse_cache()
+    entry = cache.get(_parse_cache_key(tracker_path, signature))
+    data = entry.data if entry is not None else None
+    if entry is None or (need_rows and data is None):
+        with open(tracker_path, "rb") as f:
+            raw = f.read()
+            # Key the parse by what was actually read
+            st = os.fstat(f.fileno())
+        signature = (st.st_size, st.st_mtime_ns)
+        invalidate_tracker_parse_cache(tracker_path)
+        entry = _parse_tracker_bytes(tracker_path, raw, signature)
+        data = entry.data
+        cache.set(_parse_cache_key(tracker_path, signature), entry, ttl=0)
+    with _parse_cache_lock:
+        _parse_cache_clock += 1
+        entry.last_used = _parse_cache_clock
+    if data is not None and entry.data is data:
+        _release_grid_rows(cache, entry)
+    return entry, data
+
+
 def read_tracker_file_structured(tracker_path: str) -> Dict[str, Any]:
     """
     Read a tracker file and parse its contents into list-based structures
     compatible with the new format (handles duplicate key strings).
+    Parsed files are cached process-wide until they change on disk; the
+    returned dictionary is shared and must not be modified.
     Args:
         tracker_path: Path to the tracker file
     Returns:
@@ -227,69 +454,71 @@ def read_tracker_file_structured(tracker_path: str) -> Dict[str, Any]:
         "last_key_edit": "",
         "last_grid_edit": "",
     }
-    if not os.path.exists(tracker_path):
-        logger.debug(
-            f"Tracker file not found: {tracker_path}. Returning empty structured data."
-        )
-        return empty_result
     try:
-        with open(tracker_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        # Use the helpers now defined in this file
-        definitions = read_key_definitions_from_lines(lines)
-        grid_headers, grid_rows = read_grid_from_lines(lines)
-        content_str = "".join(lines)
-        last_key_edit_match = re.search(
-            r"^last_KEY_edit\s*:\s*(.*)$", content_str, re.MULTILINE | re.IGNORECASE
-        )
-        last_key_edit = (
-            last_key_edit_match.group(1).strip() if last_key_edit_match else ""
-        )
-        last_grid_edit_match = re.search(
-            r"^last_GRID_edit\s*:\s*(.*)$", content_str, re.MULTILINE | re.IGNORECASE
-        )
-        last_grid_edit = (
-            last_grid_edit_match.group(1).strip() if last_grid_edit_match else ""
-        )
-
-        # Basic consistency check based on what was read from file directly
-        if (
-            definitions
-            and grid_headers
-            and grid_rows
-            and not (len(definitions) == len(grid_headers) == len(grid_rows))
-        ):
-            logger.warning(
-                f"ReadStructured: Inconsistent counts in '{os.path.basename(tracker_path)}'. Defs: {len(definitions)}, Headers: {len(grid_headers)}, Rows: {len(grid_rows)}. Data might be misaligned."
-            )
-        elif (
-            definitions
-            and grid_rows
-            and not grid_headers
-            and len(definitions) == len(grid_rows)
-        ):
+        _entry, data = _load_parsed_tracker(tracker_path)
+        if data is None:
             logger.debug(
-                f"ReadStructured: Grid headers missing but defs and rows match for '{os.path.basename(tracker_path)}'. Imputing headers from defs."
+                f"Tracker file not found: {tracker_path}. Returning empty structured data."
             )
-            grid_headers = [d[0] for d in definitions]
-
-        logger.debug(
-            f"Read structured tracker '{os.path.basename(tracker_path)}': "
-            f"{len(definitions)} defs, {len(grid_headers)} grid headers, {len(grid_rows)} grid rows."
-        )
-
-        return {
-            "definitions_ordered": definitions,
-            "grid_headers_ordered": grid_headers,
-            "grid_rows_ordered": grid_rows,
-            "last_key_edit": last_key_edit,
-            "last_grid_edit": last_grid_edit,
-        }
+            return empty_result
+        return data
     except Exception as e:
         logger.exception(f"Error reading structured tracker file {tracker_path}: {e}")
         return empty_result
 
 
+def read_tracker_definitions(tracker_path: str) -> List[Tuple[str, str]]:
+    """
+    Returns the (key_string, path_string) definitions of a tracker file in
+    file order, without needing its grid rows in memory.
+    """
+    tracker_path = normalize_path(tracker_path)
+    try:
+        entry, _data = _load_parsed_tracker(tracker_path, need_rows=False)
+    except Exception as e:
+        logger.exception(f"Error reading tracker definitions {tracker_path}: {e}")
+        return []
+    return entry.definitions if entry else []
+
+
+def find_tracker_row(tracker_path: str, item_path: str) -> Optional[int]:
+    """Returns the grid row index of item_path in a tracker file (first definition)."""
+    tracker_path = normalize_path(tracker_path)
+    try:
+        entry, _data = _load_parsed_tracker(tracker_path, need_rows=False)
+    except Exception as e:
+        logger.exception(f"Error reading tracker definitions {tracker_path}: {e}")
+        return None
+    return entry.row_of_path(item_path) if entry else None
+
+
+def read_tracker_grid_row(tracker_path: str, row_idx: int) -> Optional[Tuple[str, str]]:
+    """
+    Returns grid row row_idx of a tracker file as (row_label, compressed_data),
+    or None if it has no such row. Rows released from the parse cache are read
+    by seeking to the row's recorded byte offset.
+    """
+    tracker_path = normalize_path(tracker_path)
+    try:
+        entry, data = _load_parsed_tracker(tracker_path, need_rows=False)
+        if entry is None or not 0 <= row_idx < len(entry.row_spans):
+            return None
+        if data is not None:
+            return data["grid_rows_ordered"][row_idx]
+        offset, length = entry.row_spans[row_idx]
+        with open(tracker_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if (st.st_size, st.st_mtime_ns) == entry.signature:
+                f.seek(offset)
+                return _parse_grid_row_line(f.read(length).decode("utf-8").strip())
+        # Changed since it was parsed
+        rows = read_tracker_file_structured(tracker_path)["grid_rows_ordered"]
+        return rows[row_idx] if row_idx < len(rows) else None
+    except Exception as e:
+        logger.debug(f"Error reading grid row {row_idx} of {tracker_path}: {e}")
+        return None
+
+
 def find_all_tracker_paths(config: ConfigManager, project_root: str) -> Set[str]:
     """Finds all main, doc, and mini tracker files in the project."""
     all_tracker_paths = set()
@@ -388,6 +617,8 @@ def aggregate_all_dependencies(
     )  # Key: (src_KEY#GI, tgt_KEY#GI)
     config = ConfigManager()
     get_priority_from_char = config.get_char_priority
+    # Indexed map: each definition row resolves in O(1) instead of two linear scans
+    current_global_path_to_key_info = as_global_key_map(current_global_path_to_key_info)
 
     logger.debug(
         f"Aggregating dependencies (outputting KEY#global_instance) from {len(tracker_paths)} trackers..."
@@ -421,22 +652,8 @@ def aggregate_all_dependencies(
             mig_info = path_migration_info.get(path_in_file)
             resolved_ki_for_this_def_entry: Optional[KeyInfo] = None
             if mig_info and mig_info[1]:  # has a current global base key
-                new_global_base_key = mig_info[1]
-                resolved_ki_for_this_def_entry = next(
-                    (
-                        ki
-                        for ki in current_global_path_to_key_info.values()
-                        if ki.key_string == new_global_base_key
-                        and ki.norm_path == path_in_file
-                    ),
-                    None,
-                ) or next(
-                    (
-                        ki
-                        for ki in current_global_path_to_key_info.values()
-                        if ki.key_string == new_global_base_key
-                    ),
-                    None,
+                resolved_ki_for_this_def_entry = current_global_path_to_key_info.resolve(
+                    mig_info[1], path_in_file
                 )
             effective_ki_list_for_this_tracker.append(resolved_ki_for_this_def_entry)
 
@@ -20,7 +20,7 @@ from cline_utils.dependency_system.utils.tracker_utils import (
     resolve_key_global_instance_to_ki,
 )
 
-from ..core.key_manager import KeyInfo, sort_key_strings_hierarchically
+from ..core.key_manager import KeyInfo, as_global_key_map, sort_key_strings_hierarchically
 from ..utils.config_manager import ConfigManager  # To get priorities etc.
 from ..utils.path_utils import get_project_root  # For path normalization
 from ..utils.path_utils import normalize_path
@@ -249,6 +249,8 @@ def generate_mermaid_diagram(
     logger.debug(
         f"Generating Mermaid diagram. Focus Keys Input: {focus_keys_list_input or 'Project Overview'}"
     )
+    # Indexed once: every key below is resolved against this map
+    global_path_to_key_info_map = as_global_key_map(global_path_to_key_info_map)
 
     # --- Resolve focus_keys_list_input to specific KEY#GI strings ---
     resolved_focus_keys_gi: List[str] = []
@@ -35,6 +35,7 @@ if project_root not in sys.path:  # 检查是否已在路径中
 # ========================================
 from cline_utils.dependency_system.utils import path_utils  # 路径工具函数
 from cline_utils.dependency_system.utils.config_manager import ConfigManager  # 配置管理器
+from cline_utils.dependency_system.utils.path_filter import PathFilter  # 路径排除匹配器
 
 # ========================================
 # 步骤2: 尝试导入Tree-sitter（AST解析器）
@@ -586,7 +587,13 @@ def main():
     # 步骤1: 从配置管理器获取配置
     # ========================================
     code_roots = config.get_code_root_directories()  # 获取代码根目录列表
-    excluded_paths = config.get_excluded_paths()  # 获取要排除的路径列表
+    # 排除路径与文件名模式编译为一个匹配器，遍历时惰性匹配（不预先展开glob）
+    # Excluded paths and file patterns compiled into one matcher, matched lazily while walking
+    path_filter = PathFilter(
+        path_utils.get_project_root(),
+        excluded_paths=config.config.get("excluded_paths", []),
+        excluded_file_patterns=config.config.get("excluded_file_patterns", []),
+    )
 
     # ========================================
     # 步骤2: 运行pyright进行未使用项分析
@@ -647,9 +654,7 @@ def main():
             dirs[:] = [
                 d
                 for d in dirs
-                if not path_utils.is_path_excluded(
-                    os.path.join(root, d), excluded_paths
-                )
+                if not path_filter.is_excluded_dir(os.path.join(root, d))
             ]
 
             # ========================================
@@ -659,7 +664,7 @@ def main():
                 filepath = os.path.join(root, file)  # 构建完整文件路径
 
                 # 检查文件路径是否在排除列表中
-                if path_utils.is_path_excluded(filepath, excluded_paths):
+                if path_filter.is_excluded(filepath):
                     continue  # 跳过排除的文件
 
                 # 检查文件扩展名是否在支持的扩展名集合中